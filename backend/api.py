@@ -61,10 +61,13 @@ MAX_CONCURRENT_IPS = 25
 # Background task handle for CloudWatch metrics
 _queue_metrics_task = None
 _memory_watchdog_task = None
+_admission_pump_task = None
+_trigger_scheduler_task = None
+_analytics_rollup_task = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global _queue_metrics_task, _memory_watchdog_task
+    global _queue_metrics_task, _memory_watchdog_task, _admission_pump_task, _trigger_scheduler_task, _analytics_rollup_task
     env_mode = config.ENV_MODE.value if config.ENV_MODE else "unknown"
     logger.debug(f"Starting up FastAPI application with instance ID: {instance_id} in {env_mode} mode")
     try:
@@ -111,6 +114,21 @@ async def lifespan(app: FastAPI):
         # Start memory watchdog for observability
         _memory_watchdog_task = asyncio.create_task(_memory_watchdog())
         
+        # Periodically dispatch runs held by admission control
+        if config.ADMISSION_CONTROL_ENABLED:
+            from core.services import admission_control
+            _admission_pump_task = asyncio.create_task(admission_control.start_admission_pump())
+        
+        # Fire cron triggers in-process instead of via pg_cron webhooks
+        if config.TRIGGER_SCHEDULER_ENABLED:
+            from core.triggers.scheduler import start_trigger_scheduler
+            _trigger_scheduler_task = asyncio.create_task(start_trigger_scheduler(db))
+        
+        # Keep admin analytics rollups fresh (one instance per cycle holds the lock)
+        if config.ANALYTICS_ROLLUPS_ENABLED:
+            from core.admin.analytics_rollups import start_rollup_job
+            _analytics_rollup_task = asyncio.create_task(start_rollup_job(db))
+        
         yield
         
         logger.debug("Cleaning up agent resources")
@@ -132,6 +150,37 @@ async def lifespan(app: FastAPI):
             except asyncio.CancelledError:
                 pass
         
+        # Stop admission control pump
+        if _admission_pump_task is not None:
+            _admission_pump_task.cancel()
+            try:
+                await _admission_pump_task
+            except asyncio.CancelledError:
+                pass
+        
+        # Stop local trigger scheduler
+        if _trigger_scheduler_task is not None:
+            _trigger_scheduler_task.cancel()
+            try:
+                await _trigger_scheduler_task
+            except asyncio.CancelledError:
+                pass
+        
+        # Stop analytics rollup job
+        if _analytics_rollup_task is not None:
+            _analytics_rollup_task.cancel()
+            try:
+                await _analytics_rollup_task
+            except asyncio.CancelledError:
+                pass
+        
+        # Dispatch trigger events still buffered for folding
+        try:
+            from core.triggers.execution_service import flush_pending_folds
+            await flush_pending_folds()
+        except Exception as e:
+            logger.error(f"Error flushing folded trigger events: {e}")
+        
         try:
             logger.debug("Closing Redis connection")
             await redis.close()
@@ -342,6 +391,12 @@ async def health_check_docker():
 
 app.include_router(api_router, prefix="/v1")
 
+# With gunicorn --preload this module is imported once in the master process;
+# warm shared state here so forked workers inherit it copy-on-write.
+if config.PRELOAD_WARM_STATE:
+    from core.utils.preload import preload_warm_state
+    preload_warm_state()
+
 
 async def _memory_watchdog():
     """Monitor worker memory usage and log warnings when thresholds are exceeded."""
@@ -520,6 +520,57 @@ async def admin_install_suna_for_user(
             detail=f"Failed to install Suna agent for user {account_id}"
         )
 
+@router.get("/llm-routing/stats")
+async def get_llm_routing_stats(
+    admin: dict = Depends(require_admin)
+):
+    """Per-deployment TTFT, error rate, circuit breaker and hedging stats from API and worker processes."""
+    try:
+        from core.services import llm_routing
+        return await llm_routing.get_cluster_stats()
+    except Exception as e:
+        logger.error(f"Failed to get LLM routing stats: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to retrieve LLM routing stats")
+
+@router.get("/llm-cache/stats")
+async def get_llm_cache_stats(
+    admin: dict = Depends(require_admin)
+):
+    """Hit rate and tokens/cost/latency saved by the auxiliary LLM cache, per namespace."""
+    try:
+        from core.services import llm_cache
+        return {"enabled": llm_cache.is_enabled(), "namespaces": await llm_cache.get_stats()}
+    except Exception as e:
+        logger.error(f"Failed to get LLM cache stats: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to retrieve LLM cache stats")
+
+@router.get("/tool-metrics")
+async def get_tool_metrics(
+    top: int = Query(20, ge=1, le=50, description="Number of slowest calls to return"),
+    admin: dict = Depends(require_admin)
+):
+    """Per-function tool latency, error rate, result size and sandbox round trips, plus the slowest calls."""
+    try:
+        from core.services import tool_metrics
+        return await tool_metrics.get_summary(top=top)
+    except Exception as e:
+        logger.error(f"Failed to get tool metrics: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to retrieve tool metrics")
+
+@router.get("/tool-metrics/prometheus")
+async def get_tool_metrics_prometheus(
+    admin: dict = Depends(require_admin)
+):
+    """Tool metrics in the Prometheus text exposition format."""
+    from fastapi.responses import Response
+    from prometheus_client import CONTENT_TYPE_LATEST
+    try:
+        from core.services import tool_metrics
+        return Response(content=await tool_metrics.render_prometheus(), media_type=CONTENT_TYPE_LATEST)
+    except Exception as e:
+        logger.error(f"Failed to render tool metrics: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to render tool metrics")
+
 @router.get("/env-vars")
 def get_env_vars() -> Dict[str, str]:
     """Get environment variables (local mode only)."""
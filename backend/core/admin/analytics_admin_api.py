@@ -18,11 +18,15 @@ from core.services.supabase import DBConnection
 from core.utils.logger import logger
 from core.utils.pagination import PaginationService, PaginationParams, PaginatedResponse
 from core.utils.config import config
-from core.utils.query_utils import batch_query_in
+from core.services import llm_cache
+from core.admin import analytics_rollups
 import openai
 
 router = APIRouter(prefix="/admin/analytics", tags=["admin-analytics"])
 
+# Accounts an email search may resolve to (they go into an account_id IN (...) filter)
+EMAIL_SEARCH_MAX_ACCOUNTS = 200
+
 
 # ============================================================================
 # MODELS
@@ -79,6 +83,13 @@ class AnalyticsSummary(BaseModel):
     avg_threads_per_user: float
 
 
+class HourlyStats(BaseModel):
+    date: str
+    signups: List[int]
+    subscriptions: List[int]
+    threads_created: List[int]
+
+
 class TranslateRequest(BaseModel):
     text: str
     target_language: str = "English"
@@ -157,6 +168,13 @@ async def get_analytics_summary(
     admin: dict = Depends(require_admin)
 ) -> AnalyticsSummary:
     """Get overall analytics summary."""
+    if config.ANALYTICS_ROLLUPS_ENABLED:
+        try:
+            return await _get_analytics_summary_from_rollups()
+        except Exception as e:
+            logger.error(f"Failed to get analytics summary from rollups: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail="Failed to retrieve analytics summary")
+    
     try:
         db = DBConnection()
         client = await db.client
@@ -229,12 +247,76 @@ async def get_analytics_summary(
         raise HTTPException(status_code=500, detail="Failed to retrieve analytics summary")
 
 
+async def _get_analytics_summary_from_rollups() -> AnalyticsSummary:
+    """Summary read from pre-aggregated rollups (see analytics_rollups)."""
+    now = datetime.now(timezone.utc)
+    # Today plus the 7 previous days, matching the gte(today_start - 7 days) window of the live queries
+    week_days = [(now - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(8)]
+    today = week_days[0]
+    
+    daily, totals, active_users_today, active_users_week = await asyncio.gather(
+        analytics_rollups.get_daily(week_days),
+        analytics_rollups.get_totals(),
+        analytics_rollups.count_active_users([today]),
+        analytics_rollups.count_active_users(week_days),
+    )
+    
+    total_users = totals.get('total_users', 0)
+    total_threads = totals.get('total_threads', 0)
+    total_messages = totals.get('total_messages', 0)
+    new_signups_today = daily[today]['signups']
+    new_signups_week = sum(d['signups'] for d in daily.values())
+    new_subscriptions_today = daily[today]['subscriptions']
+    new_subscriptions_week = sum(d['subscriptions'] for d in daily.values())
+    
+    conversion_rate_today = (new_subscriptions_today / new_signups_today * 100) if new_signups_today > 0 else 0
+    conversion_rate_week = (new_subscriptions_week / new_signups_week * 100) if new_signups_week > 0 else 0
+    avg_messages_per_thread = (total_messages / total_threads) if total_threads > 0 else 0
+    avg_threads_per_user = (total_threads / total_users) if total_users > 0 else 0
+    
+    return AnalyticsSummary(
+        total_users=total_users,
+        total_threads=total_threads,
+        total_messages=total_messages,
+        active_users_today=active_users_today,
+        active_users_week=active_users_week,
+        new_signups_today=new_signups_today,
+        new_signups_week=new_signups_week,
+        new_subscriptions_today=new_subscriptions_today,
+        new_subscriptions_week=new_subscriptions_week,
+        conversion_rate_today=round(conversion_rate_today, 2),
+        conversion_rate_week=round(conversion_rate_week, 2),
+        avg_messages_per_thread=round(avg_messages_per_thread, 2),
+        avg_threads_per_user=round(avg_threads_per_user, 2)
+    )
+
+
 @router.get("/daily")
 async def get_daily_stats(
     days: int = Query(30, ge=1, le=90, description="Number of days to fetch"),
     admin: dict = Depends(require_admin)
 ) -> List[DailyStats]:
     """Get daily statistics for the past N days."""
+    if config.ANALYTICS_ROLLUPS_ENABLED:
+        try:
+            now = datetime.now(timezone.utc)
+            dates = [(now - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+            daily = await analytics_rollups.get_daily(dates)
+            return [
+                DailyStats(
+                    date=date,
+                    signups=daily[date]['signups'],
+                    subscriptions=daily[date]['subscriptions'],
+                    threads_created=daily[date]['threads_created'],
+                    active_users=daily[date]['active_users'],
+                    conversion_rate=round((daily[date]['subscriptions'] / daily[date]['signups'] * 100) if daily[date]['signups'] > 0 else 0, 2)
+                )
+                for date in dates
+            ]
+        except Exception as e:
+            logger.error(f"Failed to get daily stats from rollups: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail="Failed to retrieve daily statistics")
+    
     try:
         db = DBConnection()
         client = await db.client
@@ -312,6 +394,29 @@ async def get_daily_stats(
         raise HTTPException(status_code=500, detail="Failed to retrieve daily statistics")
 
 
+@router.get("/hourly")
+async def get_hourly_stats(
+    date: Optional[str] = Query(None, description="Day to fetch (YYYY-MM-DD, UTC); defaults to today"),
+    admin: dict = Depends(require_admin)
+) -> HourlyStats:
+    """Get per-hour signups, subscriptions and threads for one day (requires analytics rollups)."""
+    if not config.ANALYTICS_ROLLUPS_ENABLED:
+        raise HTTPException(status_code=400, detail="Hourly stats require ANALYTICS_ROLLUPS_ENABLED")
+    
+    day = date or datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    try:
+        datetime.strptime(day, '%Y-%m-%d')
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+    
+    try:
+        hourly = await analytics_rollups.get_hourly(day)
+        return HourlyStats(date=day, **hourly)
+    except Exception as e:
+        logger.error(f"Failed to get hourly stats: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to retrieve hourly statistics")
+
+
 @router.get("/threads/browse")
 async def browse_threads(
     page: int = Query(1, ge=1, description="Page number"),
@@ -479,68 +584,57 @@ async def _browse_threads_filtered(
             items=enriched_threads, total_count=total_count, params=params
         )
     
-    else:
-        # No category filter - simple thread query
-        threads_query = client.from_('threads').select(
-            'thread_id, project_id, account_id, is_public, created_at, updated_at, user_message_count, total_message_count'
-        )
+    # No category filter: message-count and email filters run in the DB, so only one page is fetched
+    account_ids = None
+    if search_email:
+        # Bounded so the account_id IN (...) filter stays within URL limits;
+        # one extra row tells a complete match set from a truncated one
+        customers = await client.schema('basejump').from_('billing_customers').select(
+            'account_id'
+        ).ilike('email', f"%{search_email}%").limit(EMAIL_SEARCH_MAX_ACCOUNTS + 1).execute()
+        if len(customers.data or []) > EMAIL_SEARCH_MAX_ACCOUNTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Email search matches more than {EMAIL_SEARCH_MAX_ACCOUNTS} accounts; use a more specific search",
+            )
+        account_ids = list({c['account_id'] for c in customers.data or [] if c.get('account_id')})
+        if not account_ids:
+            return await PaginationService.paginate_with_total_count(
+                items=[], total_count=0, params=params
+            )
+    
+    def apply_filters(query):
         if date_from:
-            threads_query = threads_query.gte('created_at', date_from)
+            query = query.gte('created_at', date_from)
         if date_to:
-            threads_query = threads_query.lte('created_at', date_to)
-        
-        if sort_by == 'created_at':
-            threads_query = threads_query.order('created_at', desc=(sort_order == 'desc'))
-        elif sort_by == 'updated_at':
-            threads_query = threads_query.order('updated_at', desc=(sort_order == 'desc'))
-        
-        threads_query = threads_query.limit(1000)
-        threads_result = await threads_query.execute()
-        all_threads = threads_result.data or []
+            query = query.lte('created_at', date_to)
+        if min_messages is not None:
+            query = query.gte('user_message_count', min_messages)
+        if max_messages is not None:
+            query = query.lte('user_message_count', max_messages)
+        if account_ids is not None:
+            query = query.in_('account_id', account_ids)
+        return query
+    
+    count_result = await apply_filters(client.from_('threads').select('thread_id', count='exact')).limit(1).execute()
+    total_count = count_result.count or 0
     
-    if not all_threads:
+    if total_count == 0:
         return await PaginationService.paginate_with_total_count(
             items=[], total_count=0, params=params
         )
     
-    # Filter by message count only (category already filtered via JOIN)
-    filtered_threads = []
-    for thread in all_threads:
-        user_msg_count = thread.get('user_message_count') or 0
-        
-        if min_messages is not None and user_msg_count < min_messages:
-            continue
-        if max_messages is not None and user_msg_count > max_messages:
-            continue
-        
-        filtered_threads.append(thread)
-    
-    # Filter by email if specified
-    if search_email:
-        account_ids = list(set(t['account_id'] for t in filtered_threads if t.get('account_id')))
-        if account_ids:
-            emails_data = await batch_query_in(
-                client=client,
-                table_name='billing_customers',
-                select_fields='account_id, email',
-                in_field='account_id',
-                in_values=account_ids,
-                schema='basejump'
-            )
-            account_emails = {e['account_id']: e['email'] for e in emails_data}
-            
-            search_lower = search_email.lower()
-            filtered_threads = [
-                t for t in filtered_threads
-                if t.get('account_id') and 
-                   account_emails.get(t['account_id'], '').lower().find(search_lower) >= 0
-            ]
-    
-    total_count = len(filtered_threads)
-    
-    # Paginate
     offset = (params.page - 1) * params.page_size
-    page_threads = filtered_threads[offset:offset + params.page_size]
+    threads_query = apply_filters(client.from_('threads').select(
+        'thread_id, project_id, account_id, is_public, created_at, updated_at, user_message_count, total_message_count'
+    ))
+    if sort_by == 'created_at':
+        threads_query = threads_query.order('created_at', desc=(sort_order == 'desc'))
+    elif sort_by == 'updated_at':
+        threads_query = threads_query.order('updated_at', desc=(sort_order == 'desc'))
+    
+    threads_result = await threads_query.range(offset, offset + params.page_size - 1).execute()
+    page_threads = threads_result.data or []
     
     # Enrich only this page
     result = await _enrich_threads(client, page_threads)
@@ -757,30 +851,40 @@ async def translate_text(
 
     try:
         openai_client = await get_openai_client()
-
-        response = await openai_client.chat.completions.create(
-            model="gpt-5-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": f"""You are a translator. Translate the user's message to {target_language}.
+        model = "gpt-5-mini"
+        messages = [
+            {
+                "role": "system",
+                "content": f"""You are a translator. Translate the user's message to {target_language}.
 
 Rules:
 - If the text is already in {target_language}, return it as-is
 - Preserve the original meaning and intent
 - Only output the translated text, nothing else
 - Do not add explanations or notes"""
-                },
-                {
-                    "role": "user",
-                    "content": text
-                }
-            ],
-        )
+            },
+            {
+                "role": "user",
+                "content": text
+            }
+        ]
+
+        async def translate():
+            response = await openai_client.chat.completions.create(model=model, messages=messages)
+            usage = response.usage
+            prompt_tokens = usage.prompt_tokens if usage else 0
+            completion_tokens = usage.completion_tokens if usage else 0
+            return (
+                response.choices[0].message.content.strip(),
+                prompt_tokens + completion_tokens,
+                llm_cache.estimate_cost(model, prompt_tokens, completion_tokens),
+            )
+
+        translated = await llm_cache.get_or_compute("translate", llm_cache.cache_key(model, messages), translate)
 
         return {
             "original": text,
-            "translated": response.choices[0].message.content.strip(),
+            "translated": translated,
             "target_language": target_language
         }
 
@@ -0,0 +1,277 @@
+"""
+Pre-aggregated analytics rollups for the admin dashboard.
+
+The admin summary/daily endpoints used to pull every account, subscription
+and thread row in their window into Python on each request. Instead, a
+background job (one API instance at a time, via a Redis lock) maintains
+rollups in Redis and the endpoints only read those:
+
+- analytics_rollup:day:{YYYY-MM-DD}     hash: signups, subscriptions, threads_created
+- analytics_rollup:hour:{YYYY-MM-DD}    hash: {metric}:{HH} for the same metrics
+- analytics_rollup:creators:{date}      HyperLogLog of accounts that created a thread that day
+- analytics_rollup:active:{date}        HyperLogLog of accounts whose threads were updated that day
+- analytics_rollup:totals               hash: total users/threads/messages
+
+Each cycle recomputes the open days (yesterday and today) from their rows;
+older days are computed once, a few per cycle, until the backfill window is
+covered and then marked final. Active-user sketches of the open days are fed
+only incrementally from a threads.updated_at watermark, so activity is
+recorded as it happens and only PFADDed (re-reading a row is harmless);
+backfilled days scan their own updated_at range once.
+
+Rows are paged by keyset on (timestamp, id), so rows inserted, deleted or
+updated during a scan never shift the pages and get skipped or counted twice.
+
+Finalized days keep the subscription status seen when they were closed.
+"""
+import asyncio
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from core.services import redis
+from core.services.supabase import DBConnection
+from core.utils.config import config
+from core.utils.logger import logger
+
+KEY_PREFIX = "analytics_rollup"
+TOTALS_KEY = f"{KEY_PREFIX}:totals"
+FINAL_DAYS_KEY = f"{KEY_PREFIX}:final_days"
+ACTIVE_WATERMARK_KEY = f"{KEY_PREFIX}:active_watermark"
+LOCK_KEY = f"{KEY_PREFIX}:lock"
+
+KEY_TTL_SECONDS = 400 * 86400
+PAGE_SIZE = 1000
+OPEN_DAYS = 2                # yesterday and today are recomputed every cycle
+BACKFILL_DAYS_PER_CYCLE = 7  # bounds the DB work of a single cycle while catching up
+
+METRICS = ("signups", "subscriptions", "threads_created")
+
+# metric -> (schema, table, timestamp column, unique id column, extra eq filter)
+_SOURCES = {
+    "signups": ("basejump", "accounts", "created_at", "id", None),
+    "subscriptions": ("basejump", "billing_subscriptions", "created", "id", ("status", "active")),
+    "threads_created": (None, "threads", "created_at", "thread_id", None),
+}
+
+
+def _day_key(day: str) -> str:
+    return f"{KEY_PREFIX}:day:{day}"
+
+
+def _hour_key(day: str) -> str:
+    return f"{KEY_PREFIX}:hour:{day}"
+
+
+def _creators_key(day: str) -> str:
+    return f"{KEY_PREFIX}:creators:{day}"
+
+
+def _active_key(day: str) -> str:
+    return f"{KEY_PREFIX}:active:{day}"
+
+
+def _day_bounds(day: date) -> tuple:
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    return start.isoformat(), (start + timedelta(days=1)).isoformat()
+
+
+def _table(client, schema: Optional[str], table: str):
+    return client.schema(schema).from_(table) if schema else client.from_(table)
+
+
+async def _scan(client, schema: Optional[str], table: str, columns: str, ts_field: str, id_field: str,
+                start: str, end: Optional[str] = None, eq: Optional[tuple] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Page through rows with start <= ts_field < end, oldest first, by keyset on (ts_field, id_field)."""
+    select = columns if id_field in [c.strip() for c in columns.split(",")] else f"{columns}, {id_field}"
+    cursor = None
+    while True:
+        query = _table(client, schema, table).select(select).gte(ts_field, start)
+        if end:
+            query = query.lt(ts_field, end)
+        if eq:
+            query = query.eq(*eq)
+        if cursor:
+            last_ts, last_id = cursor
+            query = query.or_(f'{ts_field}.gt."{last_ts}",and({ts_field}.eq."{last_ts}",{id_field}.gt."{last_id}")')
+        result = await query.order(ts_field).order(id_field).limit(PAGE_SIZE).execute()
+        rows = result.data or []
+        for row in rows:
+            yield row
+        if len(rows) < PAGE_SIZE:
+            return
+        cursor = (rows[-1][ts_field], rows[-1][id_field])
+
+
+async def rollup_day(client, day: date, scan_active: bool = True) -> Dict[str, int]:
+    """
+    Recompute the day and hour buckets for `day` and feed its sketches.
+
+    scan_active=False skips the threads.updated_at scan for days whose active
+    sketch refresh_active_users already feeds (the open days).
+    """
+    day_str = day.isoformat()
+    start, end = _day_bounds(day)
+    daily = {metric: 0 for metric in METRICS}
+    hourly: Dict[str, int] = defaultdict(int)
+    creators: Set[str] = set()
+    active: Set[str] = set()
+
+    for metric, (schema, table, ts_field, id_field, eq) in _SOURCES.items():
+        columns = f"{ts_field}, account_id" if metric == "threads_created" else ts_field
+        async for row in _scan(client, schema, table, columns, ts_field, id_field, start, end, eq):
+            daily[metric] += 1
+            hourly[f"{metric}:{row[ts_field][11:13]}"] += 1
+            if metric == "threads_created" and row.get("account_id"):
+                creators.add(row["account_id"])
+
+    if scan_active:
+        async for row in _scan(client, None, "threads", "updated_at, account_id", "updated_at", "thread_id", start, end):
+            if row.get("account_id"):
+                active.add(row["account_id"])
+    active |= creators
+
+    r = await redis.get_client()
+    pipe = r.pipeline()
+    pipe.hset(_day_key(day_str), mapping=daily)
+    pipe.delete(_hour_key(day_str))
+    if hourly:
+        pipe.hset(_hour_key(day_str), mapping=dict(hourly))
+    if creators:
+        pipe.pfadd(_creators_key(day_str), *creators)
+    if active:
+        pipe.pfadd(_active_key(day_str), *active)
+    for key in (_day_key(day_str), _hour_key(day_str), _creators_key(day_str), _active_key(day_str)):
+        pipe.expire(key, KEY_TTL_SECONDS)
+    await pipe.execute()
+    return daily
+
+
+async def refresh_active_users(client) -> int:
+    """PFADD accounts of threads updated since the last watermark into their day's sketch."""
+    r = await redis.get_client()
+    watermark = await r.get(ACTIVE_WATERMARK_KEY)
+    if not watermark:
+        watermark = (datetime.now(timezone.utc) - timedelta(days=OPEN_DAYS)).isoformat()
+
+    by_day: Dict[str, Set[str]] = defaultdict(set)
+    latest = watermark
+    seen = 0
+    async for row in _scan(client, None, "threads", "updated_at, account_id", "updated_at", "thread_id", watermark):
+        seen += 1
+        latest = max(latest, row["updated_at"])
+        if row.get("account_id"):
+            by_day[row["updated_at"][:10]].add(row["account_id"])
+
+    pipe = r.pipeline()
+    for day_str, accounts in by_day.items():
+        pipe.pfadd(_active_key(day_str), *accounts)
+        pipe.expire(_active_key(day_str), KEY_TTL_SECONDS)
+    # gte on the next scan re-reads rows at exactly `latest`; PFADD makes that harmless
+    pipe.set(ACTIVE_WATERMARK_KEY, latest)
+    await pipe.execute()
+    return seen
+
+
+async def refresh_totals(client) -> Dict[str, int]:
+    users, threads, messages = await asyncio.gather(
+        client.schema('basejump').from_('accounts').select('id', count='exact').limit(1).execute(),
+        client.from_('threads').select('thread_id', count='exact').limit(1).execute(),
+        client.from_('messages').select('message_id', count='exact').limit(1).execute(),
+    )
+    totals = {
+        "total_users": users.count or 0,
+        "total_threads": threads.count or 0,
+        "total_messages": messages.count or 0,
+        "updated_at": int(time.time()),
+    }
+    r = await redis.get_client()
+    await r.hset(TOTALS_KEY, mapping=totals)
+    return totals
+
+
+async def run_rollup_cycle(client) -> None:
+    started = time.monotonic()
+    today = datetime.now(timezone.utc).date()
+
+    for offset in range(OPEN_DAYS):
+        # refresh_active_users below feeds the open days' active sketches
+        await rollup_day(client, today - timedelta(days=offset), scan_active=False)
+
+    r = await redis.get_client()
+    final_days = await r.smembers(FINAL_DAYS_KEY)
+    pending = [
+        day for day in (today - timedelta(days=offset) for offset in range(OPEN_DAYS, config.ANALYTICS_ROLLUP_BACKFILL_DAYS + 1))
+        if day.isoformat() not in final_days
+    ]
+    for day in pending[:BACKFILL_DAYS_PER_CYCLE]:
+        await rollup_day(client, day)
+        await r.sadd(FINAL_DAYS_KEY, day.isoformat())
+
+    await refresh_active_users(client)
+    await refresh_totals(client)
+    logger.debug(f"📊 Analytics rollup cycle done in {time.monotonic() - started:.2f}s "
+                 f"({len(pending[:BACKFILL_DAYS_PER_CYCLE])} days backfilled, {max(0, len(pending) - BACKFILL_DAYS_PER_CYCLE)} pending)")
+
+
+async def start_rollup_job(db: DBConnection) -> None:
+    """Run rollup cycles forever; only the instance holding the lock does the work each cycle."""
+    instance_id = uuid.uuid4().hex[:8]
+    interval = config.ANALYTICS_ROLLUP_INTERVAL_SECONDS
+    logger.info(f"Starting analytics rollup job {instance_id} (every {interval}s)")
+    while True:
+        try:
+            r = await redis.get_client()
+            if await r.set(LOCK_KEY, instance_id, ex=max(interval * 2, 60), nx=True):
+                try:
+                    client = await db.client
+                    await run_rollup_cycle(client)
+                finally:
+                    if await r.get(LOCK_KEY) == instance_id:
+                        await r.delete(LOCK_KEY)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Analytics rollup cycle failed: {e}", exc_info=True)
+        await asyncio.sleep(interval)
+
+
+# ============================================================================
+# READERS (used by the admin endpoints)
+# ============================================================================
+
+async def get_daily(days: List[str]) -> Dict[str, Dict[str, int]]:
+    """Day buckets plus distinct thread creators per day."""
+    r = await redis.get_client()
+    pipe = r.pipeline()
+    for day_str in days:
+        pipe.hgetall(_day_key(day_str))
+        pipe.pfcount(_creators_key(day_str))
+    results = await pipe.execute()
+
+    daily = {}
+    for i, day_str in enumerate(days):
+        bucket = results[i * 2] or {}
+        daily[day_str] = {metric: int(bucket.get(metric, 0)) for metric in METRICS}
+        daily[day_str]["active_users"] = int(results[i * 2 + 1] or 0)
+    return daily
+
+
+async def get_hourly(day_str: str) -> Dict[str, List[int]]:
+    r = await redis.get_client()
+    bucket = await r.hgetall(_hour_key(day_str)) or {}
+    return {metric: [int(bucket.get(f"{metric}:{hour:02d}", 0)) for hour in range(24)] for metric in METRICS}
+
+
+async def count_active_users(days: List[str]) -> int:
+    """Distinct active accounts across `days` (HyperLogLog union, ~0.8% error)."""
+    r = await redis.get_client()
+    return int(await r.pfcount(*[_active_key(day_str) for day_str in days]) or 0)
+
+
+async def get_totals() -> Dict[str, int]:
+    r = await redis.get_client()
+    totals = await r.hgetall(TOTALS_KEY) or {}
+    return {field: int(value) for field, value in totals.items()}
@@ -1,5 +1,4 @@
 import asyncio
-import json
 import traceback
 import uuid
 import os
@@ -12,6 +11,7 @@ from core.utils.logger import logger, structlog
 from core.billing.credits.integration import billing_integration
 from core.utils.config import config, EnvMode
 from core.services import redis
+from core.utils import serialization
 from core.sandbox.sandbox import create_sandbox, delete_sandbox, get_or_start_sandbox
 from core.utils.sandbox_utils import generate_unique_filename, get_uploads_directory
 from run_agent_background import run_agent_background
@@ -394,28 +394,70 @@ async def _trigger_agent_background(
         effective_model: Model name to use
         agent_id: Agent ID (instead of full config to reduce log spam)
         account_id: Account ID for authorization in worker
+    
+    Returns:
+        Dict with status ("running" or "queued"), queue_position and eta_seconds
     """
+    from core.services import admission_control
+
     request_id = structlog.contextvars.get_contextvars().get('request_id')
+    send_kwargs = dict(
+        agent_run_id=agent_run_id,
+        thread_id=thread_id,
+        instance_id=utils.instance_id,
+        project_id=project_id,
+        model_name=effective_model,
+        agent_id=agent_id,  # Pass agent_id instead of full agent_config
+        account_id=account_id,  # Pass account_id for worker authorization
+        request_id=request_id,
+    )
+
+    if admission_control.is_enabled() and account_id:
+        logger.info(f"🚦 Submitting agent run {agent_run_id} to admission control (thread: {thread_id}, model: {effective_model})")
+        try:
+            return await admission_control.submit(account_id, agent_run_id, send_kwargs)
+        except admission_control.AdmissionUnavailableError as e:
+            # Admission control is an optimization; fall back to direct dispatch.
+            # Any other error may have queued the run already, so it propagates.
+            logger.error(f"Admission control failed for {agent_run_id}, sending directly: {e}", exc_info=True)
 
     logger.info(f"🚀 Sending agent run {agent_run_id} to Dramatiq queue (thread: {thread_id}, model: {effective_model})")
     
     try:
-        message = run_agent_background.send(
-            agent_run_id=agent_run_id,
-            thread_id=thread_id,
-            instance_id=utils.instance_id,
-            project_id=project_id,
-            model_name=effective_model,
-            agent_id=agent_id,  # Pass agent_id instead of full agent_config
-            account_id=account_id,  # Pass account_id for worker authorization
-            request_id=request_id,
-        )
+        message = run_agent_background.send(**send_kwargs)
         message_id = message.message_id if hasattr(message, 'message_id') else 'N/A'
         logger.info(f"✅ Successfully enqueued agent run {agent_run_id} to Dramatiq (message_id: {message_id})")
     except Exception as e:
         logger.error(f"❌ Failed to enqueue agent run {agent_run_id} to Dramatiq: {e}", exc_info=True)
         raise
 
+    return {"status": "running", "queue_position": 0, "eta_seconds": 0}
+
+
+async def _check_admission_load_shedding():
+    """
+    Reject a run before any rows are created when the run backlog is over
+    the shedding threshold.
+    
+    Raises:
+        HTTPException: 503 with Retry-After when overloaded
+    """
+    from core.services import admission_control
+
+    overload = await admission_control.check_load_shedding()
+    if overload is None:
+        return
+    raise HTTPException(
+        status_code=503,
+        detail={
+            "message": "Agent runs are temporarily at capacity. Please retry shortly.",
+            "queue_depth": overload["queue_depth"],
+            "retry_after": overload["retry_after"],
+            "error_code": "AGENT_RUN_QUEUE_FULL",
+        },
+        headers={"Retry-After": str(overload["retry_after"])},
+    )
+
 
 async def _handle_file_uploads(files: List[UploadFile], sandbox, project_id: str, prompt: str = "") -> str:
     """
@@ -609,6 +651,7 @@ async def start_agent_run(
     message_content: Optional[str] = None,  # Pre-processed content (with file refs)
     metadata: Optional[Dict[str, Any]] = None,
     skip_limits_check: bool = False,  # For triggers that have their own limits
+    agent_config: Optional[Dict[str, Any]] = None,  # Pre-resolved config (trigger snapshots)
 ) -> Dict[str, Any]:
     """
     Core function to start an agent run.
@@ -638,9 +681,10 @@ async def start_agent_run(
         message_content: Pre-processed message content (if files were handled externally)
         metadata: Additional metadata for the agent run
         skip_limits_check: Skip billing/limits check (for pre-validated callers)
+        agent_config: Already-loaded agent config to use instead of loading it
     
     Returns:
-        Dict with thread_id, agent_run_id, project_id, status
+        Dict with thread_id, agent_run_id, project_id, status, queue_position, eta_seconds
     """
     import time
     t_start = time.time()
@@ -654,7 +698,11 @@ async def start_agent_run(
     # Load config and check limits in parallel
     t_parallel = time.time()
     
+    preloaded_config = agent_config
+    
     async def load_config():
+        if preloaded_config is not None:
+            return preloaded_config
         return await _load_agent_config(client, agent_id, account_id, account_id, is_new_thread=is_new_thread)
     
     async def check_limits():
@@ -666,7 +714,7 @@ async def start_agent_run(
             check_thread_limit=is_new_thread
         )
     
-    agent_config, _ = await asyncio.gather(load_config(), check_limits())
+    agent_config, _, _ = await asyncio.gather(load_config(), check_limits(), _check_admission_load_shedding())
     logger.debug(f"⏱️ [TIMING] Parallel config+limits: {(time.time() - t_parallel) * 1000:.1f}ms")
     
     # Resolve effective model
@@ -776,7 +824,7 @@ async def start_agent_run(
     
     # Trigger background execution
     t_dispatch = time.time()
-    await _trigger_agent_background(agent_run_id, thread_id, project_id, effective_model, agent_id, account_id)
+    dispatch = await _trigger_agent_background(agent_run_id, thread_id, project_id, effective_model, agent_id, account_id)
     logger.debug(f"⏱️ [TIMING] Worker dispatch: {(time.time() - t_dispatch) * 1000:.1f}ms")
     
     logger.info(f"⏱️ [TIMING] start_agent_run total: {(time.time() - t_start) * 1000:.1f}ms")
@@ -785,7 +833,9 @@ async def start_agent_run(
         "thread_id": thread_id,
         "agent_run_id": agent_run_id,
         "project_id": project_id,
-        "status": "running"
+        "status": dispatch["status"],
+        "queue_position": dispatch["queue_position"],
+        "eta_seconds": dispatch["eta_seconds"],
     }
 
 
@@ -910,7 +960,13 @@ async def unified_agent_start(
         
         logger.info(f"⏱️ [TIMING] 🎯 API Request Total: {(time.time() - api_request_start) * 1000:.1f}ms")
         
-        return {"thread_id": result["thread_id"], "agent_run_id": result["agent_run_id"], "status": "running"}
+        return {
+            "thread_id": result["thread_id"],
+            "agent_run_id": result["agent_run_id"],
+            "status": result["status"],
+            "queue_position": result["queue_position"],
+            "eta_seconds": result["eta_seconds"],
+        }
     
     except HTTPException:
         raise
@@ -965,7 +1021,10 @@ async def optimistic_agent_start(
             resolved_model = model_manager.resolve_model_id(resolved_model)
         
         t_billing = time.time()
-        await _check_billing_and_limits(client, account_id, resolved_model, check_project_limit=True, check_thread_limit=True)
+        await asyncio.gather(
+            _check_billing_and_limits(client, account_id, resolved_model, check_project_limit=True, check_thread_limit=True),
+            _check_admission_load_shedding(),
+        )
         logger.debug(f"⏱️ [TIMING] Optimistic billing check: {(time.time() - t_billing) * 1000:.1f}ms")
         
         structlog.contextvars.bind_contextvars(thread_id=thread_id, project_id=project_id, account_id=account_id)
@@ -1060,7 +1119,13 @@ async def start_agent_on_thread(
         
         logger.info(f"⏱️ [TIMING] 🎯 Start Agent on Thread Total: {(time.time() - api_request_start) * 1000:.1f}ms")
         
-        return {"thread_id": result["thread_id"], "agent_run_id": result["agent_run_id"], "status": "running"}
+        return {
+            "thread_id": result["thread_id"],
+            "agent_run_id": result["agent_run_id"],
+            "status": result["status"],
+            "queue_position": result["queue_position"],
+            "eta_seconds": result["eta_seconds"],
+        }
     
     except HTTPException:
         raise
@@ -1310,6 +1375,26 @@ async def get_thread_agent(thread_id: str, user_id: str = Depends(verify_and_get
         logger.error(f"Error fetching agent for thread {thread_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch thread agent: {str(e)}")
 
+_TERMINAL_STATUSES = ('completed', 'failed', 'stopped', 'error')
+
+
+def _terminal_status(data: str) -> Optional[str]:
+    """Terminal status of a serialized stream response, or None.
+
+    Only responses that can be status messages are parsed; content chunks
+    are relayed without ever being decoded.
+    """
+    if '"status"' not in data:
+        return None
+    try:
+        response = serialization.loads(data)
+    except serialization.JSONDecodeError:
+        return None
+    if isinstance(response, dict) and response.get('type') == 'status' and response.get('status') in _TERMINAL_STATUSES:
+        return response['status']
+    return None
+
+
 @router.get("/agent-run/{agent_run_id}/stream", summary="Stream Agent Run", operation_id="stream_agent_run")
 async def stream_agent_run(
     agent_run_id: str,
@@ -1355,11 +1440,13 @@ async def stream_agent_run(
             if initial_entries:
                 logger.debug(f"Sending {len(initial_entries)} catch-up responses for {agent_run_id}")
                 for entry_id, fields in initial_entries:
-                    response = json.loads(fields.get('data', '{}'))
-                    yield f"data: {json.dumps(response)}\n\n"
+                    # Entries are already serialized JSON - relay as-is, parse only status messages
+                    data = fields.get('data', '{}')
+                    yield f"data: {data}\n\n"
                     # Check if already completed
-                    if response.get('type') == 'status' and response.get('status') in ['completed', 'failed', 'stopped', 'error']:
-                        logger.debug(f"Detected completion in catch-up: {response.get('status')}")
+                    status = _terminal_status(data)
+                    if status:
+                        logger.debug(f"Detected completion in catch-up: {status}")
                         terminate_stream = True
             initial_yield_complete = True
 
@@ -1370,7 +1457,7 @@ async def stream_agent_run(
             current_status = agent_run_data.get('status') if agent_run_data else None
             if current_status != 'running':
                 logger.debug(f"Agent run {agent_run_id} is not running (status: {current_status}). Ending stream.")
-                yield f"data: {json.dumps({'type': 'status', 'status': 'completed'})}\n\n"
+                yield f"data: {serialization.dumps({'type': 'status', 'status': 'completed'})}\n\n"
                 return
 
             structlog.contextvars.bind_contextvars(
@@ -1410,12 +1497,12 @@ async def stream_agent_run(
                         message = await asyncio.wait_for(message_queue.get(), timeout=30.0)
                     except asyncio.TimeoutError:
                         # Send keepalive ping every 30s to prevent connection timeout
-                        yield f"data: {json.dumps({'type': 'ping'})}\n\n"
+                        yield f"data: {serialization.dumps({'type': 'ping'})}\n\n"
                         continue
 
                     # Handle error from listener
                     if message.get("type") == "error":
-                        yield f"data: {json.dumps({'type': 'status', 'status': 'error', 'message': message.get('error')})}\n\n"
+                        yield f"data: {serialization.dumps({'type': 'status', 'status': 'error', 'message': message.get('error')})}\n\n"
                         terminate_stream = True
                         break
 
@@ -1431,19 +1518,16 @@ async def stream_agent_run(
                         yield f"data: {data}\n\n"
                         
                         # Check for terminal status (parse only for completion check)
-                        try:
-                            response = json.loads(data)
-                            if response.get('type') == 'status' and response.get('status') in ['completed', 'failed', 'stopped', 'error']:
-                                logger.debug(f"Detected completion via pubsub: {response.get('status')}")
-                                terminate_stream = True
-                        except json.JSONDecodeError:
-                            pass
+                        status = _terminal_status(data)
+                        if status:
+                            logger.debug(f"Detected completion via pubsub: {status}")
+                            terminate_stream = True
                             
                     elif channel == control_channel:
                         # Control signal
                         if data in ["STOP", "END_STREAM", "ERROR"]:
                             logger.debug(f"Received control signal '{data}' for {agent_run_id}")
-                            yield f"data: {json.dumps({'type': 'status', 'status': data})}\n\n"
+                            yield f"data: {serialization.dumps({'type': 'status', 'status': data})}\n\n"
                             terminate_stream = True
 
                 except asyncio.CancelledError:
@@ -1452,14 +1536,14 @@ async def stream_agent_run(
                     break
                 except Exception as e:
                     logger.error(f"Error processing message for {agent_run_id}: {e}", exc_info=True)
-                    yield f"data: {json.dumps({'type': 'status', 'status': 'error', 'message': f'Stream failed: {e}'})}\n\n"
+                    yield f"data: {serialization.dumps({'type': 'status', 'status': 'error', 'message': f'Stream failed: {e}'})}\n\n"
                     terminate_stream = True
                     break
 
         except Exception as e:
             logger.error(f"Error setting up stream for agent run {agent_run_id}: {e}", exc_info=True)
             if not initial_yield_complete:
-                yield f"data: {json.dumps({'type': 'status', 'status': 'error', 'message': f'Failed to start stream: {e}'})}\n\n"
+                yield f"data: {serialization.dumps({'type': 'status', 'status': 'error', 'message': f'Failed to start stream: {e}'})}\n\n"
 
         finally:
             terminate_stream = True
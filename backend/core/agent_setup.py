@@ -6,7 +6,7 @@ from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from core.utils.logger import logger
-from core.services.llm import make_llm_api_call
+from core.services.llm_cache import cached_llm_api_call
 from core.utils.icon_generator import generate_icon_and_colors
 from core.utils.auth_utils import verify_and_get_user_id_from_jwt
 from core.versioning.version_service import get_version_service as _get_version_service
@@ -58,7 +58,8 @@ Example:
         messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_message}]
 
         logger.debug(f"Calling LLM for name/prompt generation")
-        response = await make_llm_api_call(
+        response = await cached_llm_api_call(
+            "agent_setup",
             messages=messages,
             model_name=model_name,
             max_tokens=2000,
@@ -10,11 +10,11 @@ import os
 from typing import List, Dict, Any, Optional, Union
 
 from litellm.utils import token_counter
-from anthropic import Anthropic
 from core.services.supabase import DBConnection
 from core.utils.logger import logger
 from core.ai_models import model_manager
 from core.agentpress.prompt_caching import apply_anthropic_caching_strategy
+from core.agentpress.tool_result_spill import is_spilled_preview
 
 DEFAULT_TOKEN_THRESHOLD = 120000
 
@@ -31,6 +31,7 @@ def _get_anthropic_client_singleton():
     if _anthropic_client is None and not _clients_initialized:
         api_key = os.environ.get("ANTHROPIC_API_KEY")
         if api_key:
+            from anthropic import Anthropic
             _anthropic_client = Anthropic(api_key=api_key)
         _clients_initialized = True
     return _anthropic_client
@@ -315,6 +316,9 @@ class ContextManager:
         # XML tool calls have role="user" - check if content looks like a tool result
         if msg.get('role') == 'user':
             content = msg.get('content')
+            # Spilled XML-mode results are a plain-text preview, not JSON
+            if is_spilled_preview(content):
+                return True
             if isinstance(content, str):
                 # Check if content is JSON (tool results are often JSON)
                 try:
@@ -0,0 +1,213 @@
+"""
+Out-of-line storage for images loaded into LLM context.
+
+load_image stores each compressed image once, content-addressed
+(loaded_images/{sha256}.{ext} in the public `image-uploads` bucket, or a local
+directory as a stand-in), and the image_context message only carries a
+reference:
+
+    {"type": "image_url",
+     "image_url": {"url": "<public url, or image-ref:<key> for the local backend>"},
+     "image_ref": {"key": ..., "mime_type": ..., "width": ..., "height": ..., "backend": ...}}
+
+The block keeps the OpenAI shape so LiteLLM's token counter and the frontend
+keep working. resolve_image_refs() turns references into provider-specific
+image blocks right before the LLM call: providers that fetch URLs themselves
+get the public URL, Anthropic/Bedrock (where LiteLLM would download the URL
+synchronously while converting the request) and the local backend get a
+data URL read asynchronously from storage. estimate_image_tokens() prices an
+image by its dimensions instead of tokenizing its URL.
+"""
+import asyncio
+import base64
+import hashlib
+import math
+import os
+from collections import OrderedDict
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.utils.config import config
+from core.utils.logger import logger
+
+BUCKET = "image-uploads"
+PREFIX = "loaded_images"
+REF_SCHEME = "image-ref:"
+
+# Used when an image block carries no dimensions (legacy messages, user uploads)
+DEFAULT_IMAGE_TOKENS = 1600
+
+_EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "image/gif": "gif", "image/webp": "webp"}
+
+_stored_keys: set = set()
+_data_urls: "OrderedDict[str, str]" = OrderedDict()
+_data_url_bytes = 0
+
+
+def _image_size(data: bytes) -> Tuple[Optional[int], Optional[int]]:
+    """Dimensions from the image header (PIL opens lazily, nothing is decoded)."""
+    try:
+        from PIL import Image
+        with Image.open(BytesIO(data)) as img:
+            return img.size
+    except Exception:
+        return None, None
+
+
+async def _exists_or_upload(key: str, data: bytes, mime_type: str) -> None:
+    if config.VISION_IMAGE_STORAGE_BACKEND == "local":
+        full_path = os.path.join(config.VISION_IMAGE_LOCAL_DIR, key)
+
+        def _write_file():
+            if os.path.exists(full_path):
+                return
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            tmp_path = f"{full_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, full_path)
+
+        await asyncio.to_thread(_write_file)
+        return
+
+    from core.services.supabase import DBConnection
+    client = await DBConnection().client
+    try:
+        await client.storage.from_(BUCKET).upload(key, data, {"content-type": mime_type})
+    except Exception as e:
+        # Content-addressed: an existing object already holds these bytes
+        if "duplicate" not in str(e).lower() and "already exists" not in str(e).lower():
+            raise
+
+
+async def store_image(data: bytes, mime_type: str) -> Dict[str, Any]:
+    """Store image bytes once and return the reference to keep in the message."""
+    digest = hashlib.sha256(data).hexdigest()
+    key = f"{PREFIX}/{digest}.{_EXTENSIONS.get(mime_type, 'jpg')}"
+    backend = config.VISION_IMAGE_STORAGE_BACKEND
+    if (backend, key) not in _stored_keys:
+        await _exists_or_upload(key, data, mime_type)
+        _stored_keys.add((backend, key))
+
+    width, height = _image_size(data)
+    return {"key": key, "mime_type": mime_type, "width": width, "height": height,
+            "size": len(data), "backend": backend}
+
+
+async def public_url(ref: Dict[str, Any]) -> Optional[str]:
+    if ref.get("backend") == "local":
+        return None
+    from core.services.supabase import DBConnection
+    client = await DBConnection().client
+    return await client.storage.from_(BUCKET).get_public_url(ref["key"])
+
+
+def build_image_block(ref: Dict[str, Any], url: Optional[str] = None) -> Dict[str, Any]:
+    """Message content block for a stored image; `url` is its public URL if it has one."""
+    return {"type": "image_url", "image_url": {"url": url or f"{REF_SCHEME}{ref['key']}"}, "image_ref": ref}
+
+
+def estimate_image_tokens(width: Optional[int], height: Optional[int], model: str = "") -> int:
+    """Approximate input tokens the provider bills for an image of this size."""
+    if not width or not height:
+        return DEFAULT_IMAGE_TOKENS
+    model = (model or "").lower()
+    if "gemini" in model:
+        if width <= 384 and height <= 384:
+            return 258
+        return math.ceil(width / 768) * math.ceil(height / 768) * 258
+    if "gpt" in model or "openai" in model or model.startswith("o1") or model.startswith("o3"):
+        # High detail: fit in 2048x2048, shortest side to 768, then 170 per 512px tile
+        scale = min(1.0, 2048 / max(width, height))
+        w, h = width * scale, height * scale
+        scale = min(1.0, 768 / min(w, h))
+        w, h = w * scale, h * scale
+        return 85 + 170 * math.ceil(w / 512) * math.ceil(h / 512)
+    # Anthropic (default): long edge capped at 1568px and ~1.15MP, then w*h/750
+    scale = min(1.0, 1568 / max(width, height), math.sqrt(1_150_000 / (width * height)))
+    return math.ceil((width * scale) * (height * scale) / 750)
+
+
+def image_block_tokens(item: Dict[str, Any], model: str = "") -> int:
+    ref = item.get("image_ref") or {}
+    return estimate_image_tokens(ref.get("width"), ref.get("height"), model)
+
+
+async def _read(ref: Dict[str, Any]) -> bytes:
+    if ref.get("backend") == "local":
+        full_path = os.path.join(config.VISION_IMAGE_LOCAL_DIR, ref["key"])
+
+        def _read_file():
+            with open(full_path, "rb") as f:
+                return f.read()
+
+        return await asyncio.to_thread(_read_file)
+
+    from core.services.supabase import DBConnection
+    client = await DBConnection().client
+    return await client.storage.from_(BUCKET).download(ref["key"])
+
+
+async def _data_url(ref: Dict[str, Any]) -> str:
+    global _data_url_bytes
+    cache_key = f"{ref.get('backend')}:{ref['key']}"
+    cached = _data_urls.get(cache_key)
+    if cached is not None:
+        _data_urls.move_to_end(cache_key)
+        return cached
+
+    data = await _read(ref)
+    url = f"data:{ref.get('mime_type', 'image/jpeg')};base64,{base64.b64encode(data).decode('ascii')}"
+    _data_urls[cache_key] = url
+    _data_url_bytes += len(url)
+    while _data_url_bytes > config.VISION_IMAGE_INLINE_CACHE_BYTES and len(_data_urls) > 1:
+        _, evicted = _data_urls.popitem(last=False)
+        _data_url_bytes -= len(evicted)
+    return url
+
+
+def _wants_inline(model: str) -> bool:
+    """Anthropic and Bedrock-served Claude models, including registry aliases like kortix/basic."""
+    if not model:
+        return False
+    from core.agentpress.prompt_caching import is_anthropic_model  # Avoid a circular import
+    try:
+        return is_anthropic_model(model)
+    except Exception:
+        # Unknown to the registry: inlining is always safe, only slower to build
+        return True
+
+
+async def _resolve_block(item: Dict[str, Any], inline: bool) -> Dict[str, Any]:
+    ref = item["image_ref"]
+    url = (item.get("image_url") or {}).get("url", "")
+    if inline or ref.get("backend") == "local" or url.startswith(REF_SCHEME):
+        try:
+            url = await _data_url(ref)
+        except Exception as e:
+            logger.warning(f"Failed to read stored image {ref.get('key')}: {e}")
+            return {"type": "text", "text": f"[Image {ref.get('key')} is no longer available]"}
+    block = {k: v for k, v in item.items() if k != "image_ref"}  # Keeps cache_control etc.
+    block["image_url"] = {**(item.get("image_url") or {}), "url": url}
+    return block
+
+
+async def resolve_image_refs(messages: List[Dict[str, Any]], model: str) -> List[Dict[str, Any]]:
+    """Provider-ready copies of messages whose content holds image references."""
+    inline = _wants_inline(model)
+    resolved = []
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else None
+        if not isinstance(content, list) or not any(
+            isinstance(item, dict) and "image_ref" in item for item in content
+        ):
+            resolved.append(message)
+            continue
+        new_content = []
+        for item in content:
+            if isinstance(item, dict) and "image_ref" in item:
+                new_content.append(await _resolve_block(item, inline))
+            else:
+                new_content.append(item)
+        resolved.append({**message, "content": new_content})
+    return resolved
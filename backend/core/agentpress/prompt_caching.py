@@ -37,6 +37,7 @@ Based on Anthropic documentation and mathematical optimization (Sept 2025).
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timezone
 from core.utils.logger import logger
+from core.agentpress.image_refs import image_block_tokens
 
 
 async def get_stored_threshold(thread_id: str, model: str) -> Optional[Dict[str, Any]]:
@@ -162,7 +163,7 @@ def estimate_token_count(text: str, model: str = "claude-3-5-sonnet-20240620") -
         return int(word_count * 1.3)
 
 def get_message_token_count(message: Dict[str, Any], model: str = "claude-3-5-sonnet-20240620") -> int:
-    """Get estimated token count for a message, including base64 image data."""
+    """Get estimated token count for a message, pricing images by their dimensions."""
     content = message.get('content', '')
     if isinstance(content, list):
         total_tokens = 0
@@ -171,9 +172,8 @@ def get_message_token_count(message: Dict[str, Any], model: str = "claude-3-5-so
                 if item.get('type') == 'text':
                     total_tokens += estimate_token_count(item.get('text', ''), model)
                 elif item.get('type') == 'image_url':
-                    # Count image_url tokens - base64 data is very token-heavy
-                    image_url = item.get('image_url', {}).get('url', '')
-                    total_tokens += estimate_token_count(image_url, model)
+                    # Providers bill images by size, not by the length of their URL/base64 data
+                    total_tokens += image_block_tokens(item, model)
         return total_tokens
     return estimate_token_count(str(content), model)
 
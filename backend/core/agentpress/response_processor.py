@@ -35,8 +35,11 @@ from core.agentpress.native_tool_parser import (
     convert_buffer_to_metadata_tool_calls
 )
 from core.agentpress.error_processor import ErrorProcessor
+from core.agentpress.tool_result_spill import maybe_spill, spilled_result_metadata
 from langfuse.client import StatefulTraceClient
 from core.services.langfuse import langfuse
+from core.services import tool_metrics
+from core.utils import task_supervisor
 from core.utils.json_helpers import (
     ensure_dict, ensure_list, safe_json_parse, 
     to_json_string, to_json_string_fast, format_for_yield
@@ -131,6 +134,8 @@ class ResponseProcessor:
         self.jit_config = jit_config
         self.thread_manager = thread_manager
         self.project_id = project_id
+        # Functions whose last call failed, so the next call counts as a retry in tool metrics
+        self._failed_functions: set = set()
 
     def _serialize_model_response(self, model_response) -> Dict[str, Any]:
         """Convert a LiteLLM ModelResponse object to a JSON-serializable dictionary.
@@ -512,9 +517,10 @@ class ResponseProcessor:
                     "created_at": now_start, "updated_at": now_start
                 }
                 # Fire-and-forget DB save
-                background_db_tasks.append(asyncio.create_task(
+                background_db_tasks.append(task_supervisor.spawn(
                     self.add_message(thread_id=thread_id, type="status", content=start_content, 
-                                   is_llm_message=False, metadata={"thread_run_id": thread_run_id})
+                                   is_llm_message=False, metadata={"thread_run_id": thread_run_id}),
+                    name="save_thread_run_start", drain=True
                 ))
 
             llm_start_content = {
@@ -533,9 +539,10 @@ class ResponseProcessor:
                 "created_at": now_llm_start, "updated_at": now_llm_start
             }
             # Fire-and-forget DB save
-            background_db_tasks.append(asyncio.create_task(
+            background_db_tasks.append(task_supervisor.spawn(
                 self.add_message(thread_id=thread_id, type="llm_response_start", content=llm_start_content, 
-                               is_llm_message=False, metadata={"thread_run_id": thread_run_id, "llm_response_id": llm_response_id})
+                               is_llm_message=False, metadata={"thread_run_id": thread_run_id, "llm_response_id": llm_response_id}),
+                name="save_llm_response_start", drain=True
             ))
             logger.debug(f"Yielded llm_response_start for call #{auto_continue_count + 1} (DB save in background)")
             # --- End Start Events ---
@@ -727,7 +734,7 @@ class ResponseProcessor:
                                         if started_msg_obj: yield format_for_yield(started_msg_obj)
                                         yielded_tool_indices.add(tool_index) # Mark status as yielded
 
-                                        execution_task = asyncio.create_task(self._execute_tool(tool_call))
+                                        execution_task = task_supervisor.spawn(self._execute_tool(tool_call), name=f"tool:{tool_call.get('function_name')}")
                                         pending_tool_executions.append({
                                             "task": execution_task, "tool_call": tool_call,
                                             "tool_index": tool_index, "context": context
@@ -787,7 +794,7 @@ class ResponseProcessor:
                                 if started_msg_obj: yield format_for_yield(started_msg_obj)
                                 yielded_tool_indices.add(tool_index) # Mark status as yielded
 
-                                execution_task = asyncio.create_task(self._execute_tool(tool_call_data))
+                                execution_task = task_supervisor.spawn(self._execute_tool(tool_call_data), name=f"tool:{tool_call_data.get('function_name')}")
                                 pending_tool_executions.append({
                                     "task": execution_task, "tool_call": tool_call_data,
                                     "tool_index": tool_index, "context": context
@@ -1823,7 +1830,21 @@ class ResponseProcessor:
 
     # Tool execution methods
     async def _execute_tool(self, tool_call: Dict[str, Any]) -> ToolResult:
-        """Execute a single tool call and return the result."""
+        """Execute a single tool call and return the result, recording per-function metrics."""
+        function_name = tool_call.get("function_name", "unknown")
+        call = tool_metrics.start_call(function_name, tool_call.get("arguments"), retry=function_name in self._failed_functions)
+        result = None
+        try:
+            result = await self._run_tool(tool_call)
+            return result
+        finally:
+            tool_metrics.finish_call(call, result)
+            if getattr(result, "success", False):
+                self._failed_functions.discard(function_name)
+            else:
+                self._failed_functions.add(function_name)
+
+    async def _run_tool(self, tool_call: Dict[str, Any]) -> ToolResult:
         span = self.trace.span(name=f"execute_tool.{tool_call['function_name']}", input=tool_call["arguments"])
         function_name = "unknown"
         try:
@@ -2345,6 +2366,12 @@ class ResponseProcessor:
                     # Fallback to string representation
                     content = str(result)
                 
+                # Oversized outputs go to storage; the LLM copy keeps a head/tail preview,
+                # metadata.result (what the UI renders) keeps the full output
+                content, spilled = await maybe_spill(thread_id, function_name, content)
+                if spilled:
+                    metadata["spilled"] = spilled.to_metadata()
+                
                 logger.debug(f"Formatted tool result content: {content[:100]}...")
                 self.trace.event(name="formatted_tool_result_content", level="DEFAULT", status_message=(f"Formatted tool result content: {content[:100]}..."))
                 
@@ -2363,6 +2390,8 @@ class ResponseProcessor:
                 
                 metadata["function_name"] = function_name
                 
+                if spilled:
+                    structured_result = spilled_result_metadata(structured_result, spilled)
                 metadata["result"] = structured_result
                 metadata["return_format"] = "native"
                 
@@ -2404,6 +2433,12 @@ class ResponseProcessor:
                 # Fallback to string representation
                 content = str(result)
             
+            # Oversized outputs go to storage; the LLM copy keeps a head/tail preview,
+            # metadata.result (what the UI renders) keeps the full output
+            content, spilled = await maybe_spill(thread_id, tool_call.get("function_name"), content)
+            if spilled:
+                metadata["spilled"] = spilled.to_metadata()
+            
             # Create the tool response message for XML tool calls
             # XML format: role="user" with only content (no name, no tool_call_id)
             tool_message = {
@@ -2425,6 +2460,8 @@ class ResponseProcessor:
             metadata["function_name"] = function_name
             
             # Add structured result (only output, success, error) and return format to metadata
+            if spilled:
+                structured_result_for_frontend = spilled_result_metadata(structured_result_for_frontend, spilled)
             metadata['result'] = structured_result_for_frontend
             metadata['return_format'] = 'xml'
 
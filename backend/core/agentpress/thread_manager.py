@@ -10,6 +10,7 @@ if TYPE_CHECKING:
     from core.jit.config import JITConfig
 from core.services.llm import make_llm_api_call, LLMError
 from core.agentpress.prompt_caching import apply_anthropic_caching_strategy, validate_cache_blocks
+from core.agentpress.image_refs import resolve_image_refs
 from core.agentpress.tool import Tool
 from core.agentpress.tool_registry import ToolRegistry
 from core.agentpress.context_manager import ContextManager
@@ -17,6 +18,7 @@ from core.agentpress.response_processor import ResponseProcessor, ProcessorConfi
 from core.agentpress.error_processor import ErrorProcessor
 from core.services.supabase import DBConnection
 from core.utils.logger import logger
+from core.utils import serialization
 from langfuse.client import StatefulGenerationClient, StatefulTraceClient
 from core.services.langfuse import langfuse
 from datetime import datetime, timezone
@@ -32,6 +34,8 @@ class ThreadManager:
                  jit_config: Optional['JITConfig'] = None):
         self.db = DBConnection()
         self.tool_registry = ToolRegistry()
+        # Sandbox handles shared by every sandbox tool in this run (created on first use)
+        self._sandbox_handles = None
         
         self.project_id = project_id
         self.thread_id = thread_id
@@ -55,6 +59,14 @@ class ThreadManager:
             project_id=self.project_id
         )
 
+    @property
+    def sandbox_handles(self):
+        """The run's SandboxHandleRegistry; imported lazily to keep daytona_sdk out of worker startup."""
+        if self._sandbox_handles is None:
+            from core.sandbox.handle_registry import SandboxHandleRegistry
+            self._sandbox_handles = SandboxHandleRegistry(self.db)
+        return self._sandbox_handles
+
     def add_tool(self, tool_class: Type[Tool], function_names: Optional[List[str]] = None, **kwargs):
         self.tool_registry.register_tool(tool_class, function_names, **kwargs)
 
@@ -279,7 +291,7 @@ class ThreadManager:
                 # Parse content and add message_id
                 if isinstance(content, str):
                     try:
-                        parsed_item = json.loads(content)
+                        parsed_item = serialization.loads(content)
                         parsed_item['message_id'] = item['message_id']
                         
                         # Skip empty user messages (defensive filter for legacy data)
@@ -655,6 +667,9 @@ class ThreadManager:
                 logger.debug(f"✅ Pre-send validation passed: all tool calls properly paired")
             logger.debug(f"⏱️ [TIMING] Pre-send validation: {(time.time() - validation_start) * 1000:.1f}ms")
             
+            # Stored image references become provider-specific image blocks only now
+            prepared_messages = await resolve_image_refs(prepared_messages, llm_model)
+            
             llm_call_start = time.time()
             logger.info(f"📤 Sending {len(prepared_messages)} prepared messages to LLM")
 
@@ -790,7 +805,7 @@ class ThreadManager:
                         if should_continue:
                             if chunk.get('type') == 'status':
                                 try:
-                                    content = json.loads(chunk.get('content', '{}'))
+                                    content = serialization.loads(chunk.get('content', '{}'))
                                     # Only skip length limit finish statuses (frontend needs tool execution finish)
                                     if content.get('finish_reason') == 'length':
                                         continue
@@ -851,7 +866,7 @@ class ThreadManager:
         """Check if a response chunk should trigger auto-continue."""
         if chunk.get('type') == 'status':
             try:
-                content = json.loads(chunk.get('content', '{}')) if isinstance(chunk.get('content'), str) else chunk.get('content', {})
+                content = serialization.loads(chunk.get('content', '{}')) if isinstance(chunk.get('content'), str) else chunk.get('content', {})
                 finish_reason = content.get('finish_reason')
                 tools_executed = content.get('tools_executed', False)
                 
@@ -908,6 +923,10 @@ class ThreadManager:
             self.tool_registry.tools.clear()
             self.tool_registry = None
         
+        if getattr(self, '_sandbox_handles', None):
+            await self._sandbox_handles.close()
+            self._sandbox_handles = None
+
         # Clear other references that might hold memory
         if hasattr(self, 'response_processor'):
             self.response_processor = None
@@ -0,0 +1,170 @@
+"""
+Spill-to-storage for oversized tool results.
+
+Shell output, scraped pages, search results and MCP payloads used to be saved
+verbatim in messages.content and re-sent to the LLM every turn until context
+compression caught up. Results longer than TOOL_RESULT_SPILL_THRESHOLD_CHARS
+are now written to object storage (the `tool-outputs` bucket, or a local
+directory as a stand-in) and the LLM copy of the message keeps only a
+head/tail preview plus a `spill:` reference. Only the LLM copy is spilled:
+metadata.result, which the frontend tool views parse, keeps the full output
+and gains a `spilled` entry describing the stored object.
+expand_message() reads the full output back in pages.
+Spilled previews are compressed and dropped by ContextManager like any other
+tool result.
+
+Objects live at {thread_id}/{spill_id}.txt so a reference only resolves
+inside the thread that produced it.
+"""
+import asyncio
+import json
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from core.utils.config import config
+from core.utils.logger import logger
+
+BUCKET = "tool-outputs"
+REF_PREFIX = "spill:"
+PREVIEW_MARKER = "[Large tool output spilled to storage"
+
+# Results the model needs verbatim, or that are already paged (expand_message)
+NEVER_SPILL = frozenset({"expand_message", "initialize_tools", "discover_mcp_tools"})
+
+_REF_RE = re.compile(r"^spill:([0-9a-f]{32})$")
+
+
+@dataclass
+class SpilledResult:
+    ref: str
+    path: str
+    backend: str
+    chars: int
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return {"ref": self.ref, "path": self.path, "backend": self.backend, "chars": self.chars}
+
+
+def is_spill_ref(value: Any) -> bool:
+    return isinstance(value, str) and bool(_REF_RE.match(value.strip()))
+
+
+def is_spilled_preview(content: Any) -> bool:
+    return isinstance(content, str) and content.startswith(PREVIEW_MARKER)
+
+
+def _as_text(output: Any) -> str:
+    if isinstance(output, str):
+        return output
+    return json.dumps(output, default=str, ensure_ascii=False)
+
+
+def _object_path(thread_id: str, spill_id: str) -> str:
+    return f"{thread_id}/{spill_id}.txt"
+
+
+def build_preview(text: str, ref: str) -> str:
+    head_chars = config.TOOL_RESULT_SPILL_PREVIEW_HEAD_CHARS
+    tail_chars = config.TOOL_RESULT_SPILL_PREVIEW_TAIL_CHARS
+    omitted = len(text) - head_chars - tail_chars
+    return (
+        f"{PREVIEW_MARKER}: {len(text):,} chars, showing the first {head_chars:,} and last {tail_chars:,}. "
+        f"ref: \"{ref}\"]\n"
+        f"{text[:head_chars]}\n"
+        f"\n... ({omitted:,} chars omitted - call expand_message with message_id \"{ref}\" "
+        f"and an offset to read them) ...\n\n"
+        f"{text[-tail_chars:] if tail_chars else ''}"
+    )
+
+
+def spilled_result_metadata(structured_result: Dict[str, Any], spilled: SpilledResult) -> Dict[str, Any]:
+    """metadata.result for a spilled output: the full output for the UI, plus the reference."""
+    return {**structured_result, "spilled": spilled.to_metadata()}
+
+
+async def _write(path: str, data: bytes) -> None:
+    if config.TOOL_RESULT_SPILL_BACKEND == "local":
+        full_path = os.path.join(config.TOOL_RESULT_SPILL_LOCAL_DIR, path)
+
+        def _write_file():
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "wb") as f:
+                f.write(data)
+
+        await asyncio.to_thread(_write_file)
+        return
+
+    from core.services.supabase import DBConnection
+    client = await DBConnection().client
+    await client.storage.from_(BUCKET).upload(path, data, {"content-type": "text/plain; charset=utf-8"})
+
+
+async def _read(path: str, backend: str) -> bytes:
+    if backend == "local":
+        full_path = os.path.join(config.TOOL_RESULT_SPILL_LOCAL_DIR, path)
+
+        def _read_file():
+            with open(full_path, "rb") as f:
+                return f.read()
+
+        return await asyncio.to_thread(_read_file)
+
+    from core.services.supabase import DBConnection
+    client = await DBConnection().client
+    return await client.storage.from_(BUCKET).download(path)
+
+
+async def maybe_spill(thread_id: str, function_name: Optional[str], output: Any) -> Tuple[Any, Optional[SpilledResult]]:
+    """Return (content for the LLM copy of the message, spill info or None).
+
+    Small results, exempt functions, and results whose upload fails are
+    returned unchanged.
+    """
+    if not config.TOOL_RESULT_SPILL_ENABLED or function_name in NEVER_SPILL or output is None:
+        return output, None
+
+    text = _as_text(output)
+    if len(text) <= config.TOOL_RESULT_SPILL_THRESHOLD_CHARS:
+        return output, None
+
+    spill_id = uuid.uuid4().hex
+    path = _object_path(thread_id, spill_id)
+    try:
+        await _write(path, text.encode("utf-8"))
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to spill {len(text):,}-char result of {function_name} to storage, keeping it inline: {e}")
+        return output, None
+
+    spilled = SpilledResult(ref=f"{REF_PREFIX}{spill_id}", path=path,
+                            backend=config.TOOL_RESULT_SPILL_BACKEND, chars=len(text))
+    logger.debug(f"📦 Spilled {len(text):,}-char result of {function_name} to {spilled.backend}:{path}")
+    return build_preview(text, spilled.ref), spilled
+
+
+async def load_spilled(thread_id: str, ref: str, offset: int = 0, limit: Optional[int] = None,
+                       backend: Optional[str] = None) -> Dict[str, Any]:
+    """Read a page of a spilled result. Raises FileNotFoundError for unknown references."""
+    match = _REF_RE.match(ref.strip())
+    if not match:
+        raise ValueError(f"Not a spilled result reference: {ref}")
+    path = _object_path(thread_id, match.group(1))
+    try:
+        data = await _read(path, backend or config.TOOL_RESULT_SPILL_BACKEND)
+    except Exception as e:
+        raise FileNotFoundError(f"Spilled result {ref} not found in this thread") from e
+
+    text = data.decode("utf-8", errors="replace")
+    limit = limit or config.TOOL_RESULT_SPILL_EXPAND_PAGE_CHARS
+    offset = max(0, offset)
+    end = min(len(text), offset + limit)
+    page = {
+        "content": text[offset:end],
+        "offset": offset,
+        "total_chars": len(text),
+    }
+    if end < len(text):
+        page["next_offset"] = end
+    return page
@@ -126,13 +126,16 @@ class Model:
     
     def get_litellm_params(self, **override_params) -> Dict[str, Any]:
         """Get complete LiteLLM parameters for this model, including all configuration."""
+        return merge_litellm_overrides(self.get_base_litellm_params(), override_params)
+    
+    def get_base_litellm_params(self) -> Dict[str, Any]:
+        """LiteLLM parameters from the model's own configuration, before runtime overrides."""
         # Start with intelligent defaults
         params = {
             "model": self.id,
             "num_retries": 5,
         }
         
-    
         # Apply model-specific configuration if available
         if self.config:
             # Provider & API configuration parameters
@@ -154,24 +157,6 @@ class Model:
             if self.config.performanceConfig:
                 params["performanceConfig"] = self.config.performanceConfig.copy()
         
-        
-        # Apply any runtime overrides
-        for key, value in override_params.items():
-            if value is not None:
-                # Handle headers and extra_headers merging separately
-                if key == "headers" and "headers" in params:
-                    if isinstance(params["headers"], dict) and isinstance(value, dict):
-                        params["headers"].update(value)
-                    else:
-                        params[key] = value
-                elif key == "extra_headers" and "extra_headers" in params:
-                    if isinstance(params["extra_headers"], dict) and isinstance(value, dict):
-                        params["extra_headers"].update(value)
-                    else:
-                        params[key] = value
-                else:
-                    params[key] = value
-        
         return params
     
     def to_dict(self) -> Dict[str, Any]:
@@ -196,4 +181,31 @@ class Model:
             "metadata": self.metadata,
             "priority": self.priority,
             "recommended": self.recommended,
-        } 
\ No newline at end of file
+        } 
+
+
+_NESTED_PARAM_KEYS = ("headers", "extra_headers", "performanceConfig")
+
+
+def merge_litellm_overrides(params: Dict[str, Any], override_params: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply runtime overrides to LiteLLM params; None values are ignored and header dicts are merged.
+    
+    `params` may be a shared template: it is copied (including nested dicts) before being modified.
+    """
+    params = dict(params)
+    for key in _NESTED_PARAM_KEYS:
+        if isinstance(params.get(key), dict):
+            params[key] = params[key].copy()
+    
+    for key, value in override_params.items():
+        if value is not None:
+            # Handle headers and extra_headers merging separately
+            if key in ("headers", "extra_headers") and key in params:
+                if isinstance(params[key], dict) and isinstance(value, dict):
+                    params[key].update(value)
+                else:
+                    params[key] = value
+            else:
+                params[key] = value
+    
+    return params
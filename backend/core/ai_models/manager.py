@@ -1,6 +1,6 @@
 from typing import Optional, List, Dict, Any, Tuple
 from .registry import registry
-from .ai_models import Model, ModelCapability
+from .ai_models import Model, ModelCapability, merge_litellm_overrides
 from core.utils.logger import logger
 from .registry import PREMIUM_MODEL_ID, FREE_MODEL_ID
 
@@ -21,17 +21,8 @@ class ModelManager:
         """
         # logger.debug(f"resolve_model_id called with: '{model_id}' (type: {type(model_id)})")
         
-        # First try direct registry lookup
-        resolved = self.registry.resolve_model_id(model_id)
-        if resolved:
-            return resolved
-        
-        # Try reverse lookup from LiteLLM model ID (e.g. Bedrock ARN → kortix/basic)
-        reverse_resolved = self.registry.resolve_from_litellm_id(model_id)
-        if reverse_resolved != model_id:
-            return reverse_resolved
-            
-        return model_id
+        # Single precomputed lookup covering registry IDs, aliases and LiteLLM IDs
+        return self.registry.resolve_any(model_id)
     
     def validate_model(self, model_id: str) -> Tuple[bool, str]:
         model = self.get_model(model_id)
@@ -73,17 +64,17 @@ class ModelManager:
     
     def get_litellm_params(self, model_id: str, **override_params) -> Dict[str, Any]:
         """Get complete LiteLLM parameters for a model from the registry."""
-        model = self.get_model(model_id)
-        if not model:
+        template = self.registry.get_litellm_params_template(model_id)
+        if template is None:
             return {
                 "model": model_id,
                 "num_retries": 5,
                 **override_params
             }
         
-        # Get config from model, then override the model ID with the actual LiteLLM model ID
-        params = model.get_litellm_params(**override_params)
-        params["model"] = self.registry.get_litellm_model_id(model_id)
+        # Pre-baked model config (already carrying the actual LiteLLM model ID) plus overrides
+        params = merge_litellm_overrides(template, override_params)
+        params["model"] = template["model"]
         
         return params
     
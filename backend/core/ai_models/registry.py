@@ -1,4 +1,5 @@
-from typing import Dict, List, Optional, Set
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
 from .ai_models import Model, ModelProvider, ModelCapability, ModelPricing, ModelConfig
 from core.utils.config import config, EnvMode
 from core.utils.logger import logger
@@ -20,11 +21,80 @@ is_local = config.ENV_MODE == EnvMode.LOCAL
 is_prod = config.ENV_MODE == EnvMode.PRODUCTION
 # pricing_multiplier = 0.20 if is_prod else 1.0
 
+# Provider prefixes that may appear in front of a Bedrock ARN in usage/billing data
+_LITELLM_ID_PREFIXES = ('bedrock/converse/', 'bedrock/', 'converse/')
+
+# Registry models that are served by a different LiteLLM model ID
+_LITELLM_MODEL_IDS = {
+    "kortix/basic": _BASIC_MODEL_ID,  # Uses HAIKU 4.5
+    "kortix/power": _POWER_MODEL_ID,  # Uses Sonnet 4.5
+}
+
+
+def _normalize_litellm_id(litellm_model_id: str) -> str:
+    for prefix in _LITELLM_ID_PREFIXES:
+        if litellm_model_id.startswith(prefix):
+            return litellm_model_id[len(prefix):]
+    return litellm_model_id
+
+
 class ModelRegistry:
+    """Model catalogue with precomputed lookup tables.
+    
+    Lookups run on every LLM call and billing deduction, so alias resolution,
+    LiteLLM ID mapping (both directions, including prefixed Bedrock ARNs) and
+    the base LiteLLM params per model are computed once in _rebuild_lookups()
+    and served from read-only dicts. Any change to the catalogue (register,
+    enable_model, disable_model) rebuilds them.
+    """
+    
     def __init__(self):
         self._models: Dict[str, Model] = {}
         self._aliases: Dict[str, str] = {}
+        self._building = True
         self._initialize_models()
+        self._building = False
+        self._rebuild_lookups()
+    
+    def _rebuild_lookups(self) -> None:
+        # Any known name (registry ID or alias) -> registry ID
+        lookup: Dict[str, str] = {alias: model_id for alias, model_id in self._aliases.items() if model_id in self._models}
+        lookup.update({model_id: model_id for model_id in self._models})
+        
+        # Any known name -> LiteLLM model ID
+        litellm_ids = {name: _LITELLM_MODEL_IDS.get(model_id, model_id) for name, model_id in lookup.items()}
+        litellm_ids.update(_LITELLM_MODEL_IDS)
+        
+        # LiteLLM model ID (with or without provider prefix) -> registry ID
+        reverse: Dict[str, str] = {}
+        for model_id, litellm_id in _LITELLM_MODEL_IDS.items():
+            normalized = _normalize_litellm_id(litellm_id)
+            for key in [litellm_id, normalized] + [prefix + normalized for prefix in _LITELLM_ID_PREFIXES]:
+                reverse.setdefault(key, model_id)
+        
+        # Everything resolve_model_id accepts, registry names first
+        resolve = dict(reverse)
+        resolve.update(lookup)
+        
+        templates = {}
+        for model_id, model in self._models.items():
+            params = model.get_base_litellm_params()
+            params["model"] = litellm_ids[model_id]
+            templates[model_id] = MappingProxyType(params)
+        
+        enabled = tuple(m for m in self._models.values() if m.enabled)
+        by_tier: Dict[str, List[Model]] = {}
+        for model in enabled:
+            for tier in model.tier_availability:
+                by_tier.setdefault(tier, []).append(model)
+        
+        self._lookup: Mapping[str, str] = MappingProxyType(lookup)
+        self._litellm_ids: Mapping[str, str] = MappingProxyType(litellm_ids)
+        self._reverse: Mapping[str, str] = MappingProxyType(reverse)
+        self._resolve: Mapping[str, str] = MappingProxyType(resolve)
+        self._param_templates: Mapping[str, Mapping[str, Any]] = MappingProxyType(templates)
+        self._enabled: Tuple[Model, ...] = enabled
+        self._enabled_by_tier: Mapping[str, Tuple[Model, ...]] = MappingProxyType({t: tuple(ms) for t, ms in by_tier.items()})
     
     # KORTIX BASIC & POWER – Same underlying model, different configs
     def _initialize_models(self):
@@ -354,29 +424,24 @@ class ModelRegistry:
         self._models[model.id] = model
         for alias in model.aliases:
             self._aliases[alias] = model.id
+        if not self._building:
+            self._rebuild_lookups()
     
     def get(self, model_id: str) -> Optional[Model]:
         if not model_id:
             return None
-            
-        if model_id in self._models:
-            return self._models[model_id]
-        
-        if model_id in self._aliases:
-            actual_id = self._aliases[model_id]
-            return self._models.get(actual_id)
-        
-        return None
+        actual_id = self._lookup.get(model_id)
+        return self._models[actual_id] if actual_id else None
     
     def get_all(self, enabled_only: bool = True) -> List[Model]:
-        models = list(self._models.values())
         if enabled_only:
-            models = [m for m in models if m.enabled]
-        return models
+            return list(self._enabled)
+        return list(self._models.values())
     
     def get_by_tier(self, tier: str, enabled_only: bool = True) -> List[Model]:
-        models = self.get_all(enabled_only)
-        return [m for m in models if tier in m.tier_availability]
+        if enabled_only:
+            return list(self._enabled_by_tier.get(tier, ()))
+        return [m for m in self._models.values() if tier in m.tier_availability]
     
     def get_by_provider(self, provider: ModelProvider, enabled_only: bool = True) -> List[Model]:
         models = self.get_all(enabled_only)
@@ -387,37 +452,33 @@ class ModelRegistry:
         return [m for m in models if capability in m.capabilities]
     
     def resolve_model_id(self, model_id: str) -> Optional[str]:
-        model = self.get(model_id)
-        return model.id if model else None
+        return self._lookup.get(model_id) if model_id else None
+    
+    def resolve_any(self, model_id: str) -> str:
+        """Resolve a registry ID, alias or LiteLLM model ID (e.g. Bedrock ARN) to a registry ID.
+        
+        Returns the input unchanged if it is unknown.
+        """
+        return self._resolve.get(model_id, model_id) if model_id else model_id
     
     def get_litellm_model_id(self, model_id: str) -> str:
         """Get the actual model ID to pass to LiteLLM.
         
-        Resolves kortix/basic and kortix/power to actual provider model IDs.
+        Resolves kortix/basic and kortix/power (and their aliases) to actual provider
+        model IDs. Unknown IDs are returned as-is (let LiteLLM handle them).
         """
-        # Map kortix model IDs to actual LiteLLM model IDs
-        if model_id == "kortix/basic":
-            return _BASIC_MODEL_ID  # Uses HAIKU 4.5
-        elif model_id == "kortix/power":
-            return _POWER_MODEL_ID  # Uses Sonnet 4.5
-        
-        # For other models, check if it's an alias and resolve
-        model = self.get(model_id)
-        if model:
-            # Check if this model's ID needs resolution
-            if model.id == "kortix/basic":
-                return _BASIC_MODEL_ID
-            elif model.id == "kortix/power":
-                return _POWER_MODEL_ID
-            return model.id
-        
-        # Return as-is if not found (let LiteLLM handle it)
-        return model_id
+        return self._litellm_ids.get(model_id, model_id)
+    
+    def get_litellm_params_template(self, model_id: str) -> Optional[Mapping[str, Any]]:
+        """Read-only base LiteLLM params for a registry ID or alias (model already mapped to the LiteLLM ID)."""
+        actual_id = self._lookup.get(model_id)
+        return self._param_templates.get(actual_id) if actual_id else None
     
     def resolve_from_litellm_id(self, litellm_model_id: str) -> str:
         """Reverse lookup: resolve a LiteLLM model ID (e.g. Bedrock ARN) back to registry model ID.
         
         This is the inverse of get_litellm_model_id. Used by cost calculator to find pricing.
+        Bedrock ARNs match with or without a bedrock/, converse/ or bedrock/converse/ prefix.
         
         Args:
             litellm_model_id: The actual model ID used by LiteLLM (e.g. Bedrock ARN)
@@ -425,48 +486,7 @@ class ModelRegistry:
         Returns:
             The registry model ID (e.g. 'kortix/basic') or the input if not found
         """
-        # Check if this matches _BASIC_MODEL_ID (HAIKU) or _POWER_MODEL_ID (Sonnet)
-        if litellm_model_id == _BASIC_MODEL_ID:
-            return "kortix/basic"
-        if litellm_model_id == _POWER_MODEL_ID:
-            return "kortix/power"
-        
-        # Check if this is a Bedrock ARN that maps to kortix models
-        # Strip common prefixes for comparison
-        normalized_id = litellm_model_id
-        for prefix in ['bedrock/converse/', 'bedrock/', 'converse/']:
-            if normalized_id.startswith(prefix):
-                normalized_id = normalized_id[len(prefix):]
-                break
-        
-        # Normalize _BASIC_MODEL_ID for comparison
-        basic_model_normalized = _BASIC_MODEL_ID
-        for prefix in ['bedrock/converse/', 'bedrock/', 'converse/']:
-            if basic_model_normalized.startswith(prefix):
-                basic_model_normalized = basic_model_normalized[len(prefix):]
-                break
-        
-        # Normalize _POWER_MODEL_ID for comparison
-        power_model_normalized = _POWER_MODEL_ID
-        for prefix in ['bedrock/converse/', 'bedrock/', 'converse/']:
-            if power_model_normalized.startswith(prefix):
-                power_model_normalized = power_model_normalized[len(prefix):]
-                break
-        
-        # If the normalized ID matches the basic model ARN, return kortix/basic
-        if normalized_id == basic_model_normalized:
-            return "kortix/basic"
-        
-        # If the normalized ID matches the power model ARN, return kortix/power
-        if normalized_id == power_model_normalized:
-            return "kortix/power"
-        
-        # Check if this model exists directly in registry
-        if self.get(litellm_model_id):
-            return litellm_model_id
-        
-        # Return as-is if no reverse mapping found
-        return litellm_model_id
+        return self._reverse.get(litellm_model_id, litellm_model_id)
     
     def get_aliases(self, model_id: str) -> List[str]:
         model = self.get(model_id)
@@ -476,6 +496,7 @@ class ModelRegistry:
         model = self.get(model_id)
         if model:
             model.enabled = True
+            self._rebuild_lookups()
             return True
         return False
     
@@ -483,6 +504,7 @@ class ModelRegistry:
         model = self.get(model_id)
         if model:
             model.enabled = False
+            self._rebuild_lookups()
             return True
         return False
     
@@ -495,19 +517,8 @@ class ModelRegistry:
         
         Handles both registry model IDs (kortix/basic) and LiteLLM model IDs (Bedrock ARNs).
         """
-        # First try direct lookup
-        model = self.get(model_id)
-        if model and model.pricing:
-            return model.pricing
-        
-        # Try reverse lookup from LiteLLM model ID
-        resolved_id = self.resolve_from_litellm_id(model_id)
-        if resolved_id != model_id:
-            model = self.get(resolved_id)
-            if model and model.pricing:
-                return model.pricing
-        
-        return None
+        model = self.get(self.resolve_any(model_id))
+        return model.pricing if model else None
     
     def to_legacy_format(self) -> Dict:
         models_dict = {}
@@ -8,7 +8,9 @@ class UnifiedAgentStartResponse(BaseModel):
     """Unified response model for agent start (both new and existing threads)."""
     thread_id: str
     agent_run_id: str
-    status: str = "running"
+    status: str = "running"  # "queued" when held back by admission control
+    queue_position: int = 0
+    eta_seconds: int = 0
 
 
 class CreateThreadResponse(BaseModel):
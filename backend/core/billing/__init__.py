@@ -16,9 +16,29 @@ from .shared.config import (
 )
 from .credits.integration import billing_integration
 from .credits.calculator import calculate_token_cost
-from .subscriptions import subscription_service, trial_service
-from .payments import payment_service, reconciliation_service
-from .external.stripe import stripe_circuit_breaker, StripeAPIWrapper
+
+# Stripe-backed services are resolved on first access: importing the stripe SDK
+# costs over a second, and the credit/token accounting path used by agent runs
+# never touches it.
+_LAZY_EXPORTS = {
+    'subscription_service': '.subscriptions',
+    'trial_service': '.subscriptions',
+    'payment_service': '.payments',
+    'reconciliation_service': '.payments',
+    'stripe_circuit_breaker': '.external.stripe',
+    'StripeAPIWrapper': '.external.stripe',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        import importlib
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'TOKEN_PRICE_MULTIPLIER',
@@ -1,5 +1,4 @@
 from .client import stripe_circuit_breaker, StripeAPIWrapper, StripeCircuitBreaker
-from .webhooks import webhook_service
 from .idempotency import (
     stripe_idempotency_manager,
     generate_idempotency_key,
@@ -10,6 +9,9 @@ from .idempotency import (
     generate_subscription_cancel_idempotency_key,
     generate_refund_idempotency_key,
 )
+# Imported last: the webhook handlers pull in core.billing.subscriptions, whose
+# services import the client/idempotency names above from this package.
+from .webhooks import webhook_service
 
 __all__ = [
     # Circuit Breaker
@@ -1029,11 +1029,11 @@ async def composio_webhook(request: Request):
             trigger_id = row.get("trigger_id")
             if not trigger_id:
                 continue
-            result = await trigger_service.process_trigger_event(trigger_id, payload)
+            trigger = await trigger_service.get_trigger(trigger_id)
+            if not trigger:
+                continue
+            result = await trigger_service.process_trigger_event(trigger_id, payload, trigger=trigger)
             if result.success and result.should_execute_agent:
-                trigger = await trigger_service.get_trigger(trigger_id)
-                if not trigger:
-                    continue
                 ctx = {
                     "payload": payload,
                     "trigger_slug": trigger_slug,
@@ -1050,6 +1050,7 @@ async def composio_webhook(request: Request):
                     agent_id=trigger.agent_id,
                     trigger_result=result,
                     trigger_event=event,
+                    trigger=trigger,
                 )
                 executed += 1
 
@@ -7,12 +7,9 @@ from pathlib import Path
 import mimetypes
 import chardet
 
-import PyPDF2
-import docx
-
 from core.utils.logger import logger
 from core.services.supabase import DBConnection
-from core.services.llm import make_llm_api_call
+from core.services.llm_cache import cached_llm_api_call
 
 class FileProcessor:
     SUPPORTED_EXTENSIONS = {'.txt', '.pdf', '.docx'}
@@ -295,7 +292,8 @@ Keep it under 200 words and make it actionable for context injection."""
 
                     messages = [{"role": "user", "content": prompt}]
                     
-                    response = await make_llm_api_call(
+                    response = await cached_llm_api_call(
+                        "kb_summary",
                         messages=messages,
                         model_name=model_name,
                         temperature=0.1,
@@ -417,10 +415,12 @@ Keep it under 200 words and make it actionable for context injection."""
                     return file_content.decode('utf-8', errors='replace')
             
             elif file_extension == '.pdf':
+                import PyPDF2
                 pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
                 return '\n\n'.join(page.extract_text() for page in pdf_reader.pages)
             
             elif file_extension == '.docx':
+                import docx
                 doc = docx.Document(io.BytesIO(file_content))
                 return '\n'.join(paragraph.text for paragraph in doc.paragraphs)
             
@@ -15,10 +15,13 @@ from .mcp_service import (
     MCPAuthenticationError,
     CustomMCPError,
 )
+from .session_pool import MCPSessionPool, mcp_session_pool
 
 __all__ = [
     "MCPService",
     "mcp_service",
+    "MCPSessionPool",
+    "mcp_session_pool",
     "MCPConnection",
     "ToolExecutionResult",
     "CustomMCPConnectionResult",
@@ -17,6 +17,7 @@ from core.utils.logger import logger
 from core.credentials import EncryptionService
 from core.utils.config import config as app_config, EnvMode
 from core.tools.utils.mcp_tool_executor import is_safe_url
+from .session_pool import PooledSession, credential_profile_key, mcp_session_pool
 
 
 class MCPException(Exception):
@@ -103,6 +104,10 @@ class MCPService:
         self._logger = logger
         # LRU cache: Dict[name, (connection, created_at_timestamp)]
         self._connections: OrderedDict[str, Tuple[MCPConnection, float]] = OrderedDict()
+        # Pooled session backing each connection (owned by mcp_session_pool, shared across runs)
+        self._pooled: Dict[str, PooledSession] = {}
+        # tool name -> qualified_name of the connection that serves it
+        self._tool_index: Dict[str, str] = {}
         self._encryption_service = EncryptionService()
         self._max_connections = 100  # Maximum connections to keep in memory
         self._connection_ttl = 3600  # 1 hour TTL for connections
@@ -131,38 +136,38 @@ class MCPService:
             # Add debugging
             self._logger.debug(f"MCP connection details - Provider: {request.provider}, URL: {server_url}, Headers: {headers}")
             
-            # Add timeout to prevent hanging
-            async with asyncio.timeout(30):
-                async with streamablehttp_client(server_url, headers=headers) as (
-                    read_stream, write_stream, _
-                ):
-                    session = ClientSession(read_stream, write_stream)
-                    await session.initialize()
-                    
-                    tool_result = await session.list_tools()
-                    tools = tool_result.tools if tool_result else []
-                    
-                    connection = MCPConnection(
-                        qualified_name=request.qualified_name,
-                        name=request.name,
-                        config=request.config,
-                        enabled_tools=request.enabled_tools,
-                        provider=request.provider,
-                        external_user_id=request.external_user_id,
-                        session=session,
-                        tools=tools
-                    )
-                    
-                    # Store with timestamp for TTL tracking
-                    self._connections[request.qualified_name] = (connection, time())
-                    # Move to end (most recently used)
-                    self._connections.move_to_end(request.qualified_name)
-                    self._logger.debug(f"Connected to {request.qualified_name} ({len(tools)} tools available)")
-                    
-                    # Cleanup old connections
-                    await self._cleanup_old_connections()
-                    
-                    return connection
+            # Reuse a warm session for this server + credentials if another run opened one
+            # (the pool applies a 30s timeout to new handshakes)
+            profile_key = credential_profile_key(request.config.get('profile_id'), headers)
+            pooled = await mcp_session_pool.acquire(server_url, headers, profile_key)
+            tools = pooled.tools
+            
+            connection = MCPConnection(
+                qualified_name=request.qualified_name,
+                name=request.name,
+                config=request.config,
+                enabled_tools=request.enabled_tools,
+                provider=request.provider,
+                external_user_id=request.external_user_id,
+                session=pooled.session,
+                tools=tools
+            )
+            
+            if request.qualified_name in self._connections:
+                self._unindex_connection(request.qualified_name)
+            
+            # Store with timestamp for TTL tracking
+            self._connections[request.qualified_name] = (connection, time())
+            # Move to end (most recently used)
+            self._connections.move_to_end(request.qualified_name)
+            self._pooled[request.qualified_name] = pooled
+            self._index_connection(connection)
+            self._logger.debug(f"Connected to {request.qualified_name} ({len(tools)} tools available)")
+            
+            # Cleanup old connections
+            await self._cleanup_old_connections()
+            
+            return connection
                     
         except asyncio.TimeoutError:
             error_msg = f"Connection timeout for {request.qualified_name} after 30 seconds"
@@ -215,24 +220,46 @@ class MCPService:
             await self.disconnect_server(oldest_name)
     
     async def disconnect_server(self, qualified_name: str) -> None:
-        connection_data = self._connections.get(qualified_name)
-        if connection_data:
-            connection, _ = connection_data
-            if connection and connection.session:
-                try:
-                    await connection.session.close()
-                    self._logger.debug(f"Disconnected from {qualified_name}")
-                except Exception as e:
-                    self._logger.warning(f"Error disconnecting from {qualified_name}: {str(e)}")
+        # The underlying session stays in mcp_session_pool for other runs; the pool closes it when idle
+        if qualified_name in self._connections:
+            self._unindex_connection(qualified_name)
+            self._logger.debug(f"Disconnected from {qualified_name}")
         
         self._connections.pop(qualified_name, None)
+        self._pooled.pop(qualified_name, None)
     
     async def disconnect_all(self) -> None:
         for qualified_name in list(self._connections.keys()):
             await self.disconnect_server(qualified_name)
         self._connections.clear()
+        self._pooled.clear()
+        self._tool_index.clear()
         self._logger.debug("Disconnected from all MCP servers")
     
+    def _index_connection(self, connection: MCPConnection) -> None:
+        # First connection to provide a tool name keeps it, as with the old ordered scan
+        for tool in connection.tools or []:
+            self._tool_index.setdefault(tool.name, connection.qualified_name)
+    
+    def _unindex_connection(self, qualified_name: str) -> None:
+        orphaned = [name for name, owner in self._tool_index.items() if owner == qualified_name]
+        for name in orphaned:
+            del self._tool_index[name]
+        if not orphaned:
+            return
+        # Hand orphaned tool names to another connection that also serves them
+        orphaned = set(orphaned)
+        for other_name, (connection, _) in self._connections.items():
+            if other_name == qualified_name:
+                continue
+            for tool in connection.tools or []:
+                if tool.name in orphaned:
+                    self._tool_index.setdefault(tool.name, other_name)
+    
+    def is_connected(self, qualified_name: str) -> bool:
+        pooled = self._pooled.get(qualified_name)
+        return qualified_name in self._connections and pooled is not None and not pooled.closed
+    
     def get_connection(self, qualified_name: str) -> Optional[MCPConnection]:
         """Get connection, moving it to end (most recently used) for LRU"""
         if qualified_name in self._connections:
@@ -292,7 +319,7 @@ class MCPService:
             raise MCPToolExecutionError(f"Tool not enabled: {request.tool_name}")
         
         try:
-            result = await connection.session.call_tool(request.tool_name, request.arguments)
+            result = await self._call_pooled(connection, request.tool_name, request.arguments)
             
             self._logger.debug(f"Tool {request.tool_name} executed successfully")
             
@@ -324,15 +351,34 @@ class MCPService:
             )
     
     def _find_tool_connection(self, tool_name: str) -> Optional[MCPConnection]:
-        for connection in self.get_all_connections():
-            if not connection.tools:
-                continue
-            
-            for tool in connection.tools:
-                if tool.name == tool_name:
-                    return connection
-        
-        return None
+        qualified_name = self._tool_index.get(tool_name)
+        if qualified_name is None:
+            return None
+        return self.get_connection(qualified_name)
+    
+    async def _call_pooled(self, connection: MCPConnection, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        pooled = self._pooled.get(connection.qualified_name)
+        if pooled is None:
+            return await connection.session.call_tool(tool_name, arguments)
+        if pooled.closed:
+            # The pool closed the session (idle, failed health check or LRU); get a fresh one
+            await self._connect_server_internal(MCPConnectionRequest(
+                qualified_name=connection.qualified_name,
+                name=connection.name,
+                config=connection.config,
+                enabled_tools=connection.enabled_tools,
+                provider=connection.provider,
+                external_user_id=connection.external_user_id
+            ))
+            pooled = self._pooled[connection.qualified_name]
+        return await pooled.call_tool(tool_name, arguments)
+    
+    async def call_tool(self, qualified_name: str, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        """Call a tool on a specific connected server and return the raw MCP result."""
+        connection = self.get_connection(qualified_name)
+        if not connection or not connection.session:
+            raise MCPConnectionError(f"Not connected to MCP server: {qualified_name}")
+        return await self._call_pooled(connection, tool_name, arguments)
 
     async def discover_custom_tools(self, request_type: str, config: Dict[str, Any]) -> CustomMCPConnectionResult:
         if request_type == "http":
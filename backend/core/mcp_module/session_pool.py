@@ -0,0 +1,277 @@
+"""
+Process-wide pool of warm MCP client sessions.
+
+Opening an MCP session costs a streamable-HTTP handshake plus initialize and
+list_tools round trips. Agent runs in the same worker usually talk to the
+same servers with the same credentials, so sessions are kept open and shared,
+keyed by (server URL, credential profile, transport), where the transport is
+streamable HTTP ("http") or SSE ("sse"):
+
+- each session's transport lives in its own holder task (the MCP client
+  context managers must be entered and exited in the same task)
+- concurrent opens of the same key share one handshake
+- a session that has been quiet for MCP_SESSION_HEALTH_CHECK_SECONDS is
+  pinged before reuse and reopened if the ping fails
+- sessions idle for MCP_SESSION_IDLE_TTL_SECONDS are closed, and the least
+  recently used idle ones are closed when over MCP_SESSION_POOL_MAX_SESSIONS
+
+ClientSession multiplexes requests by id, so one session serves concurrent
+tool calls from several runs.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from core.utils.config import config
+from core.utils.logger import logger
+
+CONNECT_TIMEOUT_SECONDS = 30
+PING_TIMEOUT_SECONDS = 5
+
+PoolKey = Tuple[str, str, str]
+
+TRANSPORTS = ("http", "sse")
+
+
+def credential_profile_key(profile_id: Optional[str], headers: Optional[Dict[str, str]]) -> str:
+    """Pool key component identifying the credentials a session was opened with.
+
+    Uses the credential profile ID when there is one, otherwise a hash of the
+    request headers (so raw secrets are never used as dict keys or logged).
+    """
+    if profile_id:
+        return f"profile:{profile_id}"
+    encoded = json.dumps(headers or {}, sort_keys=True)
+    return f"headers:{hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:16]}"
+
+
+@dataclass(eq=False)
+class PooledSession:
+    key: PoolKey
+    session: Optional[ClientSession] = None
+    tools: List[Any] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.monotonic)
+    last_checked: float = field(default_factory=time.monotonic)
+    active_calls: int = 0
+    closed: bool = False
+    _stop: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def mark_suspect(self) -> None:
+        """Force a health check before this session is handed out again."""
+        self.last_checked = 0.0
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        self.active_calls += 1
+        self.last_used = time.monotonic()
+        try:
+            return await self.session.call_tool(tool_name, arguments)
+        except Exception:
+            self.mark_suspect()
+            raise
+        finally:
+            self.active_calls -= 1
+            self.last_used = time.monotonic()
+
+
+class MCPSessionPool:
+    def __init__(self):
+        self._sessions: "OrderedDict[PoolKey, PooledSession]" = OrderedDict()
+        self._opening: Dict[PoolKey, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._janitor: Optional[asyncio.Task] = None
+        self._stats = {"opened": 0, "reused": 0, "coalesced": 0, "health_check_failures": 0, "evicted_idle": 0, "evicted_lru": 0}
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None:
+            # Sessions belong to the loop that opened them and cannot be used (or closed) from another
+            logger.warning(f"MCP session pool moved to a new event loop, dropping {len(self._sessions)} sessions")
+        self._sessions.clear()
+        self._opening.clear()
+        self._loop = loop
+        self._janitor = None
+
+    async def acquire(
+        self,
+        server_url: str,
+        headers: Optional[Dict[str, str]] = None,
+        profile_key: Optional[str] = None,
+        transport: str = "http",
+    ) -> PooledSession:
+        """Return a live session for (server_url, profile_key, transport), opening one if needed."""
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unsupported MCP transport: {transport}")
+        self._bind_loop()
+        self._ensure_janitor()
+        key = (server_url, profile_key or credential_profile_key(None, headers), transport)
+
+        entry = self._sessions.get(key)
+        if entry is not None and not entry.closed:
+            if await self._is_healthy(entry):
+                self._sessions.move_to_end(key)
+                entry.last_used = time.monotonic()
+                self._stats["reused"] += 1
+                return entry
+            await self._close(entry)
+
+        pending = self._opening.get(key)
+        if pending is not None:
+            self._stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._opening[key] = future
+        try:
+            entry = await self._open(key, server_url, headers, transport)
+            self._sessions[key] = entry
+            self._stats["opened"] += 1
+            await self._enforce_limit()
+            future.set_result(entry)
+            return entry
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._opening.pop(key, None)
+
+    async def _open(self, key: PoolKey, server_url: str, headers: Optional[Dict[str, str]], transport: str) -> PooledSession:
+        entry = PooledSession(key=key)
+        ready = asyncio.get_running_loop().create_future()
+        if transport == "sse":
+            client = sse_client(server_url, headers=headers)
+        else:
+            client = streamablehttp_client(server_url, headers=headers)
+
+        async def hold():
+            try:
+                # sse_client yields (read, write); streamablehttp_client adds a session id getter
+                async with client as streams:
+                    read_stream, write_stream = streams[0], streams[1]
+                    async with ClientSession(read_stream, write_stream) as session:
+                        await session.initialize()
+                        tool_result = await session.list_tools()
+                        entry.session = session
+                        entry.tools = tool_result.tools if tool_result else []
+                        ready.set_result(None)
+                        await entry._stop.wait()
+            except asyncio.CancelledError:
+                if not ready.done():
+                    ready.cancel()
+                raise
+            except Exception as e:
+                if not ready.done():
+                    ready.set_exception(e)
+                elif not entry.closed:
+                    logger.warning(f"MCP session to {server_url} dropped: {e}")
+            finally:
+                entry.closed = True
+
+        entry._task = asyncio.create_task(hold())
+        try:
+            await asyncio.wait_for(asyncio.shield(ready), timeout=CONNECT_TIMEOUT_SECONDS)
+        except BaseException:
+            entry._stop.set()
+            entry._task.cancel()
+            raise
+        logger.debug(f"Opened pooled MCP session to {server_url} ({len(entry.tools)} tools)")
+        return entry
+
+    async def _is_healthy(self, entry: PooledSession) -> bool:
+        if time.monotonic() - entry.last_checked < config.MCP_SESSION_HEALTH_CHECK_SECONDS:
+            return True
+        try:
+            await asyncio.wait_for(entry.session.send_ping(), timeout=PING_TIMEOUT_SECONDS)
+            entry.last_checked = time.monotonic()
+            return True
+        except Exception as e:
+            self._stats["health_check_failures"] += 1
+            logger.debug(f"Pooled MCP session to {entry.key[0]} failed health check: {e}")
+            return False
+
+    async def _close(self, entry: PooledSession) -> None:
+        if self._sessions.get(entry.key) is entry:
+            self._sessions.pop(entry.key, None)
+        if entry._task is None or entry._task.done():
+            entry.closed = True
+            return
+        entry.closed = True
+        entry._stop.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(entry._task), timeout=PING_TIMEOUT_SECONDS)
+        except Exception:
+            entry._task.cancel()
+
+    async def _enforce_limit(self) -> None:
+        excess = len(self._sessions) - config.MCP_SESSION_POOL_MAX_SESSIONS
+        if excess <= 0:
+            return
+        # Oldest first; sessions with calls in flight are skipped
+        victims = [e for e in self._sessions.values() if e.active_calls == 0][:excess]
+        for entry in victims:
+            self._stats["evicted_lru"] += 1
+            await self._close(entry)
+
+    async def evict_idle(self) -> int:
+        now = time.monotonic()
+        idle = [e for e in self._sessions.values()
+                if e.closed or (e.active_calls == 0 and now - e.last_used > config.MCP_SESSION_IDLE_TTL_SECONDS)]
+        for entry in idle:
+            self._stats["evicted_idle"] += 1
+            await self._close(entry)
+        if idle:
+            logger.debug(f"Closed {len(idle)} idle MCP sessions ({len(self._sessions)} remain)")
+        return len(idle)
+
+    def _ensure_janitor(self) -> None:
+        if self._janitor is not None and not self._janitor.done():
+            return
+
+        async def janitor():
+            interval = max(5, min(60, config.MCP_SESSION_IDLE_TTL_SECONDS // 2))
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.evict_idle()
+                except Exception as e:
+                    logger.warning(f"MCP session pool eviction failed: {e}")
+
+        self._janitor = asyncio.create_task(janitor())
+
+    async def invalidate(self, server_url: str, profile_key: str, transport: str = "http") -> None:
+        entry = self._sessions.get((server_url, profile_key, transport))
+        if entry is not None:
+            await self._close(entry)
+
+    async def close_all(self) -> None:
+        for entry in list(self._sessions.values()):
+            await self._close(entry)
+        if self._janitor is not None:
+            self._janitor.cancel()
+            self._janitor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "sessions": len(self._sessions),
+            "active_calls": sum(e.active_calls for e in self._sessions.values()),
+            "max_sessions": config.MCP_SESSION_POOL_MAX_SESSIONS,
+        }
+
+
+mcp_session_pool = MCPSessionPool()
@@ -10,6 +10,7 @@ from core.agentpress.thread_manager import ThreadManager
 from core.agentpress.response_processor import ProcessorConfig
 from core.agentpress.error_processor import ErrorProcessor
 from core.utils.logger import logger
+from core.utils import task_supervisor
 from core.billing.credits.integration import billing_integration
 from core.services.langfuse import langfuse
 from core.tools.mcp_tool_wrapper import MCPToolWrapper
@@ -83,7 +84,7 @@ class AgentRunner:
                 logger.info(f"✅ [BOOTSTRAP] Phase A: {elapsed_ms:.1f}ms (under SLO)")
         
         if config.ENABLE_BOOTSTRAP_MODE:
-            self.enrichment_task = asyncio.create_task(self.setup_enrichment())
+            self.enrichment_task = task_supervisor.spawn(self.setup_enrichment(), name="enrichment")
         
         logger.debug(f"⏱️ [TIMING] setup_bootstrap() total: {elapsed_ms:.1f}ms")
     
@@ -130,7 +131,7 @@ class AgentRunner:
                 cache_stats = await tool_cache.get_stats()
                 if cache_stats.get('cached_tools', 0) < len(allowed_tools) // 2:
                     logger.info(f"🔥 [CACHE WARM] Warming cache for {len(allowed_tools)} tools...")
-                    asyncio.create_task(tool_cache.warm_cache(allowed_tools))
+                    task_supervisor.spawn(tool_cache.warm_cache(allowed_tools), name="tool_cache_warm", drain=True)
             
             self.enrichment_complete = True
             elapsed = (time.time() - enrichment_start) * 1000
@@ -166,7 +167,7 @@ class AgentRunner:
             cache_stats = await tool_cache.get_stats()
             if cache_stats.get('cached_tools', 0) < len(allowed_tools) // 2:
                 logger.info(f"🔥 [CACHE WARM] Warming cache for {len(allowed_tools)} tools...")
-                asyncio.create_task(tool_cache.warm_cache(allowed_tools))
+                task_supervisor.spawn(tool_cache.warm_cache(allowed_tools), name="tool_cache_warm", drain=True)
         
         self.thread_manager = ThreadManager(
             trace=self.config.trace, 
@@ -416,7 +417,7 @@ class AgentRunner:
                 logger.info(f"⏱️ [TIMING] AgentRunner.setup() completed in {(time.time() - setup_start) * 1000:.1f}ms")
             
             parallel_start = time.time()
-            setup_tools_task = asyncio.create_task(self._setup_tools_async())
+            setup_tools_task = task_supervisor.spawn(self._setup_tools_async(), name="setup_tools")
             await setup_tools_task
             
             if (hasattr(self.thread_manager, 'mcp_loader') and 
@@ -658,7 +659,7 @@ class AgentRunner:
                 logger.warning(f"Failed to cleanup ThreadManager: {e}")
 
             try:
-                asyncio.create_task(asyncio.to_thread(lambda: langfuse.flush()))
+                task_supervisor.spawn(asyncio.to_thread(lambda: langfuse.flush()), name="langfuse_flush", drain=True)
             except Exception as e:
                 logger.warning(f"Failed to flush Langfuse: {e}")
     
@@ -696,7 +697,7 @@ class AgentRunner:
                 
                 if not cache_only:
                     from core.jit.mcp_registry import warm_cache_for_agent_toolkits
-                    asyncio.create_task(warm_cache_for_agent_toolkits(mcp_config))
+                    task_supervisor.spawn(warm_cache_for_agent_toolkits(mcp_config), name="mcp_cache_warm", drain=True)
                 
             except Exception as e:
                 logger.error(f"❌ [MCP JIT] Initialization failed: {e}")
@@ -1,16 +1,7 @@
 import time
 from typing import Optional, List
-from core.tools.message_tool import MessageTool
-from core.tools.web_search_tool import SandboxWebSearchTool
-from core.tools.image_search_tool import SandboxImageSearchTool
-from core.tools.data_providers_tool import DataProvidersTool
-from core.tools.expand_msg_tool import ExpandMessageTool
-from core.tools.task_list_tool import TaskListTool
-from core.tools.people_search_tool import PeopleSearchTool
-from core.tools.company_search_tool import CompanySearchTool
-from core.tools.paper_search_tool import PaperSearchTool
-from core.tools.vapi_voice_tool import VapiVoiceTool
 from core.agentpress.thread_manager import ThreadManager
+from core.tools.tool_registry import get_tool_info, get_tool_class
 from core.utils.config import config, EnvMode
 from core.utils.logger import logger
 
@@ -22,6 +13,12 @@ class ToolManager:
         self.agent_config = agent_config
         self.account_id = agent_config.get('account_id') if agent_config else None
     
+    @staticmethod
+    def _load_tool_class(tool_name: str):
+        # Tool modules are imported on first registration, not when this module loads
+        _, module_path, class_name = get_tool_info(tool_name)
+        return get_tool_class(module_path, class_name)
+    
     def register_all_tools(self, agent_id: Optional[str] = None, disabled_tools: Optional[List[str]] = None, use_spark: bool = True):
         start = time.time()
         timings = {}
@@ -73,8 +70,9 @@ class ToolManager:
             logger.info(f"⚠️  [LEGACY] Tool registration complete. {len(self.thread_manager.tool_registry.tools)} functions in {total:.1f}ms")
     
     def _register_core_tools(self):
-        from core.jit.loader import JITLoader
-        from core.tools.tool_registry import get_tool_info, get_tool_class
+        ExpandMessageTool = self._load_tool_class('expand_msg_tool')
+        MessageTool = self._load_tool_class('message_tool')
+        TaskListTool = self._load_tool_class('task_list_tool')
         
         self.thread_manager.add_tool(ExpandMessageTool, thread_id=self.thread_id, thread_manager=self.thread_manager)
         self.thread_manager.add_tool(MessageTool)
@@ -82,11 +80,11 @@ class ToolManager:
         
         if config.TAVILY_API_KEY or config.FIRECRAWL_API_KEY:
             enabled_methods = self._get_enabled_methods_for_tool('web_search_tool')
-            self.thread_manager.add_tool(SandboxWebSearchTool, function_names=enabled_methods, thread_manager=self.thread_manager, project_id=self.project_id)
+            self.thread_manager.add_tool(self._load_tool_class('web_search_tool'), function_names=enabled_methods, thread_manager=self.thread_manager, project_id=self.project_id)
         
         if config.SERPER_API_KEY:
             enabled_methods = self._get_enabled_methods_for_tool('image_search_tool')
-            self.thread_manager.add_tool(SandboxImageSearchTool, function_names=enabled_methods, thread_manager=self.thread_manager, project_id=self.project_id)
+            self.thread_manager.add_tool(self._load_tool_class('image_search_tool'), function_names=enabled_methods, thread_manager=self.thread_manager, project_id=self.project_id)
         
         from core.tools.browser_tool import BrowserTool
         enabled_methods = self._get_enabled_methods_for_tool('browser_tool')
@@ -140,7 +138,7 @@ class ToolManager:
             'sb_expose_tool'
         ]
         
-        from core.tools.tool_registry import SANDBOX_TOOLS, get_tool_class
+        from core.tools.tool_registry import SANDBOX_TOOLS
         
         tools_needing_thread_id = {'sb_vision_tool', 'sb_image_edit_tool', 'sb_design_tool'}
         
@@ -169,28 +167,28 @@ class ToolManager:
     def _register_utility_tools(self, disabled_tools: List[str]):
         if config.RAPID_API_KEY and 'data_providers_tool' not in disabled_tools:
             enabled_methods = self._get_enabled_methods_for_tool('data_providers_tool')
-            self.thread_manager.add_tool(DataProvidersTool, function_names=enabled_methods)
+            self.thread_manager.add_tool(self._load_tool_class('data_providers_tool'), function_names=enabled_methods)
         
         if config.SEMANTIC_SCHOLAR_API_KEY and 'paper_search_tool' not in disabled_tools:
             if 'paper_search_tool' not in disabled_tools:
                 enabled_methods = self._get_enabled_methods_for_tool('paper_search_tool')
-                self.thread_manager.add_tool(PaperSearchTool, function_names=enabled_methods, thread_manager=self.thread_manager)
+                self.thread_manager.add_tool(self._load_tool_class('paper_search_tool'), function_names=enabled_methods, thread_manager=self.thread_manager)
         
         if config.EXA_API_KEY:
             if 'people_search_tool' not in disabled_tools:
                 enabled_methods = self._get_enabled_methods_for_tool('people_search_tool')
-                self.thread_manager.add_tool(PeopleSearchTool, function_names=enabled_methods, thread_manager=self.thread_manager)
+                self.thread_manager.add_tool(self._load_tool_class('people_search_tool'), function_names=enabled_methods, thread_manager=self.thread_manager)
             
             if 'company_search_tool' not in disabled_tools:
                 enabled_methods = self._get_enabled_methods_for_tool('company_search_tool')
-                self.thread_manager.add_tool(CompanySearchTool, function_names=enabled_methods, thread_manager=self.thread_manager)
+                self.thread_manager.add_tool(self._load_tool_class('company_search_tool'), function_names=enabled_methods, thread_manager=self.thread_manager)
         
         if config.ENV_MODE != EnvMode.PRODUCTION and config.VAPI_PRIVATE_KEY and 'vapi_voice_tool' not in disabled_tools:
             enabled_methods = self._get_enabled_methods_for_tool('vapi_voice_tool')
-            self.thread_manager.add_tool(VapiVoiceTool, function_names=enabled_methods, thread_manager=self.thread_manager)
+            self.thread_manager.add_tool(self._load_tool_class('vapi_voice_tool'), function_names=enabled_methods, thread_manager=self.thread_manager)
             
     def _register_agent_builder_tools(self, agent_id: str, disabled_tools: List[str]):
-        from core.tools.tool_registry import AGENT_BUILDER_TOOLS, get_tool_class
+        from core.tools.tool_registry import AGENT_BUILDER_TOOLS
         from core.services.supabase import DBConnection
         
         db = DBConnection()
@@ -220,7 +218,6 @@ class ToolManager:
     
     def _register_suna_specific_tools(self, disabled_tools: List[str]):
         if 'agent_creation_tool' not in disabled_tools and self.account_id:
-            from core.tools.tool_registry import get_tool_info, get_tool_class
             from core.services.supabase import DBConnection
             
             db = DBConnection()
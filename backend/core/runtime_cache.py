@@ -6,13 +6,14 @@ This module provides Redis-based caching for frequently accessed data:
 - Project metadata (sandbox info)
 - Running runs count (concurrent limit checks)
 - Thread count (thread limit checks)
+- Trigger agent snapshots (in-process, for high-volume triggers)
 
 All caches use explicit invalidation on data changes, with TTL as safety net.
 """
-import json
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from core.utils.logger import logger
+from core.utils import serialization
 
 # ============================================================================
 # STATIC SUNA CONFIG - Loaded once at startup, never expires
@@ -88,7 +89,7 @@ async def get_cached_user_mcps(agent_id: str) -> Optional[Dict[str, Any]]:
         
         cached = await redis_service.get(cache_key)
         if cached:
-            data = json.loads(cached) if isinstance(cached, (str, bytes)) else cached
+            data = serialization.loads(cached) if isinstance(cached, (str, bytes)) else cached
             logger.debug(f"⚡ Redis cache hit for user MCPs: {agent_id}")
             return data
     except Exception as e:
@@ -113,7 +114,7 @@ async def set_cached_user_mcps(
     
     try:
         from core.services import redis as redis_service
-        await redis_service.set(cache_key, json.dumps(data), ex=AGENT_CONFIG_TTL)
+        await redis_service.set(cache_key, serialization.dumps(data), ex=AGENT_CONFIG_TTL)
         logger.debug(f"✅ Cached user MCPs in Redis: {agent_id}")
     except Exception as e:
         logger.warning(f"Failed to cache user MCPs: {e}")
@@ -135,7 +136,7 @@ async def get_cached_agent_config(
         
         cached = await redis_service.get(cache_key)
         if cached:
-            data = json.loads(cached) if isinstance(cached, (str, bytes)) else cached
+            data = serialization.loads(cached) if isinstance(cached, (str, bytes)) else cached
             logger.debug(f"⚡ Redis cache hit for agent config: {agent_id}")
             return data
     except Exception as e:
@@ -165,7 +166,7 @@ async def set_cached_agent_config(
     
     try:
         from core.services import redis as redis_service
-        await redis_service.set(cache_key, json.dumps(config), ex=AGENT_CONFIG_TTL)
+        await redis_service.set(cache_key, serialization.dumps(config), ex=AGENT_CONFIG_TTL)
         logger.debug(f"✅ Cached custom agent config in Redis: {agent_id}")
     except Exception as e:
         logger.warning(f"Failed to cache agent config: {e}")
@@ -173,6 +174,7 @@ async def set_cached_agent_config(
 
 async def invalidate_agent_config_cache(agent_id: str) -> None:
     """Invalidate cached configs for an agent in Redis."""
+    invalidate_trigger_agent_snapshots(agent_id)
     try:
         from core.services import redis as redis_service
         await redis_service.delete(f"agent_config:{agent_id}:current")
@@ -182,6 +184,41 @@ async def invalidate_agent_config_cache(agent_id: str) -> None:
         logger.warning(f"Failed to invalidate cache: {e}")
 
 
+# ============================================================================
+# TRIGGER AGENT SNAPSHOTS - In-process, short TTL
+# High-volume webhook/Composio triggers reuse the resolved account + agent
+# config instead of reloading them for every event
+# ============================================================================
+TRIGGER_SNAPSHOT_TTL = 60  # 1 minute (cross-process edits show up within this window)
+_TRIGGER_AGENT_SNAPSHOTS: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+def get_trigger_agent_snapshot(trigger_id: str, agent_id: str) -> Optional[Dict[str, Any]]:
+    """Get the cached {account_id, agent_config} snapshot for a trigger's agent."""
+    entry = _TRIGGER_AGENT_SNAPSHOTS.get(trigger_id)
+    if not entry:
+        return None
+    cached_at, snapshot = entry
+    if time.time() - cached_at > TRIGGER_SNAPSHOT_TTL or snapshot.get('agent_id') != agent_id:
+        _TRIGGER_AGENT_SNAPSHOTS.pop(trigger_id, None)
+        return None
+    return snapshot
+
+def set_trigger_agent_snapshot(trigger_id: str, agent_id: str, account_id: str, agent_config: Optional[Dict[str, Any]]) -> None:
+    _TRIGGER_AGENT_SNAPSHOTS[trigger_id] = (time.time(), {
+        'agent_id': agent_id,
+        'account_id': account_id,
+        'agent_config': agent_config,
+    })
+
+def invalidate_trigger_agent_snapshots(agent_id: Optional[str] = None) -> None:
+    """Drop snapshots for one agent (or all when agent_id is None)."""
+    if agent_id is None:
+        _TRIGGER_AGENT_SNAPSHOTS.clear()
+        return
+    for trigger_id in [tid for tid, (_, snap) in _TRIGGER_AGENT_SNAPSHOTS.items() if snap.get('agent_id') == agent_id]:
+        _TRIGGER_AGENT_SNAPSHOTS.pop(trigger_id, None)
+
+
 async def warm_up_suna_config_cache() -> None:
     """
     Load static Suna config into memory at worker startup.
@@ -220,7 +257,7 @@ async def get_cached_project_metadata(project_id: str) -> Optional[Dict[str, Any
         
         cached = await redis_service.get(cache_key)
         if cached:
-            data = json.loads(cached) if isinstance(cached, (str, bytes)) else cached
+            data = serialization.loads(cached) if isinstance(cached, (str, bytes)) else cached
             logger.debug(f"⚡ Redis cache hit for project metadata: {project_id}")
             return data
     except Exception as e:
@@ -236,7 +273,7 @@ async def set_cached_project_metadata(project_id: str, sandbox: Dict[str, Any])
     
     try:
         from core.services import redis as redis_service
-        await redis_service.set(cache_key, json.dumps(data), ex=PROJECT_CACHE_TTL)
+        await redis_service.set(cache_key, serialization.dumps(data), ex=PROJECT_CACHE_TTL)
         logger.debug(f"✅ Cached project metadata in Redis: {project_id}")
     except Exception as e:
         logger.warning(f"Failed to cache project metadata: {e}")
@@ -274,7 +311,7 @@ async def get_cached_running_runs(account_id: str) -> Optional[Dict[str, Any]]:
         
         cached = await redis_service.get(cache_key)
         if cached:
-            data = json.loads(cached) if isinstance(cached, (str, bytes)) else cached
+            data = serialization.loads(cached) if isinstance(cached, (str, bytes)) else cached
             logger.debug(f"⚡ Redis cache hit for running runs: {account_id}")
             return data
     except Exception as e:
@@ -298,7 +335,7 @@ async def set_cached_running_runs(
     
     try:
         from core.services import redis as redis_service
-        await redis_service.set(cache_key, json.dumps(data), ex=RUNNING_RUNS_TTL)
+        await redis_service.set(cache_key, serialization.dumps(data), ex=RUNNING_RUNS_TTL)
         logger.debug(f"✅ Cached running runs in Redis: {account_id} ({running_count} runs)")
     except Exception as e:
         logger.warning(f"Failed to cache running runs: {e}")
@@ -1,20 +1,27 @@
+import io
 import os
+import json
 import shlex
+import base64
 import asyncio
+import binascii
+import tarfile
+import zipfile
 import urllib.parse
 import uuid
-from typing import Optional, TypeVar, Callable, Awaitable
+from typing import List, Literal, Optional, TypeVar, Callable, Awaitable
 
 from fastapi import FastAPI, UploadFile, File, HTTPException, APIRouter, Form, Depends, Request
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from daytona_sdk import AsyncSandbox, SessionExecuteRequest
 
 from core.sandbox.sandbox import get_or_start_sandbox, delete_sandbox, create_sandbox
+from core.sandbox import git_index
 from core.utils.logger import logger
 from core.utils.auth_utils import get_optional_user_id, verify_and_get_user_id_from_jwt, verify_sandbox_access, verify_sandbox_access_optional
 from core.services.supabase import DBConnection
-from core.utils.sandbox_utils import generate_unique_filename, get_uploads_directory
+from core.utils.sandbox_utils import generate_unique_filename, get_uploads_directory, read_files, write_files, delete_files
 
 T = TypeVar('T')
 
@@ -404,6 +411,195 @@ async def delete_file(
         logger.error(f"Error deleting file in sandbox {sandbox_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Batch endpoints: one auth check, one sandbox lookup and one sandbox round-trip
+# for many files, instead of a request per file
+MAX_BATCH_FILES = 500
+
+class BatchReadRequest(BaseModel):
+    paths: List[str]
+    format: Literal["zip", "tar"] = "zip"
+
+class BatchWriteFile(BaseModel):
+    path: str
+    content: str = ""
+    encoding: Literal["utf-8", "base64"] = "utf-8"
+
+class BatchWriteRequest(BaseModel):
+    files: List[BatchWriteFile]
+
+class BatchDeleteRequest(BaseModel):
+    paths: List[str]
+    recursive: bool = False
+
+def _check_batch_size(count: int) -> None:
+    if count == 0:
+        raise HTTPException(status_code=400, detail="At least one path is required")
+    if count > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"Too many files in one batch ({count} > {MAX_BATCH_FILES})")
+
+class _ArchiveBuffer:
+    """Write-only sink that the archive writers fill and the response generator drains."""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def _stream_archive(contents: dict, archive_format: str):
+    """Yield the archive member by member so the response starts before the last file is packed."""
+    buffer = _ArchiveBuffer()
+    if archive_format == "tar":
+        archive = tarfile.open(fileobj=buffer, mode="w|")
+        for path, data in contents.items():
+            info = tarfile.TarInfo(name=path.lstrip("/"))
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+            yield buffer.drain()
+    else:
+        # An unseekable sink makes zipfile write data descriptors instead of seeking back
+        archive = zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED)
+        for path, data in contents.items():
+            archive.writestr(path.lstrip("/"), data)
+            yield buffer.drain()
+    archive.close()
+    yield buffer.drain()
+
+@router.post("/sandboxes/{sandbox_id}/files/batch-read")
+async def read_files_batch(
+    sandbox_id: str,
+    body: BatchReadRequest,
+    request: Request = None,
+    user_id: Optional[str] = Depends(get_optional_user_id)
+):
+    """
+    Read many files in one request, returned as a streamed zip (default) or tar
+    archive. Members are named by their sandbox path without the leading slash.
+    Paths that could not be read are listed, URL-encoded JSON, in the
+    X-Failed-Paths header.
+    """
+    paths = list(dict.fromkeys(normalize_path(path) for path in body.paths))
+    _check_batch_size(len(paths))
+    
+    logger.debug(f"Received batch read request for sandbox {sandbox_id}, {len(paths)} paths, user_id: {user_id}")
+    client = await db.client
+    
+    # Verify the user has access to this sandbox
+    await verify_sandbox_access_optional(client, sandbox_id, user_id)
+    
+    try:
+        sandbox = await get_sandbox_by_id_safely(client, sandbox_id)
+        
+        contents, errors = await retry_with_backoff(
+            operation=lambda: read_files(sandbox, paths),
+            operation_name=f"download_files({len(paths)} paths) from sandbox {sandbox_id}"
+        )
+        # Keep the requested order in the archive
+        contents = {path: contents[path] for path in paths if path in contents}
+        if errors:
+            logger.warning(f"Batch read in sandbox {sandbox_id} could not read {len(errors)} of {len(paths)} files")
+        
+        media_type = "application/x-tar" if body.format == "tar" else "application/zip"
+        return StreamingResponse(
+            _stream_archive(contents, body.format),
+            media_type=media_type,
+            headers={
+                "Content-Disposition": f"attachment; filename=files.{body.format}",
+                "X-Failed-Paths": urllib.parse.quote(json.dumps(sorted(errors))),
+            }
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error batch reading files in sandbox {sandbox_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/sandboxes/{sandbox_id}/files/batch")
+async def write_files_batch(
+    sandbox_id: str,
+    body: BatchWriteRequest,
+    request: Request = None,
+    user_id: Optional[str] = Depends(get_optional_user_id)
+):
+    """Create or overwrite many files in one request (content is UTF-8 text or base64)"""
+    _check_batch_size(len(body.files))
+    
+    files = {}
+    for item in body.files:
+        try:
+            content = base64.b64decode(item.content, validate=True) if item.encoding == "base64" else item.content.encode('utf-8')
+        except (binascii.Error, ValueError):
+            raise HTTPException(status_code=400, detail=f"Invalid base64 content for {item.path}")
+        files[normalize_path(item.path)] = content
+    
+    logger.debug(f"Received batch write request for sandbox {sandbox_id}, {len(files)} files, user_id: {user_id}")
+    client = await db.client
+    
+    await verify_sandbox_access(client, sandbox_id, user_id)
+    
+    try:
+        sandbox = await get_sandbox_by_id_safely(client, sandbox_id)
+        
+        await retry_with_backoff(
+            operation=lambda: write_files(sandbox, files),
+            operation_name=f"upload_files({len(files)} files) to sandbox {sandbox_id}"
+        )
+        logger.debug(f"Wrote {len(files)} files in sandbox {sandbox_id}")
+        
+        return {"status": "success", "updated": True, "paths": list(files)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error batch writing files in sandbox {sandbox_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/sandboxes/{sandbox_id}/files/batch-delete")
+async def delete_files_batch(
+    sandbox_id: str,
+    body: BatchDeleteRequest,
+    request: Request = None,
+    user_id: str = Depends(verify_and_get_user_id_from_jwt)
+):
+    """Delete many files in one request; paths that do not exist are ignored"""
+    paths = list(dict.fromkeys(normalize_path(path) for path in body.paths))
+    _check_batch_size(len(paths))
+    
+    logger.debug(f"Received batch delete request for sandbox {sandbox_id}, {len(paths)} paths, user_id: {user_id}")
+    client = await db.client
+    
+    # Verify the user has access to this sandbox
+    await verify_sandbox_access(client, sandbox_id, user_id)
+    
+    try:
+        sandbox = await get_sandbox_by_id_safely(client, sandbox_id)
+        
+        await retry_with_backoff(
+            operation=lambda: delete_files(sandbox, paths, recursive=body.recursive),
+            operation_name=f"delete_files({len(paths)} paths) in sandbox {sandbox_id}"
+        )
+        logger.debug(f"Deleted {len(paths)} paths in sandbox {sandbox_id}")
+        
+        return {"status": "success", "deleted": True, "paths": paths}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error batch deleting files in sandbox {sandbox_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.delete("/sandboxes/{sandbox_id}")
 async def delete_sandbox_route(
     sandbox_id: str,
@@ -574,6 +770,18 @@ async def create_file_in_project(
         logger.error(f"Error uploading file to project {project_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _indexed_commit(sandbox: AsyncSandbox, sandbox_id: str, commit: str) -> Optional[str]:
+    """Full hash of `commit` if the git history index knows it, refreshing the index once if not."""
+    resolved = await git_index.resolve_commit(sandbox_id, commit)
+    if resolved is None and await git_index.refresh(sandbox, sandbox_id):
+        resolved = await git_index.resolve_commit(sandbox_id, commit)
+    return resolved
+
+def _content_disposition(path: str) -> str:
+    # RFC 5987 encoding of the filename to support non-ASCII characters
+    encoded_filename = urllib.parse.quote(os.path.basename(path), safe='')
+    return f"attachment; filename*=UTF-8''{encoded_filename}"
+
 @router.get("/sandboxes/{sandbox_id}/files/content-by-hash")
 async def read_file_by_hash(
     sandbox_id: str,
@@ -607,6 +815,23 @@ async def read_file_by_hash(
             rel_path = rel_path[len("/workspace/"):]
         rel_path = rel_path.lstrip("/")
 
+        # Indexed commits: resolve the blob from the cached tree; its hash is a stable ETag
+        full_commit = await _indexed_commit(sandbox, sandbox_id, commit)
+        if full_commit:
+            entry = git_index.find_blob(await git_index.get_tree(sandbox, sandbox_id, full_commit), rel_path)
+            if entry is None:
+                raise HTTPException(status_code=404, detail=f"File not found at commit {commit}")
+            blob_hash, blob_size = entry[2], entry[3]
+            headers = {
+                "ETag": f'"{blob_hash}"',
+                "Cache-Control": "private, max-age=31536000, immutable",
+                "Content-Disposition": _content_disposition(path),
+            }
+            if request is not None and request.headers.get("if-none-match") == headers["ETag"]:
+                return Response(status_code=304, headers=headers)
+            content = await git_index.read_blob(sandbox, blob_hash, blob_size)
+            return Response(content=content, media_type="application/octet-stream", headers=headers)
+
         tmp_path = f"/tmp/git_file_{uuid.uuid4().hex}"
 
         git_cmd = (
@@ -649,14 +874,10 @@ async def read_file_by_hash(
             f"Successfully read file {filename} from sandbox {sandbox_id} at commit {commit}"
         )
 
-        import urllib.parse
-        encoded_filename = urllib.parse.quote(filename, safe='')
-        content_disposition = f"attachment; filename*=UTF-8''{encoded_filename}"
-
         return Response(
             content=content,
             media_type="application/octet-stream",
-            headers={"Content-Disposition": content_disposition}
+            headers={"Content-Disposition": _content_disposition(path)}
         )
     except HTTPException:
         raise
@@ -713,6 +934,13 @@ async def list_file_history(
             rel_path = ""
         rel_path = rel_path.lstrip("/")
 
+        if await git_index.refresh(sandbox, sandbox_id):
+            versions = await git_index.file_history(sandbox_id, rel_path, limit_int)
+            return {
+                "path": path,
+                "versions": versions
+            }
+
         tmp_path = f"/tmp/git_log_{uuid.uuid4().hex}"
 
         # Use a structured git log format with field and record separators
@@ -799,6 +1027,42 @@ async def list_file_history(
             f"Error listing file history in sandbox {sandbox_id}, path {path}: {str(e)}"
         )
         raise HTTPException(status_code=500, detail=str(e))
+def _revert_effect(status: str) -> str:
+    first = status[0] if status else ""
+    if first == "D":
+        return "will_delete"   # file exists now, but not in target commit
+    if first == "A":
+        return "will_restore"  # file exists in target commit, not now
+    if first in ("M", "R", "C"):
+        return "will_modify"   # content / name changes
+    return "unknown"
+
+def _commit_info_response(header: dict, files_in_commit: list, revert_files: list, original_path: Optional[str]) -> dict:
+    # path membership checks
+    path_in_commit = False
+    path_affected_on_revert = False
+    if original_path:
+        repo_rel = normalize_path(original_path)
+        if repo_rel.startswith("/workspace/"):
+            repo_rel = repo_rel[len("/workspace/") :]
+        repo_rel = repo_rel.lstrip("/")
+
+        path_in_commit = any(f["path"] == repo_rel or f.get("old_path") == repo_rel for f in files_in_commit)
+        path_affected_on_revert = any(f["path"] == repo_rel or f.get("old_path") == repo_rel for f in revert_files)
+
+    return {
+        "commit": header["commit"],
+        "author_name": header["author_name"],
+        "author_email": header["author_email"],
+        "date": header["date"],
+        "message": header["message"],
+        "files_in_commit": files_in_commit,
+        "revert_files": revert_files,
+        "revert_affects_files": len(revert_files),
+        "path_in_commit": path_in_commit,
+        "path_affected_on_revert": path_affected_on_revert,
+    }
+
 @router.get("/sandboxes/{sandbox_id}/files/commit-info")
 async def get_commit_info(
     sandbox_id: str,
@@ -833,6 +1097,21 @@ async def get_commit_info(
     try:
         sandbox = await get_sandbox_by_id_safely(client, sandbox_id)
 
+        meta = await git_index.refresh(sandbox, sandbox_id)
+        full_commit = await git_index.resolve_commit(sandbox_id, commit) if meta else None
+        record = await git_index.get_commit(sandbox_id, full_commit) if full_commit else None
+        if record:
+            head_tree, target_tree = await asyncio.gather(
+                git_index.get_tree(sandbox, sandbox_id, meta["head"]),
+                git_index.get_tree(sandbox, sandbox_id, full_commit),
+            )
+            revert_files = [
+                {"status": status, "path": repo_path, "old_path": None, "new_path": None,
+                 "revert_effect": _revert_effect(status)}
+                for status, repo_path in git_index.diff_trees(head_tree, target_tree)
+            ]
+            return _commit_info_response(record, record["files"], revert_files, original_path)
+
         header_tmp = f"/tmp/git_commit_header_{uuid.uuid4().hex}"
         files_tmp = f"/tmp/git_commit_files_{uuid.uuid4().hex}"
         diff_tmp = f"/tmp/git_commit_diff_{uuid.uuid4().hex}"
@@ -898,12 +1177,13 @@ async def get_commit_info(
 
         header_text = header_raw.decode("utf-8", errors="ignore").strip()
         header_fields = header_text.split("\x1f") if header_text else []
-
-        commit_hash = header_fields[0] if len(header_fields) > 0 else commit
-        author_name = header_fields[1] if len(header_fields) > 1 else ""
-        author_email = header_fields[2] if len(header_fields) > 2 else ""
-        date_str = header_fields[3] if len(header_fields) > 3 else ""
-        subject = header_fields[4] if len(header_fields) > 4 else ""
+        header = {
+            "commit": header_fields[0] if len(header_fields) > 0 else commit,
+            "author_name": header_fields[1] if len(header_fields) > 1 else "",
+            "author_email": header_fields[2] if len(header_fields) > 2 else "",
+            "date": header_fields[3] if len(header_fields) > 3 else "",
+            "message": header_fields[4] if len(header_fields) > 4 else "",
+        }
 
         # --- parse files_in_commit (what this commit itself touched vs its parent) ---
         try:
@@ -914,39 +1194,7 @@ async def get_commit_info(
             except Exception:
                 pass
 
-        files_text = files_raw.decode("utf-8", errors="ignore")
-        files_in_commit = []
-
-        for ln in files_text.splitlines():
-            ln = ln.strip()
-            if not ln:
-                continue
-            parts = ln.split("\t")
-            if not parts:
-                continue
-
-            status = parts[0].strip()
-            repo_path = ""
-            old_path = None
-            new_path = None
-
-            if status and status[0] in ("R", "C") and len(parts) >= 3:
-                old_path = parts[1].strip()
-                new_path = parts[2].strip()
-                repo_path = new_path
-            elif len(parts) >= 2:
-                repo_path = parts[1].strip()
-            else:
-                repo_path = ln
-
-            files_in_commit.append(
-                {
-                    "status": status,
-                    "path": repo_path,
-                    "old_path": old_path,
-                    "new_path": new_path,
-                }
-            )
+        files_in_commit = git_index.parse_name_status(files_raw.decode("utf-8", errors="ignore"))
 
         # --- parse revert_files (HEAD -> commit: what changes if we move back) ---
         try:
@@ -957,82 +1205,12 @@ async def get_commit_info(
             except Exception:
                 pass
 
-        diff_text = diff_raw.decode("utf-8", errors="ignore")
-        revert_files = []
-
-        for ln in diff_text.splitlines():
-            ln = ln.strip()
-            if not ln:
-                continue
-            parts = ln.split("\t")
-            if not parts:
-                continue
-
-            status = parts[0].strip()
-            repo_path = ""
-            old_path = None
-            new_path = None
-
-            if status and status[0] in ("R", "C") and len(parts) >= 3:
-                old_path = parts[1].strip()
-                new_path = parts[2].strip()
-                repo_path = new_path
-            elif len(parts) >= 2:
-                repo_path = parts[1].strip()
-            else:
-                repo_path = ln
-
-            first = status[0] if status else ""
-            if first == "D":
-                revert_effect = "will_delete"   # file exists now, but not in target commit
-            elif first == "A":
-                revert_effect = "will_restore"  # file exists in target commit, not now
-            elif first in ("M", "R", "C"):
-                revert_effect = "will_modify"   # content / name changes
-            else:
-                revert_effect = "unknown"
-
-            revert_files.append(
-                {
-                    "status": status,
-                    "path": repo_path,
-                    "old_path": old_path,
-                    "new_path": new_path,
-                    "revert_effect": revert_effect,
-                }
-            )
+        revert_files = [
+            {**entry, "revert_effect": _revert_effect(entry["status"])}
+            for entry in git_index.parse_name_status(diff_raw.decode("utf-8", errors="ignore"))
+        ]
 
-        # path membership checks
-        path_in_commit = False
-        path_affected_on_revert = False
-        if original_path:
-            repo_rel = normalize_path(original_path)
-            if repo_rel.startswith("/workspace/"):
-                repo_rel = repo_rel[len("/workspace/") :]
-            repo_rel = repo_rel.lstrip("/")
-
-            for f in files_in_commit:
-                if f["path"] == repo_rel or f.get("old_path") == repo_rel:
-                    path_in_commit = True
-                    break
-
-            for f in revert_files:
-                if f["path"] == repo_rel or f.get("old_path") == repo_rel:
-                    path_affected_on_revert = True
-                    break
-
-        return {
-            "commit": commit_hash,
-            "author_name": author_name,
-            "author_email": author_email,
-            "date": date_str,
-            "message": subject,
-            "files_in_commit": files_in_commit,
-            "revert_files": revert_files,
-            "revert_affects_files": len(revert_files),
-            "path_in_commit": path_in_commit,
-            "path_affected_on_revert": path_affected_on_revert,
-        }
+        return _commit_info_response(header, files_in_commit, revert_files, original_path)
 
     except HTTPException:
         raise
@@ -1042,6 +1220,11 @@ async def get_commit_info(
         )
         raise HTTPException(status_code=500, detail=str(e))
 
+def _tree_entry_path(path: str, name: str) -> str:
+    if path.endswith('/'):
+        return f"{path}{name}"
+    return f"{path}/{name}"
+
 @router.get("/sandboxes/{sandbox_id}/files/tree")
 async def list_files_at_commit(
     sandbox_id: str,
@@ -1085,6 +1268,22 @@ async def list_files_at_commit(
             rel_path = ""
         rel_path = rel_path.lstrip("/")
 
+        full_commit = await _indexed_commit(sandbox, sandbox_id, commit)
+        if full_commit:
+            entries = git_index.list_directory(await git_index.get_tree(sandbox, sandbox_id, full_commit), rel_path)
+            result = [
+                FileInfo(
+                    name=os.path.basename(entry_path),
+                    path=_tree_entry_path(path, os.path.basename(entry_path)),
+                    is_dir=obj_type == "tree",
+                    size=size,
+                    mod_time="",
+                    permissions=mode
+                )
+                for mode, obj_type, _, size, entry_path in entries
+            ]
+            return {"files": [file.dict() for file in result]}
+
         tmp_path = f"/tmp/git_ls_tree_{uuid.uuid4().hex}"
 
         # Use git ls-tree to list files/dirs at the commit
@@ -1143,17 +1342,9 @@ async def list_files_at_commit(
 
             is_dir = obj_type == "tree"
             
-            # Construct full path
-            if path.endswith('/'):
-                full_path = f"{path}{name}"
-            elif path == "/workspace":
-                full_path = f"/workspace/{name}"
-            else:
-                full_path = f"{path}/{name}"
-
             file_info = FileInfo(
                 name=name,
-                path=full_path,
+                path=_tree_entry_path(path, name),
                 is_dir=is_dir,
                 size=0,  # git ls-tree doesn't provide size
                 mod_time="",  # We could get this from git log if needed
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Exports/minute for a 20-slide deck, with the shared browser pool versus a
+Chromium launch per export (the behaviour before browser_pool.py).
+
+Generates a synthetic deck under /workspace (the PDF router resolves slide
+paths relative to /workspace), then runs the PDF and PPTX converters
+back-to-back. "launch" mode swaps in a fresh BrowserPool for every export
+and stops it afterwards, which pays the same launch/teardown cost as the old
+per-request `async_playwright().chromium.launch`.
+
+Usage (inside the sandbox image):
+    python bench_export.py
+    python bench_export.py --exports 10 --slides 20 --format pdf
+"""
+
+import argparse
+import asyncio
+import json
+import shutil
+import time
+from pathlib import Path
+
+import browser_pool as browser_pool_module
+import html_to_pdf_router
+import html_to_pptx_router
+
+SLIDE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="UTF-8"><style>
+body {{ margin: 0; font-family: sans-serif; }}
+.slide-container {{ width: 1920px; height: 1080px; background: linear-gradient(135deg, #1e3a8a, #0f172a);
+                   color: white; padding: 120px; box-sizing: border-box; }}
+h1 {{ font-size: 96px; margin: 0 0 48px; }}
+li {{ font-size: 40px; margin: 16px 0; }}
+.chart {{ width: 600px; height: 300px; border-radius: 24px; background: #38bdf8; margin-top: 48px; }}
+</style></head><body><div class="slide-container">
+<h1>Slide {num}: Quarterly review</h1>
+<ul><li>Revenue up {num}% quarter over quarter</li><li>Churn down to 2.{num}%</li><li>Three new regions launched</li></ul>
+<div class="chart"></div>
+</div></body></html>
+"""
+
+
+def build_deck(deck_dir: Path, slides: int) -> None:
+    shutil.rmtree(deck_dir, ignore_errors=True)
+    deck_dir.mkdir(parents=True)
+    metadata = {"presentation_name": "bench_deck", "slides": {}}
+    for num in range(1, slides + 1):
+        filename = f"slide_{num:02d}.html"
+        (deck_dir / filename).write_text(SLIDE_TEMPLATE.format(num=num), encoding="utf-8")
+        metadata["slides"][str(num)] = {
+            "filename": filename,
+            "file_path": str((deck_dir / filename).relative_to("/workspace")),
+            "title": f"Slide {num}",
+        }
+    (deck_dir / "metadata.json").write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+
+
+async def export_once(fmt: str, deck_dir: Path) -> None:
+    if fmt == "pdf":
+        await html_to_pdf_router.PresentationToPDFAPI(str(deck_dir)).convert_to_pdf(store_locally=False)
+    else:
+        await html_to_pptx_router.OptimizedHTMLToPPTXConverter(str(deck_dir)).convert_to_pptx(store_locally=False)
+
+
+def _use_pool(pool) -> None:
+    html_to_pdf_router.browser_pool = pool
+    html_to_pptx_router.browser_pool = pool
+
+
+async def run_mode(mode: str, fmt: str, deck_dir: Path, exports: int) -> float:
+    """Exports per minute for one mode."""
+    shared = None
+    if mode == "pool":
+        shared = browser_pool_module.BrowserPool()
+        await shared.start()
+        _use_pool(shared)
+        await export_once(fmt, deck_dir)  # warm-up, not timed
+
+    started = time.monotonic()
+    for _ in range(exports):
+        if mode == "launch":
+            pool = browser_pool_module.BrowserPool()
+            _use_pool(pool)
+            try:
+                await export_once(fmt, deck_dir)
+            finally:
+                await pool.stop()
+        else:
+            await export_once(fmt, deck_dir)
+    elapsed = time.monotonic() - started
+
+    if shared is not None:
+        print(f"   pool stats: {shared.get_stats()}")
+        await shared.stop()
+    return exports / elapsed * 60
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark presentation exports per minute")
+    parser.add_argument("--exports", type=int, default=5, help="Timed exports per mode")
+    parser.add_argument("--slides", type=int, default=20, help="Slides in the synthetic deck")
+    parser.add_argument("--format", choices=["pdf", "pptx", "both"], default="both")
+    parser.add_argument("--dir", default="/workspace/bench_export_deck", help="Deck directory (must be under /workspace)")
+    args = parser.parse_args()
+
+    deck_dir = Path(args.dir)
+    build_deck(deck_dir, args.slides)
+    formats = ["pdf", "pptx"] if args.format == "both" else [args.format]
+
+    results = {}
+    for fmt in formats:
+        for mode in ("launch", "pool"):
+            print(f"▶ {fmt} / {mode}: {args.exports} exports of {args.slides} slides")
+            results[(fmt, mode)] = await run_mode(mode, fmt, deck_dir, args.exports)
+
+    print(f"\n=== Exports/minute, {args.slides}-slide deck ===")
+    print(f"  {'format':<6}  {'launch':>8}  {'pool':>8}  {'speedup':>7}")
+    for fmt in formats:
+        launch, pool = results[(fmt, "launch")], results[(fmt, "pool")]
+        print(f"  {fmt:<6}  {launch:>8.2f}  {pool:>8.2f}  {pool / launch:>6.2f}x")
+
+    shutil.rmtree(deck_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
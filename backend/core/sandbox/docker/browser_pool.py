@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Shared headless Chromium for the presentation export routers.
+
+The PDF and PPTX converters used to launch a new Chromium (1-2s and a few
+hundred MB) for every export. server.py now starts one long-lived browser
+at startup and the routers borrow from it:
+
+- Pre-warmed contexts: WARM_CONTEXTS contexts (1920x1080, DPR 1) are kept
+  ready. Each export leases one for its duration, so exports never share
+  cookies/storage, and a fresh one is warmed in the background when the
+  lease ends.
+- Page recycling: pages are opened per slide and always closed afterwards.
+  A leased context is closed after the export (or after PAGES_PER_CONTEXT
+  pages), and the whole browser is relaunched once it has served
+  RECYCLE_AFTER_EXPORTS exports and is idle, which bounds Chromium memory
+  growth.
+- Concurrency limits: at most PAGES_PER_REQUEST pages per export and
+  MAX_PAGES pages across all exports.
+- Crash recovery: when Chromium disconnects, the next page request
+  relaunches it, and exports holding a context from the dead browser
+  transparently get a new one.
+
+Usage:
+    async with browser_pool.session() as session:
+        async with session.page() as page:
+            await page.goto(...)
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:
+    raise ImportError("Playwright is not installed. Please install it with: pip install playwright")
+
+
+WARM_CONTEXTS = int(os.getenv("BROWSER_POOL_WARM_CONTEXTS", "2"))
+MAX_PAGES = int(os.getenv("BROWSER_POOL_MAX_PAGES", "10"))
+PAGES_PER_REQUEST = int(os.getenv("BROWSER_POOL_PAGES_PER_REQUEST", "5"))
+PAGES_PER_CONTEXT = int(os.getenv("BROWSER_POOL_PAGES_PER_CONTEXT", "200"))
+RECYCLE_AFTER_EXPORTS = int(os.getenv("BROWSER_POOL_RECYCLE_AFTER_EXPORTS", "100"))
+
+VIEWPORT = {"width": 1920, "height": 1080}
+
+CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--force-device-scale-factor=1',
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--disable-features=VizDisplayCompositor',
+    '--disable-extensions',
+    '--disable-plugins',
+    '--disable-web-security',
+    '--disable-features=TranslateUI',
+    '--disable-ipc-flooding-protection',
+]
+
+
+class ExportSession:
+    """One export's lease on the pool: a private context plus a page budget."""
+
+    def __init__(self, pool: "BrowserPool", max_pages: int):
+        self._pool = pool
+        self._semaphore = asyncio.Semaphore(max_pages)
+        self._context = None
+        self._generation = -1
+        self._pages_opened = 0
+        self._context_lock = asyncio.Lock()
+
+    async def _get_context(self):
+        async with self._context_lock:
+            stale = self._generation != self._pool.generation or not self._pool.is_connected()
+            if self._context is None or stale or self._pages_opened >= PAGES_PER_CONTEXT:
+                if self._context is not None and not stale:
+                    await self._pool._close_context(self._context)
+                self._context, self._generation = await self._pool._lease_context()
+                self._pages_opened = 0
+            self._pages_opened += 1
+            return self._context
+
+    @asynccontextmanager
+    async def page(self):
+        """Open a page in this export's context; it is closed when the block exits."""
+        async with self._semaphore, self._pool._page_slots:
+            context = await self._get_context()
+            page = await context.new_page()
+            try:
+                yield page
+            finally:
+                try:
+                    await page.close()
+                except Exception:
+                    pass  # Page might already be closed due to crash
+
+    async def _release(self):
+        if self._context is not None and self._generation == self._pool.generation:
+            await self._pool._close_context(self._context)
+        self._context = None
+
+
+class BrowserPool:
+    def __init__(self):
+        self._playwright = None
+        self._browser = None
+        self._warm: List = []
+        self._launch_lock = asyncio.Lock()
+        self._page_slots = asyncio.Semaphore(MAX_PAGES)
+        self._active_sessions = 0
+        self._exports_since_launch = 0
+        self._refill_task: Optional[asyncio.Task] = None
+        self.generation = 0
+        self.stats = {"launches": 0, "crashes": 0, "recycles": 0, "exports": 0,
+                      "warm_hits": 0, "cold_contexts": 0}
+
+    def is_connected(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def start(self):
+        """Launch Chromium and warm contexts (called from server.py startup)."""
+        await self._ensure_browser()
+        await self._refill()
+
+    async def stop(self):
+        if self._refill_task:
+            self._refill_task.cancel()
+        await self._shutdown_browser()
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _ensure_browser(self):
+        if self.is_connected():
+            return
+        async with self._launch_lock:
+            if self.is_connected():
+                return
+            if self._browser is not None:
+                print("⚠ Browser pool: Chromium disconnected, relaunching")
+                self.stats["crashes"] += 1
+                await self._shutdown_browser()
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            started = time.monotonic()
+            self._browser = await self._playwright.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+            self.generation += 1
+            self._exports_since_launch = 0
+            self.stats["launches"] += 1
+            print(f"🌐 Browser pool: Chromium launched in {time.monotonic() - started:.2f}s (generation {self.generation})")
+
+    async def _shutdown_browser(self):
+        warm, self._warm = self._warm, []
+        for context in warm:
+            await self._close_context(context)
+        browser, self._browser = self._browser, None
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+
+    async def _new_context(self):
+        context = await self._browser.new_context(viewport=VIEWPORT, device_scale_factor=1)
+        return context
+
+    async def _close_context(self, context):
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def _refill(self):
+        try:
+            await self._ensure_browser()
+            generation, browser = self.generation, self._browser
+            while len(self._warm) < WARM_CONTEXTS and self.is_connected():
+                context = await self._new_context()
+                # A recycle or relaunch while new_context was awaited already
+                # emptied _warm; a context from the old browser must not go back in
+                if self.generation != generation or self._browser is not browser:
+                    await self._close_context(context)
+                    return
+                self._warm.append(context)
+        except Exception as e:
+            print(f"⚠ Browser pool: failed to warm contexts: {e}")
+
+    def _schedule_refill(self):
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def _lease_context(self):
+        """A ready context and the browser generation it belongs to."""
+        await self._ensure_browser()
+        generation = self.generation
+        if self._warm:
+            context = self._warm.pop()
+            self.stats["warm_hits"] += 1
+        else:
+            context = await self._new_context()
+            self.stats["cold_contexts"] += 1
+        self._schedule_refill()
+        return context, generation
+
+    async def _maybe_recycle(self):
+        if self._active_sessions or self._exports_since_launch < RECYCLE_AFTER_EXPORTS:
+            return
+        async with self._launch_lock:
+            if self._active_sessions:
+                return
+            print(f"♻ Browser pool: recycling Chromium after {self._exports_since_launch} exports")
+            self.stats["recycles"] += 1
+            await self._shutdown_browser()
+        self._schedule_refill()
+
+    @asynccontextmanager
+    async def session(self, max_pages: int = PAGES_PER_REQUEST):
+        """Lease the pool for one export."""
+        session = ExportSession(self, max(1, min(max_pages, MAX_PAGES)))
+        self._active_sessions += 1
+        try:
+            yield session
+        finally:
+            await session._release()
+            self._active_sessions -= 1
+            self._exports_since_launch += 1
+            self.stats["exports"] += 1
+            await self._maybe_recycle()
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "connected": self.is_connected(),
+            "generation": self.generation,
+            "warm_contexts": len(self._warm),
+            "active_exports": self._active_sessions,
+            "exports_since_launch": self._exports_since_launch,
+        }
+
+
+browser_pool = BrowserPool()
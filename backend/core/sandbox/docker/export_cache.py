@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Per-slide artifact cache for presentation exports.
+
+Rendered per-slide artifacts (PDF pages today) are stored under
+EXPORT_CACHE_DIR/<name>/ and addressed by sha256 of the converter version,
+the presentation directory, the slide HTML and the path, size and mtime of
+every local asset the slide references (images, CSS, fonts, and url()s
+inside referenced CSS). An export only renders slides whose HTML or assets
+changed since an earlier export and reassembles the document from cached
+parts; two decks with identical slide HTML never share an entry. Bump the
+converter's version constant whenever its rendering output changes.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Iterable, List, Optional
+from urllib.parse import unquote, urlsplit
+
+EXPORT_CACHE_DIR = Path(os.getenv("EXPORT_CACHE_DIR", "/tmp/presentation_export_cache"))
+EXPORT_CACHE_MAX_ENTRIES = int(os.getenv("EXPORT_CACHE_MAX_ENTRIES", "1000"))
+
+
+_HTML_REF_RE = re.compile(rb"""(?:src|href|poster)\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+_CSS_URL_RE = re.compile(rb"""url\(\s*["']?([^"')]+)["']?\s*\)|@import\s+["']([^"']+)["']""", re.IGNORECASE)
+
+
+def _local_refs(data: bytes, base_dir: Path) -> Iterable[Path]:
+    """Local files referenced by src/href/url() in HTML or CSS, resolved against base_dir."""
+    for match in list(_HTML_REF_RE.finditer(data)) + list(_CSS_URL_RE.finditer(data)):
+        raw = next(group for group in match.groups() if group)
+        ref = raw.decode("utf-8", errors="ignore").strip()
+        parts = urlsplit(ref)
+        if parts.scheme not in ("", "file") or parts.netloc or not parts.path:
+            continue  # remote, data: and protocol-relative URLs
+        path = Path(unquote(parts.path))
+        yield path if path.is_absolute() else base_dir / path
+
+
+def _asset_fingerprints(html_path: Path, html: bytes) -> List[str]:
+    """path:size:mtime of each local asset a slide references, one level into CSS."""
+    seen = set()
+    fingerprints = []
+    pending = [(ref, True) for ref in _local_refs(html, html_path.parent)]
+    while pending:
+        path, follow_css = pending.pop()
+        try:
+            resolved = path.resolve()
+            if resolved in seen:
+                continue
+            seen.add(resolved)
+            stat = resolved.stat()
+        except OSError:
+            continue
+        if not resolved.is_file():
+            continue
+        fingerprints.append(f"{resolved}:{stat.st_size}:{stat.st_mtime_ns}")
+        if follow_css and resolved.suffix.lower() == ".css":
+            try:
+                css = resolved.read_bytes()
+            except OSError:
+                continue
+            pending.extend((ref, False) for ref in _local_refs(css, resolved.parent))
+    return sorted(fingerprints)
+
+
+def slide_key(html_path: Path, version: str) -> str:
+    """Address of a slide's rendering for a given converter version (see module docstring)."""
+    html_path = Path(html_path)
+    html = html_path.read_bytes()
+    digest = hashlib.sha256(version.encode())
+    for part in (str(html_path.resolve().parent).encode(), html, *(f.encode() for f in _asset_fingerprints(html_path, html))):
+        digest.update(b"\0")
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class SlideArtifactCache:
+    def __init__(self, name: str, version: str, suffix: str, max_entries: int = EXPORT_CACHE_MAX_ENTRIES):
+        self.root = EXPORT_CACHE_DIR / name
+        self.version = version
+        self.suffix = suffix
+        self.max_entries = max_entries
+
+    def key_for(self, html_path: Path) -> str:
+        return slide_key(html_path, self.version)
+
+    def get(self, key: str) -> Optional[Path]:
+        path = self.root / f"{key}{self.suffix}"
+        try:
+            os.utime(path)  # Keep recently used artifacts out of pruning
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, source: Path) -> None:
+        path = self.root / f"{key}{self.suffix}"
+        staging = self.root / f".{key}.{os.getpid()}.{id(source)}{self.suffix}"
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source, staging)
+            os.replace(staging, path)
+        except Exception as e:
+            print(f"⚠ Failed to cache slide artifact {path.name}: {e}")
+            try:
+                staging.unlink()
+            except FileNotFoundError:
+                pass
+
+    def prune(self) -> None:
+        """Drop least recently used artifacts beyond max_entries."""
+        try:
+            entries = [p for p in self.root.iterdir() if p.is_file() and not p.name.startswith('.')]
+        except FileNotFoundError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda p: p.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                pass
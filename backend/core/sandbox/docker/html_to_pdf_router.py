@@ -16,10 +16,8 @@ from fastapi.responses import Response
 from urllib.parse import quote
 from pydantic import BaseModel, Field
 
-try:
-    from playwright.async_api import async_playwright
-except ImportError:
-    raise ImportError("Playwright is not installed. Please install it with: pip install playwright")
+from browser_pool import browser_pool
+from export_cache import SlideArtifactCache
 
 try:
     from PyPDF2 import PdfWriter, PdfReader
@@ -36,6 +34,11 @@ output_dir = Path(workspace_dir) / "downloads"
 output_dir.mkdir(parents=True, exist_ok=True)
 
 
+# Bump when render_slide_to_pdf output changes so cached pages are re-rendered
+PDF_RENDER_VERSION = "1"
+pdf_page_cache = SlideArtifactCache("pdf_pages", PDF_RENDER_VERSION, ".pdf")
+
+
 class ConvertRequest(BaseModel):
     presentation_path: str = Field(..., description="Path to the presentation folder containing metadata.json")
     download: bool = Field(False, description="If true, returns the PDF file directly. If false, returns JSON with download URL.")
@@ -47,6 +50,7 @@ class ConvertResponse(BaseModel):
     pdf_url: str
     filename: str
     total_slides: int
+    cached_slides: int = 0
 
 
 class PresentationToPDFAPI:
@@ -56,6 +60,7 @@ class PresentationToPDFAPI:
         self.metadata_path = self.presentation_dir / "metadata.json"
         self.metadata = None
         self.slides_info = []
+        self.cached_slides = 0
         
         # Validate inputs
         if not self.presentation_dir.exists():
@@ -108,7 +113,7 @@ class PresentationToPDFAPI:
         except Exception as e:
             raise ValueError(f"Error loading metadata: {e}")
     
-    async def render_slide_to_pdf(self, browser, slide_info: Dict, temp_dir: Path, max_retries: int = 3) -> Path:
+    async def render_slide_to_pdf(self, session, slide_info: Dict, temp_dir: Path, max_retries: int = 3) -> Path:
         """Render a single HTML slide to PDF using Playwright with retry logic."""
         html_path = slide_info['path']
         slide_num = slide_info['number']
@@ -116,7 +121,6 @@ class PresentationToPDFAPI:
         last_error = None
         
         for attempt in range(max_retries):
-            page = None
             try:
                 if attempt > 0:
                     print(f"  ⟳ Retry {attempt}/{max_retries - 1} for slide {slide_num}...")
@@ -125,65 +129,65 @@ class PresentationToPDFAPI:
                 else:
                     print(f"Rendering slide {slide_num}: {slide_info['title']}")
                 
-                # Create new page with exact presentation dimensions
-                page = await browser.new_page()
-                
-                # Set exact viewport to 1920x1080
-                await page.set_viewport_size({"width": 1920, "height": 1080})
-                await page.emulate_media(media='screen')
+                # Pooled page in this export's context (1920x1080 viewport, DPR 1);
+                # closed again when the block exits, even if Chromium crashed
+                async with session.page() as page:
+                    # Set exact viewport to 1920x1080
+                    await page.set_viewport_size({"width": 1920, "height": 1080})
+                    await page.emulate_media(media='screen')
                 
-                # Override device pixel ratio for exact dimensions
-                await page.evaluate("""
-                    () => {
-                        Object.defineProperty(window, 'devicePixelRatio', {
-                            get: () => 1
-                        });
-                    }
-                """)
+                    # Override device pixel ratio for exact dimensions
+                    await page.evaluate("""
+                        () => {
+                            Object.defineProperty(window, 'devicePixelRatio', {
+                                get: () => 1
+                            });
+                        }
+                    """)
                 
-                # Navigate to the HTML file
-                file_url = f"file://{html_path.absolute()}"
-                await page.goto(file_url, wait_until="networkidle", timeout=30000)
+                    # Navigate to the HTML file
+                    file_url = f"file://{html_path.absolute()}"
+                    await page.goto(file_url, wait_until="networkidle", timeout=30000)
                 
-                # Wait for fonts and dynamic content to load
-                await page.wait_for_timeout(3000)
+                    # Wait for fonts and dynamic content to load
+                    await page.wait_for_timeout(3000)
                 
-                # Ensure exact slide dimensions
-                await page.evaluate("""
-                    () => {
-                        const slideContainer = document.querySelector('.slide-container');
-                        if (slideContainer) {
-                            slideContainer.style.width = '1920px';
-                            slideContainer.style.height = '1080px';
-                            slideContainer.style.transform = 'none';
-                            slideContainer.style.maxWidth = 'none';
-                            slideContainer.style.maxHeight = 'none';
-                        }
+                    # Ensure exact slide dimensions
+                    await page.evaluate("""
+                        () => {
+                            const slideContainer = document.querySelector('.slide-container');
+                            if (slideContainer) {
+                                slideContainer.style.width = '1920px';
+                                slideContainer.style.height = '1080px';
+                                slideContainer.style.transform = 'none';
+                                slideContainer.style.maxWidth = 'none';
+                                slideContainer.style.maxHeight = 'none';
+                            }
                         
-                        document.body.style.margin = '0';
-                        document.body.style.padding = '0';
-                        document.body.style.width = '1920px';
-                        document.body.style.height = '1080px';
-                        document.body.style.overflow = 'hidden';
-                    }
-                """)
+                            document.body.style.margin = '0';
+                            document.body.style.padding = '0';
+                            document.body.style.width = '1920px';
+                            document.body.style.height = '1080px';
+                            document.body.style.overflow = 'hidden';
+                        }
+                    """)
                 
-                await page.wait_for_timeout(1000)
+                    await page.wait_for_timeout(1000)
                 
-                # Generate PDF for this slide
-                temp_pdf_path = temp_dir / f"slide_{slide_num:02d}.pdf"
+                    # Generate PDF for this slide
+                    temp_pdf_path = temp_dir / f"slide_{slide_num:02d}.pdf"
                 
-                await page.pdf(
-                    path=str(temp_pdf_path),
-                    width="1920px",
-                    height="1080px",
-                    margin={"top": "0", "right": "0", "bottom": "0", "left": "0"},
-                    print_background=True,
-                    prefer_css_page_size=False
-                )
+                    await page.pdf(
+                        path=str(temp_pdf_path),
+                        width="1920px",
+                        height="1080px",
+                        margin={"top": "0", "right": "0", "bottom": "0", "left": "0"},
+                        print_background=True,
+                        prefer_css_page_size=False
+                    )
                 
-                print(f"  ✓ Slide {slide_num} rendered")
-                return temp_pdf_path
+                    print(f"  ✓ Slide {slide_num} rendered")
+                    return temp_pdf_path
                 
             except Exception as e:
                 last_error = e
@@ -201,12 +205,6 @@ class PresentationToPDFAPI:
                 else:
                     # Non-retryable error or exhausted retries
                     break
-            finally:
-                if page:
-                    try:
-                        await page.close()
-                    except Exception:
-                        pass  # Page might already be closed due to crash
         
         raise RuntimeError(f"Error rendering slide {slide_num} after {max_retries} attempts: {last_error}")
     
@@ -244,51 +242,47 @@ class PresentationToPDFAPI:
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
             
-            # Launch browser
-            async with async_playwright() as p:
-                print("🌐 Launching browser...")
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-setuid-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-gpu',
-                        '--force-device-scale-factor=1',
-                        '--disable-background-timer-throttling',
-                        '--single-process',  # More stable for PDF generation
-                    ]
-                )
-                
-                try:
-                    # Limit concurrent renders to prevent memory pressure
-                    # 5 concurrent slides balances speed and stability
-                    max_concurrent = 5
-                    semaphore = asyncio.Semaphore(max_concurrent)
-                    
-                    async def render_with_limit(slide_info):
-                        async with semaphore:
-                            return await self.render_slide_to_pdf(browser, slide_info, temp_path)
-                    
-                    print(f"📄 Processing {len(self.slides_info)} slides (max {max_concurrent} concurrent)...")
+            # Reuse pages rendered by earlier exports; only slides whose HTML changed are rendered
+            pdf_paths = {}
+            dirty_slides = []
+            for slide_info in self.slides_info:
+                slide_info['cache_key'] = pdf_page_cache.key_for(slide_info['path'])
+                cached_page = pdf_page_cache.get(slide_info['cache_key'])
+                if cached_page is not None:
+                    pdf_paths[slide_info['number']] = cached_page
+                else:
+                    dirty_slides.append(slide_info)
+            self.cached_slides = len(pdf_paths)
+            
+            if dirty_slides:
+                # Borrow the shared browser (launched once at server startup)
+                # Limit concurrent renders to prevent memory pressure
+                # 5 concurrent slides balances speed and stability
+                max_concurrent = 5
+                async with browser_pool.session(max_pages=max_concurrent) as session:
+                    print(f"📄 Rendering {len(dirty_slides)} of {len(self.slides_info)} slides (max {max_concurrent} concurrent)...")
                     
                     tasks = [
-                        render_with_limit(slide_info)
-                        for slide_info in self.slides_info
+                        self.render_slide_to_pdf(session, slide_info, temp_path)
+                        for slide_info in dirty_slides
                     ]
                     
                     # Wait for all slides to be processed
-                    pdf_paths = await asyncio.gather(*tasks)
-                    
-                finally:
-                    await browser.close()
+                    rendered_paths = await asyncio.gather(*tasks)
+                
+                for slide_info, rendered_path in zip(dirty_slides, rendered_paths):
+                    pdf_page_cache.put(slide_info['cache_key'], rendered_path)
+                    pdf_paths[slide_info['number']] = rendered_path
+                pdf_page_cache.prune()
+            else:
+                print(f"♻ All {len(self.slides_info)} slides unchanged, reassembling from cache")
             
             # Create output path
             presentation_name = self.metadata.get('presentation_name', 'presentation')
             temp_output_path = temp_path / f"{presentation_name}.pdf"
             
             # Combine all PDFs (sort by slide number to maintain order)
-            sorted_pdf_paths = sorted(pdf_paths, key=lambda p: int(p.stem.split('_')[1]))
+            sorted_pdf_paths = [pdf_paths[number] for number in sorted(pdf_paths)]
             self.combine_pdfs(sorted_pdf_paths, temp_output_path)
             
             if store_locally:
@@ -347,7 +341,8 @@ async def convert_presentation_to_pdf(request: ConvertRequest):
             message=f"PDF generated successfully with {total_slides} slides",
             pdf_url=pdf_url,
             filename=pdf_path.name,
-            total_slides=total_slides
+            total_slides=total_slides,
+            cached_slides=converter.cached_slides
         )
         
     except FileNotFoundError as e:
@@ -362,4 +357,4 @@ async def convert_presentation_to_pdf(request: ConvertRequest):
 @router.get("/health")
 async def pdf_health_check():
     """PDF service health check endpoint."""
-    return {"status": "healthy", "service": "HTML to PDF Converter"}
\ No newline at end of file
+    return {"status": "healthy", "service": "HTML to PDF Converter", "browser_pool": browser_pool.get_stats()}
\ No newline at end of file
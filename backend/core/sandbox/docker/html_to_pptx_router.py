@@ -9,21 +9,20 @@ Uses smart batching and resource cleanup to handle large presentations efficient
 import json
 import asyncio
 import os
+import time
 from pathlib import Path
 from typing import Dict, List, Optional
 import tempfile
 import shutil
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import Response
 from urllib.parse import quote
 from pydantic import BaseModel, Field
 
-try:
-    from playwright.async_api import async_playwright
-except ImportError:
-    raise ImportError("Playwright is not installed. Please install it with: pip install playwright")
+from browser_pool import browser_pool
+from export_cache import EXPORT_CACHE_DIR, slide_key
 
 try:
     from pptx import Presentation
@@ -54,6 +53,7 @@ class ConvertResponse(BaseModel):
     pptx_url: str
     filename: str
     total_slides: int
+    cached_slides: int = 0
 
 
 @dataclass
@@ -129,6 +129,102 @@ class CSSParser:
         return weight_str in bold_weights or (weight_str.isdigit() and int(weight_str) >= 700)
 
 
+# Bump when the analysis output changes so stale cache entries are ignored
+ANALYSIS_VERSION = "1"
+ANALYSIS_CACHE_DIR = Path(os.getenv("PPTX_ANALYSIS_CACHE_DIR", str(EXPORT_CACHE_DIR / "pptx_analysis")))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("PPTX_ANALYSIS_CACHE_MAX_ENTRIES", "500"))
+
+
+class SlideAnalysisCache:
+    """
+    On-disk cache of per-slide analyses (text elements, visual element images and
+    clean background), keyed by export_cache.slide_key (presentation directory,
+    slide HTML and the referenced local assets), so re-exporting a deck only
+    re-analyzes slides whose HTML or assets changed.
+
+    Each entry is a directory holding analysis.json and the captured PNGs.
+    """
+
+    def __init__(self, root: Path = ANALYSIS_CACHE_DIR, max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES):
+        self.root = root
+        self.max_entries = max_entries
+
+    @staticmethod
+    def key_for(html_path: Path) -> str:
+        return slide_key(html_path, ANALYSIS_VERSION)
+
+    def load(self, key: str) -> Optional[Dict]:
+        entry = self.root / key
+        try:
+            with open(entry / "analysis.json", 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            background_path = entry / data['background'] if data.get('background') else None
+            visual_elements = [
+                {**element, 'image_path': entry / element['image_path']}
+                for element in data['visual_elements']
+            ]
+            if any(not element['image_path'].exists() for element in visual_elements):
+                return None
+            os.utime(entry)  # Keep recently used entries out of pruning
+            return {
+                'visual_elements': visual_elements,
+                'background_path': background_path,
+                'text_elements': [TextElement(**element) for element in data['text_elements']],
+            }
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠ Ignoring unreadable analysis cache entry {key}: {e}")
+            return None
+
+    def store(self, key: str, visual_elements: List[Dict], background_path: Optional[Path],
+              text_elements: List[TextElement]) -> None:
+        entry = self.root / key
+        if entry.exists():
+            return
+        staging = self.root / f".{key}.{os.getpid()}.{id(visual_elements)}"
+        try:
+            staging.mkdir(parents=True)
+            stored_visuals = []
+            for element in visual_elements:
+                image_path = Path(element['image_path'])
+                if not image_path.exists():
+                    continue
+                shutil.copy2(image_path, staging / image_path.name)
+                stored_visuals.append({**element, 'image_path': image_path.name})
+            background = None
+            if background_path and Path(background_path).exists():
+                shutil.copy2(background_path, staging / Path(background_path).name)
+                background = Path(background_path).name
+            with open(staging / "analysis.json", 'w', encoding='utf-8') as f:
+                json.dump({
+                    'visual_elements': stored_visuals,
+                    'background': background,
+                    'text_elements': [asdict(element) for element in text_elements],
+                }, f)
+            # Atomic publish; loses harmlessly to a concurrent export storing the same slide
+            os.rename(staging, entry)
+        except Exception as e:
+            print(f"⚠ Failed to cache slide analysis {key}: {e}")
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def prune(self) -> None:
+        """Drop least recently used entries beyond max_entries."""
+        try:
+            entries = [p for p in self.root.iterdir() if p.is_dir() and not p.name.startswith('.')]
+        except FileNotFoundError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda p: p.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+slide_analysis_cache = SlideAnalysisCache()
+
+
 class OptimizedHTMLToPPTXConverter:
     def __init__(self, presentation_dir: str):
         """Initialize the optimized converter."""
@@ -136,6 +232,7 @@ class OptimizedHTMLToPPTXConverter:
         self.metadata_path = self.presentation_dir / "metadata.json"
         self.metadata = None
         self.slides_info = []
+        self.cached_slides = 0
         
         # Validate inputs
         if not self.presentation_dir.exists():
@@ -188,19 +285,83 @@ class OptimizedHTMLToPPTXConverter:
         except Exception as e:
             raise ValueError(f"Error loading metadata: {e}")
     
-    async def extract_visual_elements(self, page, html_path: Path, temp_dir: Path) -> List[Dict]:
-        """Extract all visual elements (non-text) as individual images with positioning."""
+    async def load_slide(self, page, html_path: Path) -> None:
+        """Navigate to a slide once and wait for fonts and dynamic content."""
+        # Set exact viewport dimensions
+        await page.set_viewport_size({"width": 1920, "height": 1080})
+        await page.emulate_media(media='screen')
+        
+        # Force device pixel ratio to 1 for exact measurements
+        await page.evaluate(r"""
+            () => {
+                Object.defineProperty(window, 'devicePixelRatio', {
+                    get: () => 1
+                });
+            }
+        """)
+        
+        # Use file:// URL instead of set_content to preserve relative paths
+        file_url = f"file://{html_path.resolve()}"
+        await page.goto(file_url, wait_until="networkidle", timeout=25000)
+        await page.wait_for_timeout(2000)
+    
+    def cached_analysis(self, slide_info: Dict) -> Optional[Dict]:
+        """Analysis from a previous export of the same slide HTML, if any."""
+        cached = slide_analysis_cache.load(slide_analysis_cache.key_for(slide_info['path']))
+        if cached is None:
+            return None
+        print(f"♻ Slide {slide_info['number']}: reusing cached analysis")
+        return {'slide_info': slide_info, **cached}
+    
+    async def analyze_slide(self, page, slide_info: Dict, temp_dir: Path) -> Dict:
+        """
+        Analyze a slide from a single page load and cache the result.
+        
+        Text is extracted first because it reads computed colors; visual element
+        capture then makes text transparent, which the clean background needs anyway.
+        """
+        html_path = slide_info['path']
+        key = slide_analysis_cache.key_for(html_path)
+        
+        await self.load_slide(page, html_path)
+        
+        # Extract text elements
+        text_elements = await self.extract_text_elements(page, html_path, navigate=False)
+        
+        # Extract visual elements
+        visual_elements = await self.extract_visual_elements(page, html_path, temp_dir, navigate=False)
+        
+        # Capture clean background
+        background_path = await self.capture_clean_background(page, html_path, temp_dir, visual_elements, navigate=False)
+        
+        # The extractors swallow their own errors; only cache if the page survived
+        await page.evaluate("() => true")
+        slide_analysis_cache.store(key, visual_elements, background_path, text_elements)
+        
+        return {
+            'slide_info': slide_info,
+            'visual_elements': visual_elements,
+            'background_path': background_path,
+            'text_elements': text_elements
+        }
+    
+    async def extract_visual_elements(self, page, html_path: Path, temp_dir: Path, navigate: bool = True) -> List[Dict]:
+        """Extract all visual elements (non-text) as individual images with positioning.
+        
+        Pass navigate=False when the slide is already loaded (see analyze_slide).
+        """
         visual_elements = []
         
         try:
-            # Set viewport and load HTML
-            await page.set_viewport_size({"width": 1920, "height": 1080})
-            await page.emulate_media(media='screen')
+            if navigate:
+                # Set viewport and load HTML
+                await page.set_viewport_size({"width": 1920, "height": 1080})
+                await page.emulate_media(media='screen')
             
-            # Use file:// URL instead of set_content to preserve relative paths
-            file_url = f"file://{html_path.resolve()}"
-            await page.goto(file_url, wait_until="networkidle", timeout=25000)
-            await page.wait_for_timeout(1000)
+                # Use file:// URL instead of set_content to preserve relative paths
+                file_url = f"file://{html_path.resolve()}"
+                await page.goto(file_url, wait_until="networkidle", timeout=25000)
+                await page.wait_for_timeout(1000)
             
             def handle_console(msg):
                 print(f"BROWSER CONSOLE: {msg.text}")
@@ -813,28 +974,32 @@ class OptimizedHTMLToPPTXConverter:
                 pass
             return []
 
-    async def capture_clean_background(self, page, html_path: Path, temp_dir: Path, visual_elements: List[Dict]) -> Path:
-        """Capture the clean background with visual elements temporarily hidden."""
+    async def capture_clean_background(self, page, html_path: Path, temp_dir: Path, visual_elements: List[Dict], navigate: bool = True) -> Path:
+        """Capture the clean background with visual elements temporarily hidden.
+        
+        Pass navigate=False when the slide is already loaded (see analyze_slide).
+        """
         try:
-            # Set exact viewport dimensions
-            await page.set_viewport_size({"width": 1920, "height": 1080})
-            await page.emulate_media(media='screen')
+            if navigate:
+                # Set exact viewport dimensions
+                await page.set_viewport_size({"width": 1920, "height": 1080})
+                await page.emulate_media(media='screen')
             
-            # Force device pixel ratio to 1 for exact measurements
-            await page.evaluate(r"""
-                () => {
-                    Object.defineProperty(window, 'devicePixelRatio', {
-                        get: () => 1
-                    });
-                }
-            """)
+                # Force device pixel ratio to 1 for exact measurements
+                await page.evaluate(r"""
+                    () => {
+                        Object.defineProperty(window, 'devicePixelRatio', {
+                            get: () => 1
+                        });
+                    }
+                """)
             
-            # Use file:// URL instead of set_content to preserve relative paths
-            file_url = f"file://{html_path.resolve()}"
-            await page.goto(file_url, wait_until="networkidle", timeout=25000)
+                # Use file:// URL instead of set_content to preserve relative paths
+                file_url = f"file://{html_path.resolve()}"
+                await page.goto(file_url, wait_until="networkidle", timeout=25000)
             
-            # Reduced wait time
-            await page.wait_for_timeout(2000)
+                # Reduced wait time
+                await page.wait_for_timeout(2000)
             
             # Make text completely invisible AND hide visual elements to get clean background
             await page.evaluate(r"""
@@ -914,30 +1079,34 @@ class OptimizedHTMLToPPTXConverter:
             blank_bg.save(background_path)
             return background_path
     
-    async def extract_text_elements(self, page, html_path: Path) -> List[TextElement]:
-        """Extract all text elements with precise positioning for editable text boxes."""
+    async def extract_text_elements(self, page, html_path: Path, navigate: bool = True) -> List[TextElement]:
+        """Extract all text elements with precise positioning for editable text boxes.
+        
+        Pass navigate=False when the slide is already loaded (see analyze_slide).
+        """
         text_elements = []
         
         try:
-            # Set exact viewport dimensions
-            await page.set_viewport_size({"width": 1920, "height": 1080})
-            await page.emulate_media(media='screen')
+            if navigate:
+                # Set exact viewport dimensions
+                await page.set_viewport_size({"width": 1920, "height": 1080})
+                await page.emulate_media(media='screen')
             
-            # Force device pixel ratio to 1 for exact measurements
-            await page.evaluate(r"""
-                () => {
-                    Object.defineProperty(window, 'devicePixelRatio', {
-                        get: () => 1
-                    });
-                }
-            """)
+                # Force device pixel ratio to 1 for exact measurements
+                await page.evaluate(r"""
+                    () => {
+                        Object.defineProperty(window, 'devicePixelRatio', {
+                            get: () => 1
+                        });
+                    }
+                """)
             
-            # Use file:// URL instead of set_content to preserve relative paths
-            file_url = f"file://{html_path.resolve()}"
-            await page.goto(file_url, wait_until="networkidle", timeout=25000)
+                # Use file:// URL instead of set_content to preserve relative paths
+                file_url = f"file://{html_path.resolve()}"
+                await page.goto(file_url, wait_until="networkidle", timeout=25000)
             
-            # Reduced wait time
-            await page.wait_for_timeout(2000)
+                # Reduced wait time
+                await page.wait_for_timeout(2000)
             
             # Extract all text elements with precise positioning and styling
             # // Enhanced text extraction JavaScript to include in your page.evaluate()
@@ -1297,131 +1466,69 @@ class OptimizedHTMLToPPTXConverter:
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
             
-            # Launch browser for processing
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-setuid-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-gpu',
-                        '--force-device-scale-factor=1',
-                        '--disable-background-timer-throttling',
-                        '--disable-backgrounding-occluded-windows',
-                        '--disable-renderer-backgrounding',
-                        '--disable-features=VizDisplayCompositor',
-                        '--disable-extensions',
-                        '--disable-plugins',
-                        '--disable-web-security',
-                        '--disable-features=TranslateUI',
-                        '--disable-ipc-flooding-protection'
-                    ]
-                )
+            # Borrow the shared browser (launched once at server startup);
+            # the session limits this export to 5 concurrent pages
+            async with browser_pool.session(max_pages=5) as session:
                 
-                try:
-                    # Process all slides in parallel
-                    # Create semaphore to limit concurrent operations
-                    semaphore = asyncio.Semaphore(5)
-                    context = await browser.new_context(
-                        viewport={'width': 1920, 'height': 1080}
-                    )
-                    
-                    context = await browser.new_context(
-                        viewport={'width': 1920, 'height': 1080}
-                    )
+                async def process_single_slide(slide_info: Dict) -> Dict:
+                    """Process a single slide with controlled concurrency."""
+                    slide_num = slide_info['number']
                     
-                    async def process_single_slide(slide_info: Dict) -> Dict:
-                        """Process a single slide with controlled concurrency."""
-                        async with semaphore:
-                            slide_num = slide_info['number']
-                            
+                    try:
+                        cached = self.cached_analysis(slide_info)
+                        if cached is not None:
+                            self.cached_slides += 1
+                            return cached
+                        
+                        # Pooled page for this slide, always closed afterwards to free memory
+                        async with session.page() as page:
                             try:
-                                # Create a new page for this slide
-                                page = await context.new_page()
-                                
-                                # Set exact viewport dimensions
-                                await page.set_viewport_size({"width": 1920, "height": 1080})
-                                await page.emulate_media(media='screen')
-                                
-                                # Force device pixel ratio to 1
-                                await page.evaluate(r"""
-                                    () => {
-                                        Object.defineProperty(window, 'devicePixelRatio', {
-                                            get: () => 1
-                                        });
-                                    }
-                                """)
+                                return await self.analyze_slide(page, slide_info, temp_path)
                                 
-                                try:
-                                    # Extract visual elements
-                                    visual_elements = await self.extract_visual_elements(page, slide_info['path'], temp_path)
-                                    
-                                    # Capture clean background
-                                    background_path = await self.capture_clean_background(page, slide_info['path'], temp_path, visual_elements)
-                                    
-                                    # Extract text elements
-                                    text_elements = await self.extract_text_elements(page, slide_info['path'])
-                                    
-                                    slide_analysis = {
-                                        'slide_info': slide_info,
-                                        'visual_elements': visual_elements,
-                                        'background_path': background_path,
-                                        'text_elements': text_elements
-                                    }
-                                    
-                                    return slide_analysis
-                                    
-                                except Exception as e:
-                                    return {
-                                        'slide_info': slide_info,
-                                        'visual_elements': [],
-                                        'background_path': None,
-                                        'text_elements': [],
-                                        'error': str(e)
-                                    }
-                                    
-                                finally:
-                                    # Always close the page to free memory
-                                    await page.close()
-                                    
                             except Exception as e:
                                 return {
                                     'slide_info': slide_info,
                                     'visual_elements': [],
                                     'background_path': None,
                                     'text_elements': [],
-                                    'error': f"Page creation failed: {str(e)}"
+                                    'error': str(e)
                                 }
-                    
-                    # Launch ALL slides in parallel
-                    parallel_tasks = [
-                        process_single_slide(slide_info) 
-                        for slide_info in self.slides_info
-                    ]
-                    
-                    # Wait for ALL slides to complete in parallel
-                    slide_analyses = await asyncio.gather(*parallel_tasks, return_exceptions=True)
-                    
-                    # Handle any top-level exceptions
-                    processed_analyses = []
-                    for i, result in enumerate(slide_analyses):
-                        if isinstance(result, Exception):
-                            error_analysis = {
-                                'slide_info': self.slides_info[i],
-                                'visual_elements': [],
-                                'background_path': None,
-                                'text_elements': [],
-                                'error': str(result)
-                            }
-                            processed_analyses.append(error_analysis)
-                        else:
-                            processed_analyses.append(result)
-                    
-                    all_slide_analyses = processed_analyses
-                    
-                finally:
-                    await browser.close()
+                            
+                    except Exception as e:
+                        return {
+                            'slide_info': slide_info,
+                            'visual_elements': [],
+                            'background_path': None,
+                            'text_elements': [],
+                            'error': f"Page creation failed: {str(e)}"
+                        }
+                
+                # Launch ALL slides in parallel
+                parallel_tasks = [
+                    process_single_slide(slide_info) 
+                    for slide_info in self.slides_info
+                ]
+                
+                # Wait for ALL slides to complete in parallel
+                slide_analyses = await asyncio.gather(*parallel_tasks, return_exceptions=True)
+            
+            # Handle any top-level exceptions
+            processed_analyses = []
+            for i, result in enumerate(slide_analyses):
+                if isinstance(result, Exception):
+                    error_analysis = {
+                        'slide_info': self.slides_info[i],
+                        'visual_elements': [],
+                        'background_path': None,
+                        'text_elements': [],
+                        'error': str(result)
+                    }
+                    processed_analyses.append(error_analysis)
+                else:
+                    processed_analyses.append(result)
+            
+            all_slide_analyses = processed_analyses
+            slide_analysis_cache.prune()
             
             # Build PPTX presentation
             # Create new PowerPoint presentation
@@ -1543,7 +1650,8 @@ async def convert_presentation_to_pptx(request: ConvertRequest):
             message=f"PPTX generated successfully with {total_slides} slides",
             pptx_url=pptx_url,
             filename=pptx_path.name,
-            total_slides=total_slides
+            total_slides=total_slides,
+            cached_slides=converter.cached_slides
         )
         
     except FileNotFoundError as e:
@@ -1559,5 +1667,6 @@ async def pptx_health_check():
     """PPTX service health check endpoint."""
     return {
         "status": "healthy", 
-        "service": "HTML to PPTX Converter"
+        "service": "HTML to PPTX Converter",
+        "browser_pool": browser_pool.get_stats()
     }
\ No newline at end of file
@@ -10,6 +10,7 @@ from html_to_pdf_router import router as pdf_router
 from visual_html_editor_router import router as editor_router
 from html_to_pptx_router import router as pptx_router
 from html_to_docx_router import router as docx_router
+from browser_pool import browser_pool
 
 # Ensure we're serving from the /workspace directory
 workspace_dir = "/workspace"
@@ -31,6 +32,19 @@ app.include_router(editor_router)
 app.include_router(pptx_router)
 app.include_router(docx_router)
 
+# One shared Chromium for the PDF/PPTX export routers instead of a launch per request
+@app.on_event("startup")
+async def start_browser_pool():
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        # Exports retry the launch on first use
+        print(f"⚠ Browser pool failed to start: {e}")
+
+@app.on_event("shutdown")
+async def stop_browser_pool():
+    await browser_pool.stop()
+
 # Create downloads directory in workspace for all generated files
 downloads_dir = Path(workspace_dir) / "downloads"
 downloads_dir.mkdir(parents=True, exist_ok=True)
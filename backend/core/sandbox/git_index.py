@@ -0,0 +1,379 @@
+"""
+Per-sandbox git history index for the file history endpoints.
+
+The history, commit-info, tree and content-by-hash endpoints used to run git
+in the sandbox on every request. The index keeps what they need in Redis:
+
+- git_index:{sandbox_id}:meta     indexed HEAD and commit count
+- git_index:{sandbox_id}:log      commit hashes, newest first
+- git_index:{sandbox_id}:commits  commit -> metadata + name-status file list
+- git_index:{sandbox_id}:tree:{commit}  recursive ls-tree of one commit
+  (mode, type, blob hash, size, path), built on first use; commits are
+  immutable so it never needs invalidation
+- git_blob:{blob_hash}            blob contents up to GIT_BLOB_CACHE_MAX_BYTES
+
+Freshness is checked by reading .git/HEAD and the branch ref in a single
+batch file read; when HEAD moved, only the commits since the indexed HEAD are
+logged and appended (SandboxGitTool.git_commit also refreshes right after
+committing). If the indexed HEAD is no longer an ancestor (history rewritten)
+the index is rebuilt from scratch.
+
+refresh() and resolve_commit() return None when the index cannot answer (no
+commits yet, a ref rather than a hash, Redis unavailable); the endpoints then
+fall back to running git directly.
+"""
+import asyncio
+import base64
+import json
+import re
+import shlex
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from daytona_sdk import AsyncSandbox, SessionExecuteRequest
+
+from core.services import redis
+from core.utils.config import config
+from core.utils.logger import logger
+from core.utils.sandbox_utils import read_files
+
+KEY_PREFIX = "git_index"
+BLOB_KEY_PREFIX = "git_blob"
+WORKSPACE = "/workspace"
+
+# Record separator before each commit so the name-status lines that follow belong to it
+_LOG_FORMAT = "%x1e%H%x1f%P%x1f%an%x1f%ae%x1f%ad%x1f%s"
+_HEX = re.compile(r"^[0-9a-f]{4,64}$")
+_LOG_CHUNK = 200
+
+_refresh_locks: Dict[str, asyncio.Lock] = {}
+
+
+class GitIndexError(Exception):
+    pass
+
+
+def _key(sandbox_id: str, name: str) -> str:
+    return f"{KEY_PREFIX}:{sandbox_id}:{name}"
+
+
+async def run_git(sandbox: AsyncSandbox, git_args: str) -> bytes:
+    """Run `git <git_args>` in /workspace and return its stdout."""
+    tmp_path = f"/tmp/git_index_{uuid.uuid4().hex}"
+    git_cmd = f"cd {WORKSPACE} && git {git_args} > {shlex.quote(tmp_path)}"
+    session_id = f"session_{uuid.uuid4().hex}"
+    try:
+        await sandbox.process.create_session(session_id)
+        response = await sandbox.process.execute_session_command(
+            session_id,
+            SessionExecuteRequest(command=f"bash -lc {shlex.quote(git_cmd)}", var_async=False),
+        )
+        if getattr(response, "exit_code", 0) not in (0, None):
+            raise GitIndexError(f"git {git_args.split()[0]} exited with {response.exit_code}")
+        return await sandbox.fs.download_file(tmp_path)
+    finally:
+        try:
+            await sandbox.fs.delete_file(tmp_path)
+        except Exception:
+            pass
+        try:
+            await sandbox.process.delete_session(session_id)
+        except Exception:
+            pass
+
+
+def parse_name_status(text: str) -> List[Dict[str, Any]]:
+    """Parse `--name-status` lines into {status, path, old_path, new_path} entries."""
+    files = []
+    for ln in text.splitlines():
+        ln = ln.strip()
+        if not ln:
+            continue
+        parts = ln.split("\t")
+        status = parts[0].strip()
+        old_path = None
+        new_path = None
+        if status and status[0] in ("R", "C") and len(parts) >= 3:
+            old_path = parts[1].strip()
+            new_path = parts[2].strip()
+            repo_path = new_path
+        elif len(parts) >= 2:
+            repo_path = parts[1].strip()
+        else:
+            repo_path = ln
+        files.append({"status": status, "path": repo_path, "old_path": old_path, "new_path": new_path})
+    return files
+
+
+def _parse_log(text: str) -> List[Dict[str, Any]]:
+    records = []
+    for chunk in text.split("\x1e"):
+        if not chunk.strip():
+            continue
+        header, _, body = chunk.partition("\n")
+        fields = header.split("\x1f")
+        if len(fields) < 6:
+            continue
+        commit_hash, parents, author_name, author_email, date_str, subject = fields[:6]
+        records.append({
+            "commit": commit_hash,
+            "parents": parents.split(),
+            "author_name": author_name,
+            "author_email": author_email,
+            "date": date_str,
+            "message": subject,
+            "files": parse_name_status(body),
+        })
+    return records
+
+
+def _parse_tree(data: bytes) -> List[List[Any]]:
+    """Parse `ls-tree -r -t --long -z` into [mode, type, hash, size, path] rows."""
+    entries = []
+    for item in data.decode("utf-8", errors="replace").split("\0"):
+        meta, sep, path = item.partition("\t")
+        if not sep:
+            continue
+        parts = meta.split()
+        if len(parts) < 4:
+            continue
+        mode, obj_type, obj_hash, size = parts[:4]
+        entries.append([mode, obj_type, obj_hash, int(size) if size.isdigit() else 0, path])
+    return entries
+
+
+async def read_head(sandbox: AsyncSandbox) -> Optional[str]:
+    """Current HEAD commit from the .git files, in one batch read when the branch ref is loose."""
+    git_dir = f"{WORKSPACE}/.git"
+    head_path = f"{git_dir}/HEAD"
+    packed_path = f"{git_dir}/packed-refs"
+    candidates = [f"{git_dir}/refs/heads/master", f"{git_dir}/refs/heads/main"]
+    contents, _ = await read_files(sandbox, [head_path, packed_path, *candidates])
+    head = contents.get(head_path, b"").decode("utf-8", errors="ignore").strip()
+    if not head:
+        return None
+    if not head.startswith("ref:"):
+        return head if _HEX.match(head) else None
+
+    ref = head[len("ref:"):].strip()
+    ref_path = f"{git_dir}/{ref}"
+    if ref_path not in contents:
+        extra, _ = await read_files(sandbox, [ref_path])
+        contents.update(extra)
+    value = contents.get(ref_path, b"").decode("utf-8", errors="ignore").strip()
+    if value:
+        return value
+    for line in contents.get(packed_path, b"").decode("utf-8", errors="ignore").splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[1] == ref:
+            return parts[0]
+    return None  # Unborn branch: no commits yet
+
+
+async def _load_meta(sandbox_id: str) -> Optional[Dict[str, Any]]:
+    raw = await redis.get(_key(sandbox_id, "meta"))
+    return json.loads(raw) if raw else None
+
+
+async def refresh(sandbox: AsyncSandbox, sandbox_id: str, head: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Bring the index up to date with the sandbox's HEAD and return its meta,
+    or None if the workspace has no commits or the index is unavailable.
+    """
+    try:
+        head = head or await read_head(sandbox)
+        if not head:
+            return None
+        meta = await _load_meta(sandbox_id)
+        if meta and meta.get("head") == head:
+            return meta
+
+        lock = _refresh_locks.setdefault(sandbox_id, asyncio.Lock())
+        async with lock:
+            meta = await _load_meta(sandbox_id)
+            if meta and meta.get("head") == head:
+                return meta
+            return await _update(sandbox, sandbox_id, meta, head)
+    except Exception as e:
+        logger.warning(f"Git history index unavailable for sandbox {sandbox_id}: {e}")
+        return None
+
+
+async def _update(sandbox: AsyncSandbox, sandbox_id: str, meta: Optional[Dict[str, Any]], head: str) -> Dict[str, Any]:
+    fmt = shlex.quote(_LOG_FORMAT)
+    records = None
+    if meta:
+        try:
+            text = await run_git(sandbox, f"log --date=iso-strict --name-status --format={fmt} {meta['head']}..{head}")
+            records = _parse_log(text.decode("utf-8", errors="ignore"))
+            # Only a linear continuation of the indexed history can be appended
+            if not records or meta["head"] not in records[-1]["parents"]:
+                records = None
+        except GitIndexError:
+            records = None
+
+    rebuild = records is None
+    if rebuild:
+        text = await run_git(sandbox, f"log --date=iso-strict --name-status --format={fmt} {head}")
+        records = _parse_log(text.decode("utf-8", errors="ignore"))
+
+    log_key = _key(sandbox_id, "log")
+    commits_key = _key(sandbox_id, "commits")
+    meta_key = _key(sandbox_id, "meta")
+    count = len(records) + (0 if rebuild else meta.get("commits", 0))
+    new_meta = {"head": head, "commits": count, "updated_at": datetime.now(timezone.utc).isoformat()}
+
+    client = await redis.get_client()
+    pipe = client.pipeline()
+    if rebuild:
+        pipe.delete(log_key, commits_key)
+    if records:
+        # records are newest first; push oldest first so the newest ends up at the head of the list
+        pipe.lpush(log_key, *[record["commit"] for record in reversed(records)])
+        pipe.hset(commits_key, mapping={record["commit"]: json.dumps(record) for record in records})
+    pipe.set(meta_key, json.dumps(new_meta))
+    for key in (log_key, commits_key, meta_key):
+        pipe.expire(key, config.GIT_INDEX_TTL_SECONDS)
+    await pipe.execute()
+
+    logger.debug(
+        f"{'Rebuilt' if rebuild else 'Updated'} git history index for sandbox {sandbox_id}: "
+        f"{len(records)} new commit(s), {count} total"
+    )
+    return new_meta
+
+
+async def _get_records(sandbox_id: str, commits: List[str]) -> List[Dict[str, Any]]:
+    if not commits:
+        return []
+    client = await redis.get_client()
+    rows = await client.hmget(_key(sandbox_id, "commits"), commits)
+    return [json.loads(row) for row in rows if row]
+
+
+async def resolve_commit(sandbox_id: str, commit: str) -> Optional[str]:
+    """Full hash of an indexed commit given its full or abbreviated hash (refs are not resolved)."""
+    commit = (commit or "").strip().lower()
+    if not _HEX.match(commit):
+        return None
+    try:
+        client = await redis.get_client()
+        if await client.hexists(_key(sandbox_id, "commits"), commit):
+            return commit
+        matches = [c for c in await client.lrange(_key(sandbox_id, "log"), 0, -1) if c.startswith(commit)]
+    except Exception as e:
+        logger.warning(f"Git history index unavailable for sandbox {sandbox_id}: {e}")
+        return None
+    return matches[0] if len(matches) == 1 else None
+
+
+def _touches(entry: Dict[str, Any], rel_path: str) -> bool:
+    prefix = f"{rel_path}/"
+    return any(
+        p and (p == rel_path or p.startswith(prefix))
+        for p in (entry.get("path"), entry.get("old_path"))
+    )
+
+
+async def file_history(sandbox_id: str, rel_path: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Commits touching rel_path (or all commits when empty), newest first.
+    Renames of a single file are followed like `git log --follow`.
+    """
+    client = await redis.get_client()
+    log_key = _key(sandbox_id, "log")
+    versions = []
+    tracked = rel_path
+    start = 0
+    while len(versions) < limit:
+        size = limit if not rel_path else _LOG_CHUNK
+        chunk = await client.lrange(log_key, start, start + size - 1)
+        if not chunk:
+            break
+        start += len(chunk)
+        for record in await _get_records(sandbox_id, chunk):
+            if tracked:
+                touched = [f for f in record["files"] if _touches(f, tracked)]
+                if not touched:
+                    continue
+                for f in touched:
+                    if f.get("new_path") == tracked and f["status"].startswith("R"):
+                        tracked = f["old_path"]
+            versions.append({key: record[key] for key in ("commit", "author_name", "author_email", "date", "message")})
+            if len(versions) >= limit:
+                break
+    return versions
+
+
+async def get_commit(sandbox_id: str, commit: str) -> Optional[Dict[str, Any]]:
+    records = await _get_records(sandbox_id, [commit])
+    return records[0] if records else None
+
+
+async def get_tree(sandbox: AsyncSandbox, sandbox_id: str, commit: str) -> List[List[Any]]:
+    """Recursive tree of an indexed commit, from Redis or one ls-tree run."""
+    tree_key = _key(sandbox_id, f"tree:{commit}")
+    try:
+        raw = await redis.get(tree_key)
+        if raw:
+            return json.loads(raw)
+    except Exception as e:
+        logger.warning(f"Failed to read cached git tree {commit} for sandbox {sandbox_id}: {e}")
+    entries = _parse_tree(await run_git(sandbox, f"ls-tree -r -t --long -z {shlex.quote(commit)}"))
+    try:
+        await redis.set(tree_key, json.dumps(entries), ex=config.GIT_INDEX_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Failed to cache git tree {commit} for sandbox {sandbox_id}: {e}")
+    return entries
+
+
+def list_directory(entries: List[List[Any]], rel_path: str) -> List[List[Any]]:
+    """Direct children of rel_path ("" for the repository root)."""
+    prefix = f"{rel_path}/" if rel_path else ""
+    return [
+        entry for entry in entries
+        if entry[4].startswith(prefix) and "/" not in entry[4][len(prefix):]
+    ]
+
+
+def find_blob(entries: List[List[Any]], rel_path: str) -> Optional[List[Any]]:
+    for entry in entries:
+        if entry[4] == rel_path and entry[1] == "blob":
+            return entry
+    return None
+
+
+def diff_trees(head_entries: List[List[Any]], target_entries: List[List[Any]]) -> List[Tuple[str, str]]:
+    """(status, path) changes going from HEAD to target, like `git diff --name-status HEAD target` without rename detection."""
+    head_blobs = {e[4]: e[2] for e in head_entries if e[1] == "blob"}
+    target_blobs = {e[4]: e[2] for e in target_entries if e[1] == "blob"}
+    changes = []
+    for path in sorted(head_blobs.keys() | target_blobs.keys()):
+        if path not in target_blobs:
+            changes.append(("D", path))
+        elif path not in head_blobs:
+            changes.append(("A", path))
+        elif head_blobs[path] != target_blobs[path]:
+            changes.append(("M", path))
+    return changes
+
+
+async def read_blob(sandbox: AsyncSandbox, blob_hash: str, size: int) -> bytes:
+    """Blob contents by hash; blobs are immutable, so small ones are cached across sandboxes."""
+    blob_key = f"{BLOB_KEY_PREFIX}:{blob_hash}"
+    cacheable = size <= config.GIT_BLOB_CACHE_MAX_BYTES
+    if cacheable:
+        try:
+            cached = await redis.get(blob_key)
+            if cached is not None:
+                return base64.b64decode(cached)
+        except Exception as e:
+            logger.warning(f"Failed to read cached git blob {blob_hash}: {e}")
+    content = await run_git(sandbox, f"cat-file blob {shlex.quote(blob_hash)}")
+    if cacheable:
+        try:
+            await redis.set(blob_key, base64.b64encode(content).decode("ascii"), ex=config.GIT_BLOB_CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.warning(f"Failed to cache git blob {blob_hash}: {e}")
+    return content
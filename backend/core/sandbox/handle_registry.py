@@ -0,0 +1,186 @@
+"""
+Run-scoped registry of sandbox handles shared by all sandbox tools.
+
+Every SandboxToolsBase subclass used to resolve its sandbox on its own
+(project lookup + get_or_start_sandbox), so a run with ten sandbox tools paid
+for ten project queries and ten Daytona state checks. The ThreadManager of a
+run now owns one SandboxHandleRegistry:
+
+- one handle per project_id; concurrent first calls share a single
+  resolution (single-flight), including lazy sandbox creation
+- project sandbox info comes from the runtime project cache that the agent
+  runner already fills, and only falls back to the `projects` table
+- the sandbox state is re-checked (and a stopped sandbox restarted) at most
+  once every SANDBOX_HANDLE_LIVENESS_SECONDS, instead of once per tool
+- one httpx.AsyncClient per handle for calls to the sandbox's HTTP services,
+  closed with the registry when the run ends
+"""
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+
+from core.utils.config import config
+from core.utils.logger import logger
+
+if TYPE_CHECKING:
+    import httpx
+    from daytona_sdk import AsyncSandbox
+
+
+@dataclass
+class SandboxHandle:
+    project_id: str
+    sandbox: "AsyncSandbox"
+    sandbox_id: str
+    sandbox_pass: Optional[str] = None
+    sandbox_url: Optional[str] = None
+    checked_at: float = field(default_factory=time.monotonic)
+    _http_client: Optional["httpx.AsyncClient"] = None
+
+    @property
+    def http_client(self) -> "httpx.AsyncClient":
+        """Shared client for the sandbox's HTTP services (keeps connections alive across tools)."""
+        if self._http_client is None or self._http_client.is_closed:
+            import httpx
+            self._http_client = httpx.AsyncClient(timeout=config.SANDBOX_HTTP_TIMEOUT_SECONDS)
+        return self._http_client
+
+    async def aclose(self) -> None:
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+
+class SandboxHandleRegistry:
+    def __init__(self, db):
+        self.db = db
+        self._handles: Dict[str, SandboxHandle] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    async def get(self, project_id: str) -> SandboxHandle:
+        """The project's sandbox handle, resolving or re-checking it only when needed."""
+        handle = self._handles.get(project_id)
+        if handle and time.monotonic() - handle.checked_at < config.SANDBOX_HANDLE_LIVENESS_SECONDS:
+            return handle
+
+        pending = self._pending.get(project_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._resolve(project_id, handle))
+            self._pending[project_id] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(project_id, None))
+        # Shield so one cancelled caller doesn't cancel the resolution for the others
+        return await asyncio.shield(pending)
+
+    def invalidate(self, project_id: str) -> None:
+        """Force the next get() to re-check the sandbox (e.g. after a sandbox error)."""
+        handle = self._handles.get(project_id)
+        if handle:
+            handle.checked_at = 0.0
+
+    async def close(self) -> None:
+        for handle in self._handles.values():
+            try:
+                await handle.aclose()
+            except Exception as e:
+                logger.debug(f"Error closing sandbox HTTP client for project {handle.project_id}: {e}")
+        self._handles.clear()
+
+    async def _resolve(self, project_id: str, handle: Optional[SandboxHandle]) -> SandboxHandle:
+        from core.sandbox.sandbox import get_or_start_sandbox
+        if handle is not None:
+            # Liveness re-check: restarts the sandbox if it was stopped or archived mid-run
+            handle.sandbox = await get_or_start_sandbox(handle.sandbox_id)
+            handle.checked_at = time.monotonic()
+            return handle
+
+        sandbox_info = await self._load_sandbox_info(project_id)
+        if not sandbox_info.get('id'):
+            handle = await self._create(project_id)
+        else:
+            handle = SandboxHandle(
+                project_id=project_id,
+                sandbox=await get_or_start_sandbox(sandbox_info['id']),
+                sandbox_id=sandbox_info['id'],
+                sandbox_pass=sandbox_info.get('pass'),
+                sandbox_url=sandbox_info.get('sandbox_url'),
+            )
+        self._handles[project_id] = handle
+        return handle
+
+    async def _load_sandbox_info(self, project_id: str) -> Dict[str, Any]:
+        from core.runtime_cache import get_cached_project_metadata
+        cached = await get_cached_project_metadata(project_id)
+        if cached and (cached.get('sandbox') or {}).get('id'):
+            return cached['sandbox']
+
+        client = await self.db.client
+        project = await client.table('projects').select('sandbox').eq('project_id', project_id).execute()
+        if not project.data or len(project.data) == 0:
+            raise ValueError(f"Project {project_id} not found")
+        return project.data[0].get('sandbox') or {}
+
+    async def _create(self, project_id: str) -> SandboxHandle:
+        """Create the project's sandbox lazily and persist its metadata to the `projects` table."""
+        from core.sandbox.sandbox import get_or_start_sandbox, create_sandbox, delete_sandbox
+        logger.debug(f"No sandbox recorded for project {project_id}; creating lazily")
+        client = await self.db.client
+        sandbox_pass = str(uuid.uuid4())
+        sandbox_obj = await create_sandbox(sandbox_pass, project_id)
+        sandbox_id = sandbox_obj.id
+
+        logger.info(f"Waiting 2 seconds for sandbox {sandbox_id} services to initialize...")
+        await asyncio.sleep(2)
+
+        # Gather preview links and token (best-effort parsing)
+        try:
+            vnc_link = await sandbox_obj.get_preview_link(6080)
+            website_link = await sandbox_obj.get_preview_link(8080)
+            vnc_url = vnc_link.url if hasattr(vnc_link, 'url') else str(vnc_link).split("url='")[1].split("'")[0]
+            website_url = website_link.url if hasattr(website_link, 'url') else str(website_link).split("url='")[1].split("'")[0]
+            token = vnc_link.token if hasattr(vnc_link, 'token') else (str(vnc_link).split("token='")[1].split("'")[0] if "token='" in str(vnc_link) else None)
+        except Exception:
+            # If preview link extraction fails, still proceed but leave fields None
+            logger.warning(f"Failed to extract preview links for sandbox {sandbox_id}", exc_info=True)
+            vnc_url = None
+            website_url = None
+            token = None
+
+        sandbox_data = {
+            'id': sandbox_id,
+            'pass': sandbox_pass,
+            'vnc_preview': vnc_url,
+            'sandbox_url': website_url,
+            'token': token
+        }
+
+        # Persist sandbox metadata to project record
+        update_result = await client.table('projects').update({
+            'sandbox': sandbox_data
+        }).eq('project_id', project_id).execute()
+
+        if not update_result.data:
+            # Cleanup created sandbox if DB update failed
+            try:
+                await delete_sandbox(sandbox_id)
+            except Exception:
+                logger.error(f"Failed to delete sandbox {sandbox_id} after DB update failure", exc_info=True)
+            raise Exception("Database update failed when storing sandbox metadata")
+
+        # Update project metadata cache with sandbox data (instead of invalidate)
+        try:
+            from core.runtime_cache import set_cached_project_metadata
+            await set_cached_project_metadata(project_id, sandbox_data)
+            logger.debug(f"✅ Updated project cache with sandbox data: {project_id}")
+        except Exception as cache_error:
+            logger.warning(f"Failed to update project cache: {cache_error}")
+
+        return SandboxHandle(
+            project_id=project_id,
+            sandbox=await get_or_start_sandbox(sandbox_id),
+            sandbox_id=sandbox_id,
+            sandbox_pass=sandbox_pass,
+            sandbox_url=website_url,
+        )
@@ -1,14 +1,42 @@
-from typing import Optional
-import uuid
-import asyncio
+from typing import Dict, List, Optional, Tuple
+import functools
+import inspect
+import httpx
 
 from core.agentpress.thread_manager import ThreadManager
 from core.agentpress.tool import Tool
 from daytona_sdk import AsyncSandbox
-from core.sandbox.sandbox import get_or_start_sandbox, create_sandbox, delete_sandbox
+from core.sandbox.handle_registry import SandboxHandleRegistry
 from core.utils.logger import logger
 from core.utils.files_utils import clean_path
+from core.utils import sandbox_utils
 from core.utils.config import config
+from core.services import tool_metrics
+
+# Sandbox sub-APIs whose awaited methods are remote calls
+_SANDBOX_SERVICES = frozenset({"fs", "process", "git", "computer_use"})
+
+
+class _CountingSandboxProxy:
+    """Pass-through view of a sandbox that counts awaited API calls for tool metrics."""
+    
+    __slots__ = ("_target",)
+    
+    def __init__(self, target):
+        self._target = target
+    
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if inspect.iscoroutinefunction(attr):
+            @functools.wraps(attr)
+            async def counted(*args, **kwargs):
+                tool_metrics.record_sandbox_call()
+                return await attr(*args, **kwargs)
+            return counted
+        if name in _SANDBOX_SERVICES:
+            return _CountingSandboxProxy(attr)
+        return attr
+
 
 class SandboxToolsBase(Tool):
     """Base class for all sandbox tools that provides project-based sandbox access."""
@@ -25,108 +53,51 @@ class SandboxToolsBase(Tool):
         self._sandbox_id = None
         self._sandbox_pass = None
         self._sandbox_url = None
+        self._sandbox_handle = None
+        self._own_handles: Optional[SandboxHandleRegistry] = None
 
     async def _ensure_sandbox(self) -> AsyncSandbox:
         """Ensure we have a valid sandbox instance, retrieving it from the project if needed.
 
-        If the project does not yet have a sandbox, create it lazily and persist
-        the metadata to the `projects` table so subsequent calls can reuse it.
+        The handle comes from the run's shared SandboxHandleRegistry, so every
+        sandbox tool in a run reuses one project lookup and one sandbox state
+        check. If the project does not yet have a sandbox, it is created lazily
+        and persisted to the `projects` table.
         """
-        if self._sandbox is None:
-            try:
-                # Get database client
-                client = await self.thread_manager.db.client
-
-                # Get project data
-                project = await client.table('projects').select('*').eq('project_id', self.project_id).execute()
-                if not project.data or len(project.data) == 0:
-                    raise ValueError(f"Project {self.project_id} not found")
-
-                project_data = project.data[0]
-                sandbox_info = project_data.get('sandbox') or {}
-
-                # If there is no sandbox recorded for this project, create one lazily
-                if not sandbox_info.get('id'):
-                    logger.debug(f"No sandbox recorded for project {self.project_id}; creating lazily")
-                    sandbox_pass = str(uuid.uuid4())
-                    sandbox_obj = await create_sandbox(sandbox_pass, self.project_id)
-                    sandbox_id = sandbox_obj.id
-                    
-                    logger.info(f"Waiting 2 seconds for sandbox {sandbox_id} services to initialize...")
-                    await asyncio.sleep(2)
-                    
-                    # Gather preview links and token (best-effort parsing)
-                    try:
-                        vnc_link = await sandbox_obj.get_preview_link(6080)
-                        website_link = await sandbox_obj.get_preview_link(8080)
-                        vnc_url = vnc_link.url if hasattr(vnc_link, 'url') else str(vnc_link).split("url='")[1].split("'")[0]
-                        website_url = website_link.url if hasattr(website_link, 'url') else str(website_link).split("url='")[1].split("'")[0]
-                        token = vnc_link.token if hasattr(vnc_link, 'token') else (str(vnc_link).split("token='")[1].split("'")[0] if "token='" in str(vnc_link) else None)
-                    except Exception:
-                        # If preview link extraction fails, still proceed but leave fields None
-                        logger.warning(f"Failed to extract preview links for sandbox {sandbox_id}", exc_info=True)
-                        vnc_url = None
-                        website_url = None
-                        token = None
-
-                    # Persist sandbox metadata to project record
-                    update_result = await client.table('projects').update({
-                        'sandbox': {
-                            'id': sandbox_id,
-                            'pass': sandbox_pass,
-                            'vnc_preview': vnc_url,
-                            'sandbox_url': website_url,
-                            'token': token
-                        }
-                    }).eq('project_id', self.project_id).execute()
-
-                    if not update_result.data:
-                        # Cleanup created sandbox if DB update failed
-                        try:
-                            await delete_sandbox(sandbox_id)
-                        except Exception:
-                            logger.error(f"Failed to delete sandbox {sandbox_id} after DB update failure", exc_info=True)
-                        raise Exception("Database update failed when storing sandbox metadata")
-
-                    # Update project metadata cache with sandbox data (instead of invalidate)
-                    try:
-                        from core.runtime_cache import set_cached_project_metadata
-                        sandbox_cache_data = {
-                            'id': sandbox_id,
-                            'pass': sandbox_pass,
-                            'vnc_preview': vnc_url,
-                            'sandbox_url': website_url,
-                            'token': token
-                        }
-                        await set_cached_project_metadata(self.project_id, sandbox_cache_data)
-                        logger.debug(f"✅ Updated project cache with sandbox data: {self.project_id}")
-                    except Exception as cache_error:
-                        logger.warning(f"Failed to update project cache: {cache_error}")
-
-                    # Store local metadata and ensure sandbox is ready
-                    self._sandbox_id = sandbox_id
-                    self._sandbox_pass = sandbox_pass
-                    self._sandbox_url = website_url
-                    self._sandbox = await get_or_start_sandbox(self._sandbox_id)
-                else:
-                    # Use existing sandbox metadata
-                    self._sandbox_id = sandbox_info['id']
-                    self._sandbox_pass = sandbox_info.get('pass')
-                    self._sandbox_url = sandbox_info.get('sandbox_url')
-                    self._sandbox = await get_or_start_sandbox(self._sandbox_id)
-
-            except Exception as e:
-                logger.error(f"Error retrieving/creating sandbox for project {self.project_id}: {str(e)}")
-                raise e
-
+        try:
+            handle = await self._sandbox_handles().get(self.project_id)
+        except Exception as e:
+            logger.error(f"Error retrieving/creating sandbox for project {self.project_id}: {str(e)}")
+            raise e
+
+        self._sandbox_handle = handle
+        self._sandbox = handle.sandbox
+        self._sandbox_id = handle.sandbox_id
+        self._sandbox_pass = handle.sandbox_pass
+        self._sandbox_url = handle.sandbox_url
         return self._sandbox
 
+    def _sandbox_handles(self) -> SandboxHandleRegistry:
+        registry = getattr(self.thread_manager, 'sandbox_handles', None)
+        if registry is None:
+            # Tools used outside an agent run get a registry of their own
+            if self._own_handles is None:
+                self._own_handles = SandboxHandleRegistry(self.thread_manager.db)
+            registry = self._own_handles
+        return registry
+
+    async def cleanup(self):
+        """Close the tool's own handle registry (only created outside an agent run)."""
+        if self._own_handles is not None:
+            await self._own_handles.close()
+            self._own_handles = None
+
     @property
     def sandbox(self) -> AsyncSandbox:
         """Get the sandbox instance, ensuring it exists."""
         if self._sandbox is None:
             raise RuntimeError("Sandbox not initialized. Call _ensure_sandbox() first.")
-        return self._sandbox
+        return _CountingSandboxProxy(self._sandbox)
 
     @property
     def sandbox_id(self) -> str:
@@ -135,6 +106,13 @@ class SandboxToolsBase(Tool):
             raise RuntimeError("Sandbox ID not initialized. Call _ensure_sandbox() first.")
         return self._sandbox_id
 
+    @property
+    def sandbox_http(self) -> httpx.AsyncClient:
+        """HTTP client for the sandbox's services, shared by all tools in the run."""
+        if self._sandbox_handle is None:
+            raise RuntimeError("Sandbox not initialized. Call _ensure_sandbox() first.")
+        return self._sandbox_handle.http_client
+
     @property
     def sandbox_url(self) -> str:
         """Get the sandbox URL, ensuring it exists."""
@@ -146,4 +124,16 @@ class SandboxToolsBase(Tool):
         """Clean and normalize a path to be relative to /workspace."""
         cleaned_path = clean_path(path, self.workspace_path)
         logger.debug(f"Cleaned path: {path} -> {cleaned_path}")
-        return cleaned_path
\ No newline at end of file
+        return cleaned_path
+
+    async def read_files(self, paths: List[str]) -> Tuple[Dict[str, bytes], Dict[str, str]]:
+        """Read several sandbox files in one round-trip; returns (contents, errors) keyed by path."""
+        return await sandbox_utils.read_files(self.sandbox, paths)
+
+    async def write_files(self, files: Dict[str, bytes]) -> None:
+        """Write several sandbox files (keyed by absolute path) in one round-trip."""
+        await sandbox_utils.write_files(self.sandbox, files)
+
+    async def delete_files(self, paths: List[str], recursive: bool = False) -> None:
+        """Delete several sandbox paths in one round-trip; missing paths are ignored."""
+        await sandbox_utils.delete_files(self.sandbox, paths, recursive=recursive)
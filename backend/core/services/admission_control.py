@@ -0,0 +1,503 @@
+"""
+Admission control for agent runs.
+
+Instead of sending every run straight to the shared Dramatiq FIFO, runs are
+parked in a per-account Redis queue and dispatched by deficit round robin
+(DRR) across accounts, weighted by subscription tier. A global inflight cap
+per worker pool bounds how many runs are dispatched-but-unfinished at once,
+so one tenant firing hundreds of trigger runs can only take its weighted
+share of the pool.
+
+Redis layout (all keys prefixed with admission:{<pool>}; the pool is a hash
+tag so every key a script touches lives in the same cluster slot):
+- :active          LIST  round-robin ring of accounts with queued runs
+- :q:<account_id>  LIST  queued agent_run_ids for an account (FIFO)
+- :payloads        HASH  agent_run_id -> JSON kwargs for run_agent_background.send
+- :dispatching     HASH  agent_run_id -> account, dispatch timestamp and payload
+                         (newline separated) for runs picked by a pump but not
+                         yet confirmed sent
+- :deficit         HASH  account_id -> DRR deficit counter
+- :weights         HASH  account_id -> DRR quantum (tier weight)
+- :inflight        ZSET  agent_run_id -> dispatch timestamp
+- :avg_run_seconds STR   EWMA of run duration, used for ETA estimates
+
+Dispatch (pump) is a single Lua script, so concurrent API instances and
+workers never dispatch the same run twice or overshoot the inflight cap.
+Picked runs move from :payloads to :dispatching and are only dropped once
+run_agent_background.send succeeds; a failed send puts the run back at the
+head of its account queue, and entries left behind by a pump that died
+mid-dispatch are re-queued after ADMISSION_DISPATCH_RECOVERY_SECONDS.
+"""
+import asyncio
+import json
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+from core.utils.config import config
+from core.utils.logger import logger
+
+DEFAULT_POOL = "default"
+
+# Tier weights come from the tier's concurrent_runs limit, clamped so a
+# single enterprise account cannot turn DRR back into FIFO.
+MIN_WEIGHT = 1
+MAX_WEIGHT = 10
+
+DEFAULT_AVG_RUN_SECONDS = 120.0
+AVG_RUN_ALPHA = 0.1
+
+# Upper bound on runs dispatched by a single pump call
+MAX_DISPATCH_PER_PUMP = 256
+
+# Upper bound on accounts whose queue keys are passed to a single pump call
+MAX_ACCOUNTS_PER_PUMP = 512
+
+# KEYS: active, deficits, weights, inflight, payloads, dispatching, then one
+# queue key per account named in ARGV[5..]
+_PUMP_SCRIPT = """
+local active, deficits, weights, inflight, payloads, dispatching = KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5], KEYS[6]
+local cap = tonumber(ARGV[1])
+local now = tonumber(ARGV[2])
+local stale_before = tonumber(ARGV[3])
+local max_dispatch = tonumber(ARGV[4])
+local queues = {}
+for i = 5, #ARGV do
+  queues[ARGV[i]] = KEYS[i + 2]
+end
+
+redis.call('ZREMRANGEBYSCORE', inflight, '-inf', stale_before)
+local running = redis.call('ZCARD', inflight)
+local picked = {}
+
+while running < cap and #picked < max_dispatch do
+  local account = redis.call('LINDEX', active, 0)
+  if not account then break end
+  -- Accounts activated after the caller read the ring have no queue key in
+  -- KEYS; stop here and leave them to the next pump
+  local queue = queues[account]
+  if not queue then break end
+
+  local deficit = tonumber(redis.call('HGET', deficits, account) or '0')
+  if deficit < 1 then
+    deficit = deficit + tonumber(redis.call('HGET', weights, account) or '1')
+  end
+
+  while deficit >= 1 and running < cap and #picked < max_dispatch do
+    local run_id = redis.call('LPOP', queue)
+    if not run_id then break end
+    local payload = redis.call('HGET', payloads, run_id)
+    -- Runs cancelled while queued have no payload left; skip them for free
+    if payload then
+      local entry = account .. '\\n' .. ARGV[2] .. '\\n' .. payload
+      redis.call('HDEL', payloads, run_id)
+      redis.call('HSET', dispatching, run_id, entry)
+      redis.call('ZADD', inflight, now, run_id)
+      running = running + 1
+      deficit = deficit - 1
+      table.insert(picked, entry)
+    end
+  end
+
+  if redis.call('LLEN', queue) == 0 then
+    redis.call('LPOP', active)
+    redis.call('HDEL', deficits, account)
+  else
+    redis.call('HSET', deficits, account, deficit)
+    if deficit < 1 then
+      redis.call('LMOVE', active, active, 'LEFT', 'RIGHT')
+    end
+  end
+end
+
+return picked
+"""
+
+# Put a picked run back at the head of its account queue, unless it was
+# already confirmed or re-queued by someone else.
+# KEYS: dispatching, payloads, inflight, active, queue
+# ARGV: agent_run_id, account_id, dispatching entry, payload
+_REQUEUE_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) ~= ARGV[3] then
+  return 0
+end
+redis.call('HDEL', KEYS[1], ARGV[1])
+redis.call('ZREM', KEYS[3], ARGV[1])
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[4])
+redis.call('LPUSH', KEYS[5], ARGV[1])
+if not redis.call('LPOS', KEYS[4], ARGV[2]) then
+  redis.call('RPUSH', KEYS[4], ARGV[2])
+end
+return 1
+"""
+
+class AdmissionUnavailableError(Exception):
+    """submit() failed without leaving anything behind that a pump could dispatch.
+
+    Only this error makes it safe for the caller to send the run directly;
+    any other exception from submit() may have queued it already.
+    """
+    pass
+
+
+_scripts: Dict[str, Any] = {}
+_scripts_client = None
+
+
+def is_enabled() -> bool:
+    return bool(config.ADMISSION_CONTROL_ENABLED)
+
+
+def _key(suffix: str, pool: str = DEFAULT_POOL) -> str:
+    return f"admission:{{{pool}}}:{suffix}"
+
+
+def _queue_key(account_id: str, pool: str = DEFAULT_POOL) -> str:
+    return _key(f"q:{account_id}", pool)
+
+
+async def _get_client(client=None):
+    if client is not None:
+        return client
+    from core.services import redis
+    return await redis.get_client()
+
+
+def _get_script(redis_client, name: str, source: str):
+    global _scripts_client
+    if _scripts_client is not redis_client:
+        _scripts.clear()
+        _scripts_client = redis_client
+    if name not in _scripts:
+        _scripts[name] = redis_client.register_script(source)
+    return _scripts[name]
+
+
+def _parse_dispatch_entry(entry: str):
+    """Split a :dispatching entry into (account_id, dispatched_at, payload)."""
+    account_id, dispatched_at, payload = entry.split("\n", 2)
+    return account_id, float(dispatched_at), payload
+
+
+async def _requeue(redis_client, agent_run_id: str, entry: str, pool: str = DEFAULT_POOL) -> bool:
+    account_id, _, payload = _parse_dispatch_entry(entry)
+    script = _get_script(redis_client, "requeue", _REQUEUE_SCRIPT)
+    requeued = await script(
+        keys=[
+            _key("dispatching", pool),
+            _key("payloads", pool),
+            _key("inflight", pool),
+            _key("active", pool),
+            _queue_key(account_id, pool),
+        ],
+        args=[agent_run_id, account_id, entry, payload],
+    )
+    return bool(requeued)
+
+
+async def _recover_stalled_dispatches(redis_client, pool: str = DEFAULT_POOL) -> None:
+    """Re-queue runs a pump picked but never confirmed sent (it crashed or was killed)."""
+    entries = await redis_client.hgetall(_key("dispatching", pool))
+    if not entries:
+        return
+    stalled_before = time.time() - config.ADMISSION_DISPATCH_RECOVERY_SECONDS
+    for agent_run_id, entry in entries.items():
+        if _parse_dispatch_entry(entry)[1] > stalled_before:
+            continue
+        if await _requeue(redis_client, agent_run_id, entry, pool):
+            logger.warning(f"🚦 Re-queued agent run {agent_run_id} left undispatched by a previous pump")
+
+
+async def _get_account_weight(account_id: str) -> int:
+    """DRR quantum for an account, derived from its tier's concurrent run limit."""
+    try:
+        from core.billing import subscription_service
+        tier_info = await subscription_service.get_user_subscription_tier(account_id, skip_cache=False)
+        concurrent_runs = int(tier_info.get('concurrent_runs') or MIN_WEIGHT)
+    except Exception as e:
+        logger.warning(f"Could not resolve admission weight for {account_id}, using {MIN_WEIGHT}: {e}")
+        concurrent_runs = MIN_WEIGHT
+    return max(MIN_WEIGHT, min(MAX_WEIGHT, concurrent_runs))
+
+
+async def get_depths(client=None, pool: str = DEFAULT_POOL) -> Dict[str, int]:
+    """Queued (not yet dispatched) and inflight run counts for a pool."""
+    redis_client = await _get_client(client)
+    pending, inflight = await asyncio.gather(
+        redis_client.hlen(_key("payloads", pool)),
+        redis_client.zcard(_key("inflight", pool)),
+    )
+    return {"pending": pending, "inflight": inflight}
+
+
+async def check_load_shedding(pool: str = DEFAULT_POOL) -> Optional[Dict[str, Any]]:
+    """
+    Decide whether a new run should be rejected before any work is done for it.
+
+    Returns:
+        None if the run may be admitted, otherwise a dict describing the
+        overload (queue depth, threshold, suggested retry_after seconds).
+    """
+    threshold = config.ADMISSION_SHED_QUEUE_DEPTH
+    if not is_enabled() or not threshold or threshold <= 0:
+        return None
+
+    try:
+        from core.services.queue_metrics import get_queue_metrics
+        metrics = await get_queue_metrics()
+    except Exception as e:
+        # Fail open: a metrics hiccup must not block every run
+        logger.warning(f"Admission load-shedding check skipped: {e}")
+        return None
+
+    backlog = metrics["queue_depth"] + metrics.get("admission_pending", 0)
+    if backlog < threshold:
+        return None
+
+    avg_run_seconds = await _get_avg_run_seconds()
+    cap = max(1, config.ADMISSION_MAX_INFLIGHT)
+    retry_after = int(math.ceil((backlog - threshold + 1) / cap * avg_run_seconds))
+    logger.warning(f"🚦 Shedding agent run: backlog {backlog} >= threshold {threshold}")
+    return {
+        "queue_depth": backlog,
+        "threshold": threshold,
+        "retry_after": max(1, min(retry_after, 600)),
+    }
+
+
+async def submit(
+    account_id: str,
+    agent_run_id: str,
+    payload: Dict[str, Any],
+    pool: str = DEFAULT_POOL,
+) -> Dict[str, Any]:
+    """
+    Queue a run for fair dispatch and immediately pump the scheduler.
+
+    Args:
+        account_id: Account the run is billed to (the fairness key)
+        agent_run_id: Agent run ID
+        payload: kwargs for run_agent_background.send
+        pool: Worker pool (Dramatiq queue) the run targets
+
+    Returns:
+        Dict with status ("running" if dispatched by this pump, else "queued"),
+        queue_position and eta_seconds
+
+    Raises:
+        AdmissionUnavailableError: Nothing was queued; the caller may send the run directly
+        Exception: Anything else means the run may be queued and must not be sent again
+    """
+    try:
+        redis_client = await _get_client()
+    except Exception as e:
+        raise AdmissionUnavailableError(f"Redis unavailable: {e}") from e
+    weight = await _get_account_weight(account_id)
+    queue_key = _queue_key(account_id, pool)
+    active_key = _key("active", pool)
+
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.hset(_key("payloads", pool), agent_run_id, json.dumps(payload))
+    pipe.hset(_key("weights", pool), account_id, weight)
+    pipe.rpush(queue_key, agent_run_id)
+    pipe.lpos(active_key, account_id)
+    try:
+        results = await pipe.execute()
+    except Exception as e:
+        # The transaction may or may not have been applied. Taking the payload
+        # back proves no pump can dispatch it; if it is not there, the run was
+        # either never queued or already dispatched, and we cannot tell which.
+        try:
+            withdrawn = await cancel(agent_run_id, client=redis_client, pool=pool)
+        except Exception:
+            raise e
+        if withdrawn:
+            raise AdmissionUnavailableError(f"Failed to queue run: {e}") from e
+        raise
+
+    # From here on the run is queued: failures are logged, never raised, and
+    # the periodic pump dispatches it
+    try:
+        if results[3] is None:
+            # Benign race: a concurrent pump may drop and re-add the account; the
+            # script tolerates duplicates since an empty queue is simply popped.
+            await redis_client.rpush(active_key, account_id)
+
+        dispatched = await pump(pool=pool)
+        if agent_run_id in dispatched:
+            return {"status": "running", "queue_position": 0, "eta_seconds": 0}
+
+        position = await get_queue_position(account_id, agent_run_id, pool=pool)
+    except Exception as e:
+        logger.error(f"Admission pump after queueing {agent_run_id} failed, leaving it to the periodic pump: {e}", exc_info=True)
+        return {"status": "queued", "queue_position": 0, "eta_seconds": 0}
+
+    logger.info(f"🚦 Agent run {agent_run_id} queued for account {account_id} (weight {weight}, position {position['queue_position']})")
+    return {"status": "queued", **position}
+
+
+async def pump(client=None, pool: str = DEFAULT_POOL) -> List[str]:
+    """
+    Dispatch queued runs to Dramatiq while the pool has inflight capacity.
+
+    Returns:
+        agent_run_ids dispatched by this call
+    """
+    redis_client = await _get_client(client)
+    await _recover_stalled_dispatches(redis_client, pool)
+
+    # Queue keys are passed in KEYS rather than built inside the script, so
+    # read the ring first; accounts added after this read wait for the next pump
+    accounts = await redis_client.lrange(_key("active", pool), 0, -1)
+    accounts = list(dict.fromkeys(accounts))[:MAX_ACCOUNTS_PER_PUMP]
+    if not accounts:
+        return []
+
+    now = time.time()
+    script = _get_script(redis_client, "pump", _PUMP_SCRIPT)
+    entries = await script(
+        keys=[
+            _key("active", pool),
+            _key("deficit", pool),
+            _key("weights", pool),
+            _key("inflight", pool),
+            _key("payloads", pool),
+            _key("dispatching", pool),
+            *(_queue_key(account, pool) for account in accounts),
+        ],
+        args=[
+            max(1, config.ADMISSION_MAX_INFLIGHT),
+            now,
+            now - config.ADMISSION_INFLIGHT_TTL_SECONDS,
+            MAX_DISPATCH_PER_PUMP,
+            *accounts,
+        ],
+    )
+    if not entries:
+        return []
+
+    from run_agent_background import run_agent_background
+
+    dispatched = []
+    for entry in entries:
+        kwargs = json.loads(_parse_dispatch_entry(entry)[2])
+        agent_run_id = kwargs["agent_run_id"]
+        try:
+            message = run_agent_background.send(**kwargs)
+        except Exception as e:
+            logger.error(f"❌ Failed to dispatch admitted run {agent_run_id}, re-queueing: {e}", exc_info=True)
+            # Back to the head of its account queue, and the slot back to the pool
+            await _requeue(redis_client, agent_run_id, entry, pool)
+            continue
+        dispatched.append(agent_run_id)
+        logger.info(f"✅ Admitted agent run {agent_run_id} to Dramatiq (message_id: {getattr(message, 'message_id', 'N/A')})")
+        try:
+            await redis_client.hdel(_key("dispatching", pool), agent_run_id)
+        except Exception as e:
+            # The worker's run lock absorbs the duplicate if recovery re-sends it
+            logger.warning(f"Failed to confirm dispatch of agent run {agent_run_id}: {e}")
+    return dispatched
+
+
+async def release(agent_run_id: str, client=None, pool: str = DEFAULT_POOL) -> None:
+    """
+    Free the inflight slot held by a finished run and dispatch the next ones.
+
+    Idempotent: releasing a run that was never admitted (admission disabled
+    when it started, duplicate delivery) is a no-op apart from the pump.
+    """
+    redis_client = await _get_client(client)
+    inflight_key = _key("inflight", pool)
+    dispatched_at = await redis_client.zscore(inflight_key, agent_run_id)
+    removed = await redis_client.zrem(inflight_key, agent_run_id)
+    if removed and dispatched_at is not None:
+        await _record_run_duration(redis_client, time.time() - float(dispatched_at), pool)
+    await pump(client=redis_client, pool=pool)
+
+
+async def cancel(agent_run_id: str, client=None, pool: str = DEFAULT_POOL) -> bool:
+    """
+    Drop a run that is still queued. Its id stays in the account list and is
+    skipped by the next pump.
+
+    Returns:
+        True if the run was queued (and is now cancelled)
+    """
+    redis_client = await _get_client(client)
+    return bool(await redis_client.hdel(_key("payloads", pool), agent_run_id))
+
+
+async def get_queue_position(account_id: str, agent_run_id: str, client=None, pool: str = DEFAULT_POOL) -> Dict[str, int]:
+    """
+    Estimate how many runs will be dispatched before this one and when.
+
+    Under DRR each other active account gets weight_a / weight_self runs per
+    run of ours, capped by what it actually has queued.
+    """
+    redis_client = await _get_client(client)
+    own_index = await redis_client.lpos(_queue_key(account_id, pool), agent_run_id)
+    if own_index is None:
+        return {"queue_position": 0, "eta_seconds": 0}
+
+    accounts = await redis_client.lrange(_key("active", pool), 0, -1)
+    accounts = list(dict.fromkeys(accounts))
+    weights = await redis_client.hmget(_key("weights", pool), accounts) if accounts else []
+
+    own_weight = MIN_WEIGHT
+    for account, weight in zip(accounts, weights):
+        if account == account_id:
+            own_weight = int(weight or MIN_WEIGHT)
+
+    pipe = redis_client.pipeline(transaction=False)
+    for account in accounts:
+        pipe.llen(_queue_key(account, pool))
+    lengths = await pipe.execute() if accounts else []
+
+    rounds = own_index + 1
+    position = rounds
+    for account, weight, length in zip(accounts, weights, lengths):
+        if account == account_id:
+            continue
+        share = math.ceil(rounds * int(weight or MIN_WEIGHT) / own_weight)
+        position += min(length, share)
+
+    avg_run_seconds = await _get_avg_run_seconds(redis_client, pool)
+    cap = max(1, config.ADMISSION_MAX_INFLIGHT)
+    eta_seconds = int(math.ceil(position / cap * avg_run_seconds))
+    return {"queue_position": position, "eta_seconds": eta_seconds}
+
+
+async def _get_avg_run_seconds(client=None, pool: str = DEFAULT_POOL) -> float:
+    try:
+        redis_client = await _get_client(client)
+        value = await redis_client.get(_key("avg_run_seconds", pool))
+        return float(value) if value else DEFAULT_AVG_RUN_SECONDS
+    except Exception:
+        return DEFAULT_AVG_RUN_SECONDS
+
+
+async def _record_run_duration(redis_client, duration: float, pool: str = DEFAULT_POOL) -> None:
+    try:
+        previous = await _get_avg_run_seconds(redis_client, pool)
+        updated = (1 - AVG_RUN_ALPHA) * previous + AVG_RUN_ALPHA * max(duration, 0.0)
+        await redis_client.set(_key("avg_run_seconds", pool), f"{updated:.2f}")
+    except Exception as e:
+        logger.debug(f"Failed to record run duration for admission ETA: {e}")
+
+
+async def start_admission_pump(interval_seconds: int = 15):
+    """
+    Background task that periodically pumps the scheduler, so queued runs
+    still get dispatched after stale inflight slots are reclaimed.
+    """
+    logger.info(f"Starting admission control pump (interval: {interval_seconds}s)")
+
+    while True:
+        try:
+            await asyncio.sleep(interval_seconds)
+            await pump()
+        except asyncio.CancelledError:
+            logger.info("Admission control pump stopped")
+            raise
+        except Exception as e:
+            logger.error(f"Error in admission control pump loop: {e}")
@@ -15,6 +15,7 @@ from litellm.files.main import ModelResponse
 from core.utils.logger import logger
 from core.utils.config import config
 from core.agentpress.error_processor import ErrorProcessor
+from core.services import llm_replay, llm_routing
 from pathlib import Path
 from datetime import datetime, timezone
 
@@ -169,6 +170,9 @@ def setup_provider_router(openai_compatible_api_key: str = None, openai_compatib
         # context_window_fallbacks are separate and only triggered by context length issues
     )
     
+    # The routing layer picks among the same deployment groups before the router's own fallbacks apply
+    llm_routing.set_deployment_groups(fallbacks)
+    
     logger.info(f"Configured LiteLLM Router with {len(fallbacks)} Bedrock-only fallback rules")
 
 def _configure_openai_compatible(params: Dict[str, Any], model_name: str, api_key: Optional[str], api_base: Optional[str]) -> None:
@@ -314,7 +318,13 @@ async def make_llm_api_call(
             except Exception as e:
                 logger.warning(f"⚠️ Error saving debug input: {e}")
         
-        response = await provider_router.acompletion(**params)
+        replay_provider = llm_replay.get_replay_provider()
+        if replay_provider:
+            response = await replay_provider.acompletion(params, provider_router.acompletion)
+        elif llm_routing.is_enabled():
+            response = await llm_routing.acompletion(params, provider_router.acompletion)
+        else:
+            response = await provider_router.acompletion(**params)
         
         # For streaming responses, we need to handle errors that occur during iteration
         if hasattr(response, '__aiter__') and stream:
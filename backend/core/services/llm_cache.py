@@ -0,0 +1,276 @@
+"""
+Content-addressed cache for auxiliary (non-agentic) LLM calls.
+
+Side paths such as knowledge-base file summaries, project name/icon
+generation, agent icon generation and admin translation send prompts that
+repeat often (duplicate uploads, the same agent description, the same
+message translated twice). Their results are cached by a hash of
+(model, prompt, sampling params); the prompt is hashed exactly unless the
+call site opts into whitespace normalization (only safe where the output
+does not depend on the input's formatting):
+
+- a small in-process LRU in front of Redis (aux_llm_cache:{key}, TTL bound)
+- identical in-flight calls in a process are coalesced onto one request
+- entries over AUX_LLM_CACHE_MAX_ENTRY_BYTES are not cached
+- hits record tokens and provider cost saved per namespace
+  (aux_llm_cache:stats:{namespace}) for the admin endpoint
+
+Only successful, non-empty results are cached; failures are never cached.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import litellm
+
+from core.utils.config import config
+from core.utils.logger import logger
+from core.utils import serialization
+
+KEY_PREFIX = "aux_llm_cache"
+STATS_KEY_PREFIX = f"{KEY_PREFIX}:stats"
+
+# Bumped when the key material changes, so old entries are never matched
+KEY_VERSION = 2
+
+_local: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def is_enabled() -> bool:
+    return bool(config and config.AUX_LLM_CACHE_ENABLED)
+
+
+def _normalize_content(content: Any) -> Any:
+    if isinstance(content, str):
+        # Whitespace-only differences (re-indented prompts, trailing newlines) share an entry
+        return " ".join(content.split())
+    return content
+
+
+def cache_key(model: str, messages: List[Dict[str, Any]], normalize_whitespace: bool = False, **params: Any) -> str:
+    """
+    Hash of the model, messages and sampling params.
+
+    Messages are hashed exactly by default. normalize_whitespace lets prompts
+    that differ only in whitespace share an entry; leave it off wherever the
+    result reflects the input's formatting (translation, summaries).
+    """
+    material = {
+        "v": KEY_VERSION,
+        "model": model,
+        "messages": [
+            {
+                "role": m.get("role"),
+                "content": _normalize_content(m.get("content")) if normalize_whitespace else m.get("content"),
+            }
+            for m in messages
+        ],
+        "normalized": normalize_whitespace,
+        "params": {k: v for k, v in sorted(params.items()) if v is not None},
+    }
+    encoded = json.dumps(material, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Provider cost in USD (registry pricing first, then LiteLLM's price map)."""
+    try:
+        from core.ai_models import model_manager
+        cost = model_manager.calculate_cost(model_manager.resolve_model_id(model) or model, prompt_tokens, completion_tokens)
+        if cost is not None:
+            return float(cost)
+    except Exception:
+        pass
+    try:
+        prompt_cost, completion_cost = litellm.cost_per_token(model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        return float(prompt_cost + completion_cost)
+    except Exception:
+        return 0.0
+
+
+def _local_get(key: str) -> Optional[Dict[str, Any]]:
+    entry = _local.get(key)
+    if entry is None:
+        return None
+    expires_at, record = entry
+    if expires_at < time.time():
+        _local.pop(key, None)
+        return None
+    _local.move_to_end(key)
+    return record
+
+
+def _local_set(key: str, record: Dict[str, Any], ttl_seconds: int) -> None:
+    _local[key] = (time.time() + ttl_seconds, record)
+    _local.move_to_end(key)
+    while len(_local) > config.AUX_LLM_CACHE_MAX_ENTRIES:
+        _local.popitem(last=False)
+
+
+async def _redis_get(key: str) -> Optional[Dict[str, Any]]:
+    try:
+        from core.services import redis
+        raw = await redis.get(f"{KEY_PREFIX}:{key}")
+        return serialization.loads(raw) if raw else None
+    except Exception as e:
+        logger.debug(f"Aux LLM cache read failed for {key[:12]}: {e}")
+        return None
+
+
+async def _redis_set(key: str, payload: str, ttl_seconds: int) -> None:
+    try:
+        from core.services import redis
+        await redis.set(f"{KEY_PREFIX}:{key}", payload, ex=ttl_seconds)
+    except Exception as e:
+        logger.debug(f"Aux LLM cache write failed for {key[:12]}: {e}")
+
+
+async def _record_stats(namespace: str, outcome: str, record: Optional[Dict[str, Any]] = None) -> None:
+    try:
+        from core.services import redis
+        client = await redis.get_client()
+        stats_key = f"{STATS_KEY_PREFIX}:{namespace}"
+        pipe = client.pipeline()
+        pipe.hincrby(stats_key, outcome, 1)
+        if record and outcome in ("hits", "coalesced"):
+            pipe.hincrby(stats_key, "tokens_saved", int(record.get("tokens", 0)))
+            pipe.hincrbyfloat(stats_key, "cost_saved_usd", float(record.get("cost_usd", 0.0)))
+            pipe.hincrbyfloat(stats_key, "latency_saved_seconds", float(record.get("latency_seconds", 0.0)))
+        await pipe.execute()
+    except Exception as e:
+        logger.debug(f"Aux LLM cache stats update failed: {e}")
+
+
+async def get_or_compute(
+    namespace: str,
+    key: str,
+    compute: Callable[[], Awaitable[Tuple[Any, int, float]]],
+    ttl_seconds: Optional[int] = None,
+    should_cache: Callable[[Any], bool] = bool,
+) -> Any:
+    """
+    Return the cached value for `key`, or run `compute` once and cache it.
+
+    `compute` returns (value, tokens_used, cost_usd); value must be
+    JSON-serializable, and values rejected by `should_cache` (falsy by
+    default) are returned but not cached.
+    Concurrent callers with the same key in this process share one compute.
+    """
+    if not is_enabled():
+        value, _, _ = await compute()
+        return value
+
+    ttl_seconds = ttl_seconds or config.AUX_LLM_CACHE_TTL_SECONDS
+
+    record = _local_get(key)
+    if record is None:
+        record = await _redis_get(key)
+        if record is not None:
+            _local_set(key, record, ttl_seconds)
+    if record is not None:
+        logger.debug(f"🎯 Aux LLM cache hit ({namespace}) {key[:12]}")
+        asyncio.create_task(_record_stats(namespace, "hits", record))
+        return record["value"]
+
+    pending = _inflight.get(key)
+    if pending is not None:
+        value = await asyncio.shield(pending)
+        asyncio.create_task(_record_stats(namespace, "coalesced", _local_get(key)))
+        return value
+
+    future = asyncio.get_running_loop().create_future()
+    # Waiters re-raise the leader's error; don't warn when there are none
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    _inflight[key] = future
+    try:
+        start = time.monotonic()
+        value, tokens, cost_usd = await compute()
+        record = {
+            "value": value,
+            "tokens": tokens,
+            "cost_usd": cost_usd,
+            "latency_seconds": round(time.monotonic() - start, 3),
+            "cached_at": time.time(),
+        }
+        if should_cache(value):
+            payload = serialization.dumps(record, default=str)
+            if len(payload) <= config.AUX_LLM_CACHE_MAX_ENTRY_BYTES:
+                _local_set(key, record, ttl_seconds)
+                await _redis_set(key, payload, ttl_seconds)
+        future.set_result(value)
+        asyncio.create_task(_record_stats(namespace, "misses"))
+        return value
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+async def cached_llm_api_call(
+    namespace: str,
+    messages: List[Dict[str, Any]],
+    model_name: str,
+    ttl_seconds: Optional[int] = None,
+    normalize_whitespace: bool = False,
+    **kwargs: Any,
+):
+    """
+    Non-streaming make_llm_api_call with content-addressed caching.
+
+    normalize_whitespace is passed to cache_key (see there).
+
+    Returns a litellm ModelResponse (fresh or rebuilt from cache), so callers
+    can keep using either response.choices[0].message.content or
+    response['choices'][0]['message'].
+    """
+    from core.services.llm import make_llm_api_call
+
+    kwargs["stream"] = False
+    key = cache_key(
+        model_name, messages,
+        normalize_whitespace=normalize_whitespace,
+        temperature=kwargs.get("temperature"),
+        max_tokens=kwargs.get("max_tokens"),
+        top_p=kwargs.get("top_p"),
+        response_format=kwargs.get("response_format"),
+    )
+
+    async def compute() -> Tuple[Any, int, float]:
+        response = await make_llm_api_call(messages=messages, model_name=model_name, **kwargs)
+        try:
+            content = response.choices[0].message.content
+        except (AttributeError, IndexError, KeyError, TypeError):
+            content = None
+        usage = getattr(response, "usage", None)
+        prompt_tokens = int(getattr(usage, "prompt_tokens", 0) or 0)
+        completion_tokens = int(getattr(usage, "completion_tokens", 0) or 0)
+        data = response.model_dump()
+        data["_cacheable"] = bool(content and content.strip())
+        return data, prompt_tokens + completion_tokens, estimate_cost(model_name, prompt_tokens, completion_tokens)
+
+    data = await get_or_compute(namespace, key, compute, ttl_seconds, should_cache=lambda d: d.get("_cacheable", False))
+    data = {k: v for k, v in data.items() if k != "_cacheable"}
+    return litellm.ModelResponse(**data)
+
+
+async def get_stats() -> Dict[str, Dict[str, float]]:
+    """Hit/miss/coalesced counts and tokens/cost/latency saved per namespace."""
+    from core.services import redis
+    client = await redis.get_client()
+    stats = {}
+    async for stats_key in client.scan_iter(match=f"{STATS_KEY_PREFIX}:*", count=100):
+        namespace = stats_key.rsplit(":", 1)[-1]
+        raw = await client.hgetall(stats_key)
+        values = {field: float(value) for field, value in raw.items()}
+        lookups = values.get("hits", 0) + values.get("coalesced", 0) + values.get("misses", 0)
+        values["hit_rate"] = round((values.get("hits", 0) + values.get("coalesced", 0)) / lookups, 3) if lookups else 0.0
+        stats[namespace] = values
+    return stats
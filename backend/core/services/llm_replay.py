@@ -0,0 +1,236 @@
+"""
+Record/replay stand-in for the LiteLLM provider router.
+
+In record mode every call made through make_llm_api_call still goes to the
+real provider, but the streamed chunks (with inter-chunk timing) or the full
+non-streaming response are written to a cassette file. In replay mode no
+provider is contacted: cassettes are served back as LiteLLM objects, either
+at recorded speed, accelerated, or instantly.
+
+Cassettes are JSONL files in LLM_REPLAY_DIR:
+    line 1:  {"key": ..., "model": ..., "stream": true, "recorded_at": ...}
+    line 2+: {"t": <seconds since request>, "chunk": {...}}   (streaming)
+             {"response": {...}}                              (non-streaming)
+
+Matching:
+- "hash": a cassette is selected by a hash of the request (model, messages,
+  tools, sampling params), so replays are deterministic per request
+- "sequence": cassettes are served in file order (optionally looping),
+  for benchmarks where requests contain run-specific ids
+
+Enable with LLM_REPLAY_MODE=record|replay (ignored in production), or
+install a provider explicitly with set_replay_provider().
+"""
+import asyncio
+import hashlib
+import itertools
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import litellm
+
+from core.utils.config import config, EnvMode
+from core.utils.logger import logger
+
+CASSETTE_SUFFIX = ".jsonl"
+
+# Request fields that define "the same call" for hash matching
+_KEY_FIELDS = ("model", "messages", "tools", "tool_choice", "temperature", "top_p", "stop", "response_format", "max_tokens")
+
+
+def request_key(params: Dict[str, Any]) -> str:
+    """Stable hash of the parts of a request that determine the response."""
+    material = {name: params.get(name) for name in _KEY_FIELDS}
+    encoded = json.dumps(material, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
+
+def _to_dict(obj: Any) -> Dict[str, Any]:
+    if isinstance(obj, dict):
+        return obj
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return json.loads(json.dumps(obj, default=str))
+
+
+@dataclass
+class Cassette:
+    key: str
+    model: Optional[str]
+    stream: bool
+    chunks: List[Tuple[float, Dict[str, Any]]] = field(default_factory=list)
+    response: Optional[Dict[str, Any]] = None
+    recorded_at: Optional[str] = None
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            header = {"key": self.key, "model": self.model, "stream": self.stream, "recorded_at": self.recorded_at}
+            f.write(json.dumps(header) + "\n")
+            if self.stream:
+                for offset, chunk in self.chunks:
+                    f.write(json.dumps({"t": round(offset, 6), "chunk": chunk}, default=str, ensure_ascii=False) + "\n")
+            else:
+                f.write(json.dumps({"response": self.response}, default=str, ensure_ascii=False) + "\n")
+
+    @classmethod
+    def load(cls, path: Path) -> "Cassette":
+        with open(path, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            cassette = cls(
+                key=header["key"],
+                model=header.get("model"),
+                stream=header.get("stream", True),
+                recorded_at=header.get("recorded_at"),
+            )
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if "chunk" in entry:
+                    cassette.chunks.append((float(entry.get("t", 0.0)), entry["chunk"]))
+                elif "response" in entry:
+                    cassette.response = entry["response"]
+        return cassette
+
+
+class ReplayProvider:
+    """Drop-in for provider_router.acompletion that records or replays cassettes."""
+
+    def __init__(
+        self,
+        cassette_dir: str,
+        mode: str = "replay",
+        speedup: float = 1.0,
+        match: str = "hash",
+        loop: bool = False,
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Invalid replay mode: {mode}")
+        if match not in ("hash", "sequence"):
+            raise ValueError(f"Invalid replay match strategy: {match}")
+        self.cassette_dir = Path(cassette_dir)
+        self.mode = mode
+        self.speedup = speedup
+        self.match = match
+        self.loop = loop
+        self._by_key: Dict[str, Cassette] = {}
+        self._sequence: List[Cassette] = []
+        self._cursor = None
+        self._record_counter = itertools.count()
+        if mode == "replay":
+            self._load()
+
+    def _load(self) -> None:
+        paths = sorted(self.cassette_dir.glob(f"*{CASSETTE_SUFFIX}"))
+        for path in paths:
+            cassette = Cassette.load(path)
+            self._sequence.append(cassette)
+            self._by_key.setdefault(cassette.key, cassette)
+        self._cursor = itertools.cycle(self._sequence) if self.loop else iter(self._sequence)
+        logger.info(f"🎞️ Loaded {len(self._sequence)} LLM cassettes from {self.cassette_dir} (match={self.match})")
+
+    def _next_cassette(self, params: Dict[str, Any]) -> Cassette:
+        if self.match == "hash":
+            key = request_key(params)
+            cassette = self._by_key.get(key)
+            if cassette is None:
+                raise LookupError(f"No LLM cassette recorded for request {key} (model {params.get('model')})")
+            return cassette
+        try:
+            return next(self._cursor)
+        except StopIteration:
+            raise LookupError(f"LLM cassettes in {self.cassette_dir} exhausted")
+
+    async def acompletion(self, params: Dict[str, Any], upstream: Callable[..., Awaitable[Any]]):
+        if self.mode == "replay":
+            cassette = self._next_cassette(params)
+            if params.get("stream") and cassette.stream:
+                return self._replay_stream(cassette)
+            if cassette.stream:
+                raise LookupError(f"Cassette {cassette.key} is streamed but the request is not")
+            return litellm.ModelResponse(**cassette.response)
+
+        response = await upstream(**params)
+        cassette = Cassette(
+            key=request_key(params),
+            model=params.get("model"),
+            stream=bool(params.get("stream")),
+            recorded_at=datetime.now(timezone.utc).isoformat(),
+        )
+        if cassette.stream and hasattr(response, "__aiter__"):
+            return self._record_stream(response, cassette)
+        cassette.stream = False
+        cassette.response = _to_dict(response)
+        self._save(cassette)
+        return response
+
+    def _save(self, cassette: Cassette) -> None:
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S_%f")
+        path = self.cassette_dir / f"{timestamp}_{next(self._record_counter):04d}_{cassette.key}{CASSETTE_SUFFIX}"
+        try:
+            cassette.save(path)
+            logger.debug(f"🎞️ Recorded LLM cassette: {path}")
+        except Exception as e:
+            logger.warning(f"Failed to save LLM cassette {path}: {e}")
+
+    async def _record_stream(self, response, cassette: Cassette) -> AsyncGenerator:
+        start = time.monotonic()
+        try:
+            async for chunk in response:
+                cassette.chunks.append((time.monotonic() - start, _to_dict(chunk)))
+                yield chunk
+        finally:
+            # Partial streams (errors, cancellation) are still useful for replay
+            self._save(cassette)
+
+    async def _replay_stream(self, cassette: Cassette) -> AsyncGenerator:
+        start = time.monotonic()
+        for offset, chunk in cassette.chunks:
+            if self.speedup > 0:
+                delay = offset / self.speedup - (time.monotonic() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield litellm.ModelResponseStream(**chunk)
+
+
+_replay_provider: Optional[ReplayProvider] = None
+_configured = False
+
+
+def set_replay_provider(provider: Optional[ReplayProvider]) -> None:
+    """Install (or remove with None) the provider used by make_llm_api_call."""
+    global _replay_provider, _configured
+    _replay_provider = provider
+    _configured = True
+
+
+def get_replay_provider() -> Optional[ReplayProvider]:
+    global _replay_provider, _configured
+    if _configured:
+        return _replay_provider
+
+    _configured = True
+    mode = (config.LLM_REPLAY_MODE or "").lower() if config else ""
+    if not mode:
+        return None
+    if config.ENV_MODE == EnvMode.PRODUCTION:
+        logger.warning("LLM_REPLAY_MODE is ignored in production")
+        return None
+
+    try:
+        _replay_provider = ReplayProvider(
+            cassette_dir=config.LLM_REPLAY_DIR,
+            mode=mode,
+            speedup=config.LLM_REPLAY_SPEEDUP,
+            match=config.LLM_REPLAY_MATCH,
+        )
+        logger.info(f"🎞️ LLM replay provider enabled (mode={mode}, dir={config.LLM_REPLAY_DIR})")
+    except Exception as e:
+        logger.error(f"Failed to set up LLM replay provider: {e}")
+        _replay_provider = None
+    return _replay_provider
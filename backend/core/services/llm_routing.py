@@ -0,0 +1,442 @@
+"""
+Latency-aware routing and hedged requests around the LiteLLM provider router.
+
+The router's fallbacks only kick in after a request has failed (and after its
+serial retries), so during a provider brownout time-to-first-token grows
+long before anything falls back. This layer sits in front of
+provider_router.acompletion and, per deployment (each model id / inference
+profile ARN in the fallback groups):
+
+- keeps a rolling window of TTFT samples and outcomes (per process)
+- runs a circuit breaker (closed -> open after consecutive failures ->
+  half-open after a cooldown, where a single probe request is let through,
+  closed again on the first success)
+- routes to the requested deployment while it is healthy, otherwise to the
+  healthiest deployment in its fallback group
+- optionally hedges streaming calls: if no first chunk arrives within the
+  deployment's p95 TTFT (clamped), a second request is started on the next
+  healthiest other deployment and whichever streams first wins; the loser is
+  cancelled and its stream closed
+
+Client errors (400s, context window exceeded) are request problems, not
+deployment health, and never count against a breaker.
+
+Stats are kept in-process and periodically snapshotted to Redis
+(llm_routing:stats, one field per process) for the admin endpoint.
+"""
+import asyncio
+import json
+import os
+import socket
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import litellm
+
+from core.utils.config import config
+from core.utils.logger import logger
+
+STATS_KEY = "llm_routing:stats"
+STATS_PUBLISH_INTERVAL_SECONDS = 30
+STATS_TTL_SECONDS = 300
+
+SAMPLE_WINDOW = 100               # Outcomes kept per deployment
+SAMPLE_MAX_AGE_SECONDS = 300      # Older samples are ignored
+MIN_SAMPLES = 5                   # Below this a deployment has "no data"
+MAX_ERROR_RATE = 0.5              # Route away from a deployment above this
+SLOW_FACTOR = 2.0                 # ...or when its TTFT p50 is this much worse than an alternative's
+
+_EMPTY_STREAM = object()
+
+
+@dataclass
+class _Sample:
+    at: float
+    ok: bool
+    ttft: Optional[float] = None
+
+
+@dataclass
+class _DeploymentState:
+    samples: Deque[_Sample] = field(default_factory=lambda: deque(maxlen=SAMPLE_WINDOW))
+    state: str = "closed"
+    probe_started: float = 0.0    # When the in-flight half-open probe was sent (0 = none)
+    failures: int = 0
+    last_failure: float = 0.0
+    requests: int = 0
+    errors: int = 0
+    routed_to: int = 0
+    hedges_started: int = 0
+    hedges_won: int = 0
+
+    def recent(self) -> List[_Sample]:
+        cutoff = time.time() - SAMPLE_MAX_AGE_SECONDS
+        return [s for s in self.samples if s.at >= cutoff]
+
+
+_deployments: Dict[str, _DeploymentState] = {}
+_groups: Dict[str, List[str]] = {}
+_last_publish = 0.0
+_instance = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def is_enabled() -> bool:
+    return bool(config and config.LLM_ROUTING_ENABLED)
+
+
+def set_deployment_groups(fallbacks: List[Dict[str, List[str]]]) -> None:
+    """Register fallback groups in LiteLLM Router format ([{primary: [alternatives]}])."""
+    _groups.clear()
+    for rule in fallbacks:
+        for primary, alternatives in rule.items():
+            _groups[primary] = list(alternatives)
+
+
+def _get(deployment: str) -> _DeploymentState:
+    state = _deployments.get(deployment)
+    if state is None:
+        state = _deployments[deployment] = _DeploymentState()
+    return state
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(pct / 100 * (len(values) - 1)))))
+    return values[index]
+
+
+def _ttfts(state: _DeploymentState) -> List[float]:
+    return [s.ttft for s in state.recent() if s.ok and s.ttft is not None]
+
+
+def _error_rate(state: _DeploymentState) -> Optional[float]:
+    recent = state.recent()
+    if len(recent) < MIN_SAMPLES:
+        return None
+    return sum(1 for s in recent if not s.ok) / len(recent)
+
+
+def _score(state: _DeploymentState) -> Optional[float]:
+    """Expected TTFT penalised by error rate; None if there is not enough data."""
+    ttfts = _ttfts(state)
+    error_rate = _error_rate(state)
+    if len(ttfts) < MIN_SAMPLES or error_rate is None:
+        return None
+    return _percentile(ttfts, 50) * (1 + 2 * error_rate)
+
+
+# ===== Circuit breaker (same states as the Redis worker breaker) =====
+
+def _breaker_allows(deployment: str) -> bool:
+    state = _get(deployment)
+    if state.state == "open":
+        if time.time() - state.last_failure > config.LLM_CIRCUIT_COOLDOWN_SECONDS:
+            state.state = "half-open"
+            state.probe_started = 0.0
+            logger.info(f"🔌 LLM circuit breaker half-open for {deployment} (testing)")
+            return True
+        return False
+    if state.state == "half-open":
+        # Only one probe at a time; the rest keep routing elsewhere until it
+        # resolves (a probe lost without resolving is given up after the cooldown)
+        return time.time() - state.probe_started > config.LLM_CIRCUIT_COOLDOWN_SECONDS
+    return True
+
+
+def _record_success(deployment: str, ttft: Optional[float]) -> None:
+    state = _get(deployment)
+    state.samples.append(_Sample(at=time.time(), ok=True, ttft=ttft))
+    state.failures = 0
+    if state.state != "closed":
+        state.state = "closed"
+        logger.info(f"✅ LLM circuit breaker closed for {deployment}")
+    _maybe_publish_stats()
+
+
+def _record_failure(deployment: str, error: BaseException) -> None:
+    if not _is_deployment_failure(error):
+        return
+    state = _get(deployment)
+    state.samples.append(_Sample(at=time.time(), ok=False))
+    state.errors += 1
+    state.failures += 1
+    state.last_failure = time.time()
+    if state.state == "half-open" or (state.failures >= config.LLM_CIRCUIT_FAILURE_THRESHOLD and state.state != "open"):
+        state.state = "open"
+        logger.warning(f"🔴 LLM circuit breaker OPEN for {deployment} (failures={state.failures}): {str(error)[:200]}")
+    _maybe_publish_stats()
+
+
+def _is_deployment_failure(error: BaseException) -> bool:
+    if isinstance(error, asyncio.CancelledError):
+        return False
+    # 400s (including ContextWindowExceededError) are caused by the request
+    return not isinstance(error, litellm.BadRequestError)
+
+
+# ===== Routing =====
+
+def _candidates(primary: str) -> List[str]:
+    return [primary] + [d for d in _groups.get(primary, []) if d != primary]
+
+
+def _is_degraded(deployment: str, alternatives: List[str]) -> bool:
+    state = _get(deployment)
+    error_rate = _error_rate(state)
+    if error_rate is not None and error_rate >= MAX_ERROR_RATE:
+        return True
+    own_score = _score(state)
+    if own_score is None:
+        return False
+    alt_scores = [s for s in (_score(_get(d)) for d in alternatives) if s is not None]
+    return bool(alt_scores) and own_score > min(alt_scores) * SLOW_FACTOR
+
+
+def pick_deployment(primary: str, exclude: Optional[Set[str]] = None) -> Optional[str]:
+    """
+    Choose the deployment to send a request for `primary` to.
+
+    Stays on the requested deployment unless its breaker is open or it is
+    degraded; otherwise picks the best-scoring allowed alternative (untried
+    alternatives are explored first). Returns None only when `exclude` rules
+    out every allowed candidate.
+    """
+    deployment, _ = _pick(primary, exclude)
+    return deployment
+
+
+def _pick(primary: str, exclude: Optional[Set[str]] = None) -> Tuple[Optional[str], bool]:
+    """pick_deployment, also claiming the probe slot of a half-open pick. Returns (deployment, is_probe)."""
+    exclude = exclude or set()
+    candidates = [d for d in _candidates(primary) if d not in exclude]
+    available = [d for d in candidates if _breaker_allows(d)]
+    if not available:
+        # Everything is open: keep sending to the requested deployment rather than failing locally
+        return (None, False) if exclude else (primary, False)
+
+    alternatives = [d for d in available if d != primary]
+    if primary in available and not _is_degraded(primary, alternatives):
+        chosen = primary
+    elif not alternatives:
+        chosen = primary if primary in available else None
+    else:
+        order = {d: i for i, d in enumerate(candidates)}
+        chosen = min(alternatives, key=lambda d: (_score(_get(d)) or 0.0, order[d]))
+
+    if chosen is None:
+        return None, False
+    state = _get(chosen)
+    if state.state != "half-open":
+        return chosen, False
+    state.probe_started = time.time()
+    return chosen, True
+
+
+def _hedge_delay(deployment: str) -> float:
+    min_delay = config.LLM_HEDGE_MIN_DELAY_MS / 1000
+    max_delay = config.LLM_HEDGE_MAX_DELAY_MS / 1000
+    ttfts = _ttfts(_get(deployment))
+    if len(ttfts) < MIN_SAMPLES:
+        return max_delay
+    return min(max_delay, max(min_delay, _percentile(ttfts, 95)))
+
+
+# ===== Request execution =====
+
+async def _close_stream(iterator) -> None:
+    aclose = getattr(iterator, "aclose", None)
+    if aclose:
+        try:
+            await aclose()
+        except Exception:
+            pass
+
+
+async def _attempt(call: Callable[..., Awaitable[Any]], params: Dict[str, Any], deployment: str, probe: bool = False) -> Tuple[str, Any, Any]:
+    """Issue one request; for streams, wait for the first chunk. Returns (deployment, first_chunk, response)."""
+    try:
+        return await _issue(call, params, deployment)
+    finally:
+        if probe:
+            # Success closed the breaker and a failure reopened it; a cancelled
+            # or client-error probe leaves it half-open for the next one
+            _get(deployment).probe_started = 0.0
+
+
+async def _issue(call: Callable[..., Awaitable[Any]], params: Dict[str, Any], deployment: str) -> Tuple[str, Any, Any]:
+    _get(deployment).requests += 1
+    start = time.monotonic()
+    stream = bool(params.get("stream"))
+    try:
+        response = await call(**{**params, "model": deployment})
+        if not (stream and hasattr(response, "__aiter__")):
+            _record_success(deployment, None)
+            return deployment, None, response
+
+        iterator = response.__aiter__()
+        try:
+            first = await iterator.__anext__()
+        except StopAsyncIteration:
+            first = _EMPTY_STREAM
+        except BaseException:
+            await _close_stream(iterator)
+            raise
+        _record_success(deployment, time.monotonic() - start)
+        return deployment, first, iterator
+    except BaseException as e:
+        _record_failure(deployment, e)
+        raise
+
+
+async def _discard(task: asyncio.Task) -> None:
+    """Cancel a losing attempt, or close its stream if it already produced one."""
+    if not task.done():
+        task.cancel()
+        try:
+            await task
+        except BaseException:
+            pass
+        return
+    if task.cancelled() or task.exception() is not None:
+        return
+    _, first, response = task.result()
+    if first is not None:
+        await _close_stream(response)
+
+
+async def _resume_stream(deployment: str, first: Any, iterator) -> Any:
+    try:
+        if first is not _EMPTY_STREAM:
+            yield first
+            async for chunk in iterator:
+                yield chunk
+    except Exception as e:
+        _record_failure(deployment, e)
+        raise
+    finally:
+        await _close_stream(iterator)
+
+
+async def acompletion(params: Dict[str, Any], call: Callable[..., Awaitable[Any]]):
+    """Drop-in for provider_router.acompletion(**params) with routing, breakers and hedging."""
+    primary = params.get("model")
+    deployment, probe = _pick(primary)
+    if deployment != primary:
+        _get(deployment).routed_to += 1
+        logger.info(f"🔀 Routing {primary} -> {deployment} (requested deployment unhealthy)")
+
+    tasks = [asyncio.create_task(_attempt(call, params, deployment, probe))]
+    hedge_task = None
+    winner = None
+    errors: List[BaseException] = []
+
+    try:
+        if config.LLM_HEDGING_ENABLED and params.get("stream"):
+            delay = _hedge_delay(deployment)
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                # Never hedge onto the deployment already being waited on (or the
+                # unhealthy requested one it was routed away from)
+                hedge_deployment, hedge_probe = _pick(primary, exclude={primary, deployment})
+                if hedge_deployment is None:
+                    logger.debug(f"No hedge target for {deployment} after {delay:.1f}s, waiting on it alone")
+                else:
+                    _get(hedge_deployment).hedges_started += 1
+                    logger.info(f"🏁 Hedging {deployment}: no first token after {delay:.1f}s, also trying {hedge_deployment}")
+                    hedge_task = asyncio.create_task(_attempt(call, params, hedge_deployment, hedge_probe))
+                    tasks.append(hedge_task)
+
+        pending = set(tasks)
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Prefer the original request if both finished in the same tick
+            for task in sorted(done, key=tasks.index):
+                if task.exception() is None and winner is None:
+                    winner = task
+                elif task.exception() is not None:
+                    errors.append(task.exception())
+    finally:
+        for task in tasks:
+            if task is not winner:
+                await _discard(task)
+
+    if winner is None:
+        raise errors[0]
+
+    won_deployment, first, response = winner.result()
+    if winner is hedge_task:
+        _get(won_deployment).hedges_won += 1
+        logger.info(f"🏁 Hedged request to {won_deployment} won")
+    if first is None:
+        return response
+    return _resume_stream(won_deployment, first, response)
+
+
+# ===== Metrics =====
+
+def get_stats() -> Dict[str, Any]:
+    """Per-deployment routing stats for this process."""
+    deployments = {}
+    for name, state in _deployments.items():
+        ttfts = _ttfts(state)
+        error_rate = _error_rate(state)
+        p50, p95 = _percentile(ttfts, 50), _percentile(ttfts, 95)
+        deployments[name] = {
+            "state": state.state,
+            "consecutive_failures": state.failures,
+            "requests": state.requests,
+            "errors": state.errors,
+            "error_rate": round(error_rate, 3) if error_rate is not None else None,
+            "ttft_p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "ttft_p95_ms": round(p95 * 1000) if p95 is not None else None,
+            "samples": len(state.recent()),
+            "routed_to": state.routed_to,
+            "hedges_started": state.hedges_started,
+            "hedges_won": state.hedges_won,
+        }
+    return {"instance": _instance, "updated_at": time.time(), "deployments": deployments}
+
+
+def _maybe_publish_stats() -> None:
+    global _last_publish
+    now = time.time()
+    if now - _last_publish < STATS_PUBLISH_INTERVAL_SECONDS:
+        return
+    _last_publish = now
+    try:
+        asyncio.get_running_loop().create_task(_publish_stats())
+    except RuntimeError:
+        pass
+
+
+async def _publish_stats() -> None:
+    try:
+        from core.services import redis
+        client = await redis.get_client()
+        await client.hset(STATS_KEY, _instance, json.dumps(get_stats()))
+        await client.expire(STATS_KEY, STATS_TTL_SECONDS)
+    except Exception as e:
+        logger.debug(f"Failed to publish LLM routing stats: {e}")
+
+
+async def get_cluster_stats() -> Dict[str, Any]:
+    """Latest routing stats from every process that published recently."""
+    from core.services import redis
+    client = await redis.get_client()
+    raw = await client.hgetall(STATS_KEY)
+    cutoff = time.time() - STATS_TTL_SECONDS
+    instances = {}
+    for instance, payload in raw.items():
+        try:
+            snapshot = json.loads(payload)
+        except (TypeError, json.JSONDecodeError):
+            continue
+        if snapshot.get("updated_at", 0) >= cutoff:
+            instances[instance] = snapshot
+    if _deployments:
+        instances[_instance] = get_stats()
+    return {"enabled": is_enabled(), "hedging_enabled": bool(config.LLM_HEDGING_ENABLED), "instances": instances}
@@ -2,7 +2,7 @@
 Queue metrics service for monitoring Dramatiq queue depth.
 
 Provides:
-- Queue depth metrics from Redis
+- Queue depth metrics from Redis (Dramatiq + admission control backlog)
 - CloudWatch publishing for ECS auto-scaling
 """
 import asyncio
@@ -40,20 +40,25 @@ async def get_queue_metrics() -> dict:
     Get Dramatiq queue metrics from Redis.
     
     Returns:
-        dict with queue_depth, delay_queue_depth, dead_letter_depth, timestamp
+        dict with queue_depth, delay_queue_depth, dead_letter_depth,
+        admission_pending, admission_inflight, timestamp
     """
     from core.services import redis
+    from core.services import admission_control
     
     try:
         client = await redis.get_client()
         queue_depth = await client.llen("dramatiq:default")
         delay_queue_depth = await client.llen("dramatiq:default.DQ")
         dead_letter_depth = await client.llen("dramatiq:default.XQ")
+        admission = await admission_control.get_depths(client)
         
         return {
             "queue_depth": queue_depth,
             "delay_queue_depth": delay_queue_depth,
             "dead_letter_depth": dead_letter_depth,
+            "admission_pending": admission["pending"],
+            "admission_inflight": admission["inflight"],
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
     except Exception as e:
@@ -108,7 +113,8 @@ async def start_cloudwatch_publisher(interval_seconds: int = 60):
             await asyncio.sleep(interval_seconds)
             
             metrics = await get_queue_metrics()
-            await publish_to_cloudwatch(metrics["queue_depth"])
+            # Runs held back by admission control are still work waiting for workers
+            await publish_to_cloudwatch(metrics["queue_depth"] + metrics["admission_pending"])
             
         except asyncio.CancelledError:
             logger.info("CloudWatch queue metrics publisher stopped")
@@ -0,0 +1,269 @@
+"""
+Per-function tool execution metrics.
+
+ResponseProcessor._execute_tool records every call: duration, result size,
+success, whether it retried a failed call of the same function, and how many
+sandbox round trips it made (counted by the sandbox proxy in
+core/sandbox/tool_base.py via record_sandbox_call()).
+
+Each process aggregates locally and flushes deltas to Redis every
+FLUSH_INTERVAL_SECONDS, so the admin endpoint and the Prometheus export on
+any API instance see the whole cluster (API and workers):
+
+- tool_metrics:fn:{function}  hash of counters and histogram buckets
+- tool_metrics:slowest        sorted set of the slowest calls (arguments redacted)
+"""
+import asyncio
+import json
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from core.utils.logger import logger
+
+KEY_PREFIX = "tool_metrics"
+FUNCTIONS_KEY = f"{KEY_PREFIX}:functions"
+SLOWEST_KEY = f"{KEY_PREFIX}:slowest"
+FLUSH_INTERVAL_SECONDS = 10
+SLOWEST_KEEP = 50
+SLOW_CALL_MIN_SECONDS = 1.0  # faster calls never make the slowest list
+
+# Histogram upper bounds; +Inf is implicit
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+@dataclass
+class ToolCall:
+    function_name: str
+    arguments: Any
+    retry: bool
+    started: float
+    sandbox_calls: int = 0
+    token: Any = None
+
+
+_current_call: ContextVar[Optional[ToolCall]] = ContextVar("tool_metrics_current_call", default=None)
+_pending: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+_pending_slow: List[Dict[str, Any]] = []
+_flush_task: Optional[asyncio.Task] = None
+
+
+def start_call(function_name: str, arguments: Any, retry: bool = False) -> ToolCall:
+    call = ToolCall(function_name=function_name, arguments=arguments, retry=retry, started=time.monotonic())
+    call.token = _current_call.set(call)
+    return call
+
+
+def record_sandbox_call() -> None:
+    """Count one sandbox round trip against the tool call running in this context."""
+    call = _current_call.get()
+    if call is not None:
+        call.sandbox_calls += 1
+
+
+def _bucket_field(prefix: str, value: float, bounds) -> str:
+    for bound in bounds:
+        if value <= bound:
+            return f"{prefix}_le_{bound}"
+    return f"{prefix}_le_inf"
+
+
+def _result_bytes(result: Any) -> int:
+    output = getattr(result, "output", result)
+    if output is None:
+        return 0
+    if isinstance(output, (bytes, bytearray)):
+        return len(output)
+    if not isinstance(output, str):
+        output = json.dumps(output, default=str, ensure_ascii=False)
+    return len(output.encode("utf-8", errors="replace"))
+
+
+def redact_arguments(arguments: Any) -> Any:
+    """Argument names with value types/sizes only; values can hold secrets or user data."""
+    if isinstance(arguments, str):
+        try:
+            arguments = json.loads(arguments)
+        except (ValueError, TypeError):
+            return f"<str:{len(arguments)}>"
+    if isinstance(arguments, dict):
+        return {key: redact_arguments(value) for key, value in arguments.items()}
+    if isinstance(arguments, (list, tuple)):
+        return f"<list:{len(arguments)}>"
+    if isinstance(arguments, (int, float, bool)) or arguments is None:
+        return f"<{type(arguments).__name__}>"
+    return f"<{type(arguments).__name__}:{len(str(arguments))}>"
+
+
+def finish_call(call: ToolCall, result: Any) -> None:
+    duration = time.monotonic() - call.started
+    try:
+        _current_call.reset(call.token)
+    except ValueError:
+        # Finished from a different context than it started in
+        pass
+    success = bool(getattr(result, "success", False))
+    size = _result_bytes(result) if result is not None else 0
+
+    stats = _pending[call.function_name]
+    stats["calls"] += 1
+    stats["errors"] += 0 if success else 1
+    stats["retries"] += 1 if call.retry else 0
+    stats["duration_sum"] += duration
+    stats["bytes_sum"] += size
+    stats["sandbox_calls_sum"] += call.sandbox_calls
+    stats[_bucket_field("duration", duration, DURATION_BUCKETS)] += 1
+    stats[_bucket_field("bytes", size, BYTES_BUCKETS)] += 1
+
+    if duration >= SLOW_CALL_MIN_SECONDS:
+        _pending_slow.append({
+            "function": call.function_name,
+            "duration": round(duration, 3),
+            "success": success,
+            "result_bytes": size,
+            "sandbox_calls": call.sandbox_calls,
+            "arguments": redact_arguments(call.arguments),
+            "at": time.time(),
+        })
+
+    _schedule_flush()
+
+
+def _schedule_flush() -> None:
+    global _flush_task
+    if _flush_task is not None and not _flush_task.done():
+        return
+    try:
+        _flush_task = asyncio.get_running_loop().create_task(_flush_later())
+    except RuntimeError:
+        pass
+
+
+async def _flush_later() -> None:
+    await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+    await flush()
+
+
+async def flush() -> None:
+    """Push locally aggregated deltas to Redis."""
+    global _pending_slow
+    if not _pending and not _pending_slow:
+        return
+    pending = {name: dict(stats) for name, stats in _pending.items()}
+    slow, _pending_slow = _pending_slow, []
+    _pending.clear()
+    try:
+        from core.services import redis
+        client = await redis.get_client()
+        pipe = client.pipeline()
+        for name, stats in pending.items():
+            key = f"{KEY_PREFIX}:fn:{name}"
+            for field, value in stats.items():
+                if field.endswith("_sum"):
+                    pipe.hincrbyfloat(key, field, value)
+                else:
+                    pipe.hincrby(key, field, int(value))
+            pipe.sadd(FUNCTIONS_KEY, name)
+        for entry in slow:
+            pipe.zadd(SLOWEST_KEY, {json.dumps(entry, default=str): entry["duration"]})
+        if slow:
+            pipe.zremrangebyrank(SLOWEST_KEY, 0, -(SLOWEST_KEEP + 1))
+        await pipe.execute()
+    except Exception as e:
+        logger.debug(f"Failed to flush tool metrics: {e}")
+
+
+def _quantile(buckets: Dict[str, float], prefix: str, bounds, total: float, q: float) -> Optional[float]:
+    """Upper bound of the histogram bucket containing quantile q (None past the last bucket)."""
+    if not total:
+        return None
+    seen = 0.0
+    for bound in bounds:
+        seen += buckets.get(f"{prefix}_le_{bound}", 0)
+        if seen >= q * total:
+            return float(bound)
+    return None
+
+
+async def _load() -> Dict[str, Dict[str, float]]:
+    from core.services import redis
+    client = await redis.get_client()
+    names = sorted(await client.smembers(FUNCTIONS_KEY))
+    pipe = client.pipeline()
+    for name in names:
+        pipe.hgetall(f"{KEY_PREFIX}:fn:{name}")
+    rows = await pipe.execute()
+    return {name: {field: float(value) for field, value in (row or {}).items()} for name, row in zip(names, rows)}
+
+
+async def get_summary(top: int = 20) -> Dict[str, Any]:
+    """Per-function aggregates (sorted by total time) plus the slowest recent calls."""
+    from core.services import redis
+    await flush()
+    data = await _load()
+    total_time = sum(stats.get("duration_sum", 0) for stats in data.values()) or 1.0
+
+    functions = []
+    for name, stats in data.items():
+        calls = stats.get("calls", 0)
+        if not calls:
+            continue
+        functions.append({
+            "function": name,
+            "calls": int(calls),
+            "error_rate": round(stats.get("errors", 0) / calls, 4),
+            "retries": int(stats.get("retries", 0)),
+            "total_seconds": round(stats.get("duration_sum", 0), 3),
+            "share_of_tool_time": round(stats.get("duration_sum", 0) / total_time, 4),
+            "avg_seconds": round(stats.get("duration_sum", 0) / calls, 3),
+            "p50_seconds_le": _quantile(stats, "duration", DURATION_BUCKETS, calls, 0.5),
+            "p95_seconds_le": _quantile(stats, "duration", DURATION_BUCKETS, calls, 0.95),
+            "avg_result_bytes": int(stats.get("bytes_sum", 0) / calls),
+            "avg_sandbox_calls": round(stats.get("sandbox_calls_sum", 0) / calls, 2),
+        })
+    functions.sort(key=lambda f: f["total_seconds"], reverse=True)
+
+    client = await redis.get_client()
+    slowest = [json.loads(member) for member in await client.zrevrange(SLOWEST_KEY, 0, top - 1)]
+    return {"functions": functions, "slowest": slowest}
+
+
+async def render_prometheus() -> bytes:
+    """Cluster-wide metrics in the Prometheus text exposition format."""
+    from prometheus_client import CollectorRegistry, generate_latest
+    from prometheus_client.core import CounterMetricFamily, HistogramMetricFamily
+
+    await flush()
+    data = await _load()
+
+    def histogram(name: str, doc: str, prefix: str, bounds, sum_field: str) -> HistogramMetricFamily:
+        family = HistogramMetricFamily(name, doc, labels=["function"])
+        for function, stats in data.items():
+            cumulative, buckets = 0.0, []
+            for bound in bounds:
+                cumulative += stats.get(f"{prefix}_le_{bound}", 0)
+                buckets.append((str(bound), cumulative))
+            buckets.append(("+Inf", stats.get("calls", 0)))
+            family.add_metric([function], buckets, stats.get(sum_field, 0))
+        return family
+
+    def counter(name: str, doc: str, field: str) -> CounterMetricFamily:
+        family = CounterMetricFamily(name, doc, labels=["function"])
+        for function, stats in data.items():
+            family.add_metric([function], stats.get(field, 0))
+        return family
+
+    class _Collector:
+        def collect(self):
+            yield histogram("agent_tool_duration_seconds", "Tool execution time", "duration", DURATION_BUCKETS, "duration_sum")
+            yield histogram("agent_tool_result_bytes", "Tool result size", "bytes", BYTES_BUCKETS, "bytes_sum")
+            yield counter("agent_tool_errors", "Failed tool calls", "errors")
+            yield counter("agent_tool_retries", "Tool calls retrying a failed call of the same function", "retries")
+            yield counter("agent_tool_sandbox_calls", "Sandbox round trips made by tool calls", "sandbox_calls_sum")
+
+    registry = CollectorRegistry(auto_describe=False)
+    registry.register(_Collector())
+    return generate_latest(registry)
@@ -0,0 +1,424 @@
+"""
+Cached, bounded-concurrency access to the web search and scrape providers.
+
+SandboxWebSearchTool used to call Tavily and Firecrawl directly for every
+query and URL, so a query repeated across runs and users paid full latency
+and API cost every time. Calls now go through this module:
+
+- results are cached in Redis, shared by all workers, under a hash of the
+  provider, the normalized query (whitespace collapsed, case folded) or URL
+  (scheme and host lowercased, default port and fragment dropped, query
+  parameters sorted) and the request parameters; only successful results
+  are stored
+- an entry is fresh for WEB_CACHE_TTL_SECONDS (minutes: the tool is used for
+  "latest news" style queries) and is then served stale for up to
+  WEB_CACHE_STALE_SECONDS while a single caller refreshes it in the
+  background (stale-while-revalidate; a short Redis lock dedupes refreshes
+  across workers)
+- callers that need current results pass fresh=True, which skips the cache
+  read but still stores the new result for later callers
+- scrapes are only cached when WEB_CACHE_SCRAPES is set; pages change without
+  notice and a stale copy is worse than a slower fetch
+- the cache is bounded: results over WEB_CACHE_MAX_ENTRY_BYTES are not
+  stored, and an index sorted set evicts the oldest entries beyond
+  WEB_CACHE_MAX_ENTRIES
+- concurrent misses for the same key in a process share one provider call
+- fan_out() runs a batch with at most WEB_FANOUT_CONCURRENCY calls in
+  flight; scrapes additionally respect per-domain politeness limits
+  (WEB_SCRAPE_PER_DOMAIN_CONCURRENCY in flight per domain and
+  WEB_SCRAPE_DOMAIN_INTERVAL_SECONDS between request starts)
+
+WEB_PROVIDER_MODE=stub swaps both providers for a deterministic local stub
+(no network, no API keys) so the pipeline can be benchmarked offline, see
+core/utils/scripts/bench_web_search.py. Ignored in production.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from core.services import redis
+from core.utils import task_supervisor
+from core.utils.config import config, EnvMode
+from core.utils.logger import logger
+
+CACHE_PREFIX = "web_cache"
+INDEX_KEY = f"{CACHE_PREFIX}:index"
+REFRESH_LOCK_SECONDS = 60
+
+T = TypeVar("T")
+
+# Parameters of the Tavily call made by the tool; part of the cache key
+SEARCH_PARAMS = {
+    "include_images": True,
+    "include_answer": "advanced",
+    "search_depth": "advanced",
+}
+
+_stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "provider_calls": 0}
+
+
+# ---------------------------------------------------------------------------
+# Providers
+# ---------------------------------------------------------------------------
+
+class TavilySearchProvider:
+    name = "tavily"
+
+    def __init__(self):
+        self._client = None
+
+    def available(self) -> bool:
+        return bool(config.TAVILY_API_KEY)
+
+    async def search(self, query: str, max_results: int) -> Dict[str, Any]:
+        if self._client is None:
+            from tavily import AsyncTavilyClient
+            self._client = AsyncTavilyClient(api_key=config.TAVILY_API_KEY)
+        return await self._client.search(query=query, max_results=max_results, **SEARCH_PARAMS)
+
+
+class FirecrawlScrapeProvider:
+    name = "firecrawl"
+    max_retries = 3
+    timeout_seconds = 30
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def available(self) -> bool:
+        return bool(config.FIRECRAWL_API_KEY)
+
+    async def scrape(self, url: str, formats: List[str]) -> Dict[str, Any]:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient()
+        headers = {
+            "Authorization": f"Bearer {config.FIRECRAWL_API_KEY}",
+            "Content-Type": "application/json",
+        }
+        payload = {"url": url, "formats": formats}
+
+        retry_count = 0
+        while True:
+            try:
+                response = await self._client.post(
+                    f"{config.FIRECRAWL_URL}/v1/scrape",
+                    json=payload,
+                    headers=headers,
+                    timeout=self.timeout_seconds,
+                )
+                response.raise_for_status()
+                return response.json()
+            except (httpx.ReadTimeout, httpx.ConnectTimeout, httpx.ReadError) as timeout_err:
+                retry_count += 1
+                logger.warning(f"Firecrawl request for {url} timed out (attempt {retry_count}/{self.max_retries}): {timeout_err}")
+                if retry_count >= self.max_retries:
+                    raise Exception(f"Request timed out after {self.max_retries} attempts with {self.timeout_seconds}s timeout")
+                # Exponential backoff
+                await asyncio.sleep(2 ** retry_count)
+
+
+class StubWebProvider:
+    """Deterministic offline results with a fixed latency, for benchmarks."""
+    name = "stub"
+
+    def available(self) -> bool:
+        return True
+
+    async def search(self, query: str, max_results: int) -> Dict[str, Any]:
+        await asyncio.sleep(config.WEB_STUB_LATENCY_SECONDS)
+        digest = hashlib.sha256(query.encode("utf-8")).hexdigest()[:12]
+        results = [
+            {
+                "title": f"{query} - result {i + 1}",
+                "url": f"https://stub-{i % 4}.example.com/{digest}/{i}",
+                "content": f"Synthetic result {i + 1} for '{query}'. " * 8,
+                "score": round(1.0 - i / max(max_results, 1), 3),
+                "published_date": "2025-01-01",
+            }
+            for i in range(max_results)
+        ]
+        return {
+            "query": query,
+            "answer": f"Synthetic answer for '{query}'.",
+            "images": [f"https://stub.example.com/{digest}/image.png"],
+            "results": results,
+            "response_time": config.WEB_STUB_LATENCY_SECONDS,
+        }
+
+    async def scrape(self, url: str, formats: List[str]) -> Dict[str, Any]:
+        await asyncio.sleep(config.WEB_STUB_LATENCY_SECONDS)
+        paragraph = f"Synthetic content of {url}. " * 10
+        markdown = f"# {url}\n\n" + "\n\n".join(paragraph for _ in range(config.WEB_STUB_SCRAPE_PARAGRAPHS))
+        data: Dict[str, Any] = {
+            "markdown": markdown,
+            "metadata": {"title": f"Stub page {url}", "sourceURL": url, "statusCode": 200},
+        }
+        if "html" in formats:
+            data["html"] = f"<html><body><pre>{markdown}</pre></body></html>"
+        return {"success": True, "data": data}
+
+
+_tavily = TavilySearchProvider()
+_firecrawl = FirecrawlScrapeProvider()
+_stub = StubWebProvider()
+
+
+def _use_stub() -> bool:
+    return config.WEB_PROVIDER_MODE == "stub" and config.ENV_MODE != EnvMode.PRODUCTION
+
+
+def search_provider():
+    return _stub if _use_stub() else _tavily
+
+
+def scrape_provider():
+    return _stub if _use_stub() else _firecrawl
+
+
+# ---------------------------------------------------------------------------
+# Keys
+# ---------------------------------------------------------------------------
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for cache keys; the URL actually fetched is left untouched."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def url_domain(url: str) -> str:
+    host = (urlsplit(url.strip()).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _cache_key(kind: str, material: Dict[str, Any]) -> str:
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False)
+    return f"{CACHE_PREFIX}:{kind}:{hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:40]}"
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+async def _cache_get(key: str) -> Optional[Dict[str, Any]]:
+    try:
+        raw = await redis.get(key)
+    except Exception as e:
+        logger.debug(f"Web cache read failed for {key}: {e}")
+        return None
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+async def _cache_put(key: str, data: Dict[str, Any]) -> None:
+    now = time.time()
+    encoded = json.dumps({"stored_at": now, "data": data}, ensure_ascii=False)
+    if len(encoded) > config.WEB_CACHE_MAX_ENTRY_BYTES:
+        return
+    try:
+        client = await redis.get_client()
+        async with client.pipeline() as pipe:
+            pipe.set(key, encoded, ex=config.WEB_CACHE_TTL_SECONDS + config.WEB_CACHE_STALE_SECONDS)
+            pipe.zadd(INDEX_KEY, {key: now})
+            pipe.zcard(INDEX_KEY)
+            results = await pipe.execute()
+        excess = results[-1] - config.WEB_CACHE_MAX_ENTRIES
+        if excess > 0:
+            evicted = await client.zpopmin(INDEX_KEY, excess)
+            if evicted:
+                await client.delete(*[member for member, _ in evicted])
+    except Exception as e:
+        logger.debug(f"Web cache write failed for {key}: {e}")
+
+
+async def _fetch(key: str, fetch: Callable[[], Awaitable[Dict[str, Any]]],
+                 cacheable: Callable[[Dict[str, Any]], bool]) -> Dict[str, Any]:
+    """Call the provider once per key and process, storing cacheable results."""
+    pending = _inflight.get(key)
+    if pending is None:
+        async def _run():
+            _stats["provider_calls"] += 1
+            data = await fetch()
+            if cacheable(data):
+                await _cache_put(key, data)
+            return data
+
+        pending = asyncio.ensure_future(_run())
+        _inflight[key] = pending
+        pending.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shield so one cancelled caller doesn't cancel the call for the others
+    return await asyncio.shield(pending)
+
+
+async def _refresh(key: str, fetch: Callable[[], Awaitable[Dict[str, Any]]],
+                   cacheable: Callable[[Dict[str, Any]], bool]) -> None:
+    try:
+        if not await redis.set(f"{key}:refresh", "1", ex=REFRESH_LOCK_SECONDS, nx=True):
+            return  # Another worker is already refreshing this entry
+        _stats["refreshes"] += 1
+        await _fetch(key, fetch, cacheable)
+    except Exception as e:
+        logger.debug(f"Background refresh of {key} failed: {e}")
+
+
+async def _cached(key: str, fetch: Callable[[], Awaitable[Dict[str, Any]]],
+                  cacheable: Callable[[Dict[str, Any]], bool], fresh: bool = False) -> Dict[str, Any]:
+    if fresh:
+        _stats["misses"] += 1
+        return await _fetch(key, fetch, cacheable)
+    entry = await _cache_get(key)
+    if entry is not None:
+        age = time.time() - entry.get("stored_at", 0)
+        if age < config.WEB_CACHE_TTL_SECONDS:
+            _stats["hits"] += 1
+            return entry["data"]
+        if age < config.WEB_CACHE_TTL_SECONDS + config.WEB_CACHE_STALE_SECONDS:
+            _stats["stale_hits"] += 1
+            task_supervisor.spawn(_refresh(key, fetch, cacheable), name="web_cache_refresh", drain=True)
+            return entry["data"]
+    _stats["misses"] += 1
+    return await _fetch(key, fetch, cacheable)
+
+
+# ---------------------------------------------------------------------------
+# Politeness and fan-out
+# ---------------------------------------------------------------------------
+
+class _DomainLimiter:
+    """Per-domain concurrency and minimum spacing between request starts (process-wide)."""
+
+    max_domains = 1024
+
+    def __init__(self):
+        self._domains: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def _state(self, domain: str) -> Dict[str, Any]:
+        state = self._domains.get(domain)
+        if state is None:
+            state = {
+                "semaphore": asyncio.Semaphore(config.WEB_SCRAPE_PER_DOMAIN_CONCURRENCY),
+                "lock": asyncio.Lock(),
+                "next_start": 0.0,
+                "users": 0,
+            }
+            self._domains[domain] = state
+            # Forget idle domains beyond the cap
+            for name in list(self._domains):
+                if len(self._domains) <= self.max_domains:
+                    break
+                if self._domains[name]["users"] == 0 and name != domain:
+                    del self._domains[name]
+        self._domains.move_to_end(domain)
+        return state
+
+    async def run(self, domain: str, call: Callable[[], Awaitable[T]]) -> T:
+        state = self._state(domain)
+        state["users"] += 1
+        try:
+            async with state["semaphore"]:
+                async with state["lock"]:
+                    delay = state["next_start"] - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    state["next_start"] = time.monotonic() + config.WEB_SCRAPE_DOMAIN_INTERVAL_SECONDS
+                return await call()
+        finally:
+            state["users"] -= 1
+
+
+_domain_limiter = _DomainLimiter()
+
+
+async def fan_out(items: List[Any], call: Callable[[Any], Awaitable[T]], limit: Optional[int] = None) -> List[Any]:
+    """Run call(item) for every item with bounded concurrency.
+
+    Like asyncio.gather(..., return_exceptions=True): results keep the order
+    of `items` and exceptions are returned in place of results.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit or config.WEB_FANOUT_CONCURRENCY))
+
+    async def _bounded(item):
+        async with semaphore:
+            return await call(item)
+
+    return await asyncio.gather(*[_bounded(item) for item in items], return_exceptions=True)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def search_available() -> bool:
+    return search_provider().available()
+
+
+def scrape_available() -> bool:
+    return scrape_provider().available()
+
+
+def _search_cacheable(response: Dict[str, Any]) -> bool:
+    answer = response.get("answer") or ""
+    return bool(response.get("results")) or bool(answer.strip())
+
+
+def _scrape_cacheable(response: Dict[str, Any]) -> bool:
+    return response.get("success", True) is not False and bool((response.get("data") or {}).get("markdown"))
+
+
+async def search(query: str, max_results: int, fresh: bool = False) -> Dict[str, Any]:
+    """Provider search response for a query, served from the shared cache unless `fresh`."""
+    provider = search_provider()
+    key = _cache_key("search", {
+        "provider": provider.name,
+        "query": normalize_query(query),
+        "max_results": max_results,
+        **SEARCH_PARAMS,
+    })
+    return await _cached(key, lambda: provider.search(query, max_results), _search_cacheable, fresh)
+
+
+async def scrape(url: str, formats: List[str], fresh: bool = False) -> Dict[str, Any]:
+    """Provider scrape response for a URL.
+
+    Served from the shared cache only when WEB_CACHE_SCRAPES is set and not
+    `fresh`; otherwise concurrent scrapes of the same URL still share one call.
+    Provider calls go through the per-domain politeness limiter.
+    """
+    provider = scrape_provider()
+    key = _cache_key("scrape", {
+        "provider": provider.name,
+        "url": normalize_url(url),
+        "formats": sorted(formats),
+    })
+    domain = url_domain(url)
+    fetch = lambda: _domain_limiter.run(domain, lambda: provider.scrape(url, formats))
+    if not config.WEB_CACHE_SCRAPES:
+        _stats["misses"] += 1
+        return await _fetch(key, fetch, lambda _: False)
+    return await _cached(key, fetch, _scrape_cacheable, fresh)
+
+
+def get_stats() -> Dict[str, int]:
+    return dict(_stats)
@@ -66,7 +66,7 @@ async def initialize_thread_background(
         
         worker_instance_id = str(uuid.uuid4())[:8]
         
-        run_agent_background.send(
+        send_kwargs = dict(
             agent_run_id=agent_run_id,
             thread_id=thread_id,
             instance_id=worker_instance_id,
@@ -76,6 +76,17 @@ async def initialize_thread_background(
             account_id=account_id,
         )
         
+        from core.services import admission_control
+        dispatch_directly = not admission_control.is_enabled()
+        if not dispatch_directly:
+            try:
+                await admission_control.submit(account_id, agent_run_id, send_kwargs)
+            except admission_control.AdmissionUnavailableError as e:
+                logger.error(f"Admission control failed for {agent_run_id}, sending directly: {e}")
+                dispatch_directly = True
+        if dispatch_directly:
+            run_agent_background.send(**send_kwargs)
+        
         logger.info(f"Thread {thread_id} initialization completed and agent dispatched: {agent_run_id}")
         
     except Exception as e:
@@ -1,6 +1,7 @@
 from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata
 from core.agentpress.thread_manager import ThreadManager
-from typing import List
+from core.agentpress.tool_result_spill import is_spill_ref, load_spilled
+from typing import List, Optional
 import json
 
 @tool_metadata(
@@ -40,6 +41,8 @@ import json
 - View full content of truncated messages
 - Use when previous messages were shortened
 - Retrieve complete message history
+- Large tool outputs are spilled to storage and shown as a preview with a "spill:..." reference;
+  pass that reference as message_id and page through with offset/next_offset
 
 **Most operations are internal and transparent to users.**
 """
@@ -54,21 +57,33 @@ class ExpandMessageTool(Tool):
         "type": "function",
         "function": {
             "name": "expand_message",
-            "description": "Expand a message from the previous conversation with the user. Use this tool to expand a message that was truncated in the earlier conversation.",
+            "description": "Expand a message from the previous conversation with the user. Use this tool to expand a message that was truncated in the earlier conversation, or to read a large tool output that was spilled to storage (page through it with offset).",
             "parameters": {
                 "type": "object",
                 "properties": {
                     "message_id": {
                         "type": "string",
-                        "description": "The ID of the message to expand. Must be a UUID."
+                        "description": "The ID of the message to expand (a UUID), or the \"spill:...\" reference shown in a spilled tool output preview."
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "description": "For spilled tool outputs: character offset to start reading from. Use next_offset from the previous call to continue.",
+                        "default": 0
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "For spilled tool outputs: maximum number of characters to return."
                     }
                 },
                 "required": ["message_id"]
             }
         }
     })
-    async def expand_message(self, message_id: str) -> ToolResult:
+    async def expand_message(self, message_id: str, offset: int = 0, limit: Optional[int] = None) -> ToolResult:
         try:
+            if is_spill_ref(message_id):
+                return await self._expand_spilled(message_id, offset, limit)
+
             client = await self.thread_manager.db.client
             message = await client.table('messages').select('*').eq('message_id', message_id).eq('thread_id', self.thread_id).execute()
 
@@ -76,6 +91,16 @@ class ExpandMessageTool(Tool):
                 return self.fail_response(f"Message with ID {message_id} not found in thread {self.thread_id}")
 
             message_data = message.data[0]
+            metadata = message_data.get('metadata') or {}
+            if isinstance(metadata, str):
+                try:
+                    metadata = json.loads(metadata)
+                except json.JSONDecodeError:
+                    metadata = {}
+            spilled = metadata.get('spilled') if isinstance(metadata, dict) else None
+            if spilled:
+                return await self._expand_spilled(spilled['ref'], offset, limit, backend=spilled.get('backend'))
+
             message_content = message_data['content']
             final_content = message_content
             if isinstance(message_content, dict) and 'content' in message_content:
@@ -92,6 +117,22 @@ class ExpandMessageTool(Tool):
         except Exception as e:
             return self.fail_response(f"Error expanding message: {str(e)}")
 
+    async def _expand_spilled(self, ref: str, offset: int = 0, limit: Optional[int] = None, backend: Optional[str] = None) -> ToolResult:
+        try:
+            page = await load_spilled(self.thread_id, ref, offset=int(offset or 0), limit=int(limit) if limit else None, backend=backend)
+        except FileNotFoundError as e:
+            return self.fail_response(str(e))
+
+        response = {
+            "status": "Spilled tool output loaded.",
+            "message": page["content"],
+            "offset": page["offset"],
+            "total_chars": page["total_chars"],
+        }
+        if "next_offset" in page:
+            response["next_offset"] = page["next_offset"]
+        return self.success_response(response)
+
     @openapi_schema({
         "type": "function", 
         "function": {
@@ -88,24 +88,28 @@ class SandboxFilesTool(SandboxToolsBase):
             await self._ensure_sandbox()
             
             files = await self.sandbox.fs.list_files(self.workspace_path)
-            for file_info in files:
+            # Skip excluded files and directories
+            file_infos = {
+                f"{self.workspace_path}/{file_info.name}": file_info
+                for file_info in files
+                if not self._should_exclude_file(file_info.name) and not file_info.is_dir
+            }
+            
+            # Read everything in one round-trip instead of a download per file
+            contents, errors = await self.read_files(list(file_infos))
+            for full_path, error in errors.items():
+                print(f"Error reading file {file_infos[full_path].name}: {error}")
+            
+            for full_path, data in contents.items():
+                file_info = file_infos[full_path]
                 rel_path = file_info.name
-                
-                # Skip excluded files and directories
-                if self._should_exclude_file(rel_path) or file_info.is_dir:
-                    continue
-
                 try:
-                    full_path = f"{self.workspace_path}/{rel_path}"
-                    content = (await self.sandbox.fs.download_file(full_path)).decode()
                     files_state[rel_path] = {
-                        "content": content,
+                        "content": data.decode(),
                         "is_dir": file_info.is_dir,
                         "size": file_info.size,
                         "modified": file_info.mod_time
                     }
-                except Exception as e:
-                    print(f"Error reading file {rel_path}: {e}")
                 except UnicodeDecodeError:
                     print(f"Skipping binary file: {rel_path}")
 
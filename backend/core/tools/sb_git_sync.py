@@ -7,6 +7,7 @@ from typing import Optional
 
 from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
 from core.sandbox.tool_base import SandboxToolsBase
+from core.sandbox import git_index
 from core.agentpress.thread_manager import ThreadManager
 from core.utils.logger import logger
 from daytona_sdk import SessionExecuteRequest
@@ -228,6 +229,9 @@ class SandboxGitTool(SandboxToolsBase):
 
             commit_hash = hash_bytes.decode("utf-8", errors="ignore").strip()
 
+            # Index the new commit now so the file history endpoints don't shell out to git
+            await git_index.refresh(self.sandbox, self.sandbox_id, head=commit_hash)
+
             # Format a human-friendly message with some status context
             changed_files_preview = []
             for line in changed_lines[:10]:
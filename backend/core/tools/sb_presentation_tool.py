@@ -197,37 +197,24 @@ class SandboxPresentationTool(SandboxToolsBase):
         # Ensure presentation directory exists
         await self._ensure_presentation_dir(presentation_name)
         
-        # Use os.walk to recursively copy all files
+        # Collect the whole template and upload it in one request (parent directories are created on upload)
+        template_files = {}
         copied_files = []
         for root, dirs, files in os.walk(template_path):
-            # Calculate relative path from template root
-            rel_path = os.path.relpath(root, template_path)
-            
-            # Create corresponding directory in workspace (if not root)
-            if rel_path != '.':
-                target_dir = os.path.join(presentation_path, rel_path)
-                target_dir_path = target_dir.replace('\\', '/')  # Normalize path separators
-                try:
-                    await self.sandbox.fs.create_folder(target_dir_path, "755")
-                except:
-                    pass  # Directory might already exist
-            else:
-                target_dir_path = presentation_path
-            
-            # Copy all files
             for file in files:
                 source_file = os.path.join(root, file)
                 rel_file_path = os.path.relpath(source_file, template_path)
-                target_file = os.path.join(presentation_path, rel_file_path).replace('\\', '/')
+                target_file = os.path.join(presentation_path, rel_file_path).replace('\\', '/')  # Normalize path separators
                 
                 try:
                     with open(source_file, 'rb') as f:
-                        file_content = f.read()
-                    await self.sandbox.fs.upload_file(file_content, target_file)
+                        template_files[target_file] = f.read()
                     copied_files.append(rel_file_path)
                 except Exception as e:
                     # Log error but continue with other files
-                    print(f"Error copying {rel_file_path}: {str(e)}")
+                    print(f"Error reading template file {rel_file_path}: {str(e)}")
+        
+        await self.write_files(template_files)
         
         # Update metadata.json with correct paths for the new presentation
         metadata = await self._load_presentation_metadata(presentation_path)
@@ -1129,6 +1116,7 @@ print(json.dumps(result))
                     "file": f"{self.presentations_dir}/{safe_name}/{safe_name}.{format_type}",
                     "download_url": f"/workspace/downloads/{filename}",
                     "total_slides": result.get("total_slides"),
+                    "cached_slides": result.get("cached_slides", 0),
                     "stored_locally": True
                 }
             else:
@@ -1192,16 +1180,16 @@ print(json.dumps(result))
             
             total_slides = len(metadata.get("slides", {}))
             
-            # Run both exports in parallel
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                pptx_task = self._export_to_format(
-                    presentation_name, safe_name, presentation_path, "pptx", store_locally, client
-                )
-                pdf_task = self._export_to_format(
-                    presentation_name, safe_name, presentation_path, "pdf", store_locally, client
-                )
-                
-                pptx_result, pdf_result = await asyncio.gather(pptx_task, pdf_task)
+            # Run both exports in parallel over the run's shared sandbox client
+            client = self.sandbox_http
+            pptx_task = self._export_to_format(
+                presentation_name, safe_name, presentation_path, "pptx", store_locally, client
+            )
+            pdf_task = self._export_to_format(
+                presentation_name, safe_name, presentation_path, "pdf", store_locally, client
+            )
+            
+            pptx_result, pdf_result = await asyncio.gather(pptx_task, pdf_task)
             
             # Build response
             response_data = {
@@ -1218,7 +1206,8 @@ print(json.dumps(result))
                 response_data["exports"]["pptx"] = {
                     "file": pptx_result.get("file"),
                     "download_url": pptx_result.get("download_url"),
-                    "stored_locally": pptx_result.get("stored_locally")
+                    "stored_locally": pptx_result.get("stored_locally"),
+                    "cached_slides": pptx_result.get("cached_slides", 0)
                 }
                 successes.append("PPTX")
             else:
@@ -1229,7 +1218,8 @@ print(json.dumps(result))
                 response_data["exports"]["pdf"] = {
                     "file": pdf_result.get("file"),
                     "download_url": pdf_result.get("download_url"),
-                    "stored_locally": pdf_result.get("stored_locally")
+                    "stored_locally": pdf_result.get("stored_locally"),
+                    "cached_slides": pdf_result.get("cached_slides", 0)
                 }
                 successes.append("PDF")
             else:
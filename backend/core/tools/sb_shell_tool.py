@@ -1,11 +1,81 @@
 import asyncio
-from typing import Optional, Dict, Any
+import re
+import shlex
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
 import time
-import asyncio
 from uuid import uuid4
+import structlog
 from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
+from core.services import redis
+from core.utils import serialization
+from core.utils.config import config
+from core.utils.logger import logger
+
+# Every tmux session pipes its output to a log file, so output is read by byte
+# offset instead of re-capturing the whole pane on each poll.
+SESSION_LOG_DIR = "/tmp/sb_shell"
+MARKER_PREFIX = "__CMD_DONE_"
+
+_MARKER_LINE = re.compile(rf"^{MARKER_PREFIX}[0-9a-f]+:\d+[ \t]*\n?", re.MULTILINE)
+_ANSI_ESCAPE = re.compile(r'\x1b\[[0-?]*[ -/]*[@-~]|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|\x1b[@-Z\\-_]')
+
+
+@dataclass
+class _Poll:
+    size: int  # Log size in bytes when polled
+    end: int  # Offset after the bytes read
+    read: int  # Bytes read
+    skipped: int  # Bytes skipped inside the sandbox by the truncation policy
+    alive: bool
+    exit_code: Optional[int]  # Set once the completion marker was seen
+    text: str
+
+
+class _OutputWindow:
+    """Head and tail of a command's output; what lies between is never transferred."""
+
+    def __init__(self, head_bytes: int, tail_bytes: int):
+        self.head_room = head_bytes
+        self.tail_bytes = tail_bytes
+        self._head: List[str] = []
+        self._tail = ""
+        self.skipped = 0
+
+    def add(self, poll: _Poll) -> None:
+        self.skipped += poll.skipped
+        if not poll.text:
+            return
+        if self.head_room > 0 and not self.skipped:
+            self._head.append(poll.text)
+            self.head_room -= poll.read
+            return
+        tail = self._tail + poll.text
+        if len(tail) > self.tail_bytes:
+            self.skipped += len(tail) - self.tail_bytes
+            tail = tail[-self.tail_bytes:]
+        self._tail = tail
+
+    def render(self) -> str:
+        text = "".join(self._head)
+        if self.skipped:
+            text += f"\n... [{self.skipped} bytes of output omitted] ...\n"
+        return text + self._tail
+
+
+def _clean_output(text: str) -> str:
+    """Raw terminal output as it would read on screen: no escape codes, carriage returns resolved."""
+    text = _ANSI_ESCAPE.sub("", text).replace("\r\n", "\n")
+    lines = []
+    for line in text.split("\n"):
+        if "\r" in line:
+            # Progress bars redraw the line; keep what was drawn last
+            line = next((part for part in reversed(line.split("\r")) if part), "")
+        lines.append(line)
+    return _MARKER_LINE.sub("", "\n".join(lines))
+
 
 @tool_metadata(
     display_name="Terminal & Commands",
@@ -63,6 +133,7 @@ class SandboxShellTool(SandboxToolsBase):
     def __init__(self, project_id: str, thread_manager: ThreadManager):
         super().__init__(project_id, thread_manager)
         self._sessions: Dict[str, str] = {}  # Maps session names to session IDs
+        self._offsets: Dict[str, int] = {}  # Log offset up to which check_command_output has returned output
 
     async def _ensure_session(self, session_name: str = "default") -> str:
         """Ensure a session exists and return its ID."""
@@ -143,65 +214,53 @@ class SandboxShellTool(SandboxToolsBase):
             if not session_name:
                 session_name = f"session_{str(uuid4())[:8]}"
             
-            # Check if tmux session already exists
-            check_session = await self._execute_raw_command(f"tmux has-session -t {session_name} 2>/dev/null || echo 'not_exists'")
-            session_exists = "not_exists" not in check_session.get("output", "")
-            
-            if not session_exists:
-                # Create a new tmux session with the specified working directory
-                await self._execute_raw_command(f"tmux new-session -d -s {session_name} -c {cwd}")
-            
-            # Escape double quotes for the command
-            wrapped_command = command.replace('"', '\\"')
+            # Create the tmux session if needed; its output is piped to a log from the start
+            offset = await self._start_session(session_name, cwd)
             
             if blocking:
-                # For blocking execution, use a more reliable approach
-                # Add a unique marker to detect command completion
-                marker = f"COMMAND_DONE_{str(uuid4())[:8]}"
+                # Add a unique marker to detect command completion (and carry the exit code)
+                marker = f"{MARKER_PREFIX}{uuid4().hex[:8]}"
                 completion_command = self._format_completion_command(command, marker)
-                wrapped_completion_command = completion_command.replace('"', '\\"')
-                
-                # Send the command with completion marker
-                await self._execute_raw_command(f'tmux send-keys -t {session_name} "{wrapped_completion_command}" Enter')
+                await self._send_keys(session_name, completion_command)
                 
+                window = _OutputWindow(config.SHELL_OUTPUT_HEAD_BYTES, config.SHELL_OUTPUT_TAIL_BYTES)
+                exit_code = None
                 start_time = time.time()
-                final_output = ""
                 
-                while (time.time() - start_time) < timeout:
-                    # Wait a shorter interval for more responsive checking
-                    await asyncio.sleep(0.5)
+                while True:
+                    # One round trip per poll: new bytes since `offset`, session liveness and the marker
+                    poll = await self._poll(session_name, offset, window.head_room, marker)
+                    offset = poll.end
+                    window.add(poll)
+                    if poll.text:
+                        await self._publish_progress(session_name, window.render())
+                    if poll.exit_code is not None:
+                        exit_code = poll.exit_code
                     
-                    # Check if session still exists (command might have exited)
-                    check_result = await self._execute_raw_command(f"tmux has-session -t {session_name} 2>/dev/null || echo 'ended'")
-                    if "ended" in check_result.get("output", ""):
+                    caught_up = poll.end >= poll.size
+                    if caught_up and (exit_code is not None or not poll.alive):
                         break
-                        
-                    # Get current output and check for our completion marker
-                    output_result = await self._execute_raw_command(f"tmux capture-pane -t {session_name} -p -S - -E -")
-                    current_output = output_result.get("output", "")
-
-                    if self._is_command_completed(current_output, marker):
-                        final_output = current_output
+                    if (time.time() - start_time) >= timeout:
                         break
-                
-                # If we didn't get the marker, capture whatever output we have
-                if not final_output:
-                    output_result = await self._execute_raw_command(f"tmux capture-pane -t {session_name} -p -S - -E -")
-                    final_output = output_result.get("output", "")
+                    if caught_up:
+                        await asyncio.sleep(config.SHELL_POLL_INTERVAL_SECONDS)
                 
                 # Kill the session after capture
-                await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+                await self._kill_session(session_name)
+                
+                final_output = _clean_output(window.render())
                 
                 # For blocking commands, do NOT return session_name since it's already cleaned up
                 # This prevents the LLM from incorrectly trying to call check_command_output
                 return self.success_response({
                     "output": final_output,
+                    "exit_code": exit_code,
                     "cwd": cwd,
                     "completed": True
                 })
             else:
                 # Send command to tmux session for non-blocking execution
-                await self._execute_raw_command(f'tmux send-keys -t {session_name} "{wrapped_command}" Enter')
+                await self._send_keys(session_name, command)
                 
                 # For non-blocking, just return immediately
                 return self.success_response({
@@ -215,11 +274,128 @@ class SandboxShellTool(SandboxToolsBase):
             # Attempt to clean up session in case of error
             if session_name:
                 try:
-                    await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+                    await self._kill_session(session_name)
                 except:
                     pass
             return self.fail_response(f"Error executing command: {str(e)}")
 
+    @staticmethod
+    def _log_path(session_name: str) -> str:
+        safe_name = re.sub(r'[^\w.-]', '_', session_name)
+        return f"{SESSION_LOG_DIR}/{safe_name}.log"
+
+    async def _start_session(self, session_name: str, cwd: str) -> int:
+        """Create the tmux session if it doesn't exist and pipe its output to its log.
+        
+        Returns the current size of the log, i.e. the offset new output starts at.
+        """
+        session = shlex.quote(session_name)
+        log = shlex.quote(self._log_path(session_name))
+        pipe = shlex.quote(f"cat >> {log}")
+        result = await self._execute_raw_command(
+            f"mkdir -p {SESSION_LOG_DIR}; "
+            f"tmux has-session -t {session} 2>/dev/null || {{ rm -f {log}; tmux new-session -d -s {session} -c {shlex.quote(cwd)}; }}; "
+            # The log exists iff the pane is piped (pipe-pane -o would toggle an existing pipe off)
+            f"[ -e {log} ] || {{ : > {log}; tmux pipe-pane -t {session} {pipe}; }}; "
+            f"stat -c %s {log} 2>/dev/null || echo 0"
+        )
+        output = result.get("output", "").strip().splitlines()
+        return int(output[-1]) if output and output[-1].isdigit() else 0
+
+    async def _send_keys(self, session_name: str, command: str) -> None:
+        # -l sends the command literally; quoting keeps $vars and quotes for the session's shell
+        session = shlex.quote(session_name)
+        await self._execute_raw_command(
+            f"tmux send-keys -t {session} -l {shlex.quote(command)} && tmux send-keys -t {session} Enter"
+        )
+
+    async def _kill_session(self, session_name: str) -> None:
+        self._offsets.pop(session_name, None)
+        await self._execute_raw_command(
+            f"tmux kill-session -t {shlex.quote(session_name)} 2>/dev/null; rm -f {shlex.quote(self._log_path(session_name))}"
+        )
+
+    async def _poll(self, session_name: str, offset: int, head_room: int, marker: Optional[str] = None) -> _Poll:
+        """Read the session log from `offset` in a single sandbox command.
+        
+        The sandbox applies the truncation policy: while the head window has
+        room, bytes are read from `offset`; once it is full, everything but the
+        last SHELL_OUTPUT_TAIL_BYTES of the log is skipped without being
+        transferred. The completion marker is searched with grep in the
+        unread part of the log only.
+        """
+        log = shlex.quote(self._log_path(session_name))
+        chunk = config.SHELL_POLL_CHUNK_BYTES
+        limit = min(head_room, chunk) if head_room > 0 else chunk
+        tail = config.SHELL_OUTPUT_TAIL_BYTES
+        script = [
+            f"size=$(stat -c %s {log} 2>/dev/null || echo -1)",
+            f"start={offset}",
+            # The log was recreated (session restarted under the same name)
+            "[ $size -lt $start ] && start=0",
+            f"if [ {head_room} -le 0 ] && [ $((size - start)) -gt {tail} ]; then start=$((size - {tail})); fi",
+            f"n=$((size - start)); [ $n -gt {limit} ] && n={limit}; [ $n -lt 0 ] && n=0",
+            f"alive=1; tmux has-session -t {shlex.quote(session_name)} 2>/dev/null || alive=0",
+            "done=",
+        ]
+        if marker:
+            # Back off a little so a marker split across two polls is still found
+            script.append(
+                f"done=$(tail -c +{max(offset - 63, 1)} {log} 2>/dev/null | grep -a -o -m1 '{marker}:[0-9][0-9]*' | head -n1)"
+            )
+        script += [
+            'echo "$size $start $n $alive $done"',
+            f"if [ $n -gt 0 ]; then tail -c +$((start + 1)) {log} | head -c $n; fi",
+        ]
+        result = await self._execute_raw_command("; ".join(script))
+        header, _, text = result.get("output", "").partition("\n")
+        fields = header.split()
+        if len(fields) < 4:
+            raise RuntimeError(f"Unexpected output while reading session '{session_name}': {header[:200]}")
+        size, start, read = int(fields[0]), int(fields[1]), int(fields[2])
+        exit_code = None
+        if len(fields) > 4 and ":" in fields[4]:
+            exit_code = int(fields[4].rsplit(":", 1)[1])
+        return _Poll(
+            size=size,
+            end=start + read,
+            read=read,
+            skipped=max(start - offset, 0),
+            alive=fields[3] == "1",
+            exit_code=exit_code,
+            text=text,
+        )
+
+    async def _publish_progress(self, session_name: str, output: str) -> None:
+        """Relay partial output of a blocking command to the client watching the run.
+        
+        `output` is everything captured so far; each event carries its last
+        SHELL_PROGRESS_MAX_BYTES, so a client simply shows the latest event.
+        Published on the run's pubsub channel only: progress is transient and
+        never stored with the thread's messages. Best-effort.
+        """
+        if not config.SHELL_PROGRESS_EVENTS:
+            return
+        agent_run_id = structlog.contextvars.get_contextvars().get('agent_run_id')
+        if not agent_run_id:
+            return
+        # content and metadata are JSON strings, as in every other streamed message
+        message = {
+            "message_id": None,
+            "type": "status",
+            "content": serialization.dumps({
+                "status_type": "tool_progress",
+                "function_name": "execute_command",
+                "session_name": session_name,
+                "output": _clean_output(output)[-config.SHELL_PROGRESS_MAX_BYTES:],
+            }),
+            "metadata": serialization.dumps({"transient": True}),
+        }
+        try:
+            await redis.publish(f"agent_run:{agent_run_id}:pubsub", serialization.dumps(message))
+        except Exception as e:
+            logger.debug(f"Failed to publish shell progress for agent run {agent_run_id}: {e}")
+
     async def _execute_raw_command(self, command: str) -> Dict[str, Any]:
         """Execute a raw command directly in the sandbox."""
         # Ensure session exists for raw commands
@@ -257,7 +433,7 @@ class SandboxShellTool(SandboxToolsBase):
         "type": "function",
         "function": {
             "name": "check_command_output",
-            "description": "Check the output of a NON-BLOCKING command running in a tmux session. IMPORTANT: Only use this for commands that were executed with blocking=false. Do NOT use this for blocking commands - they return output directly and clean up their session automatically.",
+            "description": "Check the output of a NON-BLOCKING command running in a tmux session. Returns only the output produced since the previous check of the same session (the first check returns everything). IMPORTANT: Only use this for commands that were executed with blocking=false. Do NOT use this for blocking commands - they return output directly and clean up their session automatically.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -269,6 +445,11 @@ class SandboxShellTool(SandboxToolsBase):
                         "type": "boolean",
                         "description": "Whether to terminate the tmux session after checking. Set to true when you're done with the command.",
                         "default": False
+                    },
+                    "full_output": {
+                        "type": "boolean",
+                        "description": "If true, return the whole visible terminal history of the session instead of only the output since the previous check.",
+                        "default": False
                     }
                 },
                 "required": ["session_name"]
@@ -278,24 +459,39 @@ class SandboxShellTool(SandboxToolsBase):
     async def check_command_output(
         self,
         session_name: str,
-        kill_session: bool = False
+        kill_session: bool = False,
+        full_output: bool = False
     ) -> ToolResult:
         try:
             # Ensure sandbox is initialized
             await self._ensure_sandbox()
             
-            # Check if session exists
-            check_result = await self._execute_raw_command(f"tmux has-session -t {session_name} 2>/dev/null || echo 'not_exists'")
-            if "not_exists" in check_result.get("output", ""):
+            window = _OutputWindow(config.SHELL_OUTPUT_HEAD_BYTES, config.SHELL_OUTPUT_TAIL_BYTES)
+            offset = self._offsets.get(session_name, 0)
+            poll = await self._poll(session_name, offset, window.head_room)
+            if not poll.alive:
                 return self.fail_response(f"Tmux session '{session_name}' does not exist.")
             
-            # Get output from tmux pane
-            output_result = await self._execute_raw_command(f"tmux capture-pane -t {session_name} -p -S - -E -")
-            output = output_result.get("output", "")
+            if full_output or poll.size < 0:
+                # Whole pane; also covers sessions that have no output log
+                output_result = await self._execute_raw_command(f"tmux capture-pane -t {shlex.quote(session_name)} -p -S - -E -")
+                output = output_result.get("output", "")
+                if poll.size < 0:
+                    await self._start_session(session_name, self.workspace_path)
+                    poll.end = 0
+            else:
+                # Read what was new when the check started; later output is left for the next check
+                target = poll.size
+                window.add(poll)
+                while poll.end < target and poll.read:
+                    poll = await self._poll(session_name, poll.end, window.head_room)
+                    window.add(poll)
+                output = _clean_output(window.render())
+            self._offsets[session_name] = poll.end
             
             # Kill session if requested
             if kill_session:
-                await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+                await self._kill_session(session_name)
                 termination_status = "Session terminated."
             else:
                 termination_status = "Session still running."
@@ -340,7 +536,7 @@ class SandboxShellTool(SandboxToolsBase):
                 return self.fail_response(f"Tmux session '{session_name}' does not exist.")
             
             # Kill the session
-            await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+            await self._kill_session(session_name)
             
             return self.success_response({
                 "message": f"Tmux session '{session_name}' terminated successfully."
@@ -393,108 +589,39 @@ class SandboxShellTool(SandboxToolsBase):
             return self.fail_response(f"Error listing commands: {str(e)}")
 
     def _format_completion_command(self, command: str, marker: str) -> str:
-        """Format command with completion marker, handling heredocs properly."""
-        import re
+        """Format command with completion marker, handling heredocs properly.
         
+        The marker is printed as `<marker>:<exit code>`. It is split into two
+        printf arguments so the echoed command line never matches it.
+        """
         # Check if command contains heredoc syntax
         # Look for patterns like: << EOF, << 'EOF', << "EOF", <<EOF
         heredoc_pattern = r'<<\s*[\'"]?\w+[\'"]?'
+        marker_command = f"printf '\\n%s%s:%s\\n' {MARKER_PREFIX} {marker[len(MARKER_PREFIX):]} \"$?\""
         
         if re.search(heredoc_pattern, command):
             # For heredoc commands, add the completion marker on a new line
             # This ensures it executes after the heredoc completes
-            return f"{command}\necho {marker}"
+            return f"{command}\n{marker_command}"
         else:
             # For regular commands, use semicolon separator
-            return f"{command} ; echo {marker}"
-
-    def _is_command_completed(self, current_output: str, marker: str) -> bool:
-        """
-        Check if command execution is completed by comparing marker from end to start.
-        
-        Args:
-            current_output: Current output content
-            marker: Completion marker
-            
-        Returns:
-            bool: True if command completed, False otherwise
-        """
-        if not current_output or not marker:
-            return False
-
-        # Find the last complete marker match position to start comparison
-        # Avoid terminal prompt output at the end
-        marker_end_pos = -1
-        for i in range(len(current_output) - len(marker), -1, -1):
-            if current_output[i:i+len(marker)] == marker:
-                marker_end_pos = i + len(marker) - 1
-                break
-        
-        # Start comparison from found marker position or end of output
-        if marker_end_pos != -1:
-            output_idx = marker_end_pos
-            marker_idx = len(marker) - 1
-        else:
-            output_idx = len(current_output) - 1
-            marker_idx = len(marker) - 1
-        
-        # Compare characters from end to start
-        while marker_idx >= 0 and output_idx >= 0:
-            # Skip newlines in current_output
-            if current_output[output_idx] == '\n':
-                output_idx -= 1
-                continue
-                
-            # Compare characters
-            if current_output[output_idx] != marker[marker_idx]:
-                return False
-                
-            # Continue comparison
-            output_idx -= 1
-            marker_idx -= 1
-        
-        # If marker not fully matched
-        if marker_idx >= 0:
-            return False
-            
-        # Check if preceded by "echo " (command just started)
-        check_count = 0
-        echo_chars = "echo "
-        echo_idx = len(echo_chars) - 1
-        
-        while output_idx >= 0 and check_count < 5:
-            # Skip newlines
-            if current_output[output_idx] == '\n':
-                output_idx -= 1
-                continue
-                
-            check_count += 1
-            
-            # Check for "echo " pattern
-            if echo_idx >= 0 and current_output[output_idx] == echo_chars[echo_idx]:
-                echo_idx -= 1
-            else:
-                echo_idx = len(echo_chars) - 1
-                
-            output_idx -= 1
-            
-        # If "echo " found, command just started
-        if echo_idx < 0:
-            return False
-            
-        return True
+            return f"{command} ; {marker_command}"
 
     async def cleanup(self):
         """Clean up all sessions."""
-        # Only cleanup if we actually have a sandbox - don't create one during cleanup
-        if self._sandbox is None:
-            return
-        
-        for session_name in list(self._sessions.keys()):
-            await self._cleanup_session(session_name)
-        
-        # Also clean up any tmux sessions
         try:
-            await self._execute_raw_command("tmux kill-server 2>/dev/null || true")
-        except:
-            pass
\ No newline at end of file
+            # Only cleanup if we actually have a sandbox - don't create one during cleanup
+            if self._sandbox is None:
+                return
+            
+            for session_name in list(self._sessions.keys()):
+                await self._cleanup_session(session_name)
+            
+            # Also clean up any tmux sessions and their output logs
+            self._offsets.clear()
+            try:
+                await self._execute_raw_command(f"tmux kill-server 2>/dev/null; rm -rf {SESSION_LOG_DIR}")
+            except:
+                pass
+        finally:
+            await super().cleanup()
\ No newline at end of file
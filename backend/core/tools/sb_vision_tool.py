@@ -1,11 +1,8 @@
 import os
 import base64
 import mimetypes
-import uuid
-from datetime import datetime
 from typing import Optional, Tuple
 from io import BytesIO
-from PIL import Image
 from urllib.parse import urlparse
 from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
 from core.sandbox.tool_base import SandboxToolsBase
@@ -15,7 +12,8 @@ import json
 from svglib.svglib import svg2rlg
 from reportlab.graphics import renderPM
 import tempfile
-import requests
+from core.utils import image_pipeline
+from core.agentpress import image_refs
 from core.utils.config import config
 from core.utils.logger import logger
 # Add common image MIME types if mimetypes module is limited
@@ -214,45 +212,17 @@ class SandboxVisionTool(SandboxToolsBase):
                     except Exception as e:
                         raise Exception(f"SVG conversion failed for '{file_path}': {str(e)}. Please convert to PNG manually.")
             
-            # Open image from bytes
-            img = Image.open(BytesIO(image_bytes))
-            
-            # Convert RGBA to RGB if necessary (for JPEG)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                # Create a white background
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-            
-            # Calculate new dimensions while maintaining aspect ratio
-            width, height = img.size
-            if width > DEFAULT_MAX_WIDTH or height > DEFAULT_MAX_HEIGHT:
-                ratio = min(DEFAULT_MAX_WIDTH / width, DEFAULT_MAX_HEIGHT / height)
-                new_width = int(width * ratio)
-                new_height = int(height * ratio)
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            # Decode, resize and encode off the event loop (cached by content hash)
+            compressed = await image_pipeline.compress(
+                image_bytes, mime_type, DEFAULT_MAX_WIDTH, DEFAULT_MAX_HEIGHT,
+                DEFAULT_JPEG_QUALITY, DEFAULT_PNG_COMPRESS_LEVEL
+            )
+            if compressed.output_size != compressed.original_size:
+                width, height = compressed.original_size
+                new_width, new_height = compressed.output_size
                 print(f"[SeeImage] Resized image from {width}x{height} to {new_width}x{new_height}")
             
-            # Save to bytes with compression
-            output = BytesIO()
-            
-            # Determine output format based on original mime type
-            if mime_type == 'image/gif':
-                # Keep GIFs as GIFs to preserve animation
-                img.save(output, format='GIF', optimize=True)
-                output_mime = 'image/gif'
-            elif mime_type == 'image/png':
-                # Compress PNG
-                img.save(output, format='PNG', optimize=True, compress_level=DEFAULT_PNG_COMPRESS_LEVEL)
-                output_mime = 'image/png'
-            else:
-                # Convert everything else to JPEG for better compression (converted SVGs stay PNG above)
-                img.save(output, format='JPEG', quality=DEFAULT_JPEG_QUALITY, optimize=True)
-                output_mime = 'image/jpeg'
-            
-            compressed_bytes = output.getvalue()
+            compressed_bytes, output_mime = compressed.data, compressed.mime_type
             
             # Log compression results
             original_size = len(image_bytes)
@@ -277,38 +247,9 @@ class SandboxVisionTool(SandboxToolsBase):
         parsed_url = urlparse(file_path)
         return parsed_url.scheme in ('http', 'https')
     
-    def download_image_from_url(self, url: str) -> Tuple[bytes, str]:
+    async def download_image_from_url(self, url: str) -> Tuple[bytes, str]:
         """Download image from a URL"""
-        try:
-            headers = {
-                "User-Agent": "Mozilla/5.0"  # Some servers block default Python
-            }
-
-            # HEAD request to get the image size
-            head_response = requests.head(url, timeout=10, headers=headers, stream=True)
-            head_response.raise_for_status()
-            
-            # Check content length
-            content_length = int(head_response.headers.get('Content-Length'))
-            if content_length and content_length > MAX_IMAGE_SIZE:
-                raise Exception(f"Image is too large ({(content_length)/(1024*1024):.2f}MB) for the maximum allowed size of {MAX_IMAGE_SIZE/(1024*1024):.2f}MB")
-            
-            # Download the image
-            response = requests.get(url, timeout=10, headers=headers, stream=True)
-            response.raise_for_status()
-
-            image_bytes = response.content
-            if len(image_bytes) > MAX_IMAGE_SIZE:
-                raise Exception(f"Downloaded image is too large ({(len(image_bytes))/(1024*1024):.2f}MB). Maximum allowed size of {MAX_IMAGE_SIZE/(1024*1024):.2f}MB")
-
-            # Get MIME type
-            mime_type = response.headers.get('Content-Type')
-            if not mime_type or not mime_type.startswith('image/'):
-                raise Exception(f"URL does not point to an image (Content-Type: {mime_type}): {url}")
-            
-            return image_bytes, mime_type
-        except Exception as e:
-            return self.fail_response(f"Failed to download image from URL: {str(e)}")
+        return await image_pipeline.fetch_image(url, MAX_IMAGE_SIZE)
     
     @openapi_schema({
         "type": "function",
@@ -337,7 +278,7 @@ Images remain in the sandbox and can be loaded again anytime. SVG files are auto
             is_url = self.is_url(file_path)
             if is_url:
                 try:
-                    image_bytes, mime_type = self.download_image_from_url(file_path)
+                    image_bytes, mime_type = await self.download_image_from_url(file_path)
                     original_size = len(image_bytes)
                     cleaned_path = file_path
                 except Exception as e:
@@ -415,37 +356,12 @@ Images remain in the sandbox and can be loaded again anytime. SVG files are auto
                     f"Original file: '{cleaned_path}'. Please convert the image to a supported format."
                 )
 
-            # Upload to Supabase Storage instead of base64
+            # Store the image once (content-addressed); the message only keeps a reference
             try:
-                # Generate unique filename
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                unique_id = str(uuid.uuid4())[:8]
-                
-                # Determine file extension from mime type
-                ext_map = {
-                    'image/jpeg': 'jpg',
-                    'image/png': 'png',
-                    'image/gif': 'gif',
-                    'image/webp': 'webp'
-                }
-                ext = ext_map.get(compressed_mime_type, 'jpg')
-                
-                # Create filename from original path
-                base_filename = os.path.splitext(os.path.basename(cleaned_path))[0]
-                storage_filename = f"loaded_images/{base_filename}_{timestamp}_{unique_id}.{ext}"
-                
-                # Upload to Supabase storage (public bucket for LLM access)
-                client = await self.db.client
-                storage_response = await client.storage.from_('image-uploads').upload(
-                    storage_filename,
-                    compressed_bytes,
-                    {"content-type": compressed_mime_type}
-                )
-                
-                # Get public URL
-                public_url = await client.storage.from_('image-uploads').get_public_url(storage_filename)
-                
-                print(f"[LoadImage] Uploaded image to cloud storage: {public_url}")
+                image_ref = await image_refs.store_image(compressed_bytes, compressed_mime_type)
+                public_url = await image_refs.public_url(image_ref)
+                image_block = image_refs.build_image_block(image_ref, public_url)
+                print(f"[LoadImage] Stored image as {image_ref['key']}")
                 
             except Exception as upload_error:
                 print(f"[LoadImage] Failed to upload to cloud storage: {upload_error}")
@@ -465,7 +381,7 @@ Images remain in the sandbox and can be loaded again anytime. SVG files are auto
                 "role": "user",
                 "content": [
                     {"type": "text", "text": f"[Image loaded from '{cleaned_path}']"},
-                    {"type": "image_url", "image_url": {"url": public_url}}
+                    image_block
                 ]
             }
             
@@ -478,7 +394,8 @@ Images remain in the sandbox and can be loaded again anytime. SVG files are auto
                     "file_path": cleaned_path,
                     "mime_type": compressed_mime_type,
                     "original_size": original_size,
-                    "compressed_size": len(compressed_bytes)
+                    "compressed_size": len(compressed_bytes),
+                    "image_ref": image_ref
                 }
             )
             
@@ -500,9 +417,10 @@ Images remain in the sandbox and can be loaded again anytime. SVG files are auto
         """Count how many image_context messages are currently in the conversation."""
         try:
             client = await self.db.client
-            result = await client.table('messages').select('message_id').eq('thread_id', self.thread_id).eq('type', 'image_context').execute()
+            # Exact count from the index; no message rows (or image content) are transferred
+            result = await client.table('messages').select('message_id', count='exact').eq('thread_id', self.thread_id).eq('type', 'image_context').limit(1).execute()
             
-            return len(result.data) if result.data else 0
+            return result.count or 0
         except Exception as e:
             print(f"[LoadImage] Error counting images in context: {e}")
             return 0
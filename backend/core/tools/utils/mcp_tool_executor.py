@@ -2,14 +2,13 @@ import json
 import asyncio
 import ipaddress
 import socket
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from urllib.parse import urlparse
 from core.agentpress.tool import ToolResult
 from mcp import ClientSession, StdioServerParameters
-from mcp.client.sse import sse_client
 from mcp.client.stdio import stdio_client
-from mcp.client.streamable_http import streamablehttp_client
 from core.mcp_module import mcp_service
+from core.mcp_module.session_pool import credential_profile_key, mcp_session_pool
 from core.utils.logger import logger
 
 
@@ -173,23 +172,8 @@ class MCPToolExecutor:
         if not is_safe:
             return self._create_error_result(f"URL validation failed: {error_msg}")
         
-        async with asyncio.timeout(30):
-            try:
-                async with sse_client(url, headers=headers) as (read, write):
-                    async with ClientSession(read, write) as session:
-                        await session.initialize()
-                        result = await session.call_tool(original_tool_name, arguments)
-                        return self._create_success_result(self._extract_content(result))
-                        
-            except TypeError as e:
-                if "unexpected keyword argument" in str(e):
-                    async with sse_client(url) as (read, write):
-                        async with ClientSession(read, write) as session:
-                            await session.initialize()
-                            result = await session.call_tool(original_tool_name, arguments)
-                            return self._create_success_result(self._extract_content(result))
-                else:
-                    raise
+        result = await self._call_pooled_tool(url, headers, custom_config.get('profile_id'), "sse", original_tool_name, arguments)
+        return self._create_success_result(self._extract_content(result))
     
     async def _execute_http_tool(self, tool_name: str, arguments: Dict[str, Any], tool_info: Dict[str, Any]) -> ToolResult:
         custom_config = tool_info['custom_config']
@@ -203,17 +187,26 @@ class MCPToolExecutor:
             return self._create_error_result(f"URL validation failed: {error_msg}")
         
         try:
-            async with asyncio.timeout(30):
-                async with streamablehttp_client(url) as (read, write, _):
-                    async with ClientSession(read, write) as session:
-                        await session.initialize()
-                        result = await session.call_tool(original_tool_name, arguments)
-                        return self._create_success_result(self._extract_content(result))
-                        
+            result = await self._call_pooled_tool(url, None, custom_config.get('profile_id'), "http", original_tool_name, arguments)
+            return self._create_success_result(self._extract_content(result))
         except Exception as e:
             logger.error(f"Error executing HTTP MCP tool: {str(e)}")
             return self._create_error_result(f"Error executing HTTP tool: {str(e)}")
     
+    async def _call_pooled_tool(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        profile_id: Optional[str],
+        transport: str,
+        tool_name: str,
+        arguments: Dict[str, Any],
+    ) -> Any:
+        # Warm sessions are shared per (url, credentials, transport) across runs in this process
+        async with asyncio.timeout(30):
+            pooled = await mcp_session_pool.acquire(url, headers, credential_profile_key(profile_id, headers), transport=transport)
+            return await pooled.call_tool(tool_name, arguments)
+    
     async def _execute_json_tool(self, tool_name: str, arguments: Dict[str, Any], tool_info: Dict[str, Any]) -> ToolResult:
         custom_config = tool_info['custom_config']
         original_tool_name = tool_info['original_name']
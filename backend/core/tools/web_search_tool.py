@@ -1,10 +1,9 @@
-from tavily import AsyncTavilyClient
-import httpx
 from dotenv import load_dotenv
 from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata
 from core.utils.config import config
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
+from core.services import web_search as web_search_service
 import json
 import datetime
 import asyncio
@@ -91,14 +90,11 @@ class SandboxWebSearchTool(SandboxToolsBase):
         self.firecrawl_api_key = config.FIRECRAWL_API_KEY
         self.firecrawl_url = config.FIRECRAWL_URL
         
-        if not self.tavily_api_key:
+        if not web_search_service.search_available():
             logging.warning("TAVILY_API_KEY not configured - Web Search Tool will not be available")
-        if not self.firecrawl_api_key:
+        if not web_search_service.scrape_available():
             logging.warning("FIRECRAWL_API_KEY not configured - Web Scraping Tool will not be available")
 
-        # Tavily asynchronous search client
-        self.tavily_client = AsyncTavilyClient(api_key=self.tavily_api_key)
-
     @openapi_schema({
         "type": "function",
         "function": {
@@ -127,6 +123,11 @@ class SandboxWebSearchTool(SandboxToolsBase):
                         "type": "integer",
                         "description": "The number of search results to return per query (1-50). MUST be a native integer like 5, NOT a string like \"5\". Increase for more comprehensive research or decrease for focused, high-relevance results. Applies to each query when using batch mode.",
                         "default": 5
+                    },
+                    "fresh": {
+                        "type": "boolean",
+                        "description": "Bypass cached results and query the search provider directly. Set to true for breaking news, live prices, scores or anything that may have changed in the last few minutes, or when repeating a search to get updated results.",
+                        "default": False
                     }
                 },
                 "required": ["query"]
@@ -136,7 +137,8 @@ class SandboxWebSearchTool(SandboxToolsBase):
     async def web_search(
         self, 
         query: str | list[str],
-        num_results: int = 5
+        num_results: int = 5,
+        fresh: bool = False
     ) -> ToolResult:
         """
         Search the web using the Tavily API to find relevant and up-to-date information.
@@ -144,7 +146,7 @@ class SandboxWebSearchTool(SandboxToolsBase):
         """
         try:
             # Check if Tavily API key is configured
-            if not self.tavily_api_key:
+            if not web_search_service.search_available():
                 return self.fail_response("Web Search is not available. TAVILY_API_KEY is not configured.")
             
             # Normalize num_results
@@ -181,13 +183,11 @@ class SandboxWebSearchTool(SandboxToolsBase):
                 
                 logging.info(f"Executing batch web search for {len(queries)} queries with {num_results} results each")
                 
-                # Execute all searches concurrently
+                # Execute searches concurrently (bounded; cached results skip the provider)
                 start_time = time.time()
-                tasks = [
-                    self._execute_single_search(q, num_results) 
-                    for q in queries
-                ]
-                search_results = await asyncio.gather(*tasks, return_exceptions=True)
+                search_results = await web_search_service.fan_out(
+                    queries, lambda q: self._execute_single_search(q, num_results, fresh)
+                )
                 elapsed_time = time.time() - start_time
                 logging.info(f"Batch search completed in {elapsed_time:.2f}s (concurrent execution)")
                 
@@ -238,7 +238,7 @@ class SandboxWebSearchTool(SandboxToolsBase):
                     return self.fail_response("A valid search query is required.")
                 
                 logging.info(f"Executing web search for query: '{query}' with {num_results} results")
-                result = await self._execute_single_search(query, num_results)
+                result = await self._execute_single_search(query, num_results, fresh)
                 
                 if result.get("success", False):
                     return ToolResult(
@@ -261,25 +261,20 @@ class SandboxWebSearchTool(SandboxToolsBase):
                 simplified_message += "..."
             return self.fail_response(simplified_message)
     
-    async def _execute_single_search(self, query: str, num_results: int) -> dict:
+    async def _execute_single_search(self, query: str, num_results: int, fresh: bool = False) -> dict:
         """
         Helper function to execute a single search query.
         
         Parameters:
         - query: The search query string
         - num_results: Number of results to return
+        - fresh: Skip the result cache
         
         Returns:
         - dict with success status, results, answer, images, and full response
         """
         try:
-            search_response = await self.tavily_client.search(
-                query=query,
-                max_results=num_results,
-                include_images=True,
-                include_answer="advanced",
-                search_depth="advanced",
-            )
+            search_response = await web_search_service.search(query, num_results, fresh=fresh)
             
             # Extract results and answer
             results = search_response.get('results', [])
@@ -327,6 +322,11 @@ class SandboxWebSearchTool(SandboxToolsBase):
                         "type": "boolean",
                         "description": "Whether to include the full raw HTML content alongside the extracted text. Set to true when you need to analyze page structure, extract specific HTML elements, or work with complex layouts. Default is false for cleaner text extraction.",
                         "default": False
+                    },
+                    "fresh": {
+                        "type": "boolean",
+                        "description": "Fetch the pages again instead of using a cached copy (only relevant when page caching is enabled). Set to true when the page content may have changed recently.",
+                        "default": False
                     }
                 },
                 "required": ["urls"]
@@ -336,7 +336,8 @@ class SandboxWebSearchTool(SandboxToolsBase):
     async def scrape_webpage(
         self,
         urls: str,
-        include_html: bool = False
+        include_html: bool = False,
+        fresh: bool = False
     ) -> ToolResult:
         """
         Retrieve the complete text content of multiple webpages in a single efficient operation.
@@ -347,10 +348,11 @@ class SandboxWebSearchTool(SandboxToolsBase):
         Parameters:
         - urls: Multiple URLs to scrape, separated by commas
         - include_html: Whether to include full HTML content alongside markdown (default: False)
+        - fresh: Skip the page cache (default: False)
         """
         try:
             # Check if Firecrawl API key is configured
-            if not self.firecrawl_api_key:
+            if not web_search_service.scrape_available():
                 return self.fail_response("Web Scraping is not available. FIRECRAWL_API_KEY is not configured.")
             
             logging.info(f"Starting to scrape webpages: {urls}")
@@ -375,10 +377,11 @@ class SandboxWebSearchTool(SandboxToolsBase):
             
             logging.info(f"Processing {len(url_list)} URLs: {url_list}")
             
-            # Process each URL concurrently and collect results
+            # Process URLs concurrently (bounded, polite per domain) and collect results
             start_time = time.time()
-            tasks = [self._scrape_single_url(url, include_html) for url in url_list]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            results = await web_search_service.fan_out(
+                url_list, lambda url: self._scrape_single_url(url, include_html, fresh)
+            )
             elapsed_time = time.time() - start_time
             logging.info(f"Scraped {len(url_list)} URLs in {elapsed_time:.2f}s (concurrent execution)")
 
@@ -431,13 +434,14 @@ class SandboxWebSearchTool(SandboxToolsBase):
             logging.error(f"Error in scrape_webpage: {error_message}")
             return self.fail_response(f"Error processing scrape request: {error_message[:200]}")
     
-    async def _scrape_single_url(self, url: str, include_html: bool = False) -> dict:
+    async def _scrape_single_url(self, url: str, include_html: bool = False, fresh: bool = False) -> dict:
         """
         Helper function to scrape a single URL and return the result information.
         
         Parameters:
         - url: URL to scrape
         - include_html: Whether to include full HTML content alongside markdown
+        - fresh: Skip the page cache
         """
         
         # # Add protocol if missing
@@ -448,53 +452,14 @@ class SandboxWebSearchTool(SandboxToolsBase):
         logging.info(f"Scraping single URL: {url}")
         
         try:
-            # ---------- Firecrawl scrape endpoint ----------
-            logging.info(f"Sending request to Firecrawl for URL: {url}")
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "Authorization": f"Bearer {self.firecrawl_api_key}",
-                    "Content-Type": "application/json",
-                }
-                # Determine formats to request based on include_html flag
-                formats = ["markdown"]
-                if include_html:
-                    formats.append("html")
-                
-                payload = {
-                    "url": url,
-                    "formats": formats
-                }
-                
-                # Use longer timeout and retry logic for more reliability
-                max_retries = 3
-                timeout_seconds = 30
-                retry_count = 0
-                
-                while retry_count < max_retries:
-                    try:
-                        logging.info(f"Sending request to Firecrawl (attempt {retry_count + 1}/{max_retries})")
-                        response = await client.post(
-                            f"{self.firecrawl_url}/v1/scrape",
-                            json=payload,
-                            headers=headers,
-                            timeout=timeout_seconds,
-                        )
-                        response.raise_for_status()
-                        data = response.json()
-                        logging.info(f"Successfully received response from Firecrawl for {url}")
-                        break
-                    except (httpx.ReadTimeout, httpx.ConnectTimeout, httpx.ReadError) as timeout_err:
-                        retry_count += 1
-                        logging.warning(f"Request timed out (attempt {retry_count}/{max_retries}): {str(timeout_err)}")
-                        if retry_count >= max_retries:
-                            raise Exception(f"Request timed out after {max_retries} attempts with {timeout_seconds}s timeout")
-                        # Exponential backoff
-                        logging.info(f"Waiting {2 ** retry_count}s before retry")
-                        await asyncio.sleep(2 ** retry_count)
-                    except Exception as e:
-                        # Don't retry on non-timeout errors
-                        logging.error(f"Error during scraping: {str(e)}")
-                        raise e
+            # Determine formats to request based on include_html flag
+            formats = ["markdown"]
+            if include_html:
+                formats.append("html")
+            
+            # ---------- Firecrawl scrape endpoint (through the shared cache) ----------
+            data = await web_search_service.scrape(url, formats, fresh=fresh)
+            logging.info(f"Received scrape result for {url}")
 
             # Format the response
             title = data.get("data", {}).get("metadata", {}).get("title", "")
@@ -636,6 +636,14 @@ async def trigger_webhook(
             logger.warning(f"Invalid webhook secret for trigger {trigger_id}")
             raise HTTPException(status_code=401, detail="Unauthorized")
 
+        # Schedules are fired by the local scheduler; ignore leftover pg_cron calls
+        if config.TRIGGER_SCHEDULER_ENABLED and request.headers.get("x-trigger-source") == "schedule":
+            logger.debug(f"Ignoring pg_cron webhook for trigger {trigger_id}: local scheduler is enabled")
+            return JSONResponse(content={
+                "success": True,
+                "message": "Schedule handled by local scheduler"
+            })
+
         # Get raw data from request
         raw_data = {}
         try:
@@ -671,7 +679,8 @@ async def trigger_webhook(
                 execution_result = await execution_service.execute_trigger_result(
                     agent_id=trigger.agent_id,
                     trigger_result=result,
-                    trigger_event=event
+                    trigger_event=event,
+                    trigger=trigger
                 )
                 
                 logger.debug(f"Agent execution result: {execution_result}")
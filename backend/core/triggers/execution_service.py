@@ -2,17 +2,95 @@
 Trigger execution service - executes agents when triggers fire.
 
 This is a thin wrapper that reuses existing agent_runs infrastructure.
+
+Hot-path optimizations for high-volume webhook/Composio triggers:
+- Prompt templates are compiled once per trigger version and cached
+- The resolved account + agent config is snapshotted per trigger
+  (core.runtime_cache) instead of being reloaded for every event
+- Triggers that opt in with `fold_window_seconds` fold bursts of events
+  into a single run
 """
+import asyncio
 import json
+import re
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Set, Tuple
 
 from core.services.supabase import DBConnection
 from core.services import redis
 from core.utils.logger import logger, structlog
 from core.utils.config import config, EnvMode
-from .trigger_service import TriggerEvent, TriggerResult
+from .trigger_service import Trigger, TriggerEvent, TriggerResult
+
+
+_PLACEHOLDER_RE = re.compile(r"\{\{(payload|trigger_slug|webhook_id)\}\}")
+
+# Compiled templates per trigger; the prompt text is the version key, so an
+# edited trigger recompiles on its next event
+_TEMPLATE_CACHE_SIZE = 1024
+_compiled_templates: "OrderedDict[str, Tuple[str, CompiledPromptTemplate]]" = OrderedDict()
+
+# Event folding limits
+MAX_FOLD_WINDOW_SECONDS = 300
+MAX_FOLDED_EVENTS = 50
+FOLD_SHUTDOWN_FLUSH_SECONDS = 20
+
+# Flushers sleep out their window in the background; keep references so they
+# are not garbage-collected mid-flight, and so shutdown can flush them early
+_fold_flushers: Set[asyncio.Task] = set()
+_fold_flush_now = asyncio.Event()
+
+
+def _to_json(obj: Any) -> str:
+    try:
+        return json.dumps(obj, ensure_ascii=False, indent=2)
+    except Exception:
+        return str(obj)
+
+
+class CompiledPromptTemplate:
+    """Trigger prompt split once into literal text and placeholder slots."""
+
+    __slots__ = ("_parts", "placeholders")
+
+    def __init__(self, template: str):
+        # re.split with a capture group alternates literal, name, literal, ...
+        self._parts: List[str] = _PLACEHOLDER_RE.split(template)
+        self.placeholders = frozenset(self._parts[1::2])
+
+    def render(self, values: Dict[str, str]) -> str:
+        if not self.placeholders:
+            return self._parts[0]
+        rendered = list(self._parts)
+        for i in range(1, len(rendered), 2):
+            rendered[i] = values[rendered[i]]
+        return "".join(rendered)
+
+
+def get_compiled_template(trigger_id: str, prompt: str) -> CompiledPromptTemplate:
+    cached = _compiled_templates.get(trigger_id)
+    if cached and cached[0] == prompt:
+        _compiled_templates.move_to_end(trigger_id)
+        return cached[1]
+
+    compiled = CompiledPromptTemplate(prompt)
+    _compiled_templates[trigger_id] = (prompt, compiled)
+    if len(_compiled_templates) > _TEMPLATE_CACHE_SIZE:
+        _compiled_templates.popitem(last=False)
+    return compiled
+
+
+def get_fold_window(trigger: Optional[Trigger]) -> int:
+    """Seconds to fold events for this trigger (0 = execute every event)."""
+    if not trigger or not trigger.config:
+        return 0
+    try:
+        window = int(trigger.config.get('fold_window_seconds') or 0)
+    except (TypeError, ValueError):
+        return 0
+    return max(0, min(window, MAX_FOLD_WINDOW_SECONDS))
 
 
 class ExecutionService:
@@ -25,25 +103,47 @@ class ExecutionService:
         self,
         agent_id: str,
         trigger_result: TriggerResult,
-        trigger_event: TriggerEvent
+        trigger_event: TriggerEvent,
+        account_id: Optional[str] = None,
+        trigger: Optional[Trigger] = None
     ) -> Dict[str, Any]:
         """
         Execute an agent based on trigger result.
         
         Reuses the core agent start infrastructure from agent_runs.py.
+        Callers that already resolved the agent's account (e.g. the batched
+        local scheduler) pass account_id to skip the lookup. Passing the
+        trigger enables event folding when its config opts in.
         """
+        fold_window = get_fold_window(trigger)
+        if fold_window:
+            try:
+                return await self._fold_event(trigger, trigger_result, trigger_event, fold_window)
+            except Exception as e:
+                logger.warning(f"Event folding failed for trigger {trigger_event.trigger_id}, executing directly: {e}")
+        
         try:
             logger.debug(f"Executing trigger for agent {agent_id}")
             
             client = await self._db.client
-            agent_result = await client.table('agents').select('account_id').eq('agent_id', agent_id).single().execute()
-            if not agent_result.data:
-                return {
-                    "success": False,
-                    "error": f"Agent {agent_id} not found",
-                    "message": "Failed to execute trigger"
-                }
-            account_id = agent_result.data['account_id']
+            from core.runtime_cache import get_trigger_agent_snapshot, set_trigger_agent_snapshot
+            
+            agent_config = None
+            snapshot = get_trigger_agent_snapshot(trigger_event.trigger_id, agent_id)
+            if snapshot:
+                account_id = snapshot['account_id']
+                agent_config = snapshot['agent_config']
+                logger.debug(f"⚡ Trigger agent snapshot hit for {trigger_event.trigger_id}")
+            
+            if not account_id:
+                agent_result = await client.table('agents').select('account_id').eq('agent_id', agent_id).single().execute()
+                if not agent_result.data:
+                    return {
+                        "success": False,
+                        "error": f"Agent {agent_id} not found",
+                        "message": "Failed to execute trigger"
+                    }
+                account_id = agent_result.data['account_id']
             
             if config.ENV_MODE != EnvMode.LOCAL:
                 from core.utils.limits_checker import check_project_count_limit, check_thread_limit
@@ -72,7 +172,11 @@ class ExecutionService:
                 trigger_event
             )
             
-            from core.agent_runs import start_agent_run
+            from core.agent_runs import start_agent_run, _load_agent_config
+            
+            if agent_config is None:
+                agent_config = await _load_agent_config(client, agent_id, account_id, account_id)
+                set_trigger_agent_snapshot(trigger_event.trigger_id, agent_id, account_id, agent_config)
             
             model_name = trigger_result.model if hasattr(trigger_result, 'model') and trigger_result.model else None
             
@@ -86,7 +190,8 @@ class ExecutionService:
                     "trigger_id": trigger_event.trigger_id,
                     "trigger_variables": trigger_result.execution_variables
                 },
-                skip_limits_check=True
+                skip_limits_check=True,
+                agent_config=agent_config
             )
             
             return {
@@ -104,47 +209,145 @@ class ExecutionService:
                 "message": "Failed to execute trigger"
             }
     
+    async def _fold_event(
+        self,
+        trigger: Trigger,
+        trigger_result: TriggerResult,
+        trigger_event: TriggerEvent,
+        fold_window: int
+    ) -> Dict[str, Any]:
+        """
+        Buffer an event for a folding trigger. The first event of a burst
+        claims the flush lock and schedules one run for everything buffered
+        within the window; later events just append.
+        """
+        ctx = dict(trigger_event.context) if isinstance(trigger_event.context, dict) else {}
+        if trigger_result.execution_variables:
+            ctx.update(trigger_result.execution_variables)
+        entry = json.dumps({
+            "context": ctx,
+            "agent_prompt": trigger_result.agent_prompt,
+            "model": trigger_result.model,
+            "timestamp": trigger_event.timestamp.isoformat(),
+        }, default=str)
+        
+        events_key = f"trigger_fold:{trigger.trigger_id}"
+        buffered = await redis.rpush(events_key, entry)
+        await redis.expire(events_key, fold_window * 10 + 60)
+        
+        if await self._claim_fold_flush(trigger.trigger_id, fold_window):
+            self._spawn_fold_flusher(trigger, trigger_event.trigger_type, fold_window)
+        
+        logger.debug(f"Folded event for trigger {trigger.trigger_id} ({buffered} buffered)")
+        return {
+            "success": True,
+            "folded": True,
+            "buffered_events": buffered,
+            "message": f"Event buffered; batched execution within {fold_window}s"
+        }
+    
+    async def _claim_fold_flush(self, trigger_id: str, fold_window: int) -> bool:
+        # Lock outlives the window so a crashed flusher is replaced by the next event
+        return bool(await redis.set(f"trigger_fold_lock:{trigger_id}", "1", ex=fold_window * 3, nx=True))
+    
+    def _spawn_fold_flusher(self, trigger: Trigger, trigger_type, fold_window: int) -> None:
+        task = asyncio.create_task(
+            self._flush_folded_events(trigger, trigger_type, fold_window),
+            name=f"trigger_fold_flush:{trigger.trigger_id}",
+        )
+        _fold_flushers.add(task)
+        task.add_done_callback(_fold_flushers.discard)
+    
+    async def _flush_folded_events(self, trigger: Trigger, trigger_type, fold_window: int) -> None:
+        events_key = f"trigger_fold:{trigger.trigger_id}"
+        lock_key = f"trigger_fold_lock:{trigger.trigger_id}"
+        try:
+            # Wait out the window, or less if the process is shutting down
+            try:
+                await asyncio.wait_for(_fold_flush_now.wait(), timeout=fold_window)
+            except asyncio.TimeoutError:
+                pass
+            
+            client = await redis.get_client()
+            pipe = client.pipeline(transaction=True)
+            pipe.lrange(events_key, 0, MAX_FOLDED_EVENTS - 1)
+            pipe.ltrim(events_key, MAX_FOLDED_EVENTS, -1)
+            raw_events, _ = await pipe.execute()
+            events = [json.loads(raw) for raw in raw_events]
+            if not events:
+                return
+            
+            latest = events[-1]
+            contexts = [event.get("context") or {} for event in events]
+            folded_ctx = {
+                "payload": [ctx.get("payload") for ctx in contexts],
+                "trigger_slug": latest["context"].get("trigger_slug"),
+                "webhook_id": latest["context"].get("webhook_id"),
+                "folded_events": len(events),
+                "first_event_at": events[0].get("timestamp"),
+                "last_event_at": latest.get("timestamp"),
+            }
+            folded_result = TriggerResult(
+                success=True,
+                should_execute_agent=True,
+                agent_prompt=latest.get("agent_prompt"),
+                execution_variables={"folded_events": len(events)},
+                model=latest.get("model"),
+            )
+            folded_event = TriggerEvent(
+                trigger_id=trigger.trigger_id,
+                agent_id=trigger.agent_id,
+                trigger_type=trigger_type,
+                raw_data={"folded_events": len(events)},
+                context=folded_ctx,
+            )
+            logger.info(f"Executing folded run for trigger {trigger.trigger_id} ({len(events)} events)")
+            # No trigger passed: the folded run itself must not be folded again
+            await self.execute_trigger_result(trigger.agent_id, folded_result, folded_event)
+        except Exception as e:
+            logger.error(f"Failed to flush folded events for trigger {trigger.trigger_id}: {e}", exc_info=True)
+        finally:
+            try:
+                await redis.delete(lock_key)
+                # Events that arrived during the flush (or beyond the batch cap) get their own flush
+                client = await redis.get_client()
+                if await client.llen(events_key) and await self._claim_fold_flush(trigger.trigger_id, fold_window):
+                    self._spawn_fold_flusher(trigger, trigger_type, fold_window)
+            except Exception as e:
+                logger.warning(f"Failed to reschedule folded events for trigger {trigger.trigger_id}: {e}")
+    
     def _render_prompt(
         self,
         prompt: str,
         trigger_variables: Optional[Dict[str, Any]],
         trigger_event: TriggerEvent
     ) -> str:
-        """Render trigger variables into the prompt template."""
+        """Render trigger variables into the trigger's compiled prompt template."""
         rendered = prompt
         
         try:
             # Get context from trigger event
             ctx = {}
             if hasattr(trigger_event, "context") and isinstance(trigger_event.context, dict):
-                ctx = trigger_event.context
+                ctx = dict(trigger_event.context)
             
             # Merge with execution variables
             if trigger_variables:
                 ctx.update(trigger_variables)
             
-            payload = ctx.get("payload")
-            trigger_slug = ctx.get("trigger_slug")
-            webhook_id = ctx.get("webhook_id")
-            
-            def _to_json(obj: Any) -> str:
-                try:
-                    return json.dumps(obj, ensure_ascii=False, indent=2)
-                except Exception:
-                    return str(obj)
-            
-            # Replace template variables
-            if "{{payload}}" in rendered:
-                rendered = rendered.replace("{{payload}}", _to_json(payload))
-            if "{{trigger_slug}}" in rendered:
-                rendered = rendered.replace("{{trigger_slug}}", str(trigger_slug or ""))
-            if "{{webhook_id}}" in rendered:
-                rendered = rendered.replace("{{webhook_id}}", str(webhook_id or ""))
+            template = get_compiled_template(trigger_event.trigger_id, prompt or "")
+            values = {}
+            if "payload" in template.placeholders:
+                values["payload"] = _to_json(ctx.get("payload"))
+            if "trigger_slug" in template.placeholders:
+                values["trigger_slug"] = str(ctx.get("trigger_slug") or "")
+            if "webhook_id" in template.placeholders:
+                values["webhook_id"] = str(ctx.get("webhook_id") or "")
+            rendered = template.render(values)
             
             # Append full context for reference
             if ctx:
-                context_json = _to_json(ctx)
-                rendered = f"{rendered}\n\n---\nContext\n{context_json}"
+                rendered = f"{rendered}\n\n---\nContext\n{_to_json(ctx)}"
                 
         except Exception as e:
             logger.warning(f"Failed to render prompt variables: {e}")
@@ -153,6 +356,28 @@ class ExecutionService:
         return rendered
 
 
+async def flush_pending_folds(timeout: float = FOLD_SHUTDOWN_FLUSH_SECONDS) -> None:
+    """
+    Flush every buffered fold now instead of at the end of its window.
+    
+    Called at shutdown so events buffered by this process are dispatched
+    rather than left waiting for another event on the same trigger.
+    """
+    _fold_flush_now.set()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    # Flushers reschedule themselves for events beyond the batch cap
+    while _fold_flushers:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        await asyncio.wait(set(_fold_flushers), timeout=remaining)
+    if _fold_flushers:
+        logger.warning(f"{len(_fold_flushers)} trigger fold flushers still running after {timeout}s, cancelling")
+        for task in list(_fold_flushers):
+            task.cancel()
+
+
 def get_execution_service(db_connection: DBConnection) -> ExecutionService:
     """Factory function for ExecutionService."""
     return ExecutionService(db_connection)
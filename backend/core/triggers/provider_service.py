@@ -86,6 +86,8 @@ class ScheduleProvider(TriggerProvider):
         return config
     
     async def setup_trigger(self, trigger: Trigger) -> bool:
+        if app_config.TRIGGER_SCHEDULER_ENABLED:
+            return await self._setup_local_schedule(trigger)
         try:
             base_url = app_config.WEBHOOK_BASE_URL or 'http://localhost:8000'
             webhook_url = f"{base_url}/v1/triggers/{trigger.trigger_id}/webhook"
@@ -148,6 +150,18 @@ class ScheduleProvider(TriggerProvider):
             logger.error(f"Failed to setup Supabase Cron schedule for trigger {trigger.trigger_id}: {e}")
             return False
     
+    async def _setup_local_schedule(self, trigger: Trigger) -> bool:
+        # The local scheduler (core.triggers.scheduler) picks the trigger up from
+        # agent_triggers on its next refresh; just make sure no pg_cron job is
+        # left over from before the switch.
+        if trigger.config.get('cron_job_name'):
+            await self.teardown_trigger(trigger)
+        trigger.config.pop('cron_job_name', None)
+        trigger.config.pop('cron_job_id', None)
+        trigger.config['scheduler'] = 'local'
+        logger.debug(f"Trigger {trigger.trigger_id} scheduled by local scheduler")
+        return True
+
     async def teardown_trigger(self, trigger: Trigger) -> bool:
         try:
             job_name = trigger.config.get('cron_job_name') or f"trigger_{trigger.trigger_id}"
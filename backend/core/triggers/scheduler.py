@@ -0,0 +1,360 @@
+"""
+Local scheduler for cron triggers.
+
+Replaces the per-trigger Supabase pg_cron HTTP job: active schedule triggers
+are loaded from `agent_triggers` into a min-heap keyed by next fire time, and
+due triggers are fired in batches straight into the execution service, with
+no webhook round trip.
+
+- Jitter: each trigger fires at a stable offset inside
+  TRIGGER_SCHEDULER_JITTER_SECONDS after its cron time, so the top of the
+  minute/hour is spread out instead of hitting the API as one herd.
+- Idempotency: every firing claims `trigger_fire:{trigger_id}:{cron_ts}` in
+  Redis with SET NX before dispatch, so restarts, leader failover or a
+  leftover pg_cron job can never run the same occurrence twice.
+- Leadership: only the instance holding the Redis leader lock loads and
+  fires schedules; other API instances keep polling for the lock.
+- Batching: due triggers are re-read (to drop deleted/paused ones) and their
+  agents' account ids resolved with one query per batch.
+"""
+import asyncio
+import hashlib
+import heapq
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import croniter
+import pytz
+
+from core.services.supabase import DBConnection
+from core.services import redis
+from core.utils.config import config
+from core.utils.logger import logger
+from .trigger_service import Trigger, TriggerEvent, TriggerType, get_trigger_service
+
+LEADER_KEY = "trigger_scheduler:leader"
+LEADER_TTL_SECONDS = 30
+FIRE_KEY_TTL_SECONDS = 3600 * 24
+
+# Upper bound on how long the loop sleeps, so leadership and refreshes are
+# checked even when nothing is due for hours.
+MAX_SLEEP_SECONDS = 5.0
+
+# Rows fetched per page when loading schedules
+LOAD_PAGE_SIZE = 1000
+
+
+@dataclass
+class ScheduleEntry:
+    trigger_id: str
+    agent_id: str
+    cron_expression: str
+    timezone: str
+    updated_at: str
+    cron_time: datetime  # Next occurrence in UTC, before jitter
+    fire_at: float       # Epoch seconds, with jitter applied
+
+
+def _jitter_seconds(trigger_id: str) -> float:
+    """Stable per-trigger offset in [0, TRIGGER_SCHEDULER_JITTER_SECONDS)."""
+    window = config.TRIGGER_SCHEDULER_JITTER_SECONDS
+    if not window or window <= 0:
+        return 0.0
+    digest = hashlib.blake2b(trigger_id.encode(), digest_size=8).digest()
+    return (int.from_bytes(digest, "big") % (window * 1000)) / 1000
+
+
+def _next_cron_time(cron_expression: str, user_timezone: str, after: datetime) -> datetime:
+    """Next occurrence strictly after `after`, evaluated in the user's timezone (DST-aware)."""
+    tz = pytz.timezone(user_timezone or "UTC")
+    cron = croniter.croniter(cron_expression, after.astimezone(tz))
+    return cron.get_next(datetime).astimezone(timezone.utc)
+
+
+class TriggerScheduler:
+    def __init__(self, db_connection: DBConnection):
+        self._db = db_connection
+        self._instance_id = str(uuid.uuid4())[:8]
+        self._heap: List[Tuple[float, str, int]] = []
+        self._entries: Dict[str, ScheduleEntry] = {}
+        self._versions: Dict[str, int] = {}
+        self._is_leader = False
+        self._last_full_load = 0.0
+        self._last_refresh = 0.0
+        self._refresh_watermark: Optional[str] = None
+        self._semaphore = asyncio.Semaphore(max(1, config.TRIGGER_SCHEDULER_MAX_CONCURRENCY))
+
+    # ------------------------------------------------------------------
+    # Heap maintenance
+    # ------------------------------------------------------------------
+
+    def _schedule(self, row: Dict[str, Any], after: Optional[datetime] = None) -> None:
+        trigger_config = row.get('config') or {}
+        cron_expression = trigger_config.get('cron_expression')
+        trigger_id = row['trigger_id']
+        if not row.get('is_active', True) or not cron_expression:
+            self._unschedule(trigger_id)
+            return
+
+        user_timezone = trigger_config.get('timezone', 'UTC')
+        try:
+            cron_time = _next_cron_time(cron_expression, user_timezone, after or datetime.now(timezone.utc))
+        except Exception as e:
+            logger.warning(f"Skipping trigger {trigger_id} with invalid schedule '{cron_expression}': {e}")
+            self._unschedule(trigger_id)
+            return
+
+        entry = ScheduleEntry(
+            trigger_id=trigger_id,
+            agent_id=row['agent_id'],
+            cron_expression=cron_expression,
+            timezone=user_timezone,
+            updated_at=row.get('updated_at') or '',
+            cron_time=cron_time,
+            fire_at=cron_time.timestamp() + _jitter_seconds(trigger_id),
+        )
+        version = self._versions.get(trigger_id, 0) + 1
+        self._versions[trigger_id] = version
+        self._entries[trigger_id] = entry
+        heapq.heappush(self._heap, (entry.fire_at, trigger_id, version))
+
+    def _unschedule(self, trigger_id: str) -> None:
+        # Heap items are invalidated lazily via the version check in _pop_due
+        self._entries.pop(trigger_id, None)
+        self._versions[trigger_id] = self._versions.get(trigger_id, 0) + 1
+
+    def _pop_due(self, now: float, limit: int) -> List[ScheduleEntry]:
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < limit:
+            _, trigger_id, version = heapq.heappop(self._heap)
+            if self._versions.get(trigger_id) != version:
+                continue
+            entry = self._entries.get(trigger_id)
+            if entry:
+                due.append(entry)
+        return due
+
+    def _seconds_until_next(self, now: float) -> float:
+        while self._heap and self._versions.get(self._heap[0][1]) != self._heap[0][2]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return MAX_SLEEP_SECONDS
+        return min(MAX_SLEEP_SECONDS, max(0.0, self._heap[0][0] - now))
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _schedule_query(self, client):
+        return client.table('agent_triggers').select(
+            'trigger_id, agent_id, is_active, config, updated_at'
+        ).eq('trigger_type', TriggerType.SCHEDULE.value)
+
+    async def _full_load(self) -> None:
+        t_start = time.time()
+        client = await self._db.client
+        rows: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            result = await self._schedule_query(client).eq('is_active', True).order('trigger_id').range(
+                offset, offset + LOAD_PAGE_SIZE - 1
+            ).execute()
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < LOAD_PAGE_SIZE:
+                break
+            offset += LOAD_PAGE_SIZE
+
+        self._heap = []
+        self._entries = {}
+        for row in rows:
+            self._schedule(row)
+        self._refresh_watermark = max((row.get('updated_at') or '' for row in rows), default=None) or datetime.now(timezone.utc).isoformat()
+        self._last_full_load = self._last_refresh = time.time()
+        logger.info(f"⏰ Trigger scheduler loaded {len(self._entries)} schedules in {(time.time() - t_start) * 1000:.1f}ms")
+
+    async def _incremental_refresh(self) -> None:
+        """Pick up schedules created, edited, paused or resumed since the last load."""
+        client = await self._db.client
+        query = self._schedule_query(client)
+        if self._refresh_watermark:
+            query = query.gt('updated_at', self._refresh_watermark)
+        result = await query.execute()
+        rows = result.data or []
+        for row in rows:
+            current = self._entries.get(row['trigger_id'])
+            if current and current.updated_at == row.get('updated_at'):
+                continue
+            self._schedule(row)
+        if rows:
+            self._refresh_watermark = max(row.get('updated_at') or '' for row in rows)
+            logger.debug(f"⏰ Trigger scheduler refreshed {len(rows)} changed schedules")
+        self._last_refresh = time.time()
+
+    # ------------------------------------------------------------------
+    # Firing
+    # ------------------------------------------------------------------
+
+    async def _claim(self, entry: ScheduleEntry) -> bool:
+        fire_key = f"trigger_fire:{entry.trigger_id}:{int(entry.cron_time.timestamp())}"
+        return bool(await redis.set(fire_key, self._instance_id, ex=FIRE_KEY_TTL_SECONDS, nx=True))
+
+    async def _fire_batch(self, due: List[ScheduleEntry]) -> None:
+        client = await self._db.client
+        trigger_ids = [entry.trigger_id for entry in due]
+
+        # Re-read due triggers so deleted/paused ones are dropped and fresh config is used
+        result = await client.table('agent_triggers').select('*').in_('trigger_id', trigger_ids).execute()
+        trigger_service = get_trigger_service(self._db)
+        triggers: Dict[str, Trigger] = {}
+        for row in result.data or []:
+            if row.get('is_active', True):
+                triggers[row['trigger_id']] = trigger_service._map_to_trigger(row)
+
+        agent_ids = list({trigger.agent_id for trigger in triggers.values()})
+        account_ids: Dict[str, str] = {}
+        if agent_ids:
+            agents_result = await client.table('agents').select('agent_id, account_id').in_('agent_id', agent_ids).execute()
+            account_ids = {row['agent_id']: row['account_id'] for row in agents_result.data or []}
+
+        tasks = []
+        for entry in due:
+            trigger = triggers.get(entry.trigger_id)
+            if not trigger:
+                self._unschedule(entry.trigger_id)
+                continue
+            # Reschedule before dispatch so a slow run never delays the next occurrence
+            self._schedule(
+                {
+                    'trigger_id': trigger.trigger_id,
+                    'agent_id': trigger.agent_id,
+                    'is_active': trigger.is_active,
+                    'config': trigger.config,
+                    'updated_at': entry.updated_at,
+                },
+                # Never catch up on occurrences missed while the batch was late
+                after=max(entry.cron_time, datetime.now(timezone.utc)),
+            )
+            account_id = account_ids.get(trigger.agent_id)
+            if not account_id:
+                logger.warning(f"Skipping trigger {trigger.trigger_id}: agent {trigger.agent_id} not found")
+                continue
+            tasks.append(self._fire(trigger, entry, account_id))
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def _fire(self, trigger: Trigger, entry: ScheduleEntry, account_id: str) -> None:
+        async with self._semaphore:
+            try:
+                if not await self._claim(entry):
+                    logger.debug(f"Trigger {trigger.trigger_id} occurrence {entry.cron_time.isoformat()} already fired")
+                    return
+
+                raw_data = {
+                    "trigger_id": trigger.trigger_id,
+                    "agent_id": trigger.agent_id,
+                    "agent_prompt": trigger.config.get('agent_prompt'),
+                    "timestamp": entry.cron_time.isoformat(),
+                }
+                trigger_service = get_trigger_service(self._db)
+                result = await trigger_service.process_trigger_event(trigger.trigger_id, raw_data, trigger=trigger)
+                if not result.success or not result.should_execute_agent:
+                    logger.warning(f"Scheduled trigger {trigger.trigger_id} not executed: {result.error_message}")
+                    return
+
+                from .execution_service import get_execution_service
+                event = TriggerEvent(
+                    trigger_id=trigger.trigger_id,
+                    agent_id=trigger.agent_id,
+                    trigger_type=trigger.trigger_type,
+                    raw_data=raw_data,
+                )
+                execution = await get_execution_service(self._db).execute_trigger_result(
+                    agent_id=trigger.agent_id,
+                    trigger_result=result,
+                    trigger_event=event,
+                    account_id=account_id,
+                    trigger=trigger,
+                )
+                lag_ms = (time.time() - entry.cron_time.timestamp()) * 1000
+                logger.info(f"⏰ Fired scheduled trigger {trigger.trigger_id} (lag {lag_ms:.0f}ms): {execution.get('message')}")
+            except Exception as e:
+                logger.error(f"Failed to fire scheduled trigger {trigger.trigger_id}: {e}", exc_info=True)
+
+    # ------------------------------------------------------------------
+    # Main loop
+    # ------------------------------------------------------------------
+
+    async def _hold_leadership(self) -> bool:
+        client = await redis.get_client()
+        if self._is_leader:
+            owner = await client.get(LEADER_KEY)
+            if owner == self._instance_id:
+                await client.expire(LEADER_KEY, LEADER_TTL_SECONDS)
+                return True
+            logger.warning("⏰ Trigger scheduler lost leadership")
+            self._is_leader = False
+            return False
+
+        acquired = await client.set(LEADER_KEY, self._instance_id, ex=LEADER_TTL_SECONDS, nx=True)
+        if acquired:
+            logger.info(f"⏰ Trigger scheduler {self._instance_id} acquired leadership")
+            self._is_leader = True
+            self._last_full_load = 0.0
+        return self._is_leader
+
+    async def _release_leadership(self) -> None:
+        if not self._is_leader:
+            return
+        try:
+            client = await redis.get_client()
+            if await client.get(LEADER_KEY) == self._instance_id:
+                await client.delete(LEADER_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to release trigger scheduler leadership: {e}")
+        self._is_leader = False
+
+    async def run(self) -> None:
+        logger.info(f"Starting local trigger scheduler {self._instance_id}")
+        last_leader_check = 0.0
+        try:
+            while True:
+                try:
+                    now = time.time()
+                    if now - last_leader_check >= LEADER_TTL_SECONDS / 3:
+                        await self._hold_leadership()
+                        last_leader_check = now
+
+                    if not self._is_leader:
+                        await asyncio.sleep(MAX_SLEEP_SECONDS)
+                        continue
+
+                    if now - self._last_full_load >= config.TRIGGER_SCHEDULER_FULL_RELOAD_SECONDS:
+                        await self._full_load()
+                    elif now - self._last_refresh >= config.TRIGGER_SCHEDULER_REFRESH_SECONDS:
+                        await self._incremental_refresh()
+
+                    due = self._pop_due(time.time(), config.TRIGGER_SCHEDULER_BATCH_SIZE)
+                    if due:
+                        await self._fire_batch(due)
+                        continue
+
+                    await asyncio.sleep(self._seconds_until_next(time.time()))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error in trigger scheduler loop: {e}", exc_info=True)
+                    await asyncio.sleep(MAX_SLEEP_SECONDS)
+        except asyncio.CancelledError:
+            logger.info("Local trigger scheduler stopped")
+            await self._release_leadership()
+            raise
+
+
+async def start_trigger_scheduler(db_connection: DBConnection):
+    """Background task entry point used by the API lifespan."""
+    await TriggerScheduler(db_connection).run()
@@ -198,8 +198,15 @@ class TriggerService:
         
         return success
     
-    async def process_trigger_event(self, trigger_id: str, raw_data: Dict[str, Any]) -> TriggerResult:
-        trigger = await self.get_trigger(trigger_id)
+    async def process_trigger_event(
+        self,
+        trigger_id: str,
+        raw_data: Dict[str, Any],
+        trigger: Optional[Trigger] = None
+    ) -> TriggerResult:
+        # The local scheduler passes the trigger it already loaded for the batch
+        if trigger is None:
+            trigger = await self.get_trigger(trigger_id)
         if not trigger:
             return TriggerResult(success=False, error_message=f"Trigger not found: {trigger_id}")
         
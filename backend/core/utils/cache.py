@@ -1,6 +1,6 @@
-import json
 from typing import Any
 from core.services.redis import get_client
+from core.utils import serialization
 
 
 class _cache:
@@ -9,13 +9,13 @@ class _cache:
         key = f"cache:{key}"
         result = await redis.get(key)
         if result:
-            return json.loads(result)
+            return serialization.loads(result)
         return None
 
     async def set(self, key: str, value: Any, ttl: int = 15 * 60):
         redis = await get_client()
         key = f"cache:{key}"
-        await redis.set(key, json.dumps(value), ex=ttl)
+        await redis.set(key, serialization.dumps(value), ex=ttl)
 
     async def invalidate(self, key: str):
         redis = await get_client()
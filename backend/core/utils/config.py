@@ -96,7 +96,34 @@ class Configuration:
     BOOTSTRAP_SLO_WARNING_MS: int = 750       # Emit warning if Phase A exceeds this threshold
     BOOTSTRAP_SLO_CRITICAL_MS: int = 1500     # Hard timeout for Phase A (fail if exceeded)
     # =========================================
-    
+
+    # ===== PROCESS STARTUP CONFIGURATION =====
+    PRELOAD_WARM_STATE: bool = False          # Warm tools/prompts/models in the parent before fork, then gc.freeze()
+    # =========================================
+
+    # ===== ADMISSION CONTROL CONFIGURATION =====
+    ADMISSION_CONTROL_ENABLED: bool = False   # Queue runs per account (weighted DRR) instead of sending straight to Dramatiq
+    ADMISSION_MAX_INFLIGHT: int = 64          # Max dispatched-but-unfinished runs per worker pool
+    ADMISSION_SHED_QUEUE_DEPTH: int = 1000    # Reject new runs with 503 when queued work exceeds this
+    ADMISSION_INFLIGHT_TTL_SECONDS: int = 7200  # Reclaim inflight slots whose worker never released them
+    ADMISSION_DISPATCH_RECOVERY_SECONDS: int = 60  # Re-queue runs picked by a pump that died before sending them
+    # ===========================================
+
+    # ===== TRIGGER SCHEDULER CONFIGURATION =====
+    TRIGGER_SCHEDULER_ENABLED: bool = False   # Fire cron triggers from the local scheduler instead of pg_cron webhooks
+    TRIGGER_SCHEDULER_JITTER_SECONDS: int = 30  # Spread each trigger's firing over this window after its cron time
+    TRIGGER_SCHEDULER_BATCH_SIZE: int = 200   # Max due triggers fired per batch
+    TRIGGER_SCHEDULER_MAX_CONCURRENCY: int = 20  # Max trigger executions in flight per batch
+    TRIGGER_SCHEDULER_REFRESH_SECONDS: int = 30  # Poll agent_triggers for changed schedules
+    TRIGGER_SCHEDULER_FULL_RELOAD_SECONDS: int = 900  # Rebuild the heap from scratch (drops deleted triggers)
+    # ===========================================
+    
+    # ===== ANALYTICS ROLLUPS (see core/admin/analytics_rollups.py) =====
+    ANALYTICS_ROLLUPS_ENABLED: bool = False   # Admin summary/daily stats read Redis rollups kept by a background job
+    ANALYTICS_ROLLUP_INTERVAL_SECONDS: int = 300  # How often the job refreshes open days and totals
+    ANALYTICS_ROLLUP_BACKFILL_DAYS: int = 90  # Closed days kept rolled up (the daily endpoint allows up to 90)
+    # ====================================================================
+
     # ===== PRESENCE CONFIGURATION =====
     DISABLE_PRESENCE: bool = False  # Disable presence tracking entirely
     # ==================================
@@ -369,6 +396,20 @@ class Configuration:
     FIRECRAWL_URL: Optional[str] = "https://api.firecrawl.dev"
     EXA_API_KEY: Optional[str] = None
     SEMANTIC_SCHOLAR_API_KEY: Optional[str] = None
+
+    # ===== WEB SEARCH CACHE (see core/services/web_search.py) =====
+    WEB_CACHE_TTL_SECONDS: int = 10 * 60  # Cached results are served fresh for this long
+    WEB_CACHE_STALE_SECONDS: int = 5 * 60  # ...then served stale while refreshed in the background
+    WEB_CACHE_SCRAPES: bool = False  # Also cache page scrapes (searches are always cached)
+    WEB_CACHE_MAX_ENTRIES: int = 50_000  # Oldest entries beyond this are evicted
+    WEB_CACHE_MAX_ENTRY_BYTES: int = 2 * 1024 * 1024  # Larger results are not cached
+    WEB_FANOUT_CONCURRENCY: int = 8  # Provider calls in flight per batch of queries or URLs
+    WEB_SCRAPE_PER_DOMAIN_CONCURRENCY: int = 2  # Scrapes in flight per target domain (per process)
+    WEB_SCRAPE_DOMAIN_INTERVAL_SECONDS: float = 0.5  # Minimum spacing between scrape starts on one domain
+    WEB_PROVIDER_MODE: Optional[str] = None  # "stub" serves synthetic results offline; ignored in production
+    WEB_STUB_LATENCY_SECONDS: float = 0.3  # Simulated provider latency of the stub
+    WEB_STUB_SCRAPE_PARAGRAPHS: int = 20  # Size of stub scrape pages
+    # =================================================================
     
     VAPI_PRIVATE_KEY: Optional[str] = None
     VAPI_PHONE_NUMBER_ID: Optional[str] = None
@@ -410,6 +451,76 @@ class Configuration:
             return False
         return self._DEBUG_SAVE_LLM_IO or False
 
+    # LLM record/replay (see core/services/llm_replay.py). Ignored in production.
+    LLM_REPLAY_MODE: Optional[str] = None     # "record" to capture cassettes, "replay" to serve them offline
+    LLM_REPLAY_DIR: str = "llm_cassettes"     # Directory holding cassette .jsonl files
+    LLM_REPLAY_SPEEDUP: float = 1.0           # Replay speed multiplier (0.5 = half speed); 0 replays instantly
+    LLM_REPLAY_MATCH: str = "hash"            # "hash" (per request) or "sequence" (file order)
+
+    # ===== LLM ROUTING CONFIGURATION (see core/services/llm_routing.py) =====
+    LLM_ROUTING_ENABLED: bool = False         # Route around unhealthy deployments using rolling TTFT/error stats
+    LLM_HEDGING_ENABLED: bool = False         # Start a second streaming request when the first is slower than p95 TTFT
+    LLM_HEDGE_MIN_DELAY_MS: int = 2000        # Never hedge earlier than this
+    LLM_HEDGE_MAX_DELAY_MS: int = 15000       # Hedge delay when a deployment has no TTFT history yet
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5    # Consecutive failures before a deployment's breaker opens
+    LLM_CIRCUIT_COOLDOWN_SECONDS: int = 30    # Time an open breaker waits before letting a probe through
+    # ========================================================================
+
+    # ===== AUXILIARY LLM CACHE (see core/services/llm_cache.py) =====
+    AUX_LLM_CACHE_ENABLED: bool = True        # Cache file summaries, name/icon generation and admin translations
+    AUX_LLM_CACHE_TTL_SECONDS: int = 604800   # 7 days
+    AUX_LLM_CACHE_MAX_ENTRIES: int = 1024     # In-process LRU size (Redis holds the shared copy)
+    AUX_LLM_CACHE_MAX_ENTRY_BYTES: int = 65536  # Larger results are not cached
+    # ================================================================
+
+    # ===== MCP SESSION POOL (see core/mcp_module/session_pool.py) =====
+    MCP_SESSION_POOL_MAX_SESSIONS: int = 200  # Warm MCP client sessions kept per process
+    MCP_SESSION_IDLE_TTL_SECONDS: int = 600   # Close sessions unused for this long
+    MCP_SESSION_HEALTH_CHECK_SECONDS: int = 60  # Ping a reused session if it has been quiet this long
+    # ==================================================================
+
+    # ===== TOOL RESULT SPILL (see core/agentpress/tool_result_spill.py) =====
+    TOOL_RESULT_SPILL_ENABLED: bool = True    # Store oversized tool results outside messages.content
+    TOOL_RESULT_SPILL_THRESHOLD_CHARS: int = 20000  # Results longer than this are spilled
+    TOOL_RESULT_SPILL_PREVIEW_HEAD_CHARS: int = 2000  # Leading chars kept in the message
+    TOOL_RESULT_SPILL_PREVIEW_TAIL_CHARS: int = 1000  # Trailing chars kept in the message
+    TOOL_RESULT_SPILL_EXPAND_PAGE_CHARS: int = 20000  # Default page size when expand_message reads a spill
+    TOOL_RESULT_SPILL_BACKEND: str = "supabase"  # "supabase" (tool-outputs bucket) or "local"
+    TOOL_RESULT_SPILL_LOCAL_DIR: str = "tool_result_spill"  # Directory used by the local backend
+    # ========================================================================
+
+    # ===== IMAGE PIPELINE (see core/utils/image_pipeline.py) =====
+    IMAGE_PROCESS_WORKERS: int = 2  # Processes for image decode/resize/encode; 0 uses a thread
+    IMAGE_CACHE_MAX_ENTRIES: int = 256  # Compressed images kept per worker process
+    IMAGE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Total size cap for the compressed image cache
+    # =============================================================
+
+    # ===== VISION IMAGE STORAGE (see core/agentpress/image_refs.py) =====
+    VISION_IMAGE_STORAGE_BACKEND: str = "supabase"  # "supabase" (image-uploads bucket) or "local"
+    VISION_IMAGE_LOCAL_DIR: str = "vision_images"  # Directory used by the local backend
+    VISION_IMAGE_INLINE_CACHE_BYTES: int = 32 * 1024 * 1024  # Data URLs kept for providers that need inline images
+    # ====================================================================
+
+    # ===== GIT HISTORY INDEX (see core/sandbox/git_index.py) =====
+    GIT_INDEX_TTL_SECONDS: int = 7 * 24 * 3600  # Per-sandbox commit log, file changes and trees
+    GIT_BLOB_CACHE_MAX_BYTES: int = 1024 * 1024  # Larger blobs are read from the sandbox every time
+    GIT_BLOB_CACHE_TTL_SECONDS: int = 24 * 3600
+    # =============================================================
+
+    # ===== SANDBOX HANDLES (see core/sandbox/handle_registry.py) =====
+    SANDBOX_HANDLE_LIVENESS_SECONDS: int = 60  # How long a run trusts a sandbox's state before re-checking it
+    SANDBOX_HTTP_TIMEOUT_SECONDS: float = 120.0  # Default timeout of the shared client to sandbox services
+    # =================================================================
+
+    # ===== SHELL OUTPUT (see core/tools/sb_shell_tool.py) =====
+    SHELL_OUTPUT_HEAD_BYTES: int = 20_000  # Output kept from the start of a command (or of a check_command_output window)
+    SHELL_OUTPUT_TAIL_BYTES: int = 30_000  # Output kept from the end; bytes in between are skipped inside the sandbox
+    SHELL_POLL_CHUNK_BYTES: int = 64_000  # Max bytes read from a session log per poll
+    SHELL_POLL_INTERVAL_SECONDS: float = 0.5  # Delay between polls of a blocking command
+    SHELL_PROGRESS_EVENTS: bool = True  # Stream partial output of blocking commands to the client
+    SHELL_PROGRESS_MAX_BYTES: int = 4_000  # Tail of the output so far carried by each progress event
+    # =================================================================
+
     # LangFuse configuration
     LANGFUSE_PUBLIC_KEY: Optional[str] = None
     LANGFUSE_SECRET_KEY: Optional[str] = None
@@ -593,6 +704,12 @@ class Configuration:
                         setattr(self, key, int(env_val))
                     except ValueError:
                         logger.warning(f"Invalid value for {key}: {env_val}, using default")
+                elif expected_type == float:
+                    # Handle float conversion
+                    try:
+                        setattr(self, key, float(env_val))
+                    except ValueError:
+                        logger.warning(f"Invalid value for {key}: {env_val}, using default")
                 else:
                     # String or other type
                     setattr(self, key, env_val)
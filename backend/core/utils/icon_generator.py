@@ -5,7 +5,7 @@ import json
 import traceback
 from typing import Dict
 from core.utils.logger import logger
-from core.services.llm import make_llm_api_call
+from core.services.llm_cache import cached_llm_api_call
 
 # Lucide React icons (hardcoded for performance)
 RELEVANT_ICONS = [
@@ -162,9 +162,11 @@ Example response:
         messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_message}]
 
         logger.debug(f"Calling LLM ({model_name}) for icon and color generation.")
-        response = await make_llm_api_call(
+        response = await cached_llm_api_call(
+            "agent_icon",
             messages=messages, 
             model_name=model_name, 
+            normalize_whitespace=True,  # A title/icon pick does not depend on the prompt's formatting
             max_tokens=4000, 
             temperature=0.7,
             response_format={"type": "json_object"},
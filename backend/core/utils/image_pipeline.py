@@ -0,0 +1,206 @@
+"""
+Off-loop image loading for the vision tool.
+
+- fetch_image() downloads with httpx, streaming, and aborts as soon as the
+  body passes the size cap (no blocking requests.head/get on the event loop)
+- compress() decodes, downscales and re-encodes in a process pool. JPEGs are
+  decoded with PIL draft mode, so a 4000px photo is decoded at roughly the
+  target size instead of full resolution before the LANCZOS resize
+- compressed outputs are kept in a bounded in-memory LRU keyed by the source
+  content hash and target size, so a screenshot loaded repeatedly in a run is
+  only processed once per worker process
+
+IMAGE_PROCESS_WORKERS=0 runs the CPU work in a thread instead of a process.
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional, Tuple
+
+import httpx
+from PIL import Image
+
+from core.utils.config import config
+from core.utils.logger import logger
+
+FETCH_TIMEOUT_SECONDS = 10.0
+FETCH_HEADERS = {"User-Agent": "Mozilla/5.0"}  # Some servers block default Python
+
+
+class ImageTooLargeError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class CompressedImage:
+    data: bytes
+    mime_type: str
+    original_size: Tuple[int, int]
+    output_size: Tuple[int, int]
+
+
+async def fetch_image(url: str, max_bytes: int) -> Tuple[bytes, str]:
+    """Download an image, refusing non-image responses and bodies over max_bytes."""
+    async with httpx.AsyncClient(timeout=FETCH_TIMEOUT_SECONDS, follow_redirects=True, headers=FETCH_HEADERS) as client:
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+
+            mime_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+            if not mime_type.startswith("image/"):
+                raise Exception(f"URL does not point to an image (Content-Type: {mime_type or None}): {url}")
+
+            content_length = response.headers.get("Content-Length")
+            if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+                raise ImageTooLargeError(
+                    f"Image is too large ({int(content_length)/(1024*1024):.2f}MB) for the maximum allowed size of {max_bytes/(1024*1024):.2f}MB"
+                )
+
+            buffer = bytearray()
+            async for chunk in response.aiter_bytes():
+                buffer.extend(chunk)
+                if len(buffer) > max_bytes:
+                    raise ImageTooLargeError(
+                        f"Downloaded image exceeds the maximum allowed size of {max_bytes/(1024*1024):.2f}MB"
+                    )
+            return bytes(buffer), mime_type
+
+
+def _compress_sync(image_bytes: bytes, mime_type: str, max_width: int, max_height: int,
+                   jpeg_quality: int, png_compress_level: int) -> CompressedImage:
+    """CPU-bound decode/resize/encode. Runs in the process pool; keep it free of app imports."""
+    img = Image.open(BytesIO(image_bytes))
+    original_size = img.size
+
+    # Let the JPEG decoder downscale by a power of two while decoding
+    if img.format == "JPEG" and (img.width > max_width or img.height > max_height):
+        img.draft("RGB", (max_width, max_height))
+
+    # Convert RGBA to RGB if necessary (for JPEG)
+    if img.mode in ('RGBA', 'LA', 'P'):
+        # Create a white background
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+        img = background
+
+    # Calculate new dimensions while maintaining aspect ratio
+    width, height = img.size
+    if width > max_width or height > max_height:
+        ratio = min(max_width / width, max_height / height)
+        img = img.resize((int(width * ratio), int(height * ratio)), Image.Resampling.LANCZOS)
+
+    output = BytesIO()
+    if mime_type == 'image/gif':
+        # Keep GIFs as GIFs
+        img.save(output, format='GIF', optimize=True)
+        output_mime = 'image/gif'
+    elif mime_type == 'image/png':
+        img.save(output, format='PNG', optimize=True, compress_level=png_compress_level)
+        output_mime = 'image/png'
+    else:
+        # Convert everything else to JPEG for better compression
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.save(output, format='JPEG', quality=jpeg_quality, optimize=True)
+        output_mime = 'image/jpeg'
+
+    return CompressedImage(output.getvalue(), output_mime, original_size, img.size)
+
+
+class _CompressedCache:
+    """LRU of compressed outputs bounded by entry count and total bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, CompressedImage]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[CompressedImage]:
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: tuple, value: CompressedImage) -> None:
+        if len(value.data) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous.data)
+        self._entries[key] = value
+        self._bytes += len(value.data)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.data)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+_cache = _CompressedCache(config.IMAGE_CACHE_MAX_ENTRIES, config.IMAGE_CACHE_MAX_BYTES)
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    global _executor
+    if config.IMAGE_PROCESS_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            # forkserver: the pool is created lazily inside multithreaded worker/API
+            # processes, where fork risks deadlocked children and copies the parent's memory
+            _executor = ProcessPoolExecutor(
+                max_workers=config.IMAGE_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        return _executor
+
+
+def _reset_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def compress(image_bytes: bytes, mime_type: str, max_width: int, max_height: int,
+                   jpeg_quality: int, png_compress_level: int) -> CompressedImage:
+    """Downscale and re-encode an image off the event loop, reusing earlier results for the same bytes."""
+    key = (hashlib.sha256(image_bytes).hexdigest(), mime_type, max_width, max_height, jpeg_quality, png_compress_level)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    args = (image_bytes, mime_type, max_width, max_height, jpeg_quality, png_compress_level)
+    executor = _get_executor()
+    if executor is None:
+        result = await asyncio.to_thread(_compress_sync, *args)
+    else:
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(executor, _compress_sync, *args)
+        except BrokenProcessPool:
+            logger.warning("Image process pool broke, recreating it and processing this image in a thread")
+            _reset_executor()
+            result = await asyncio.to_thread(_compress_sync, *args)
+
+    _cache.put(key, result)
+    return result
+
+
+def get_cache_stats() -> dict:
+    return _cache.stats()
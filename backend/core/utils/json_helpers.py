@@ -5,7 +5,7 @@ These utilities help with the transition from storing JSON as strings to storing
 them as proper JSONB objects in the database.
 """
 
-import json
+from core.utils import serialization
 from typing import Any, Union, Dict, List
 
 
@@ -37,11 +37,11 @@ def ensure_dict(value: Union[str, Dict[str, Any], None], default: Dict[str, Any]
         
     if isinstance(value, str):
         try:
-            parsed = json.loads(value)
+            parsed = serialization.loads(value)
             if isinstance(parsed, dict):
                 return parsed
             return default
-        except (json.JSONDecodeError, TypeError):
+        except (serialization.JSONDecodeError, TypeError):
             return default
             
     return default
@@ -75,11 +75,11 @@ def ensure_list(value: Union[str, List[Any], None], default: List[Any] = None) -
         
     if isinstance(value, str):
         try:
-            parsed = json.loads(value)
+            parsed = serialization.loads(value)
             if isinstance(parsed, list):
                 return parsed
             return default
-        except (json.JSONDecodeError, TypeError):
+        except (serialization.JSONDecodeError, TypeError):
             return default
             
     return default
@@ -109,8 +109,8 @@ def safe_json_parse(value: Union[str, Dict, List, Any], default: Any = None) ->
     # If it's a string, try to parse it
     if isinstance(value, str):
         try:
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
+            return serialization.loads(value)
+        except (serialization.JSONDecodeError, TypeError):
             # If it's not valid JSON, return the string itself
             return value
             
@@ -134,14 +134,14 @@ def to_json_string(value: Any) -> str:
     if isinstance(value, str):
         # If it's already a string, check if it's valid JSON
         try:
-            json.loads(value)
+            serialization.loads(value)
             return value  # It's already a JSON string
-        except (json.JSONDecodeError, TypeError):
+        except (serialization.JSONDecodeError, TypeError):
             # It's a plain string, encode it as JSON
-            return json.dumps(value)
+            return serialization.dumps(value)
     
     # For all other types, convert to JSON
-    return json.dumps(value)
+    return serialization.dumps(value)
 
 
 def to_json_string_fast(value: Any) -> str:
@@ -157,7 +157,7 @@ def to_json_string_fast(value: Any) -> str:
     Returns:
         JSON string representation
     """
-    return json.dumps(value, separators=(',', ':'))  # Compact JSON, no extra whitespace
+    return serialization.dumps(value)  # Compact JSON, no extra whitespace
 
 
 def format_for_yield(message_object: Dict[str, Any]) -> Dict[str, Any]:
@@ -181,10 +181,10 @@ def format_for_yield(message_object: Dict[str, Any]) -> Dict[str, Any]:
     
     # Ensure content is a JSON string
     if 'content' in formatted and not isinstance(formatted['content'], str):
-        formatted['content'] = json.dumps(formatted['content'])
+        formatted['content'] = serialization.dumps(formatted['content'])
         
     # Ensure metadata is a JSON string
     if 'metadata' in formatted and not isinstance(formatted['metadata'], str):
-        formatted['metadata'] = json.dumps(formatted['metadata'])
+        formatted['metadata'] = serialization.dumps(formatted['metadata'])
         
     return formatted 
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Pre-fork warm-up for API and worker processes.
+
+Both the API (gunicorn --preload) and the Dramatiq workers fork their worker
+processes from a single parent. When PRELOAD_WARM_STATE is enabled, the parent
+imports the core tree and warms every process-level cache before forking, so
+the children share those pages copy-on-write instead of each paying the cost:
+- Tool classes, schemas and stateless instances (tool_discovery)
+- Static Suna config, core prompt and the minimal tool index
+- Model registry and the LiteLLM provider router
+
+After warming we call gc.freeze(): everything allocated so far is moved to the
+permanent generation, so the cyclic GC in each child never walks (and thereby
+dirties) the shared pages.
+
+Only import-time, fork-safe state is warmed here - no DB clients, Redis
+connections or event loops. Those are still created per process in lifespan /
+initialize().
+
+Usage (Dramatiq, replaces `dramatiq run_agent_background ...`):
+    uv run python -m core.utils.preload --processes 4 --threads 4 run_agent_background
+
+Relies on the fork start method (Linux default).
+"""
+
+import gc
+import importlib
+import sys
+import time
+from typing import Dict, Optional
+
+from core.utils.logger import logger
+
+_PRELOADED = False
+_PRELOAD_TIMINGS: Dict[str, float] = {}
+
+
+def _timed(step: str, fn) -> None:
+    start = time.time()
+    try:
+        fn()
+    except Exception as e:
+        logger.warning(f"Preload step '{step}' failed (non-fatal): {e}")
+    _PRELOAD_TIMINGS[step] = (time.time() - start) * 1000
+
+
+def _warm_tools() -> None:
+    from core.utils.tool_discovery import warm_up_tools_cache
+    warm_up_tools_cache()
+
+
+def _warm_suna_config() -> None:
+    from core.runtime_cache import load_static_suna_config
+    load_static_suna_config()
+
+
+def _warm_prompts() -> None:
+    from core.prompts.core_prompt import get_core_system_prompt
+    from core.tools.tool_guide_registry import get_minimal_tool_index
+    get_core_system_prompt()
+    get_minimal_tool_index()
+
+
+def _warm_models() -> None:
+    # Importing llm configures the LiteLLM provider router at module level
+    from core.ai_models import registry  # noqa: F401
+    from core.services import llm  # noqa: F401
+
+
+def preload_warm_state(entry_module: Optional[str] = None) -> Dict[str, float]:
+    """Import and warm shared state in the parent process, then freeze the GC.
+
+    Args:
+        entry_module: Optional module to import first (e.g. 'run_agent_background'),
+            so its import-time side effects also land in shared memory.
+
+    Returns:
+        Dict of step name -> milliseconds spent warming
+    """
+    global _PRELOADED
+
+    if _PRELOADED:
+        return _PRELOAD_TIMINGS
+
+    logger.info("🔥 Preloading shared state before fork...")
+    start = time.time()
+
+    if entry_module:
+        _timed(f"import:{entry_module}", lambda: importlib.import_module(entry_module))
+
+    _timed("tools", _warm_tools)
+    _timed("suna_config", _warm_suna_config)
+    _timed("prompts", _warm_prompts)
+    _timed("models", _warm_models)
+
+    gc.collect()
+    gc.freeze()
+    _PRELOADED = True
+
+    _PRELOAD_TIMINGS['total'] = (time.time() - start) * 1000
+    steps = ", ".join(f"{k}={v:.0f}ms" for k, v in _PRELOAD_TIMINGS.items())
+    logger.info(f"✅ Preload complete, {gc.get_freeze_count():,} objects frozen ({steps})")
+    return _PRELOAD_TIMINGS
+
+
+def is_preloaded() -> bool:
+    """Whether this process (or its parent before fork) ran preload_warm_state()."""
+    return _PRELOADED
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Preload the Dramatiq entry module, then hand over to the Dramatiq CLI.
+
+    Dramatiq forks worker processes from this parent; each worker's import of the
+    broker module is then a sys.modules hit on pre-warmed, frozen state.
+    """
+    from dramatiq.cli import main as dramatiq_main, make_argument_parser
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    args = make_argument_parser().parse_args(argv)
+    entry_module = args.broker.split(":", 1)[0]
+
+    preload_warm_state(entry_module)
+
+    sys.exit(dramatiq_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 import json
 import traceback
 from core.services.supabase import DBConnection
-from core.services.llm import make_llm_api_call
+from core.services.llm_cache import cached_llm_api_call
 from .logger import logger
 from .icon_generator import RELEVANT_ICONS
 
@@ -59,9 +59,11 @@ async def generate_and_update_project_name(project_id: str, prompt: str):
         messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_message}]
 
         logger.debug(f"Calling LLM ({model_name}) for project {project_id} naming and icon selection.")
-        response = await make_llm_api_call(
+        response = await cached_llm_api_call(
+            "project_name",
             messages=messages, 
             model_name=model_name, 
+            normalize_whitespace=True,  # A title/icon pick does not depend on the prompt's formatting
             max_tokens=1000, 
             temperature=0.7,
             response_format={"type": "json_object"},
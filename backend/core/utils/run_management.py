@@ -30,6 +30,15 @@ async def stop_agent_run_with_helpers(agent_run_id: str, error_message: Optional
     client = await db.client
     final_status = "failed" if error_message else "stopped"
 
+    # Drop the run from the admission queue if it was never dispatched
+    from core.services import admission_control
+    if admission_control.is_enabled():
+        try:
+            if await admission_control.cancel(agent_run_id):
+                logger.debug(f"Removed queued agent run {agent_run_id} from admission control")
+        except Exception as e:
+            logger.warning(f"Failed to cancel queued agent run {agent_run_id}: {e}")
+
     # Attempt to fetch final responses from Redis stream
     stream_key = f"agent_run:{agent_run_id}:stream"
     all_responses = []
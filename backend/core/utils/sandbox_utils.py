@@ -1,9 +1,10 @@
 """Utility functions for sandbox file operations."""
 
+import shlex
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
-from daytona_sdk import AsyncSandbox
+from typing import Dict, List, Optional, Tuple
+from daytona_sdk import AsyncSandbox, FileDownloadRequest, FileUpload
 from core.utils.logger import logger
 
 
@@ -61,3 +62,65 @@ def get_uploads_directory() -> str:
     """
     return "/workspace/uploads"
 
+
+
+async def read_files(sandbox: AsyncSandbox, paths: List[str]) -> Tuple[Dict[str, bytes], Dict[str, str]]:
+    """
+    Download several files from the sandbox in a single request.
+    
+    Args:
+        sandbox: The sandbox instance
+        paths: Absolute paths of the files to read
+        
+    Returns:
+        (contents, errors): file bytes keyed by path, and an error message for
+        every path that could not be read
+    """
+    if not paths:
+        return {}, {}
+    
+    responses = await sandbox.fs.download_files([FileDownloadRequest(source=path) for path in dict.fromkeys(paths)])
+    contents: Dict[str, bytes] = {}
+    errors: Dict[str, str] = {}
+    for response in responses:
+        if response.error or response.result is None:
+            errors[response.source] = response.error or "No data received"
+        else:
+            contents[response.source] = response.result
+    return contents, errors
+
+
+async def write_files(sandbox: AsyncSandbox, files: Dict[str, bytes]) -> None:
+    """
+    Upload several files to the sandbox in a single multipart request.
+    Existing files are overwritten and missing parent directories are created.
+    
+    Args:
+        sandbox: The sandbox instance
+        files: File contents keyed by absolute destination path
+    """
+    if not files:
+        return
+    await sandbox.fs.upload_files([FileUpload(source=content, destination=path) for path, content in files.items()])
+
+
+async def delete_files(sandbox: AsyncSandbox, paths: List[str], recursive: bool = False) -> None:
+    """
+    Delete several files from the sandbox with one command instead of a
+    delete request per file. Paths that do not exist are ignored.
+    
+    Args:
+        sandbox: The sandbox instance
+        paths: Absolute paths of the files to delete
+        recursive: Also delete directories and their contents
+        
+    Raises:
+        Exception: If the delete command fails
+    """
+    if not paths:
+        return
+    flags = "-rf" if recursive else "-f"
+    command = f"rm {flags} -- " + " ".join(shlex.quote(path) for path in dict.fromkeys(paths))
+    response = await sandbox.process.exec(command, timeout=60)
+    if response.exit_code != 0:
+        raise Exception(f"Failed to delete files: {(response.result or '').strip()}")
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Offline agent-loop benchmark.
+
+Drives ThreadManager.run_thread -> ResponseProcessor -> the worker's Redis
+publishing loop (run_agent_background.process_agent_responses) end-to-end
+with the LLM served from cassettes by core.services.llm_replay, the database
+replaced by an in-memory table store and Redis by an in-memory recorder.
+No network, provider keys, Supabase or Redis are needed, so the numbers
+isolate our own per-turn overhead.
+
+By default synthetic cassettes are generated (a turn that streams text and
+calls a native tool, then a final text turn with usage). To benchmark real
+traffic, record cassettes first with LLM_REPLAY_MODE=record and point
+--cassette-dir at them.
+
+Reports per-turn CPU time, allocations (tracemalloc), streamed responses and
+runs/sec for a single worker process.
+
+Usage:
+    uv run python -m core.utils.scripts.bench_agent_loop
+    uv run python -m core.utils.scripts.bench_agent_loop --runs 50 --chunks 400
+    uv run python -m core.utils.scripts.bench_agent_loop --speedup 1 --runs 5
+    uv run python -m core.utils.scripts.bench_agent_loop --cassette-dir llm_cassettes --json
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_MODEL = "kortix/basic"
+BENCH_TOOL_NAME = "bench_echo"
+
+
+class _Result:
+    def __init__(self, data: Any = None, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """Minimal postgrest-style query builder over in-memory rows."""
+
+    def __init__(self, store: "FakeSupabase", table: str):
+        self._store = store
+        self._table = table
+        self._op = "select"
+        self._payload: Any = None
+        self._filters: List = []
+        self._order: List = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._single = False
+        self._maybe_single = False
+
+    def select(self, *columns, **kwargs):
+        self._op = "select"
+        return self
+
+    def insert(self, payload):
+        self._op, self._payload = "insert", payload
+        return self
+
+    def upsert(self, payload, **kwargs):
+        return self.insert(payload)
+
+    def update(self, payload):
+        self._op, self._payload = "update", payload
+        return self
+
+    def delete(self):
+        self._op = "delete"
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self._filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self._filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def is_(self, column, value):
+        expected = None if value in (None, "null") else value
+        self._filters.append(lambda row: row.get(column) is expected)
+        return self
+
+    def order(self, column, desc=False, **kwargs):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def range(self, start, end):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def maybe_single(self):
+        self._maybe_single = True
+        return self
+
+    def _matching(self) -> List[Dict[str, Any]]:
+        return [r for r in self._store.tables.setdefault(self._table, []) if all(f(r) for f in self._filters)]
+
+    async def execute(self):
+        rows = self._store.tables.setdefault(self._table, [])
+
+        if self._op == "insert":
+            payloads = self._payload if isinstance(self._payload, list) else [self._payload]
+            inserted = []
+            for payload in payloads:
+                row = copy.deepcopy(payload)
+                row.setdefault("message_id", str(uuid.uuid4()))
+                row.setdefault("created_at", self._store.next_timestamp())
+                rows.append(row)
+                inserted.append(copy.deepcopy(row))
+            return _Result(inserted)
+
+        if self._op == "update":
+            matched = self._matching()
+            for row in matched:
+                row.update(copy.deepcopy(self._payload))
+            return _Result(copy.deepcopy(matched))
+
+        if self._op == "delete":
+            matched = self._matching()
+            self._store.tables[self._table] = [r for r in rows if r not in matched]
+            return _Result(matched)
+
+        matched = self._matching()
+        for column, desc in reversed(self._order):
+            matched.sort(key=lambda r: r.get(column) or "", reverse=desc)
+        matched = matched[self._offset:]
+        if self._limit is not None:
+            matched = matched[:self._limit]
+        matched = copy.deepcopy(matched)
+
+        if self._single:
+            if len(matched) != 1:
+                raise ValueError(f"single() expected 1 row from {self._table}, got {len(matched)}")
+            return _Result(matched[0])
+        if self._maybe_single:
+            return _Result(matched[0] if matched else None)
+        return _Result(matched, count=len(matched))
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self._clock = 0
+
+    def next_timestamp(self) -> str:
+        # Strictly increasing so order('created_at') is stable
+        self._clock += 1
+        return f"2025-01-01T00:00:00.{self._clock:06d}+00:00"
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    async def rpc(self, *args, **kwargs):
+        return _Result(None)
+
+
+class FakeRedis:
+    """Stands in for core.services.redis_worker inside process_agent_responses."""
+
+    def __init__(self):
+        self.published = 0
+        self.stream_entries = 0
+        self.bytes_published = 0
+
+    def is_redis_healthy(self) -> bool:
+        return True
+
+    async def publish(self, channel: str, message: str):
+        self.published += 1
+        self.bytes_published += len(message)
+        return 1
+
+    async def xadd(self, key: str, fields: Dict[str, str], maxlen: Optional[int] = None, approximate: bool = True):
+        self.stream_entries += 1
+        return f"{self.stream_entries}-0"
+
+    async def expire(self, key: str, seconds: int):
+        return True
+
+
+class _FakeTrace:
+    def span(self, *args, **kwargs):
+        return self
+
+    def end(self, *args, **kwargs):
+        return None
+
+
+def _build_bench_tool():
+    from core.agentpress.tool import Tool, ToolResult, openapi_schema
+
+    class BenchEchoTool(Tool):
+        @openapi_schema({
+            "type": "function",
+            "function": {
+                "name": BENCH_TOOL_NAME,
+                "description": "Echo the given text back (benchmark tool).",
+                "parameters": {
+                    "type": "object",
+                    "properties": {"text": {"type": "string"}},
+                    "required": ["text"],
+                },
+            },
+        })
+        async def bench_echo(self, text: str) -> ToolResult:
+            return self.success_response({"echo": text})
+
+    return BenchEchoTool
+
+
+def write_synthetic_cassettes(cassette_dir: Path, model: str, chunks: int, chunk_interval: float) -> None:
+    """Write a two-turn conversation: text + native tool call, then text + usage."""
+    import litellm
+    from litellm.types.utils import Delta, StreamingChoices, ChatCompletionDeltaToolCall, Function, Usage
+    from core.services.llm_replay import Cassette
+
+    def chunk(delta: Delta, finish_reason: Optional[str] = None, usage: Optional[Usage] = None) -> Dict[str, Any]:
+        kwargs = {"id": "chatcmpl-bench", "model": model, "choices": [StreamingChoices(index=0, delta=delta, finish_reason=finish_reason)]}
+        if usage is not None:
+            kwargs["usage"] = usage
+        return litellm.ModelResponseStream(**kwargs).model_dump()
+
+    def text_chunks(prefix: str) -> List[Dict[str, Any]]:
+        return [chunk(Delta(content=f"{prefix} token {i} ", role="assistant" if i == 0 else None)) for i in range(chunks)]
+
+    tool_turn = text_chunks("Working")
+    tool_turn.append(chunk(Delta(tool_calls=[ChatCompletionDeltaToolCall(
+        id="call_bench_1", type="function", index=0,
+        function=Function(name=BENCH_TOOL_NAME, arguments=json.dumps({"text": "hello"})),
+    )])))
+    tool_turn.append(chunk(Delta(), finish_reason="tool_calls"))
+    tool_turn.append(chunk(Delta(), usage=Usage(prompt_tokens=1200, completion_tokens=chunks * 3, total_tokens=1200 + chunks * 3)))
+
+    final_turn = text_chunks("Done")
+    final_turn.append(chunk(Delta(), finish_reason="stop"))
+    final_turn.append(chunk(Delta(), usage=Usage(prompt_tokens=1400, completion_tokens=chunks * 3, total_tokens=1400 + chunks * 3)))
+
+    for index, turn in enumerate((tool_turn, final_turn)):
+        cassette = Cassette(key=f"synthetic-{index}", model=model, stream=True, recorded_at=datetime.now(timezone.utc).isoformat())
+        cassette.chunks = [(i * chunk_interval, c) for i, c in enumerate(turn)]
+        cassette.save(cassette_dir / f"{index:04d}_synthetic.jsonl")
+
+
+@dataclass
+class TurnStats:
+    cpu_ms: float
+    wall_ms: float
+    responses: int
+
+
+@dataclass
+class RunStats:
+    cpu_ms: float
+    wall_ms: float
+    responses: int
+    alloc_peak_kb: float
+    alloc_retained_kb: float
+    status: str
+    turns: List[TurnStats] = field(default_factory=list)
+
+
+async def _run_once(model: str, fake_db: FakeSupabase, fake_redis: FakeRedis, native_max_auto_continues: int) -> RunStats:
+    import run_agent_background
+    from core.agentpress.thread_manager import ThreadManager
+    from core.agentpress.response_processor import ProcessorConfig
+
+    thread_id = str(uuid.uuid4())
+    agent_run_id = str(uuid.uuid4())
+    # No account_id on the thread, so billing and credit checks are skipped
+    fake_db.tables.setdefault("threads", []).append({"thread_id": thread_id, "account_id": None, "metadata": {}})
+    fake_db.tables.setdefault("messages", []).append({
+        "message_id": str(uuid.uuid4()), "thread_id": thread_id, "type": "user", "is_llm_message": True,
+        "content": {"role": "user", "content": "Run the benchmark tool and summarize."},
+        "metadata": {}, "created_at": fake_db.next_timestamp(),
+    })
+
+    thread_manager = ThreadManager(thread_id=thread_id)
+    thread_manager.add_tool(_build_bench_tool())
+
+    agent_gen = await thread_manager.run_thread(
+        thread_id=thread_id,
+        system_prompt={"role": "system", "content": "You are a benchmark agent."},
+        stream=True,
+        llm_model=model,
+        processor_config=ProcessorConfig(xml_tool_calling=False, native_tool_calling=True, execute_tools=True, execute_on_stream=True),
+        native_max_auto_continues=native_max_auto_continues,
+    )
+
+    turns: List[TurnStats] = []
+    turn_cpu = time.process_time()
+    turn_wall = time.perf_counter()
+    turn_responses = 0
+
+    async def timed_gen():
+        nonlocal turn_cpu, turn_wall, turn_responses
+        async for response in agent_gen:
+            turn_responses += 1
+            yield response
+            if response.get("type") == "status":
+                try:
+                    content = json.loads(response.get("content") or "{}")
+                except (TypeError, json.JSONDecodeError):
+                    content = {}
+                if content.get("status_type") == "finish" or content.get("finish_reason"):
+                    turns.append(TurnStats(
+                        cpu_ms=(time.process_time() - turn_cpu) * 1000,
+                        wall_ms=(time.perf_counter() - turn_wall) * 1000,
+                        responses=turn_responses,
+                    ))
+                    turn_cpu, turn_wall, turn_responses = time.process_time(), time.perf_counter(), 0
+
+    redis_keys = run_agent_background.create_redis_keys(agent_run_id, "bench")
+    tracemalloc.reset_peak()
+    before_bytes = tracemalloc.get_traced_memory()[0]
+    start_cpu, start_wall = time.process_time(), time.perf_counter()
+
+    final_status, error_message, _, total_responses = await run_agent_background.process_agent_responses(
+        timed_gen(), agent_run_id, redis_keys, _FakeTrace(), start_wall, {}
+    )
+    cpu_ms = (time.process_time() - start_cpu) * 1000
+    wall_ms = (time.perf_counter() - start_wall) * 1000
+    current, peak = tracemalloc.get_traced_memory()
+    await thread_manager.cleanup()
+
+    if error_message:
+        raise RuntimeError(f"Benchmark run failed: {error_message}")
+
+    return RunStats(
+        cpu_ms=cpu_ms,
+        wall_ms=wall_ms,
+        responses=total_responses,
+        alloc_peak_kb=(peak - before_bytes) / 1024,
+        alloc_retained_kb=(current - before_bytes) / 1024,
+        status=final_status,
+        turns=turns,
+    )
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    import run_agent_background
+    from core.services.supabase import DBConnection
+    from core.services import llm_replay
+
+    cassette_dir = Path(args.cassette_dir) if args.cassette_dir else Path(tempfile.mkdtemp(prefix="bench_cassettes_"))
+    if not args.cassette_dir:
+        write_synthetic_cassettes(cassette_dir, args.model, args.chunks, args.chunk_interval)
+
+    llm_replay.set_replay_provider(llm_replay.ReplayProvider(
+        str(cassette_dir), mode="replay", speedup=args.speedup, match="sequence", loop=True,
+    ))
+
+    fake_db = FakeSupabase()
+    db = DBConnection()
+    db._client, db._initialized = fake_db, True
+
+    fake_redis = FakeRedis()
+    run_agent_background.redis = fake_redis
+
+    tracemalloc.start()
+    # One warm-up run so lazy imports and caches don't count against run 1
+    await _run_once(args.model, fake_db, fake_redis, args.max_auto_continues)
+
+    runs: List[RunStats] = []
+    bench_start = time.perf_counter()
+    for _ in range(args.runs):
+        runs.append(await _run_once(args.model, fake_db, fake_redis, args.max_auto_continues))
+    elapsed = time.perf_counter() - bench_start
+    tracemalloc.stop()
+
+    turn_cpu = [t.cpu_ms for r in runs for t in r.turns]
+    return {
+        "runs": args.runs,
+        "speedup": args.speedup,
+        "cassette_dir": str(cassette_dir),
+        "runs_per_sec": args.runs / elapsed if elapsed else 0.0,
+        "run_wall_ms_p50": statistics.median(r.wall_ms for r in runs),
+        "run_cpu_ms_p50": statistics.median(r.cpu_ms for r in runs),
+        "turn_cpu_ms_p50": statistics.median(turn_cpu) if turn_cpu else 0.0,
+        "turn_cpu_ms_max": max(turn_cpu) if turn_cpu else 0.0,
+        "turns_per_run": statistics.mean(len(r.turns) for r in runs),
+        "responses_per_run": statistics.mean(r.responses for r in runs),
+        "alloc_peak_kb_p50": statistics.median(r.alloc_peak_kb for r in runs),
+        "alloc_retained_kb_p50": statistics.median(r.alloc_retained_kb for r in runs),
+        "redis_publishes": fake_redis.published,
+        "redis_bytes_published": fake_redis.bytes_published,
+        "per_run": [asdict(r) for r in runs],
+    }
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"\n=== Agent loop benchmark: {result['runs']} runs (speedup={result['speedup']}) ===")
+    print(f"  runs/sec (1 worker):   {result['runs_per_sec']:>10.2f}")
+    print(f"  run wall p50:          {result['run_wall_ms_p50']:>10.1f} ms")
+    print(f"  run CPU p50:           {result['run_cpu_ms_p50']:>10.1f} ms")
+    print(f"  turn CPU p50 / max:    {result['turn_cpu_ms_p50']:>10.1f} / {result['turn_cpu_ms_max']:.1f} ms")
+    print(f"  turns per run:         {result['turns_per_run']:>10.1f}")
+    print(f"  responses per run:     {result['responses_per_run']:>10.1f}")
+    print(f"  alloc peak p50:        {result['alloc_peak_kb_p50']:>10.1f} KiB")
+    print(f"  alloc retained p50:    {result['alloc_retained_kb_p50']:>10.1f} KiB")
+    print(f"  redis publishes:       {result['redis_publishes']:>10} ({result['redis_bytes_published'] / 1024:.1f} KiB)")
+    print(f"  cassettes:             {result['cassette_dir']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the agent loop offline against replayed LLM cassettes")
+    parser.add_argument("--runs", type=int, default=20, help="Measured runs (after one warm-up run)")
+    parser.add_argument("--chunks", type=int, default=200, help="Text chunks per synthetic turn")
+    parser.add_argument("--chunk-interval", type=float, default=0.01, help="Seconds between synthetic chunks at speedup=1")
+    parser.add_argument("--speedup", type=float, default=0, help="Replay speed multiplier (0 = no delays)")
+    parser.add_argument("--cassette-dir", default=None, help="Replay recorded cassettes instead of synthetic ones")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Model name passed to run_thread")
+    parser.add_argument("--max-auto-continues", type=int, default=5, help="native_max_auto_continues for run_thread")
+    parser.add_argument("--verbose", action="store_true", help="Keep application logging enabled")
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable JSON")
+    args = parser.parse_args()
+
+    # Must be set before core modules are imported (logger and config read them at import)
+    os.environ["DEBUG_SAVE_LLM_IO"] = "false"
+    if not args.verbose:
+        os.environ["LOGGING_LEVEL"] = "ERROR"
+        logging.disable(logging.ERROR)
+
+    result = asyncio.run(run_benchmark(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
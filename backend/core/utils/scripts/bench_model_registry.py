@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for model registry lookups on the LLM call / billing hot path.
+
+Every LLM call goes through ModelManager.resolve_model_id and
+get_litellm_params, and every billing deduction through calculate_token_cost
+(which resolves the Bedrock ARN back to a registry model). These should be
+plain dict lookups; this script times them and, with --check, fails if any
+exceeds its per-call budget.
+
+Usage:
+    uv run python -m core.utils.scripts.bench_model_registry
+    uv run python -m core.utils.scripts.bench_model_registry --iterations 200000 --json
+    uv run python -m core.utils.scripts.bench_model_registry --check
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+# Per-call budgets in microseconds. Generous for CI noise: a dict lookup is
+# well under 1us, a params copy a few us.
+BUDGETS_US: Dict[str, float] = {
+    "resolve_model_id(alias)": 2.0,
+    "resolve_model_id(litellm_arn)": 2.0,
+    "resolve_from_litellm_id(prefixed_arn)": 2.0,
+    "get_litellm_model_id(registry_id)": 2.0,
+    "get_litellm_params(registry_id)": 15.0,
+    "get_pricing(litellm_arn)": 3.0,
+    "calculate_token_cost(litellm_arn)": 60.0,
+}
+
+
+def _cases() -> List[Tuple[str, Callable[[], object]]]:
+    from core.ai_models import model_manager, registry
+    from core.ai_models.registry import FREE_MODEL_ID, PREMIUM_MODEL_ID
+    from core.billing.credits.calculator import calculate_token_cost
+
+    basic_litellm_id = registry.get_litellm_model_id(FREE_MODEL_ID)
+    prefixed = basic_litellm_id if basic_litellm_id.startswith("bedrock/") else f"bedrock/{basic_litellm_id}"
+    alias = registry.get_aliases(PREMIUM_MODEL_ID)[0]
+    messages = [{"role": "user", "content": "hi"}]
+
+    return [
+        ("resolve_model_id(alias)", lambda: model_manager.resolve_model_id(alias)),
+        ("resolve_model_id(litellm_arn)", lambda: model_manager.resolve_model_id(basic_litellm_id)),
+        ("resolve_from_litellm_id(prefixed_arn)", lambda: registry.resolve_from_litellm_id(prefixed)),
+        ("get_litellm_model_id(registry_id)", lambda: registry.get_litellm_model_id(PREMIUM_MODEL_ID)),
+        ("get_litellm_params(registry_id)", lambda: model_manager.get_litellm_params(
+            PREMIUM_MODEL_ID, messages=messages, temperature=0, stream=True, extra_headers={"x-test": "1"})),
+        ("get_pricing(litellm_arn)", lambda: registry.get_pricing(basic_litellm_id)),
+        ("calculate_token_cost(litellm_arn)", lambda: calculate_token_cost(1000, 200, basic_litellm_id)),
+    ]
+
+
+def run(iterations: int, repeat: int) -> Dict[str, float]:
+    """Best-of-`repeat` per-call time in microseconds for each case."""
+    results = {}
+    for name, fn in _cases():
+        fn()
+        best = min(timeit.repeat(fn, number=iterations, repeat=repeat))
+        results[name] = best / iterations * 1_000_000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model registry lookups")
+    parser.add_argument("--iterations", type=int, default=50_000, help="Calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per case (best is reported)")
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable JSON")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero if a case exceeds its budget")
+    args = parser.parse_args()
+
+    # Logging inside the measured calls (e.g. cost calc debug lines) is not what we're measuring
+    os.environ.setdefault("LOGGING_LEVEL", "WARNING")
+    logging.disable(logging.WARNING)
+
+    results = run(args.iterations, args.repeat)
+
+    if args.json:
+        print(json.dumps({name: round(us, 3) for name, us in results.items()}, indent=2))
+    else:
+        print(f"\n=== Model registry hot path ({args.iterations:,} calls x {args.repeat}) ===")
+        print(f"  {'us/call':>9}  {'budget':>7}  case")
+        for name, us in results.items():
+            print(f"  {us:>9.3f}  {BUDGETS_US.get(name, float('inf')):>7.1f}  {name}")
+
+    if args.check:
+        violations = [f"{name}: {us:.3f}us (budget {BUDGETS_US[name]}us)"
+                      for name, us in results.items() if name in BUDGETS_US and us > BUDGETS_US[name]]
+        if violations:
+            print("\n❌ Model registry lookups over budget:", file=sys.stderr)
+            for v in violations:
+                print(f"  - {v}", file=sys.stderr)
+            sys.exit(1)
+        print("\n✅ Model registry lookups within budget", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Per-chunk serialization cost on the streaming hot path, before and after
+core.utils.serialization.
+
+Every streamed response is serialized once in the worker
+(process_agent_responses -> Redis pubsub/stream) and inspected once in the API
+(stream_agent_run) to detect terminal statuses. Catch-up entries used to be
+parsed and re-serialized before being relayed. This script times both paths
+on representative chunks:
+
+- before: stdlib json.dumps in the worker, json.loads of every pubsub message,
+          json.loads + json.dumps of every catch-up entry
+- after:  serialization.dumps in the worker, parse only possible status
+          messages, relay catch-up entries as-is
+
+Usage:
+    uv run python -m core.utils.scripts.bench_serialization
+    uv run python -m core.utils.scripts.bench_serialization --iterations 50000 --json
+"""
+
+import argparse
+import json
+import logging
+import os
+import timeit
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def _chunks() -> Dict[str, Dict[str, Any]]:
+    now = datetime.now(timezone.utc).isoformat()
+    thread_id = str(uuid.uuid4())
+    tool_output = "\n".join(f"{i:>6}  drwxr-xr-x  user  staff  4096  {now}  file_{i}.py" for i in range(400))
+    return {
+        "assistant_text_chunk": {
+            "sequence": 412, "message_id": None, "thread_id": thread_id, "type": "assistant",
+            "is_llm_message": True,
+            "content": json.dumps({"role": "assistant", "content": "Let me check the files in the project "}),
+            "metadata": json.dumps({"stream_status": "chunk", "thread_run_id": str(uuid.uuid4())}),
+            "created_at": now, "updated_at": now,
+        },
+        "tool_status": {
+            "message_id": str(uuid.uuid4()), "thread_id": thread_id, "type": "status", "is_llm_message": False,
+            "content": json.dumps({"role": "assistant", "status_type": "tool_completed", "function_name": "execute_command",
+                                   "xml_tag_name": "execute-command", "tool_index": 3}),
+            "metadata": json.dumps({"thread_run_id": str(uuid.uuid4()), "linked_tool_result_message_id": str(uuid.uuid4())}),
+            "created_at": now, "updated_at": now,
+        },
+        "tool_result_30kb": {
+            "message_id": str(uuid.uuid4()), "thread_id": thread_id, "type": "tool", "is_llm_message": True,
+            "content": json.dumps({"role": "user", "content": tool_output}),
+            "metadata": json.dumps({"function_name": "execute_command",
+                                    "result": {"success": True, "output": tool_output, "error": None}}),
+            "created_at": now, "updated_at": now,
+        },
+    }
+
+
+def _before(chunk: Dict[str, Any]) -> Tuple[Callable[[], Any], Callable[[], Any]]:
+    encoded = json.dumps(chunk)
+
+    def live():
+        data = json.dumps(chunk)
+        try:
+            response = json.loads(data)
+            response.get('type') == 'status' and response.get('status') in ['completed', 'failed', 'stopped', 'error']
+        except json.JSONDecodeError:
+            pass
+
+    def catch_up():
+        response = json.loads(encoded)
+        f"data: {json.dumps(response)}\n\n"
+        response.get('type') == 'status' and response.get('status') in ['completed', 'failed', 'stopped', 'error']
+
+    return live, catch_up
+
+
+def _after(chunk: Dict[str, Any]) -> Tuple[Callable[[], Any], Callable[[], Any]]:
+    from core.agent_runs import _terminal_status
+    from core.utils import serialization
+
+    encoded = serialization.dumps(chunk)
+
+    def live():
+        _terminal_status(serialization.dumps(chunk))
+
+    def catch_up():
+        f"data: {encoded}\n\n"
+        _terminal_status(encoded)
+
+    return live, catch_up
+
+
+def _cases() -> List[Tuple[str, Callable[[], Any]]]:
+    cases = []
+    for name, chunk in _chunks().items():
+        before_live, before_catch_up = _before(chunk)
+        after_live, after_catch_up = _after(chunk)
+        cases += [
+            (f"{name}/live/before", before_live),
+            (f"{name}/live/after", after_live),
+            (f"{name}/catch_up/before", before_catch_up),
+            (f"{name}/catch_up/after", after_catch_up),
+        ]
+    return cases
+
+
+def run(iterations: int, repeat: int) -> Dict[str, float]:
+    """Best-of-`repeat` per-chunk time in microseconds for each case."""
+    results = {}
+    for name, fn in _cases():
+        fn()
+        number = max(1, iterations // 20) if "30kb" in name else iterations
+        best = min(timeit.repeat(fn, number=number, repeat=repeat))
+        results[name] = best / number * 1_000_000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-chunk stream serialization")
+    parser.add_argument("--iterations", type=int, default=20_000, help="Chunks per timing run (1/20th for the 30KB chunk)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per case (best is reported)")
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable JSON")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOGGING_LEVEL", "WARNING")
+    logging.disable(logging.WARNING)
+
+    from core.utils import serialization
+    results = run(args.iterations, args.repeat)
+
+    if args.json:
+        print(json.dumps({"orjson": serialization.USING_ORJSON,
+                          "us_per_chunk": {name: round(us, 3) for name, us in results.items()}}, indent=2))
+        return
+
+    backend = "orjson" if serialization.USING_ORJSON else "stdlib fallback"
+    print(f"\n=== Stream serialization per chunk ({backend}, {args.iterations:,} chunks x {args.repeat}) ===")
+    print(f"  {'before us':>10}  {'after us':>9}  {'speedup':>7}  case")
+    for name in dict.fromkeys(name.rsplit("/", 1)[0] for name in results):
+        before, after = results[f"{name}/before"], results[f"{name}/after"]
+        print(f"  {before:>10.2f}  {after:>9.2f}  {before / after:>6.1f}x  {name}")
+
+
+if __name__ == "__main__":
+    main()
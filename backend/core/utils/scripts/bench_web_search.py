@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the web search / scrape pipeline.
+
+Drives core.services.web_search the way SandboxWebSearchTool does (batches of
+queries and URLs through fan_out, search and scrape) with the stub provider
+(WEB_PROVIDER_MODE=stub) and Redis replaced by an in-memory store, so no
+network, API keys or Redis are needed. Queries and URLs are drawn from a
+fixed pool with a skewed (Zipf-like) popularity, as repeated research topics
+are across runs and users.
+
+Reports batch wall time, provider calls and cache hit rates; compare with
+--no-cache to see what the cache saves and with --concurrency / --per-domain
+to see the effect of the fan-out and politeness limits. Scrapes are not cached
+unless --cache-scrapes is given (WEB_CACHE_SCRAPES).
+
+Usage:
+    uv run python -m core.utils.scripts.bench_web_search
+    uv run python -m core.utils.scripts.bench_web_search --rounds 50 --latency 0.2
+    uv run python -m core.utils.scripts.bench_web_search --no-cache --json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class FakeCacheRedis:
+    """Stands in for core.services.redis inside core.services.web_search (expiry is ignored)."""
+
+    def __init__(self, disabled: bool = False):
+        self.disabled = disabled
+        self.values: Dict[str, str] = {}
+        self.index: Dict[str, float] = {}
+
+    async def get_client(self):
+        return self
+
+    async def get(self, key: str, default: Optional[str] = None):
+        if self.disabled:
+            return default
+        return self.values.get(key, default)
+
+    async def set(self, key: str, value: str, ex: Optional[int] = None, nx: bool = False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self.values.pop(key, None)
+        return len(keys)
+
+    async def zadd(self, key: str, mapping: Dict[str, float]):
+        self.index.update(mapping)
+        return len(mapping)
+
+    async def zcard(self, key: str):
+        return len(self.index)
+
+    async def zpopmin(self, key: str, count: int = 1):
+        popped = sorted(self.index.items(), key=lambda item: item[1])[:count]
+        for member, _ in popped:
+            del self.index[member]
+        return popped
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis: FakeCacheRedis):
+        self.redis = redis
+        self.calls: List[Tuple[str, tuple, dict]] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+        return record
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+def _zipf_choices(rng: random.Random, pool: List[str], k: int) -> List[str]:
+    weights = [1 / (i + 1) for i in range(len(pool))]
+    return rng.choices(pool, weights=weights, k=k)
+
+
+def _p(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    from core.services import web_search
+    from core.utils.config import config
+
+    config.WEB_PROVIDER_MODE = "stub"
+    config.WEB_STUB_LATENCY_SECONDS = args.latency
+    config.WEB_FANOUT_CONCURRENCY = args.concurrency
+    config.WEB_SCRAPE_PER_DOMAIN_CONCURRENCY = args.per_domain
+    config.WEB_SCRAPE_DOMAIN_INTERVAL_SECONDS = args.domain_interval
+    config.WEB_CACHE_SCRAPES = args.cache_scrapes
+    web_search.redis = FakeCacheRedis(disabled=args.no_cache)
+
+    rng = random.Random(args.seed)
+    queries = [f"research topic {i} latest developments" for i in range(args.distinct)]
+    urls = [f"https://site{i % args.domains}.example.com/article/{i}" for i in range(args.distinct)]
+
+    search_ms: List[float] = []
+    scrape_ms: List[float] = []
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        batch = _zipf_choices(rng, queries, args.batch)
+        t0 = time.perf_counter()
+        await web_search.fan_out(batch, lambda q: web_search.search(q, 5))
+        search_ms.append((time.perf_counter() - t0) * 1000)
+
+        batch = _zipf_choices(rng, urls, args.batch)
+        t0 = time.perf_counter()
+        await web_search.fan_out(batch, lambda url: web_search.scrape(url, ["markdown"]))
+        scrape_ms.append((time.perf_counter() - t0) * 1000)
+    total = time.perf_counter() - start
+
+    stats = web_search.get_stats()
+    lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+    return {
+        "rounds": args.rounds,
+        "batch": args.batch,
+        "cache": not args.no_cache,
+        "cache_scrapes": args.cache_scrapes,
+        "latency_s": args.latency,
+        "concurrency": args.concurrency,
+        "per_domain": args.per_domain,
+        "total_s": round(total, 3),
+        "search_batch_ms_p50": round(statistics.median(search_ms), 1),
+        "search_batch_ms_p95": round(_p(search_ms, 0.95), 1),
+        "scrape_batch_ms_p50": round(statistics.median(scrape_ms), 1),
+        "scrape_batch_ms_p95": round(_p(scrape_ms, 0.95), 1),
+        "lookups": lookups,
+        "provider_calls": stats["provider_calls"],
+        "hit_rate": round(stats["hits"] / lookups, 3) if lookups else 0.0,
+        "cached_entries": len(web_search.redis.values),
+    }
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"\n=== Web search benchmark: {result['rounds']} rounds x {result['batch']} "
+          f"(cache={'on' if result['cache'] else 'off'}, scrapes cached={'yes' if result['cache_scrapes'] else 'no'}, "
+          f"latency={result['latency_s']}s) ===")
+    print(f"  total:                 {result['total_s']:>10.2f} s")
+    print(f"  search batch p50/p95:  {result['search_batch_ms_p50']:>10.1f} / {result['search_batch_ms_p95']:.1f} ms")
+    print(f"  scrape batch p50/p95:  {result['scrape_batch_ms_p50']:>10.1f} / {result['scrape_batch_ms_p95']:.1f} ms")
+    print(f"  lookups:               {result['lookups']:>10}")
+    print(f"  provider calls:        {result['provider_calls']:>10}")
+    print(f"  cache hit rate:        {result['hit_rate']:>10.1%}")
+    print(f"  cached entries:        {result['cached_entries']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the web search/scrape pipeline offline against the stub provider")
+    parser.add_argument("--rounds", type=int, default=20, help="Search + scrape batches to run")
+    parser.add_argument("--batch", type=int, default=8, help="Queries / URLs per batch")
+    parser.add_argument("--distinct", type=int, default=60, help="Size of the query and URL pools")
+    parser.add_argument("--domains", type=int, default=5, help="Distinct domains the URL pool is spread over")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub provider latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=8, help="WEB_FANOUT_CONCURRENCY")
+    parser.add_argument("--per-domain", type=int, default=2, help="WEB_SCRAPE_PER_DOMAIN_CONCURRENCY")
+    parser.add_argument("--domain-interval", type=float, default=0.0, help="WEB_SCRAPE_DOMAIN_INTERVAL_SECONDS")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the cache (every lookup is a miss)")
+    parser.add_argument("--cache-scrapes", action="store_true", help="WEB_CACHE_SCRAPES (cache page scrapes too)")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for the query/URL draw")
+    parser.add_argument("--verbose", action="store_true", help="Keep application logging enabled")
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable JSON")
+    args = parser.parse_args()
+
+    # Must be set before core modules are imported (logger and config read them at import)
+    if not args.verbose:
+        os.environ["LOGGING_LEVEL"] = "ERROR"
+        logging.disable(logging.ERROR)
+
+    result = asyncio.run(run_benchmark(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
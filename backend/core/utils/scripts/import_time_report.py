@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the backend entry points.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for each
+entry point and reports where cold start time goes, so import regressions in
+the core tree (tools, prompts, litellm, ...) show up before they hit autoscaling.
+
+With --check the script also enforces the import budget: it exits non-zero if an
+entry point exceeds its time budget or eagerly imports a dependency that must
+stay behind a lazy import boundary.
+
+Usage:
+    uv run python -m core.utils.scripts.import_time_report
+    uv run python -m core.utils.scripts.import_time_report api --top 40
+    uv run python -m core.utils.scripts.import_time_report run_agent_background --json
+    uv run python -m core.utils.scripts.import_time_report --check
+    uv run python -m core.utils.scripts.import_time_report --check --budget api=10000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parents[3]
+
+DEFAULT_ENTRY_POINTS = ["api", "run_agent_background"]
+
+# Wall-clock import budgets (ms). Generous enough for CI noise; tighten as
+# lazy boundaries land.
+IMPORT_BUDGETS_MS: Dict[str, float] = {
+    "api": 15000,
+    "run_agent_background": 7000,
+}
+
+# Packages an entry point must not import at module load. Tool modules are
+# loaded by ToolManager / the JIT loader on registration, and these SDKs only
+# by the code paths that need them.
+FORBIDDEN_IMPORTS: Dict[str, List[str]] = {
+    "run_agent_background": [
+        "stripe",
+        "composio_client",
+        "PyPDF2",
+        "docx",
+        "anthropic",
+        "boto3",
+        "daytona_sdk",
+        "core.tools.sb_files_tool",
+        "core.tools.sb_presentation_tool",
+        "core.tools.browser_tool",
+    ],
+    "api": [
+        "PyPDF2",
+        "docx",
+        "anthropic",
+        "boto3",
+    ],
+}
+
+
+@dataclass
+class ModuleImport:
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportReport:
+    entry_point: str
+    total_us: int
+    modules: List[ModuleImport]
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_us / 1000
+
+    def top_modules(self, n: int) -> List[ModuleImport]:
+        """Slowest modules by self time (excluding their children)."""
+        return sorted(self.modules, key=lambda m: m.self_us, reverse=True)[:n]
+
+    def imported(self, package: str) -> bool:
+        return any(m.name == package or m.name.startswith(package + ".") for m in self.modules)
+
+    def by_package(self) -> Dict[str, int]:
+        """Self time summed per top-level package (core.* split one level deeper)."""
+        totals: Dict[str, int] = defaultdict(int)
+        for m in self.modules:
+            parts = m.name.split(".")
+            key = ".".join(parts[:2]) if parts[0] == "core" and len(parts) > 1 else parts[0]
+            totals[key] += m.self_us
+        return dict(sorted(totals.items(), key=lambda kv: kv[1], reverse=True))
+
+
+def parse_importtime(stderr: str) -> List[ModuleImport]:
+    """Parse the `-X importtime` table written to stderr."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        self_us, cumulative_us, name = fields
+        if not self_us.strip().isdigit():
+            # Header row
+            continue
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped)) // 2
+        modules.append(ModuleImport(
+            name=stripped.strip(),
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us),
+            depth=depth,
+        ))
+    return modules
+
+
+def measure_entry_point(module: str) -> ImportReport:
+    """Import `module` in a fresh interpreter and collect per-module import cost."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BACKEND_DIR), env.get("PYTHONPATH")]))
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    modules = parse_importtime(result.stderr)
+    if result.returncode != 0:
+        tail = "\n".join(l for l in result.stderr.splitlines() if not l.startswith("import time:"))[-2000:]
+        raise RuntimeError(f"Importing {module} failed:\n{tail}")
+
+    top_level = next((m for m in reversed(modules) if m.name == module), None)
+    total_us = top_level.cumulative_us if top_level else sum(m.self_us for m in modules)
+    return ImportReport(entry_point=module, total_us=total_us, modules=modules)
+
+
+def print_report(report: ImportReport, top: int) -> None:
+    print(f"\n=== {report.entry_point}: {report.total_ms:,.0f}ms total, {len(report.modules)} modules ===")
+
+    print(f"\nTop {top} modules by self time:")
+    print(f"  {'self ms':>9}  {'cum ms':>9}  module")
+    for m in report.top_modules(top):
+        print(f"  {m.self_us / 1000:>9.1f}  {m.cumulative_us / 1000:>9.1f}  {m.name}")
+
+    print(f"\nTop {top} packages by self time:")
+    for package, self_us in list(report.by_package().items())[:top]:
+        share = (self_us / report.total_us * 100) if report.total_us else 0
+        print(f"  {self_us / 1000:>9.1f}  {share:>5.1f}%  {package}")
+
+
+def check_budget(report: ImportReport, budget_ms: float) -> List[str]:
+    """Return budget violations for a report (empty list if within budget)."""
+    violations = []
+    if report.total_ms > budget_ms:
+        violations.append(f"{report.entry_point}: import took {report.total_ms:,.0f}ms (budget {budget_ms:,.0f}ms)")
+    for package in FORBIDDEN_IMPORTS.get(report.entry_point, []):
+        if report.imported(package):
+            violations.append(f"{report.entry_point}: eagerly imports '{package}' (must be lazy)")
+    return violations
+
+
+def _parse_budgets(values: List[str]) -> Dict[str, float]:
+    budgets = dict(IMPORT_BUDGETS_MS)
+    for value in values:
+        name, _, ms = value.partition("=")
+        budgets[name] = float(ms)
+    return budgets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report per-module import cost for backend entry points")
+    parser.add_argument("entry_points", nargs="*", default=DEFAULT_ENTRY_POINTS,
+                        help="Modules to import (default: api run_agent_background)")
+    parser.add_argument("--top", type=int, default=25, help="Number of offenders to list")
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable JSON")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero if an import budget is exceeded")
+    parser.add_argument("--budget", action="append", default=[], metavar="ENTRY=MS",
+                        help="Override the time budget for an entry point")
+    args = parser.parse_args()
+
+    reports = [measure_entry_point(ep) for ep in args.entry_points]
+    budgets = _parse_budgets(args.budget)
+
+    if args.json:
+        print(json.dumps([
+            {
+                "entry_point": r.entry_point,
+                "total_ms": r.total_ms,
+                "top_modules": [asdict(m) for m in r.top_modules(args.top)],
+                "packages_us": dict(list(r.by_package().items())[:args.top]),
+            }
+            for r in reports
+        ], indent=2))
+    else:
+        for r in reports:
+            print_report(r, args.top)
+
+    if args.check:
+        violations = []
+        for r in reports:
+            violations.extend(check_budget(r, budgets.get(r.entry_point, float("inf"))))
+        if violations:
+            print("\n❌ Import budget exceeded:", file=sys.stderr)
+            for v in violations:
+                print(f"  - {v}", file=sys.stderr)
+            sys.exit(1)
+        print("\n✅ All entry points within import budget", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Central JSON serialization for the streaming hot path, caches and message storage.
+
+Uses orjson when it is installed and falls back to the stdlib json module
+otherwise. Both paths produce compact JSON (no spaces after separators) and
+handle the types that show up in agent responses and cached rows:
+
+- datetime/date/time -> ISO 8601 string
+- UUID -> string
+- Decimal -> float
+- set/frozenset -> list
+- Pydantic models -> model_dump(), dataclasses -> dict
+
+orjson keeps non-ASCII characters as UTF-8. The stdlib encoder escapes them
+(\\uXXXX), so strings orjson cannot encode, such as lone surrogates, still
+serialize. Values orjson cannot encode (integers beyond 64 bits, non-string
+dict keys) are retried with the stdlib encoder, so dumps() never fails where
+json.dumps(..., default=...) would have succeeded.
+
+loads() retries anything orjson refuses to parse with the stdlib decoder,
+which reads everything the stdlib encoder writes (lone surrogate escapes,
+NaN/Infinity). Decode errors are raised as JSONDecodeError
+(json.JSONDecodeError, a ValueError) on both paths.
+"""
+import dataclasses
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Optional, Union
+from uuid import UUID
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is a declared dependency
+    orjson = None
+
+JSONDecodeError = json.JSONDecodeError
+USING_ORJSON = orjson is not None
+
+_STDLIB_SEPARATORS = (",", ":")
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _with_fallback(fallback: Optional[Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    if fallback is None:
+        return _default
+
+    def default(obj: Any) -> Any:
+        try:
+            return _default(obj)
+        except TypeError:
+            return fallback(obj)
+    return default
+
+
+def _stdlib_dumps(obj: Any, default: Callable[[Any], Any] = _default) -> str:
+    # ensure_ascii: lone surrogates (which orjson rejects) become \ud83d escapes
+    # instead of text that cannot be encoded as UTF-8
+    return json.dumps(obj, default=default, separators=_STDLIB_SEPARATORS, ensure_ascii=True)
+
+
+if USING_ORJSON:
+    def dumps_bytes(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        """Serialize to UTF-8 encoded JSON bytes. `default` handles types not listed above."""
+        encode = _with_fallback(default)
+        try:
+            return orjson.dumps(obj, default=encode)
+        except TypeError:
+            return _stdlib_dumps(obj, encode).encode("utf-8")
+
+    def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+        """Serialize to a JSON string. `default` handles types not listed above."""
+        encode = _with_fallback(default)
+        try:
+            return orjson.dumps(obj, default=encode).decode("utf-8")
+        except TypeError:
+            return _stdlib_dumps(obj, encode)
+
+    def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        """Parse JSON from str or bytes."""
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError as e:
+            # The stdlib reads what orjson refuses but the stdlib encoder writes:
+            # lone surrogate escapes (\ud83d) and NaN/Infinity
+            try:
+                return json.loads(bytes(data) if isinstance(data, (bytearray, memoryview)) else data)
+            except ValueError:
+                raise e
+else:
+    def dumps_bytes(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        """Serialize to UTF-8 encoded JSON bytes. `default` handles types not listed above."""
+        return _stdlib_dumps(obj, _with_fallback(default)).encode("utf-8")
+
+    def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+        """Serialize to a JSON string. `default` handles types not listed above."""
+        return _stdlib_dumps(obj, _with_fallback(default))
+
+    def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        """Parse JSON from str or bytes."""
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data)
@@ -0,0 +1,193 @@
+"""
+Per-run ownership of asyncio tasks and pubsub connections.
+
+A background agent run spawns a stop-signal checker, Redis publish/xadd
+tasks, DB saves, tool executions and enrichment tasks, and opens a control
+pubsub. Anything that outlives the run accumulates on a long-lived worker, so
+every run gets a RunTaskSupervisor:
+
+- spawn() creates a task owned by the current run (the supervisor travels in
+  a ContextVar, so code deep in ResponseProcessor/AgentRunner needs no
+  plumbing; outside a run it falls back to asyncio.create_task)
+- adopt()/release() track resources such as pubsubs that must be closed
+- aclose() waits for drain tasks (publishes, DB saves) up to a timeout,
+  cancels the rest, awaits them, closes unreleased resources and reports
+  whatever is still alive as leaked
+
+Live counts per run are published to Redis by start_task_count_reporter()
+(worker_tasks:{instance_id}) and shown by worker_health.py.
+"""
+import asyncio
+import json
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional, Set
+
+from core.utils.logger import logger
+
+TASK_COUNTS_KEY_PREFIX = "worker_tasks"
+REPORT_INTERVAL_SECONDS = 15
+REPORT_TTL_SECONDS = 60
+DRAIN_TIMEOUT_SECONDS = 30.0
+CANCEL_TIMEOUT_SECONDS = 5.0
+
+_current: ContextVar[Optional["RunTaskSupervisor"]] = ContextVar("run_task_supervisor", default=None)
+_live: Dict[str, "RunTaskSupervisor"] = {}
+_leaked_tasks: Set[asyncio.Task] = set()
+_leaked_total = 0
+_unreleased_total = 0
+
+
+class RunTaskSupervisor:
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.started = time.monotonic()
+        self.closed = False
+        self._tasks: Set[asyncio.Task] = set()
+        self._drain: Set[asyncio.Task] = set()
+        self._resources: Dict[int, tuple] = {}
+        self._token = None
+
+    def spawn(self, coro: Coroutine, *, name: Optional[str] = None, drain: bool = False) -> asyncio.Task:
+        """Start a task owned by this run. Drain tasks get DRAIN_TIMEOUT_SECONDS to finish at teardown."""
+        task = asyncio.create_task(coro, name=f"{self.run_id}:{name}" if name else None)
+        self._tasks.add(task)
+        if drain:
+            self._drain.add(task)
+        task.add_done_callback(self._on_done)
+        return task
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._drain.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Run task {task.get_name()} for {self.run_id} failed: {task.exception()!r}")
+
+    def adopt(self, resource: Any, close: Callable[[], Awaitable[Any]], name: str) -> Any:
+        """Track a resource that must be closed by the end of the run."""
+        self._resources[id(resource)] = (name, close)
+        return resource
+
+    def release(self, resource: Any) -> None:
+        self._resources.pop(id(resource), None)
+
+    def counts(self) -> Dict[str, Any]:
+        return {
+            "tasks": len(self._tasks),
+            "draining": len(self._drain),
+            "resources": len(self._resources),
+            "age_seconds": round(time.monotonic() - self.started, 1),
+        }
+
+    async def aclose(self, drain_timeout: float = DRAIN_TIMEOUT_SECONDS,
+                     cancel_timeout: float = CANCEL_TIMEOUT_SECONDS) -> Dict[str, Any]:
+        global _leaked_total, _unreleased_total
+        if self.closed:
+            return {}
+        self.closed = True
+
+        for task in list(self._tasks - self._drain):
+            task.cancel()
+        if self._drain:
+            _, pending = await asyncio.wait(list(self._drain), timeout=drain_timeout)
+            if pending:
+                logger.warning(f"⚠️ {len(pending)} run tasks for {self.run_id} did not finish within {drain_timeout}s, cancelling")
+            for task in pending:
+                task.cancel()
+
+        leaked: List[asyncio.Task] = []
+        if self._tasks:
+            _, still_alive = await asyncio.wait(list(self._tasks), timeout=cancel_timeout)
+            leaked = list(still_alive)
+
+        unreleased = list(self._resources.values())
+        self._resources.clear()
+        for name, close in unreleased:
+            try:
+                await asyncio.wait_for(close(), timeout=cancel_timeout)
+            except Exception as e:
+                logger.warning(f"Failed to close {name} for {self.run_id}: {e}")
+
+        if leaked:
+            _leaked_total += len(leaked)
+            _leaked_tasks.update(leaked)
+            logger.warning(f"🚨 Leaked {len(leaked)} tasks for run {self.run_id} (still alive after cancel): "
+                           f"{[task.get_name() for task in leaked]}")
+        if unreleased:
+            _unreleased_total += len(unreleased)
+            logger.warning(f"🚨 Run {self.run_id} ended without releasing {[name for name, _ in unreleased]} - closed by supervisor")
+
+        _live.pop(self.run_id, None)
+        if self._token is not None:
+            try:
+                _current.reset(self._token)
+            except ValueError:
+                # Closed from a different context than it was opened in
+                _current.set(None)
+            self._token = None
+
+        return {"leaked_tasks": len(leaked), "unreleased_resources": len(unreleased)}
+
+
+def open_run_supervisor(run_id: str) -> RunTaskSupervisor:
+    """Create the supervisor for a run and make it current for this context."""
+    supervisor = RunTaskSupervisor(run_id)
+    supervisor._token = _current.set(supervisor)
+    _live[run_id] = supervisor
+    return supervisor
+
+
+def current_supervisor() -> Optional[RunTaskSupervisor]:
+    supervisor = _current.get()
+    if supervisor is None or supervisor.closed:
+        return None
+    return supervisor
+
+
+def spawn(coro: Coroutine, *, name: Optional[str] = None, drain: bool = False) -> asyncio.Task:
+    """Create a task owned by the current run, or a plain task outside one."""
+    supervisor = current_supervisor()
+    if supervisor is None:
+        return asyncio.create_task(coro, name=name)
+    return supervisor.spawn(coro, name=name, drain=drain)
+
+
+def get_task_counts() -> Dict[str, Any]:
+    for task in [task for task in _leaked_tasks if task.done()]:
+        _leaked_tasks.discard(task)
+    try:
+        asyncio_tasks = len(asyncio.all_tasks())
+    except RuntimeError:
+        asyncio_tasks = None
+    return {
+        "runs": {run_id: supervisor.counts() for run_id, supervisor in _live.items()},
+        "leaked_alive": len(_leaked_tasks),
+        "leaked_total": _leaked_total,
+        "unreleased_total": _unreleased_total,
+        "asyncio_tasks": asyncio_tasks,
+        "updated_at": int(time.time()),
+    }
+
+
+async def _report_loop(instance_id: str) -> None:
+    from core.services import redis_worker as redis
+    key = f"{TASK_COUNTS_KEY_PREFIX}:{instance_id}"
+    while True:
+        try:
+            await redis.set(key, json.dumps(get_task_counts()), ex=REPORT_TTL_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"Failed to publish task counts: {e}")
+        await asyncio.sleep(REPORT_INTERVAL_SECONDS)
+
+
+_reporter_task: Optional[asyncio.Task] = None
+
+
+def start_task_count_reporter(instance_id: str) -> None:
+    """Publish this worker's live task counts to Redis for worker_health.py."""
+    global _reporter_task
+    if _reporter_task is not None and not _reporter_task.done():
+        return
+    _reporter_task = asyncio.create_task(_report_loop(instance_id), name="task_count_reporter")
@@ -10,13 +10,14 @@ from typing import Optional, Dict, Any, Tuple
 from core.services import redis_worker as redis
 from core.run import run_agent
 from core.utils.logger import logger, structlog
-from core.utils.tool_discovery import warm_up_tools_cache
 import dramatiq
 import uuid
 from core.services.supabase import DBConnection
 from dramatiq.brokers.redis import RedisBroker
 from core.services.langfuse import langfuse
 from core.utils.retry import retry
+from core.utils import task_supervisor
+from core.utils import serialization
 import time
 
 from core.services.redis import get_redis_config as _get_redis_config
@@ -37,8 +38,8 @@ else:
 
 dramatiq.set_broker(redis_broker)
 
-warm_up_tools_cache()
-logger.info("✅ Worker process ready, tool cache warmed")
+# Tool classes/schemas are warmed in initialize() (or pre-fork by core.utils.preload),
+# not at import - the API imports this module to enqueue runs.
 
 _initialized = False
 db = DBConnection()
@@ -56,7 +57,7 @@ def check_terminating_tool_call(response: Dict[str, Any]) -> Optional[str]:
     metadata = response.get('metadata', {})
     if isinstance(metadata, str):
         try:
-            metadata = json.loads(metadata)
+            metadata = serialization.loads(metadata)
         except (json.JSONDecodeError, TypeError):
             metadata = {}
     
@@ -66,7 +67,7 @@ def check_terminating_tool_call(response: Dict[str, Any]) -> Optional[str]:
     content = response.get('content', {})
     if isinstance(content, str):
         try:
-            content = json.loads(content)
+            content = serialization.loads(content)
         except (json.JSONDecodeError, TypeError):
             content = {}
     
@@ -93,6 +94,8 @@ async def initialize():
     
     from core.utils.tool_discovery import warm_up_tools_cache
     warm_up_tools_cache()
+
+    task_supervisor.start_task_count_reporter(instance_id)
     
     try:
         from core.runtime_cache import warm_up_suna_config_cache
@@ -325,19 +328,19 @@ async def process_agent_responses(
             trace.span(name="agent_run_stopped").end(status_message=f"agent_run_stopped: {stop_reason}", level="WARNING")
             break
 
-        response_json = json.dumps(response)
+        response_json = serialization.dumps(response)
         
         if redis_streaming_enabled and redis.is_redis_healthy():
             pending_redis_operations.append(
-                asyncio.create_task(redis.publish(pubsub_channel, response_json))
+                task_supervisor.spawn(redis.publish(pubsub_channel, response_json), name="publish", drain=True)
             )
             pending_redis_operations.append(
-                asyncio.create_task(redis.xadd(
+                task_supervisor.spawn(redis.xadd(
                     stream_key,
                     {'data': response_json},
                     maxlen=10000,
                     approximate=True
-                ))
+                ), name="xadd", drain=True)
             )
         
         total_responses += 1
@@ -378,7 +381,6 @@ async def process_agent_responses(
                     logger.error(f"Agent run failed: {error_message}")
                 break
     
-    stop_signal_checker_state['pending_redis_operations'] = pending_redis_operations
     return final_status, error_message, complete_tool_called, total_responses
 
 
@@ -393,7 +395,7 @@ async def handle_normal_completion(
     logger.info(f"Agent run {agent_run_id} completed normally (duration: {duration:.2f}s, responses: {total_responses})")
     completion_message = {"type": "status", "status": "completed", "message": "Agent run completed successfully"}
     trace.span(name="agent_run_completed").end(status_message="agent_run_completed")
-    completion_json = json.dumps(completion_message)
+    completion_json = serialization.dumps(completion_message)
     try:
         await asyncio.wait_for(
             asyncio.gather(
@@ -506,7 +508,6 @@ async def run_agent_background(
         start_time = datetime.now(timezone.utc)
         pubsub = None
         stop_checker = None
-        pending_redis_operations = []
         cancellation_event = asyncio.Event()
 
         redis_keys = create_redis_keys(agent_run_id, instance_id)
@@ -527,10 +528,15 @@ async def run_agent_background(
             await update_agent_run_status(client, agent_run_id, "failed", error=f"Worker setup failed: {str(e)}", account_id=account_id)
         except Exception as inner_e:
             logger.error(f"Failed to update status after setup error: {inner_e}")
+        await _release_admission_slot(agent_run_id)
         return
+
+    # Owns every task spawned for this run (here, in AgentRunner and in ResponseProcessor)
+    supervisor = task_supervisor.open_run_supervisor(agent_run_id)
     try:
         try:
             pubsub = await asyncio.wait_for(redis.create_pubsub(), timeout=5.0)
+            supervisor.adopt(pubsub, lambda ps=pubsub: cleanup_pubsub(ps, agent_run_id), "control pubsub")
             await asyncio.wait_for(
                 pubsub.subscribe(
                     redis_keys['instance_control_channel'],
@@ -594,7 +600,7 @@ async def run_agent_background(
                     logger.error(f"Error in stop signal checker wrapper for {agent_run_id}: {e}", exc_info=True)
                     await asyncio.sleep(1)
         
-        stop_checker = asyncio.create_task(check_for_stop_signal_wrapper())
+        stop_checker = supervisor.spawn(check_for_stop_signal_wrapper(), name="stop_checker")
         try:
             await asyncio.wait_for(
                 redis.set(redis_keys['instance_active'], "running", ex=redis.REDIS_KEY_TTL),
@@ -624,8 +630,6 @@ async def run_agent_background(
             agent_gen, agent_run_id, redis_keys, trace, worker_start, stop_signal_checker_state
         )
 
-        pending_redis_operations = stop_signal_checker_state.get('pending_redis_operations', [])
-
         if final_status == "running":
             final_status = "completed"
             await handle_normal_completion(agent_run_id, start_time, total_responses, redis_keys, trace)
@@ -653,7 +657,7 @@ async def run_agent_background(
 
         error_response = {"type": "status", "status": "error", "message": error_message}
         try:
-            error_json = json.dumps(error_response)
+            error_json = serialization.dumps(error_response)
             await asyncio.wait_for(
                 asyncio.gather(
                     redis.publish(redis_keys['response_pubsub'], error_json),
@@ -696,17 +700,26 @@ async def run_agent_background(
                 logger.warning(f"Error during stop_checker cancellation: {e}")
 
         await cleanup_pubsub(pubsub, agent_run_id)
+        supervisor.release(pubsub)
         await _cleanup_redis_response_stream(agent_run_id)
         await _cleanup_redis_instance_key(agent_run_id, instance_id)
         await _cleanup_redis_run_lock(agent_run_id)
+        await _release_admission_slot(agent_run_id)
 
-        try:
-            await asyncio.wait_for(asyncio.gather(*pending_redis_operations), timeout=30.0)
-        except asyncio.TimeoutError:
-            logger.warning(f"Timeout waiting for pending Redis operations for {agent_run_id}")
+        # Lets pending publishes drain, then cancels and reports anything still running
+        await supervisor.aclose()
 
         logger.debug(f"Agent run background task fully completed for: {agent_run_id} (Instance: {instance_id}) with final status: {final_status}")
 
+async def _release_admission_slot(agent_run_id: str):
+    from core.services import admission_control
+    if not admission_control.is_enabled():
+        return
+    try:
+        await admission_control.release(agent_run_id, client=await redis.get_client())
+    except Exception as e:
+        logger.warning(f"Failed to release admission slot for {agent_run_id}: {str(e)}")
+
 async def _cleanup_redis_instance_key(agent_run_id: str, instance_id: str):
     if not instance_id:
         logger.warning("Instance ID not set, cannot clean up instance key.")
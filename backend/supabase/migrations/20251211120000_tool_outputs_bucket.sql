@@ -0,0 +1,12 @@
+-- Private bucket for oversized tool results spilled out of messages.content
+-- (see backend/core/agentpress/tool_result_spill.py). Only the backend service
+-- role reads and writes it, so no RLS policies are added.
+INSERT INTO storage.buckets (id, name, public, allowed_mime_types, file_size_limit)
+VALUES (
+    'tool-outputs',
+    'tool-outputs',
+    false,
+    NULL,
+    52428800
+)
+ON CONFLICT (id) DO UPDATE SET public = false;
@@ -9,6 +9,10 @@ The old approach (sending a Dramatiq task) could fail under load because:
 2. Health check task waits in queue behind other tasks
 3. Times out after 20s → ECS kills the worker
 4. Creates a vicious cycle where workers can't start
+
+It also reports live asyncio task counts per agent run, as published by each
+worker's task supervisor (core/utils/task_supervisor.py). Run with --tasks to
+print them as JSON instead of running the health check.
 """
 import dotenv
 dotenv.load_dotenv()
@@ -16,7 +20,38 @@ dotenv.load_dotenv()
 from core.utils.logger import logger
 from core.services import redis
 import asyncio
+import json
+import sys
 from core.utils.retry import retry
+from core.utils.task_supervisor import TASK_COUNTS_KEY_PREFIX
+
+
+async def get_worker_task_counts() -> dict:
+    """Latest task counts published by every live worker instance, keyed by instance id."""
+    client = await redis.get_client()
+    counts = {}
+    async for key in client.scan_iter(match=f"{TASK_COUNTS_KEY_PREFIX}:*", count=100):
+        value = await client.get(key)
+        if value:
+            counts[key.split(":", 1)[1]] = json.loads(value)
+    return counts
+
+
+def log_task_counts(counts: dict):
+    for instance, stats in counts.items():
+        runs = stats.get("runs", {})
+        live_tasks = sum(run.get("tasks", 0) for run in runs.values())
+        logger.info(f"Worker {instance}: {len(runs)} runs, {live_tasks} run tasks, "
+                    f"{stats.get('asyncio_tasks')} asyncio tasks, {stats.get('leaked_alive', 0)} leaked tasks alive "
+                    f"({stats.get('leaked_total', 0)} leaked, {stats.get('unreleased_total', 0)} unreleased resources since start)")
+        for run_id, run in runs.items():
+            logger.debug(f"  run {run_id}: {run}")
+
+
+async def print_task_counts():
+    await retry(lambda: redis.initialize_async())
+    print(json.dumps(await get_worker_task_counts(), indent=2))
+    await redis.close()
 
 
 async def main():
@@ -49,6 +84,13 @@ async def main():
             exit(1)
         
         logger.info("Health check passed: Redis connectivity OK")
+
+        # Informational only - leaks never fail the health check
+        try:
+            log_task_counts(await get_worker_task_counts())
+        except Exception as e:
+            logger.warning(f"Could not read worker task counts: {e}")
+
         await redis.close()
         exit(0)
         
@@ -58,4 +100,7 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if "--tasks" in sys.argv:
+        asyncio.run(print_task_counts())
+    else:
+        asyncio.run(main())
@@ -536,6 +536,7 @@ export function ThreadComponent({ projectId, threadId, compact = false, configur
     status: streamHookStatus,
     textContent: streamingTextContent,
     toolCall: streamingToolCall,
+    toolProgress,
     error: streamError,
     agentRunId: currentHookRunId,
     startStreaming,
@@ -1097,6 +1098,7 @@ export function ThreadComponent({ projectId, threadId, compact = false, configur
           compact={true}
           streamingTextContent={isShared ? '' : displayStreamingText}
           streamingToolCall={isShared || showOptimisticUI ? undefined : streamingToolCall}
+          toolProgress={isShared ? undefined : toolProgress}
         >
           <div
             ref={scrollContainerRef}
@@ -1261,6 +1263,7 @@ export function ThreadComponent({ projectId, threadId, compact = false, configur
         leftSidebarState={leftSidebarState}
         streamingTextContent={isShared ? '' : displayStreamingText}
         streamingToolCall={isShared || showOptimisticUI ? undefined : streamingToolCall}
+        toolProgress={isShared ? undefined : toolProgress}
       >
         <ThreadContent
           messages={isShared ? playback.playbackState.visibleMessages : displayMessages}
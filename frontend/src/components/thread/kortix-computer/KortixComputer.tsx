@@ -18,6 +18,7 @@ import {
   FolderOpen,
 } from 'lucide-react';
 import { useIsMobile } from '@/hooks/utils';
+import type { ToolProgress } from '@/hooks/messages';
 import { Button } from '@/components/ui/button';
 import { Badge } from '@/components/ui/badge';
 import {
@@ -89,6 +90,7 @@ interface KortixComputerProps {
   disableInitialAnimation?: boolean;
   compact?: boolean;
   streamingText?: string;
+  toolProgress?: ToolProgress | null;
   sandboxId?: string;
   projectId?: string;
 }
@@ -576,6 +578,7 @@ export const KortixComputer = memo(function KortixComputer({
   disableInitialAnimation,
   compact = false,
   streamingText,
+  toolProgress,
   sandboxId,
   projectId,
 }: KortixComputerProps) {
@@ -1030,6 +1033,7 @@ export const KortixComputer = memo(function KortixComputer({
         totalCalls={displayTotalCalls}
         onFileClick={onFileClick}
         streamingText={isStreaming ? streamingText : undefined}
+        toolProgress={isStreaming ? toolProgress ?? undefined : undefined}
       />
     );
   };
@@ -12,6 +12,7 @@ import {
   ResizableHandle,
 } from '@/components/ui/resizable';
 import { useKortixComputerStore } from '@/stores/kortix-computer-store';
+import type { ToolProgress } from '@/hooks/messages';
 
 interface ThreadLayoutProps {
   children: React.ReactNode;
@@ -44,6 +45,7 @@ interface ThreadLayoutProps {
   leftSidebarState?: 'collapsed' | 'expanded';
   streamingTextContent?: string;
   streamingToolCall?: any;
+  toolProgress?: ToolProgress | null;
 }
 
 export const ThreadLayout = memo(function ThreadLayout({
@@ -77,6 +79,7 @@ export const ThreadLayout = memo(function ThreadLayout({
   leftSidebarState = 'collapsed',
   streamingTextContent,
   streamingToolCall,
+  toolProgress,
 }: ThreadLayoutProps) {
   const isActuallyMobile = useIsMobile();
 
@@ -179,6 +182,7 @@ export const ThreadLayout = memo(function ThreadLayout({
                 disableInitialAnimation={disableInitialAnimation}
                 compact={true}
                 streamingText={streamingToolArgsJson}
+                toolProgress={toolProgress}
                 sandboxId={sandboxId || undefined}
                 projectId={projectId}
               />
@@ -236,6 +240,7 @@ export const ThreadLayout = memo(function ThreadLayout({
           agentName={agentName}
           disableInitialAnimation={disableInitialAnimation}
           streamingText={streamingToolArgsJson}
+          toolProgress={toolProgress}
           sandboxId={sandboxId || undefined}
           projectId={projectId}
         />
@@ -319,6 +324,7 @@ export const ThreadLayout = memo(function ThreadLayout({
             agentName={agentName}
             disableInitialAnimation={disableInitialAnimation}
             streamingText={streamingToolArgsJson}
+            toolProgress={toolProgress}
             sandboxId={sandboxId || undefined}
             projectId={projectId}
           />
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import {
   Terminal,
   CheckCircle,
@@ -27,10 +27,12 @@ export function CommandToolView({
   toolTimestamp,
   isSuccess = true,
   isStreaming = false,
+  toolProgress,
 }: ToolViewProps) {
   const { resolvedTheme } = useTheme();
   const isDarkTheme = resolvedTheme === 'dark';
   const [showFullOutput, setShowFullOutput] = useState(true);
+  const liveOutputRef = useRef<HTMLDivElement>(null);
 
   const {
     command,
@@ -58,6 +60,17 @@ export function CommandToolView({
 
   const toolTitle = getToolTitle(name);
 
+  // Output so far of a blocking command, relayed while it runs (tail only)
+  const liveOutput = isStreaming && toolProgress?.functionName.replace(/_/g, '-') === name
+    ? toolProgress.output
+    : '';
+
+  useEffect(() => {
+    // Follow the tail like a terminal would
+    const el = liveOutputRef.current;
+    if (el) el.scrollTop = el.scrollHeight;
+  }, [liveOutput]);
+
   // Check if this is a non-blocking command with just a status message
   const isNonBlockingCommand = React.useMemo(() => {
     if (!output) return false;
@@ -219,6 +232,23 @@ export function CommandToolView({
                 </div>
               )}
             </div>
+            {liveOutput && (
+              <div className="flex-1 min-h-0 px-4 pb-4">
+                <div className="h-full bg-card border border-border rounded-lg flex flex-col overflow-hidden">
+                  <div className="flex-shrink-0 p-3.5 pb-2 border-b border-border">
+                    <Badge variant="outline" className="text-xs px-1.5 py-0 h-4 font-normal">
+                      <TerminalIcon className="h-2.5 w-2.5 mr-1 opacity-70" />
+                      Output
+                    </Badge>
+                  </div>
+                  <div ref={liveOutputRef} className="flex-1 min-h-0 overflow-auto p-3.5 pt-2">
+                    <pre className="text-xs text-foreground font-mono whitespace-pre-wrap break-words">
+                      {liveOutput}
+                    </pre>
+                  </div>
+                </div>
+              </div>
+            )}
             {!command && (
           <LoadingState
             icon={Terminal}
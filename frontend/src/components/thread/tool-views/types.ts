@@ -1,4 +1,5 @@
 import { Project } from '@/lib/api/threads';
+import type { ToolProgress } from '@/hooks/messages';
 
 /**
  * Structured tool call data from metadata
@@ -37,6 +38,7 @@ export interface ToolViewProps {
   onFileClick?: (filePath: string) => void;
   viewToggle?: React.ReactNode;
   streamingText?: string; // Live streaming content from assistant message
+  toolProgress?: ToolProgress; // Partial output of the running tool, while it executes
 }
 
 export interface BrowserToolViewProps extends ToolViewProps {
@@ -4,6 +4,6 @@
 export { useAgentVersionData } from './use-agent-version-data';
 export { useModelSelection, type ModelOption } from './use-model-selection';
 // Re-export from messages for backward compatibility
-export { useAgentStream, type UseAgentStreamResult, type AgentStreamCallbacks } from '../messages';
+export { useAgentStream, type UseAgentStreamResult, type AgentStreamCallbacks, type ToolProgress } from '../messages';
 
 
@@ -1,5 +1,5 @@
 // Message and streaming related hooks
-export { useAgentStream, type UseAgentStreamResult, type AgentStreamCallbacks } from './useAgentStream';
+export { useAgentStream, type UseAgentStreamResult, type AgentStreamCallbacks, type ToolProgress } from './useAgentStream';
 export { useThreadToolCalls } from './useThreadToolCalls';
 export { useMessagesQuery, useAddUserMessageMutation } from './useMessages';
 export { usePlaybackController, type PlaybackState } from './usePlaybackController';
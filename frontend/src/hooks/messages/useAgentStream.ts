@@ -19,11 +19,19 @@ import { fileQueryKeys } from '@/hooks/files/use-file-queries';
 import { usePricingModalStore } from '@/stores/pricing-modal-store';
 import { accountStateKeys } from '@/hooks/billing';
 
+// Partial output of a running tool (transient, never saved with the thread)
+export interface ToolProgress {
+  functionName: string;
+  sessionName?: string;
+  output: string;
+}
+
 // Define the structure returned by the hook
 export interface UseAgentStreamResult {
   status: string;
   textContent: string;
   toolCall: UnifiedMessage | null; // UnifiedMessage with metadata.tool_calls
+  toolProgress: ToolProgress | null; // Tail of the running tool's output so far, if it reports any
   error: string | null;
   agentRunId: string | null;
   startStreaming: (runId: string) => void;
@@ -39,6 +47,7 @@ export interface AgentStreamCallbacks {
   onAssistantStart?: () => void;
   onAssistantChunk?: (chunk: { content: string }) => void;
   onToolCallChunk?: (message: UnifiedMessage) => void;
+  onToolProgress?: (progress: ToolProgress) => void;
 }
 
 export function useAgentStream(
@@ -105,6 +114,7 @@ export function useAgentStream(
   }, [flushPendingContent]);
   
   const [toolCall, setToolCall] = useState<UnifiedMessage | null>(null);
+  const [toolProgress, setToolProgress] = useState<ToolProgress | null>(null);
   const [error, setError] = useState<string | null>(null);
   const [agentRunId, setAgentRunId] = useState<string | null>(null);
 
@@ -188,6 +198,7 @@ export function useAgentStream(
       setStatus('idle');
       setTextContent([]);
       setToolCall(null);
+      setToolProgress(null);
       setAgentRunId(null);
       currentRunIdRef.current = null;
     }
@@ -263,6 +274,7 @@ export function useAgentStream(
       // Reset streaming-specific state
       setTextContent([]);
       setToolCall(null);
+      setToolProgress(null);
 
       // Update status and clear run ID
       updateStatus(finalStatus);
@@ -539,6 +551,7 @@ export function useAgentStream(
             React.startTransition(() => {
               setTextContent([]);
               setToolCall(null);
+              setToolProgress(null);
             });
             if (message.message_id) callbacksRef.current.onMessage(message);
           } else if (!parsedMetadata.stream_status) {
@@ -550,6 +563,7 @@ export function useAgentStream(
         case 'tool':
           React.startTransition(() => {
             setToolCall(null); // Clear any streaming tool call
+            setToolProgress(null);
           });
           if (message.message_id) callbacksRef.current.onMessage(message);
           break;
@@ -561,8 +575,22 @@ export function useAgentStream(
               // Clear streaming tool call when tool completes/fails
               React.startTransition(() => {
                 setToolCall(null);
+                setToolProgress(null);
+              });
+              break;
+            case 'tool_progress': {
+              // Output so far of a long-running tool (e.g. a blocking shell command)
+              const progress: ToolProgress = {
+                functionName: parsedContent.function_name,
+                sessionName: parsedContent.session_name,
+                output: parsedContent.output || '',
+              };
+              React.startTransition(() => {
+                setToolProgress(progress);
               });
+              callbacksRef.current.onToolProgress?.(progress);
               break;
+            }
             case 'finish':
               // Optional: Handle finish reasons like 'xml_tool_limit_reached'
               // Don't finalize here, wait for thread_run_end or completion message
@@ -801,6 +829,7 @@ export function useAgentStream(
         // Reset state for the new stream
         setTextContent([]);
         setToolCall(null);
+        setToolProgress(null);
         setError(null);
         updateStatus('connecting');
         setAgentRunId(runId);
@@ -915,6 +944,7 @@ export function useAgentStream(
     status,
     textContent: orderedTextContent,
     toolCall,
+    toolProgress,
     error,
     agentRunId,
     startStreaming,